@@ -0,0 +1,162 @@
+"""
+Structured Access Logging
+=========================
+One JSON record per request, written off the event loop.
+
+Each record carries method, route template, status, duration, response bytes
+and a request id (taken from `X-Request-ID` or generated, and echoed back).
+Records are handed to a `QueueHandler`; a background `QueueListener` thread
+formats and writes them, so the request path never does I/O.
+
+Configuration:
+    ACCESS_LOG_SAMPLE_RATE   Fraction of 1xx-3xx requests to log (default 1.0).
+                             4xx/5xx and unhandled exceptions are always logged.
+
+Usage:
+    from access_log import AccessLogMiddleware, start_access_logging
+
+    start_access_logging()
+    app.add_middleware(AccessLogMiddleware)
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+import uuid
+from typing import Optional
+
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+
+access_logger = logging.getLogger("access")
+access_logger.setLevel(logging.INFO)
+access_logger.propagate = False
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+# ─── Handlers ─────────────────────────────────────────────────────────────────
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that skips formatting on the caller's thread.
+
+    The stock `prepare()` formats the message before enqueueing; access
+    records are plain dicts, so formatting is left to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JSONAccessFormatter(logging.Formatter):
+    """Render the `access` dict attached to a record as one JSON line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = getattr(record, "access", None) or {"message": record.getMessage()}
+        return json.dumps(
+            {"ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"), **entry},
+            separators=(",", ":"),
+        )
+
+
+def start_access_logging(handler: Optional[logging.Handler] = None) -> None:
+    """Attach the queue handler and start the background writer (idempotent)."""
+    global _listener
+    if _listener is not None:
+        return
+    if handler is None:
+        handler = logging.StreamHandler()
+    handler.setFormatter(JSONAccessFormatter())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    access_logger.addHandler(_DeferredQueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_access_logging)
+
+
+def stop_access_logging() -> None:
+    """Flush pending records and stop the background writer."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in list(access_logger.handlers):
+        if isinstance(handler, _DeferredQueueHandler):
+            access_logger.removeHandler(handler)
+    _listener = None
+
+
+# ─── Middleware ───────────────────────────────────────────────────────────────
+class AccessLogMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task/stream overhead) that
+    emits one structured access record per HTTP request.
+    """
+
+    def __init__(self, app, sample_rate: Optional[float] = None):
+        self.app = app
+        self.sample_rate = ACCESS_LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status = 500
+            self._log(scope, status, start, size, request_id, error=True)
+            raise
+        self._log(scope, status, start, size, request_id)
+
+    def _log(self, scope, status: int, start: float, size: int,
+             request_id: str, error: bool = False) -> None:
+        if status < 400 and not error and random.random() >= self.sample_rate:
+            return
+        route = scope.get("route")
+        access_logger.info(
+            "access",
+            extra={
+                "access": {
+                    "request_id": request_id,
+                    "method": scope["method"],
+                    "route": getattr(route, "path", None) or scope["path"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                    "bytes": size,
+                    "client": scope["client"][0] if scope.get("client") else None,
+                    **({"error": True} if error else {}),
+                }
+            },
+        )
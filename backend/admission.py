@@ -0,0 +1,286 @@
+"""
+LLM Admission Control
+=====================
+Guards the Claude-backed endpoints (chat, solve-error, learn, teach) with two
+checks that run before any LLM work starts:
+
+1. **Token budget.** Each client (IP, and session_id when the body has one)
+   gets LLM_CLIENT_TOKENS_PER_MINUTE tokens. A request is charged its
+   *expected* cost up front: prompt size (~4 chars per token) plus the
+   endpoint's output cap from agent.MAX_OUTPUT_TOKENS. So one large
+   error-solver request weighs as much as many short chats. Over budget
+   answers 429 with `Retry-After`.
+   The budget lives in the rate limiter's storage (rate_limit.py), so all
+   workers share it. It is a cost-weighted sliding window, which behaves like
+   a token bucket refilled over one minute.
+
+2. **Concurrency gate.** Each endpoint runs at most LLM_MAX_CONCURRENT
+   requests per worker. Up to LLM_MAX_QUEUED more wait, for at most
+   LLM_QUEUE_TIMEOUT seconds. Beyond that, requests are shed immediately
+   with 503 and a `Retry-After` estimated from recent service times. A
+   flood of LLM requests therefore cannot pile up unbounded waiting tasks
+   and starve the rest of the API.
+
+RATELIMIT_ENABLED=false (load tests) lifts both checks, like the per-route
+limits. Requests answered without an LLM call (chats the intent router
+answers, lesson cache hits) are admitted without either check.
+
+Configuration:
+    LLM_CLIENT_TOKENS_PER_MINUTE   Expected tokens per client per minute, 0 = off (default 20000)
+    LLM_MAX_CONCURRENT             In-flight LLM requests per endpoint per worker (default 4)
+    LLM_MAX_QUEUED                 Requests waiting for a slot per endpoint (default 8)
+    LLM_QUEUE_TIMEOUT              Seconds a queued request waits before 503 (default 15)
+
+Usage:
+    from admission import LLMAdmission
+
+    admission = LLMAdmission(limiter)
+
+    @app.post("/api/learn", dependencies=[Depends(admission.guard("learn", "learning"))])
+    async def learn_topic(...): ...
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, Request
+from limits import RateLimitItemPerMinute
+from limits.strategies import SlidingWindowCounterRateLimiter
+from slowapi.util import get_remote_address
+
+from agent import MAX_OUTPUT_TOKENS
+from metrics import Counter, Gauge, Histogram
+
+LLM_CLIENT_TOKENS_PER_MINUTE = int(os.getenv("LLM_CLIENT_TOKENS_PER_MINUTE", "20000"))
+LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", "4"))
+LLM_MAX_QUEUED = int(os.getenv("LLM_MAX_QUEUED", "8"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "15"))
+CHARS_PER_TOKEN = 4
+# Bodies larger than this are charged by size without looking for a session_id
+MAX_SESSION_SCAN_BYTES = 64 * 1024
+
+logger = logging.getLogger("admission")
+
+llm_admission_rejected_total = Counter(
+    "llm_admission_rejected_total", "LLM requests shed before running, by endpoint and reason",
+    ["endpoint", "reason"],
+)
+llm_inflight = Gauge(
+    "llm_inflight_requests", "LLM requests holding a concurrency slot", ["endpoint"]
+)
+llm_queued = Gauge(
+    "llm_queued_requests", "LLM requests waiting for a concurrency slot", ["endpoint"]
+)
+llm_queue_wait = Histogram(
+    "llm_queue_wait_seconds", "Time LLM requests wait for a concurrency slot", ["endpoint"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+def _reject(status: int, endpoint: str, reason: str, retry_after: float,
+            detail: str) -> HTTPException:
+    llm_admission_rejected_total.inc(endpoint, reason)
+    return HTTPException(
+        status_code=status, detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+# ─── Concurrency Gate ─────────────────────────────────────────────────────────
+class ConcurrencyGate:
+    """Per-endpoint semaphore with a bounded, time-limited wait queue."""
+
+    def __init__(self, name: str, max_concurrent: Optional[int] = None,
+                 max_queued: Optional[int] = None, queue_timeout: Optional[float] = None):
+        self.name = name
+        self.max_concurrent = LLM_MAX_CONCURRENT if max_concurrent is None else max_concurrent
+        self.max_queued = LLM_MAX_QUEUED if max_queued is None else max_queued
+        self.queue_timeout = LLM_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self.active = 0
+        self.waiting = 0
+        # Moving average of how long a request holds its slot
+        self.avg_hold = 1.0
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+    @property
+    def full(self) -> bool:
+        return self.active >= self.max_concurrent and self.waiting >= self.max_queued
+
+    def retry_after(self) -> float:
+        """Rough time until a newly queued request would get a slot."""
+        return self.avg_hold * (self.waiting + 1) / max(self.max_concurrent, 1)
+
+    def check_room(self) -> None:
+        """Shed now (503) if the queue is already full, without waiting."""
+        if self.full:
+            raise _reject(503, self.name, "queue_full", self.retry_after(),
+                          f"{self.name} is at capacity, please retry shortly")
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the endpoint's slots for the duration of the block."""
+        self.check_room()
+        queued_at = time.perf_counter()
+        if not self._semaphore.locked():
+            # A free slot is taken without yielding, so `active` is exact
+            await self._semaphore.acquire()
+        else:
+            self.waiting += 1
+            llm_queued.inc(self.name)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise _reject(503, self.name, "queue_timeout", self.retry_after(),
+                              f"{self.name} is busy, please retry shortly") from None
+            finally:
+                self.waiting -= 1
+                llm_queued.dec(self.name)
+        started = time.perf_counter()
+        llm_queue_wait.observe(started - queued_at, self.name)
+        self.active += 1
+        llm_inflight.inc(self.name)
+        try:
+            yield
+        finally:
+            self.active -= 1
+            llm_inflight.dec(self.name)
+            self._semaphore.release()
+            self.avg_hold = 0.8 * self.avg_hold + 0.2 * (time.perf_counter() - started)
+
+    def status(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "avg_hold_s": round(self.avg_hold, 3),
+        }
+
+
+# ─── Token Budget ─────────────────────────────────────────────────────────────
+class TokenBudget:
+    """Cost-weighted per-client limit on the shared rate-limit storage."""
+
+    def __init__(self, storage, tokens_per_minute: Optional[int] = None):
+        self.storage = storage
+        self.tokens_per_minute = (
+            LLM_CLIENT_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        )
+        self._window = SlidingWindowCounterRateLimiter(storage)
+        self._item = RateLimitItemPerMinute(max(self.tokens_per_minute, 1), namespace="LLM_TOKENS")
+
+    def charge(self, endpoint: str, keys: List[str], cost: int) -> None:
+        """Charge `cost` to every key, or raise 429 if any key lacks budget."""
+        if self.tokens_per_minute <= 0:
+            return
+        # A prompt bigger than the whole budget may still run once per window
+        cost = min(cost, self.tokens_per_minute)
+        try:
+            for key in keys:
+                if not self._window.test(self._item, key, cost=cost):
+                    raise self._over_budget(endpoint, key, cost)
+            for key in keys:
+                if not self._window.hit(self._item, key, cost=cost):
+                    raise self._over_budget(endpoint, key, cost)
+        except self.storage.base_exceptions as e:
+            # The shared store being down must not take the LLM endpoints with it
+            logger.warning("LLM token budget unavailable, admitting request: %s", e)
+
+    def _over_budget(self, endpoint: str, key: str, cost: int) -> HTTPException:
+        stats = self._window.get_window_stats(self._item, key)
+        return _reject(
+            429, endpoint, "token_budget", stats.reset_time - time.time(),
+            f"LLM budget exceeded: this request needs ~{cost} tokens and "
+            f"{stats.remaining} of {self.tokens_per_minute} per minute are left",
+        )
+
+
+# ─── Request Cost ─────────────────────────────────────────────────────────────
+async def client_keys(request: Request) -> List[str]:
+    """The IP, plus the body's session_id if present (both are charged)."""
+    keys = [f"ip:{get_remote_address(request)}"]
+    body = await request.body()
+    if body and len(body) <= MAX_SESSION_SCAN_BYTES and b'"session_id"' in body:
+        try:
+            session_id = json.loads(body).get("session_id")
+        except (ValueError, AttributeError):
+            session_id = None
+        if session_id:
+            keys.append(f"session:{session_id}")
+    return keys
+
+
+async def expected_cost(request: Request, agent_name: str, llm_calls: int = 1) -> int:
+    """Prompt tokens (estimated from body size) plus the agent's output cap per LLM call."""
+    body = await request.body()
+    return len(body) // CHARS_PER_TOKEN + MAX_OUTPUT_TOKENS[agent_name] * llm_calls
+
+
+# ─── Admission ────────────────────────────────────────────────────────────────
+class LLMAdmission:
+    """Budget and concurrency checks for the LLM endpoints of one app."""
+
+    def __init__(self, limiter, tokens_per_minute: Optional[int] = None, **gate_options):
+        self.limiter = limiter
+        self.budget = TokenBudget(limiter._storage, tokens_per_minute)
+        self.gate_options = gate_options
+        self.gates: Dict[str, ConcurrencyGate] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.limiter.enabled
+
+    def gate(self, endpoint: str) -> ConcurrencyGate:
+        if endpoint not in self.gates:
+            self.gates[endpoint] = ConcurrencyGate(endpoint, **self.gate_options)
+        return self.gates[endpoint]
+
+    async def admit(self, request: Request, endpoint: str, agent_name: str,
+                    llm_calls: int = 1) -> None:
+        """
+        Charge the request's expected cost; raises 429 when over budget.
+        Batch endpoints pass `llm_calls` so each LLM-bound item is charged
+        its output cap.
+        """
+        if self.enabled:
+            keys = await client_keys(request)
+            self.budget.charge(endpoint, keys, await expected_cost(request, agent_name, llm_calls))
+
+    def guard(self, endpoint: str, agent_name: str):
+        """
+        FastAPI dependency: charge the budget, then hold a concurrency slot
+        while the handler runs. Streaming handlers should call `admit()` and
+        take `gate(endpoint).slot()` inside the stream instead, because
+        dependencies exit before the body is streamed.
+        """
+
+        async def dependency(request: Request):
+            await self.admit(request, endpoint, agent_name)
+            async with self.slot(endpoint):
+                yield
+
+        return dependency
+
+    @asynccontextmanager
+    async def slot(self, endpoint: str):
+        """Hold one of `endpoint`'s concurrency slots (no-op when admission is off)."""
+        if not self.enabled:
+            yield
+            return
+        async with self.gate(endpoint).slot():
+            yield
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "tokens_per_minute": self.budget.tokens_per_minute,
+            "endpoints": {name: gate.status() for name, gate in self.gates.items()},
+        }
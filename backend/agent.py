@@ -11,22 +11,58 @@ Features:
 - Error solver agent (debugs code errors)
 - Learning agent (personalized lessons)
 - Teaching agent (contribute knowledge)
+- Retrieval over blog posts and approved lessons (knowledge_index.py)
+- Streamed learning/teaching answers, field by field, for SSE
 """
 
 from __future__ import annotations
 
+import asyncio
+import importlib.util
+import json
 import os
-from typing import Annotated, TypedDict
-
-# Graceful import — LangGraph is optional (falls back if not installed)
-try:
-    from langgraph.graph import StateGraph, END
-    from langgraph.graph.message import add_messages
-    from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
-    from langchain_core.tools import tool
-    LANGGRAPH_AVAILABLE = True
-except ImportError:
-    LANGGRAPH_AVAILABLE = False
+import threading
+import time
+from collections import OrderedDict
+from typing import Annotated, Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, TypedDict
+
+from metrics import agent_runs_total
+from blocking import run_blocking
+from error_kb import knowledge_base
+from intent_router import INTENT_ROUTER_ENABLED, IntentRouter
+from knowledge_index import format_hits, knowledge_index
+from llm_resilience import CircuitOpenError, deadline_for, llm_guard
+from structured_output import (
+    ErrorSolution, JsonFieldStream, LearningPlan, TeachingResult, bind_schema, chunk_text, extract,
+    message_text,
+)
+from session_memory import SessionContext, session_memory
+from llm_usage import (
+    LLM_MODEL, LLMBudgetExceededError, invoke_llm, record_fallback, session_over_budget,
+    session_scope, stream_llm,
+)
+
+# LangGraph is optional (falls back if not installed) and slow to import, so
+# only check that it is installed here. The LLM stack is imported on first
+# agent use, or ahead of time by warm_up() once the server is running.
+LANGGRAPH_AVAILABLE = all(
+    importlib.util.find_spec(name) is not None for name in ("langgraph", "langchain_core")
+)
+
+# Per-call output caps, also the expected cost used by admission.py
+MAX_OUTPUT_TOKENS = {"portfolio": 512, "error_solver": 1024, "learning": 1500, "teaching": 1000}
+
+# Mark the stable system prompts (and, before them, the tool schemas) as an
+# Anthropic prompt-cache prefix. The API only caches prefixes of at least
+# LLM_MIN_CACHEABLE_TOKENS (4096 for claude-haiku-4-5); today's prefixes are
+# about 100-300 tokens, so they are processed uncached and the markers are a
+# no-op until the prompts grow or the model's minimum is lower. Padding them
+# to the minimum would cost more than caching saves.
+PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() == "true"
+
+# Knowledge-base matches at or above this confidence answer an error without
+# the LLM (batch endpoint); the static fallback uses the best match regardless
+ERROR_KB_MIN_CONFIDENCE = float(os.getenv("ERROR_KB_MIN_CONFIDENCE", "0.8"))
 
 # ─── Portfolio Data (used by tools) ──────────────────────────────────────────
 PORTFOLIO_DATA = {
@@ -66,172 +102,418 @@ def get_static_response(question: str) -> str:
     )
 
 
+# ─── Intent Router (answers without the LLM) ─────────────────────────────────
+# One precomputed answer per get_portfolio_info topic
+ROUTER_ANSWERS = {
+    "skills": (
+        f"{PORTFOLIO_DATA['name']} works with {', '.join(PORTFOLIO_DATA['skills'])}. "
+        f"His focus: {PORTFOLIO_DATA['focus']}."
+    ),
+    "projects": "His projects: " + "; ".join(
+        f"{p['name']} ({p['type']}, built with {', '.join(p['tech'])})"
+        for p in PORTFOLIO_DATA["projects"]
+    ) + ".",
+    "hackathons": f"He has taken part in the {', '.join(PORTFOLIO_DATA['hackathons'])}.",
+    "contact": (
+        f"You can reach {PORTFOLIO_DATA['name']} by email at {PORTFOLIO_DATA['email']}, "
+        f"on Discord ({PORTFOLIO_DATA['discord']}) or on GitHub ({PORTFOLIO_DATA['github']})."
+    ),
+    "education": f"{PORTFOLIO_DATA['education']}.",
+    "about": (
+        f"{PORTFOLIO_DATA['name']} is an Agentic AI developer specializing in "
+        f"{PORTFOLIO_DATA['focus']}. Interests: {', '.join(PORTFOLIO_DATA['interests'])}."
+    ),
+}
+
+intent_router = IntentRouter(PORTFOLIO_DATA)
+
+
 # ─── LangGraph Agent ─────────────────────────────────────────────────────────
-if LANGGRAPH_AVAILABLE:
-
-    @tool
-    def get_portfolio_info(topic: str) -> str:
-        """
-        Get information about Asadullah's portfolio.
-        topic: one of 'skills', 'projects', 'hackathons', 'contact', 'about', 'education'
-        """
-        topic = topic.lower()
-        if topic == "skills":
-            return f"Skills: {', '.join(PORTFOLIO_DATA['skills'])}. Focus areas: {PORTFOLIO_DATA['focus']}"
-        if topic == "projects":
-            return "\n".join(
-                f"- {p['name']}: {', '.join(p['tech'])} ({p['type']})"
-                for p in PORTFOLIO_DATA["projects"]
-            )
-        if topic == "hackathons":
-            return f"Hackathons: {', '.join(PORTFOLIO_DATA['hackathons'])}"
-        if topic == "contact":
-            return f"Email: {PORTFOLIO_DATA['email']} | Discord: {PORTFOLIO_DATA['discord']} | GitHub: {PORTFOLIO_DATA['github']}"
-        if topic == "education":
-            return PORTFOLIO_DATA["education"]
-        # default: about
+def get_portfolio_info(topic: str) -> str:
+    """
+    Get information about Asadullah's portfolio.
+    topic: one of 'skills', 'projects', 'hackathons', 'contact', 'about', 'education'
+    """
+    topic = topic.lower()
+    if topic == "skills":
+        skills = ", ".join(PORTFOLIO_DATA["skills"])
+        return f"Skills: {skills}. Focus areas: {PORTFOLIO_DATA['focus']}"
+    if topic == "projects":
+        return "\n".join(
+            f"- {p['name']}: {', '.join(p['tech'])} ({p['type']})"
+            for p in PORTFOLIO_DATA["projects"]
+        )
+    if topic == "hackathons":
+        return f"Hackathons: {', '.join(PORTFOLIO_DATA['hackathons'])}"
+    if topic == "contact":
         return (
-            f"{PORTFOLIO_DATA['name']} is an Agentic AI developer specializing in "
-            f"{PORTFOLIO_DATA['focus']}. Interests: {', '.join(PORTFOLIO_DATA['interests'][:3])}."
+            f"Email: {PORTFOLIO_DATA['email']} | Discord: {PORTFOLIO_DATA['discord']} "
+            f"| GitHub: {PORTFOLIO_DATA['github']}"
         )
+    if topic == "education":
+        return PORTFOLIO_DATA["education"]
+    # default: about
+    return (
+        f"{PORTFOLIO_DATA['name']} is an Agentic AI developer specializing in "
+        f"{PORTFOLIO_DATA['focus']}. Interests: {', '.join(PORTFOLIO_DATA['interests'][:3])}."
+    )
+
 
-    TOOLS = [get_portfolio_info]
+def search_knowledge(query: str) -> str:
+    """
+    Search Asadullah's blog posts and community-taught lessons for passages
+    relevant to the query. Use it for technical questions and topics he has
+    written or taught about.
+    """
+    index = knowledge_index()
+    if index is None:
+        return "The knowledge base is not available."
+    return format_hits(index.search(query)) or "No relevant passages found."
+
+
+# ─── Prompts ──────────────────────────────────────────────────────────────────
+# Instructions live in the system prompt, identical on every call, so they
+# form a cacheable prefix; the per-request input always comes last.
+PORTFOLIO_SYSTEM_PROMPT = (
+    "You are a concise portfolio assistant for Asadullah Shafique, an Agentic AI developer. "
+    "Answer questions about his skills, projects, hackathons, and contact info. "
+    "Use the get_portfolio_info tool when asked about specific topics. "
+    "Keep answers under 3 sentences."
+)
+# Appended when the knowledge index is available and search_knowledge is bound
+KNOWLEDGE_PROMPT = (
+    " Use the search_knowledge tool for technical questions and topics from his blog posts or "
+    "community lessons, and answer from the passages it returns."
+)
+
+ERROR_SOLVER_SYSTEM_PROMPT = """You are an expert programming tutor. \
+Analyze the coding error in the user's message and provide a helpful solution.
+
+Provide your response in JSON format with these fields:
+- explanation: Clear explanation of what went wrong (2-3 sentences)
+- solution: Step-by-step solution
+- corrected_code: The fixed code (if applicable)
+- confidence: Confidence score (0.0 to 1.0)
 
-    class AgentState(TypedDict):
-        messages: Annotated[list, add_messages]
+Be concise, educational, and encouraging."""
 
-    def _build_graph():
-        """Build and compile the LangGraph agent."""
-        anthropic_key = os.getenv("ANTHROPIC_API_KEY", "")
-        if not anthropic_key:
-            return None
-
-        try:
-            from langchain_anthropic import ChatAnthropic
-
-            llm = ChatAnthropic(
-                model="claude-haiku-4-5-20251001",
-                api_key=anthropic_key,
-                max_tokens=512,
-            ).bind_tools(TOOLS)
-        except Exception:
-            return None
-
-        SYSTEM_PROMPT = (
-            "You are a concise portfolio assistant for Asadullah Shafique, an Agentic AI developer. "
-            "Answer questions about his skills, projects, hackathons, and contact info. "
-            "Use the get_portfolio_info tool when asked about specific topics. "
-            "Keep answers under 3 sentences."
-        )
+LEARNING_SYSTEM_PROMPT = """You are an expert educator. Create a personalized learning plan \
+for the topic, level, learning style and questions in the user's message.
+
+Respond in JSON format with:
+- lesson_plan: Detailed lesson plan (markdown format)
+- resources: List of 4-5 learning resources (URLs or titles)
+- quiz_questions: List of 3 quiz questions
+- next_steps: Recommended next steps
+
+Make it engaging, practical, and tailored to the learning style."""
+
+TEACHING_SYSTEM_PROMPT = """You are an educational content curator. \
+Process the teaching contribution in the user's message.
+
+Respond in JSON format with:
+- acknowledgment: Thank you message
+- structured_content: Well-formatted content (markdown)
+- suggested_exercises: List of 3-4 practical exercises
+- related_topics: List of 4 related topics to explore
+
+Make it educational and engaging."""
+
+
+def _system_message(text: str):
+    """System prompt, marked as the end of the cacheable prefix."""
+    from langchain_core.messages import SystemMessage
+
+    if not PROMPT_CACHE_ENABLED:
+        return SystemMessage(content=text)
+    return SystemMessage(
+        content=[{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+    )
+
+
+def _prompt(system_prompt: str, user_input: str) -> list:
+    from langchain_core.messages import HumanMessage
+
+    return [_system_message(system_prompt), HumanMessage(content=user_input)]
+
+
+def _chat_model(agent_name: str):
+    """Claude client for one agent (endpoint and key come from the environment)."""
+    from langchain_anthropic import ChatAnthropic
+
+    return ChatAnthropic(
+        model=LLM_MODEL,
+        api_key=os.getenv("ANTHROPIC_API_KEY", ""),
+        max_tokens=MAX_OUTPUT_TOKENS[agent_name],
+        max_retries=0,  # retries are counted by llm_usage.invoke_llm
+        # No single request may outlive the agent's deadline (llm_resilience.py)
+        default_request_timeout=deadline_for(agent_name),
+    )
+
+
+def _fallback_reason(exc: Exception) -> str:
+    """record_fallback reason for an exception from the LLM path."""
+    if isinstance(exc, LLMBudgetExceededError):
+        return "budget"
+    if isinstance(exc, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(exc, TimeoutError):
+        return "timeout"
+    return "error"
+
+
+# ─── Tool Execution ───────────────────────────────────────────────────────────
+# Tools whose result depends only on their arguments; results are memoized
+PURE_TOOLS = frozenset({"get_portfolio_info"})
+PORTFOLIO_TOPICS = ("skills", "projects", "hackathons", "contact", "about", "education")
+MAX_TOOL_CACHE_ENTRIES = 256
+
+# (tool name, canonical JSON args) -> result, LRU-bounded since the model
+# may invent topics
+_tool_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_tool_cache_lock = threading.Lock()
+
+
+def _tool_cache_key(name: str, args: dict) -> Tuple[str, str]:
+    return name, json.dumps(args, sort_keys=True, default=str)
+
+
+def _cache_tool_result(key: Tuple[str, str], result: str) -> None:
+    with _tool_cache_lock:
+        _tool_cache[key] = result
+        _tool_cache.move_to_end(key)
+        while len(_tool_cache) > MAX_TOOL_CACHE_ENTRIES:
+            _tool_cache.popitem(last=False)
+
+
+def precompute_tool_results() -> None:
+    """Fill the cache with get_portfolio_info for every static topic."""
+    for topic in PORTFOLIO_TOPICS:
+        key = _tool_cache_key("get_portfolio_info", {"topic": topic})
+        _cache_tool_result(key, get_portfolio_info(topic))
+
+
+async def _run_tool(tools_by_name: Dict[str, Any], name: str, args: dict) -> str:
+    tool_fn = tools_by_name.get(name)
+    if tool_fn is None:
+        return "Tool not found"
+    if name in PURE_TOOLS:
+        key = _tool_cache_key(name, args)
+        cached = _tool_cache.get(key)
+        if cached is not None:
+            return cached
+    # Tools are plain functions; keep them off the event loop
+    result = str(await run_blocking(tool_fn.invoke, args))
+    if name in PURE_TOOLS:
+        _cache_tool_result(key, result)
+    return result
+
+
+async def run_tool_calls(tools_by_name: Dict[str, Any], tool_calls: List[dict]) -> List[str]:
+    """Run one model turn's tool calls concurrently; results keep call order."""
+    return await asyncio.gather(
+        *(_run_tool(tools_by_name, tc["name"], tc["args"]) for tc in tool_calls)
+    )
 
-        async def call_model(state: AgentState):
-            # Use ainvoke to avoid blocking the uvicorn event loop during LLM calls.
-            messages = [SystemMessage(content=SYSTEM_PROMPT)] + state["messages"]
-            response = await llm.ainvoke(messages)
-            return {"messages": [response]}
-
-        def call_tools(state: AgentState):
-            last_msg = state["messages"][-1]
-            results = []
-            for tc in last_msg.tool_calls:
-                tool_fn = next((t for t in TOOLS if t.name == tc["name"]), None)
-                result = tool_fn.invoke(tc["args"]) if tool_fn else "Tool not found"
-                results.append(ToolMessage(content=str(result), tool_call_id=tc["id"]))
-            return {"messages": results}
-
-        def should_continue(state: AgentState):
-            last = state["messages"][-1]
-            if hasattr(last, "tool_calls") and last.tool_calls:
-                return "tools"
-            return END
-
-        graph = StateGraph(AgentState)
-        graph.add_node("agent", call_model)
-        graph.add_node("tools", call_tools)
-        graph.set_entry_point("agent")
-        graph.add_conditional_edges("agent", should_continue, {"tools": "tools", END: END})
-        graph.add_edge("tools", "agent")
-        return graph.compile()
-
-    _compiled_graph = None
-
-    def get_graph():
-        global _compiled_graph
-        if _compiled_graph is None:
-            _compiled_graph = _build_graph()
-        return _compiled_graph
-
-
-async def run_agent(question: str) -> dict:
+
+def _build_graph():
+    """Build and compile the LangGraph agent (imports the LLM stack)."""
+    anthropic_key = os.getenv("ANTHROPIC_API_KEY", "")
+    if not anthropic_key:
+        return None
+
+    from langchain_core.messages import ToolMessage
+    from langchain_core.tools import tool
+    from langgraph.graph import END, StateGraph
+    from langgraph.graph.message import add_messages
+
+    tools = [tool(get_portfolio_info)]
+    system_prompt = PORTFOLIO_SYSTEM_PROMPT
+    if knowledge_index() is not None:
+        tools.append(tool(search_knowledge))
+        system_prompt += KNOWLEDGE_PROMPT
+    tools_by_name = {t.name: t for t in tools}
+    precompute_tool_results()
+
+    # Functional form: class-based annotations would be strings under
+    # `from __future__ import annotations` and could not see add_messages
+    AgentState = TypedDict("AgentState", {"messages": Annotated[list, add_messages]})
+
+    try:
+        llm = _chat_model("portfolio").bind_tools(tools)
+    except Exception:
+        return None
+
+    # Tools precede the system prompt in the request, so its cache breakpoint
+    # covers the tool schemas too
+    system_message = _system_message(system_prompt)
+
+    # Node functions stay unannotated: LangGraph resolves hints against module
+    # globals, where the locally built AgentState does not exist
+    async def call_model(state):
+        # Use ainvoke to avoid blocking the uvicorn event loop during LLM calls.
+        messages = [system_message] + state["messages"]
+        response = await invoke_llm(llm, messages, agent="portfolio")
+        return {"messages": [response]}
+
+    async def call_tools(state):
+        # A multi-tool turn takes as long as its slowest tool
+        tool_calls = state["messages"][-1].tool_calls
+        results = await run_tool_calls(tools_by_name, tool_calls)
+        return {"messages": [
+            ToolMessage(content=result, tool_call_id=tc["id"])
+            for tc, result in zip(tool_calls, results)
+        ]}
+
+    def should_continue(state):
+        last = state["messages"][-1]
+        if hasattr(last, "tool_calls") and last.tool_calls:
+            return "tools"
+        return END
+
+    graph = StateGraph(AgentState)
+    graph.add_node("agent", call_model)
+    graph.add_node("tools", call_tools)
+    graph.set_entry_point("agent")
+    graph.add_conditional_edges("agent", should_continue, {"tools": "tools", END: END})
+    graph.add_edge("tools", "agent")
+    return graph.compile()
+
+
+_compiled_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_graph():
+    """Compiled portfolio graph, built on first use (None without an LLM)."""
+    global _compiled_graph
+    if _compiled_graph is None and LANGGRAPH_AVAILABLE:
+        with _graph_lock:
+            if _compiled_graph is None:
+                _compiled_graph = _build_graph()
+    return _compiled_graph
+
+
+def warm_up() -> float:
+    """
+    Import the LLM stack and compile the portfolio graph ahead of the first
+    agent request. Blocking; run it off the event loop. Returns seconds spent.
+    """
+    start = time.perf_counter()
+    if LANGGRAPH_AVAILABLE:
+        import langchain_core.messages  # noqa: F401
+        if importlib.util.find_spec("langchain_anthropic") is not None:
+            import langchain_anthropic  # noqa: F401
+        get_graph()
+    return time.perf_counter() - start
+
+
+def _conversation(context: SessionContext, question: str) -> list:
+    """Recent turns plus the new question, with older turns summarised up front."""
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    texts = [t.text for t in context.turns] + [question]
+    if context.summary:
+        texts[0] = f"(Earlier in this conversation: {context.summary})\n\n{texts[0]}"
+    roles = [t.role for t in context.turns] + ["user"]
+    return [HumanMessage(content=text) if role == "user" else AIMessage(content=text)
+            for role, text in zip(roles, texts)]
+
+
+async def run_agent(question: str, session_id: str = None) -> dict:
+    """
+    Run the portfolio agent. Plain portfolio questions are answered by the
+    intent router without an LLM call; the rest use LangGraph if available +
+    ANTHROPIC_API_KEY set, otherwise a static response. LLM usage is attributed to
+    `session_id`, which also switches to the static path once over budget,
+    and the session's recent conversation (session_memory.py) is sent along.
+    """
+    result = await answer_from_router(question, session_id)
+    if result is not None:
+        return result
+    with session_scope(session_id):
+        result = await _run_agent(question, session_id)
+    agent_runs_total.inc(result["mode"])
+    return result
+
+
+async def answer_from_router(question: str, session_id: str = None) -> Optional[dict]:
     """
-    Run the portfolio agent. Uses LangGraph if available + ANTHROPIC_API_KEY set,
-    otherwise falls back to static response.
+    The intent router's answer to a plain portfolio question, or None when it
+    needs the agent. Makes no LLM call, so endpoints check it before charging
+    LLM admission; routing takes microseconds, so run_agent repeats it.
     """
+    # Needs no LLM stack, so it also answers when LangGraph is not installed
+    if not INTENT_ROUTER_ENABLED:
+        return None
+    route = intent_router.route(question)
+    if not intent_router.answerable(route):
+        return None
+    answer = ROUTER_ANSWERS[route.topic]
+    # Kept in the history so LLM follow-ups see the exchange
+    await run_blocking(session_memory.append, session_id, question, answer)
+    agent_runs_total.inc("router")
+    return {
+        "answer": answer, "mode": "router",
+        "confidence": route.confidence, "topic": route.topic,
+    }
+
+
+async def _run_agent(question: str, session_id: str = None) -> dict:
     if not LANGGRAPH_AVAILABLE:
+        record_fallback("portfolio", "unavailable")
         return {"answer": get_static_response(question), "mode": "static"}
 
-    graph = get_graph()
+    # First use compiles the graph (and imports LangGraph) off the event loop
+    graph = _compiled_graph or await run_blocking(get_graph)
     if graph is None:
+        record_fallback("portfolio", "no_llm")
+        return {"answer": get_static_response(question), "mode": "static"}
+
+    if session_over_budget(session_id):
+        record_fallback("portfolio", "budget")
         return {"answer": get_static_response(question), "mode": "static"}
 
     try:
-        result = await graph.ainvoke({"messages": [HumanMessage(content=question)]})
+        # With a shared store these take a SQLite lock, so keep them off the loop
+        context = await run_blocking(session_memory.get, session_id)
+        messages = _conversation(context, question)
+        async with llm_guard("portfolio"):
+            result = await graph.ainvoke({"messages": messages})
         answer = result["messages"][-1].content
+        await run_blocking(
+            session_memory.append,
+            session_id, question, answer if isinstance(answer, str) else str(answer),
+        )
         return {"answer": answer, "mode": "langgraph"}
     except Exception as e:
+        record_fallback("portfolio", _fallback_reason(e))
         return {"answer": get_static_response(question), "mode": "static", "error": str(e)}
 
 
 # ─── Error Solver Agent ───────────────────────────────────────────────────────
-def get_static_error_solution(error_message: str, code_snippet: str = None, language: str = "python") -> dict:
+def known_error_solution(
+    error_message: str, code_snippet: str = None, language: str = None
+) -> Optional[dict]:
+    """Solution from the error knowledge base when its best match is confident enough, else None."""
+    matches = knowledge_base().match(error_message, language)
+    if matches and matches[0].pattern.confidence >= ERROR_KB_MIN_CONFIDENCE:
+        return matches[0].render(code_snippet)
+    return None
+
+
+def get_static_error_solution(error_message: str, code_snippet: str = None,
+                              language: str = "python") -> dict:
     """Fallback error solver when LangGraph/LLM not available."""
-    error_lower = error_message.lower()
-    
-    # Common error patterns
-    if "typeerror" in error_lower and "not iterable" in error_lower:
-        return {
-            "explanation": "You're trying to iterate over a non-iterable object (like an integer). In Python, you can only iterate over sequences like lists, tuples, strings, or ranges.",
-            "solution": "Use range() to create an iterable sequence from the integer.",
-            "corrected_code": "for i in range(5):\n    print(i)",
-            "confidence": 0.95,
-        }
-    
-    if "indexerror" in error_lower:
-        return {
-            "explanation": "You're trying to access an index that doesn't exist in the list/array.",
-            "solution": "Check the length of your list and ensure the index is within bounds (0 to len(list)-1).",
-            "corrected_code": "# Check bounds before accessing\nif index < len(my_list):\n    item = my_list[index]",
-            "confidence": 0.90,
-        }
-    
-    if "keyerror" in error_lower:
-        return {
-            "explanation": "You're trying to access a dictionary key that doesn't exist.",
-            "solution": "Use .get() method or check if key exists before accessing.",
-            "corrected_code": "# Safe access\nvalue = my_dict.get('key', default_value)\n# Or check first\nif 'key' in my_dict:\n    value = my_dict['key']",
-            "confidence": 0.90,
-        }
-    
-    if "nameerror" in error_lower:
-        return {
-            "explanation": "You're using a variable or function name that hasn't been defined.",
-            "solution": "Check for typos, ensure the variable is defined before use, or import the required module.",
-            "corrected_code": "# Define before use\nvariable = value\n# Or import required module\nimport module_name",
-            "confidence": 0.85,
-        }
-    
-    if "attributeerror" in error_lower:
-        return {
-            "explanation": "You're trying to access an attribute or method that doesn't exist on this object.",
-            "solution": "Check the object type and verify the attribute/method name is correct.",
-            "corrected_code": "# Check object type and available methods\ndir(object_name)  # See available attributes",
-            "confidence": 0.85,
-        }
-    
-    # Default response
+    matches = knowledge_base().match(error_message, language)
+    if matches:
+        return matches[0].render(code_snippet)
     return {
         "explanation": f"The error '{error_message}' indicates an issue in your code.",
-        "solution": "Review the error message, check the line mentioned in the traceback, and verify your logic.",
+        "solution": (
+            "Review the error message, check the line mentioned in the traceback, "
+            "and verify your logic."
+        ),
         "corrected_code": code_snippet,
         "confidence": 0.70,
     }
@@ -248,81 +530,44 @@ async def run_error_solver_agent(
     Analyzes coding errors and provides explanations and solutions.
     """
     if not LANGGRAPH_AVAILABLE:
+        record_fallback("error_solver", "unavailable")
         return get_static_error_solution(error_message, code_snippet, language)
     
     anthropic_key = os.getenv("ANTHROPIC_API_KEY", "")
     if not anthropic_key:
+        record_fallback("error_solver", "no_llm")
         return get_static_error_solution(error_message, code_snippet, language)
     
     try:
-        from langchain_anthropic import ChatAnthropic
-        
-        llm = ChatAnthropic(
-            model="claude-haiku-4-5-20251001",
-            api_key=anthropic_key,
-            max_tokens=1024,
-        )
-        
-        prompt = f"""You are an expert programming tutor. Analyze this coding error and provide a helpful solution.
-
-**Error Message:** {error_message}
+        llm = bind_schema(_chat_model("error_solver"), ErrorSolution)
+        prompt = _prompt(ERROR_SOLVER_SYSTEM_PROMPT, f"""**Error Message:** {error_message}
 **Language:** {language}
 **Code Snippet:** {code_snippet or "Not provided"}
-**Context:** {context or "Not provided"}
+**Context:** {context or "Not provided"}""")
 
-Provide your response in JSON format with these fields:
-- explanation: Clear explanation of what went wrong (2-3 sentences)
-- solution: Step-by-step solution
-- corrected_code: The fixed code (if applicable)
-- confidence: Confidence score (0.0 to 1.0)
+        async with llm_guard("error_solver"):
+            response = await invoke_llm(llm, prompt, agent="error_solver")
 
-Be concise, educational, and encouraging."""
+        solution = extract(response, ErrorSolution)
+        if solution is not None:
+            return solution.model_dump()
 
-        response = await llm.ainvoke(prompt)
-        content = response.content
-        
-        # Try to parse JSON from response
-        import json
-        import re
-        
-        # Extract JSON from response (handle markdown code blocks)
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            try:
-                result = json.loads(json_match.group())
-                return {
-                    "explanation": result.get("explanation", "Error analysis unavailable"),
-                    "solution": result.get("solution", "Review the error and code carefully"),
-                    "corrected_code": result.get("corrected_code"),
-                    "confidence": result.get("confidence", 0.8),
-                }
-            except json.JSONDecodeError:
-                pass
-        
-        # Fallback if JSON parsing fails
+        # Fallback if the reply holds no valid solution object
         return {
-            "explanation": content[:500],
+            "explanation": message_text(response)[:500],
             "solution": "Review the error message and apply the explanation",
             "corrected_code": code_snippet,
             "confidence": 0.75,
         }
-        
+
     except Exception as e:
+        record_fallback("error_solver", _fallback_reason(e))
         return get_static_error_solution(error_message, code_snippet, language)
 
 
 # ─── Learning Agent ───────────────────────────────────────────────────────────
-async def run_learning_agent(
-    topic: str,
-    level: str = "beginner",
-    learning_style: str = "interactive",
-    questions: list = None,
-) -> dict:
-    """
-    Create personalized learning experiences.
-    Generates lesson plans, resources, and quizzes.
-    """
-    # Static fallback
+def _static_lesson(topic: str, level: str) -> dict:
+    """Template lesson plan used when the LLM is unavailable."""
     lesson_plan = f"""# {topic} - {level.capitalize()} Lesson Plan
 
 ## Learning Objectives
@@ -368,80 +613,81 @@ async def run_learning_agent(
 2. Joining online communities
 3. Contributing to open-source
 4. Exploring advanced topics"""
-    
-    # If LLM available, enhance the content
-    if LANGGRAPH_AVAILABLE:
-        anthropic_key = os.getenv("ANTHROPIC_API_KEY", "")
-        if anthropic_key:
-            try:
-                from langchain_anthropic import ChatAnthropic
-                
-                llm = ChatAnthropic(
-                    model="claude-haiku-4-5-20251001",
-                    api_key=anthropic_key,
-                    max_tokens=1500,
-                )
-                
-                questions_str = "\n".join(questions) if questions else "None specified"
-                
-                prompt = f"""You are an expert educator. Create a personalized learning plan for:
-
-**Topic:** {topic}
-**Level:** {level}
-**Learning Style:** {learning_style}
-**Student Questions:** {questions_str}
-
-Respond in JSON format with:
-- lesson_plan: Detailed lesson plan (markdown format)
-- resources: List of 4-5 learning resources (URLs or titles)
-- quiz_questions: List of 3 quiz questions
-- next_steps: Recommended next steps
-
-Make it engaging, practical, and tailored to the learning style."""
 
-                response = await llm.ainvoke(prompt)
-                content = response.content
-                
-                import json
-                import re
-                
-                json_match = re.search(r'\{[\s\S]*\}', content)
-                if json_match:
-                    try:
-                        result = json.loads(json_match.group())
-                        return {
-                            "lesson_plan": result.get("lesson_plan", lesson_plan),
-                            "resources": result.get("resources", resources),
-                            "quiz_questions": result.get("quiz_questions", quiz_questions),
-                            "next_steps": result.get("next_steps", next_steps),
-                        }
-                    except json.JSONDecodeError:
-                        pass
-            except Exception:
-                pass
-    
     return {
         "lesson_plan": lesson_plan,
         "resources": resources,
         "quiz_questions": quiz_questions,
         "next_steps": next_steps,
+        "mode": "static",
     }
 
 
-# ─── Teaching Agent ───────────────────────────────────────────────────────────
-async def run_teaching_agent(
+def _learning_prompt(topic: str, level: str, learning_style: str, questions: list = None) -> list:
+    questions_str = "\n".join(questions) if questions else "None specified"
+    return _prompt(LEARNING_SYSTEM_PROMPT, f"""**Topic:** {topic}
+**Level:** {level}
+**Learning Style:** {learning_style}
+**Student Questions:** {questions_str}""")
+
+
+async def run_learning_agent(
     topic: str,
-    content: str,
-    difficulty: str = "intermediate",
-    examples: list = None,
+    level: str = "beginner",
+    learning_style: str = "interactive",
+    questions: list = None,
 ) -> dict:
     """
-    Process and structure educational content contributed by users.
-    Enhances content with exercises and related topics.
+    Create personalized learning experiences.
+    Generates lesson plans, resources, and quizzes. `mode` is "llm" for a
+    generated lesson and "static" for the template fallback.
     """
+    # If LLM available, enhance the content
+    fallback_reason = "unavailable"
+    if LANGGRAPH_AVAILABLE:
+        anthropic_key = os.getenv("ANTHROPIC_API_KEY", "")
+        fallback_reason = "no_llm"
+        if anthropic_key:
+            try:
+                llm = bind_schema(_chat_model("learning"), LearningPlan)
+                prompt = _learning_prompt(topic, level, learning_style, questions)
+
+                async with llm_guard("learning"):
+                    response = await invoke_llm(llm, prompt, agent="learning")
+
+                plan = extract(response, LearningPlan)
+                if plan is not None:
+                    return {**plan.model_dump(), "mode": "llm"}
+                fallback_reason = "parse_error"
+            except Exception as e:
+                fallback_reason = _fallback_reason(e)
+    
+    record_fallback("learning", fallback_reason)
+    return _static_lesson(topic, level)
+
+
+def stream_learning_agent(
+    topic: str,
+    level: str = "beginner",
+    learning_style: str = "interactive",
+    questions: list = None,
+) -> AsyncIterator[dict]:
+    """`run_learning_agent` as a stream of field events (see `stream_structured`)."""
+    return stream_structured(
+        "learning", LearningPlan, lambda: _learning_prompt(topic, level, learning_style, questions),
+        lambda: _static_lesson(topic, level),
+    )
+
+
+# ─── Teaching Agent ───────────────────────────────────────────────────────────
+def _static_teaching(topic: str, content: str, difficulty: str, examples: list = None) -> dict:
+    """Template structure for a contribution, used when the LLM is unavailable."""
     examples_str = "\n".join(examples) if examples else "No examples provided"
     
-    acknowledgment = f"Thank you for contributing to the {topic} knowledge base! Your content has been processed and added to our learning platform."
+    acknowledgment = (
+        f"Thank you for contributing to the {topic} knowledge base! "
+        "Your content has been processed and added to our learning platform."
+    )
     
     structured_content = f"""# {topic} ({difficulty.capitalize()})
 
@@ -469,59 +715,125 @@ async def run_teaching_agent(
         f"{topic} vs Alternatives",
         f"Real-world {topic} Applications",
     ]
-    
+
+    return {
+        "acknowledgment": acknowledgment,
+        "structured_content": structured_content,
+        "suggested_exercises": suggested_exercises,
+        "related_topics": related_topics,
+    }
+
+
+def _teaching_prompt(topic: str, content: str, difficulty: str, examples: list = None) -> list:
+    examples_str = "\n".join(examples) if examples else "No examples provided"
+    return _prompt(TEACHING_SYSTEM_PROMPT, f"""**Topic:** {topic}
+**Content:** {content}
+**Difficulty:** {difficulty}
+**Examples:** {examples_str}""")
+
+
+async def run_teaching_agent(
+    topic: str,
+    content: str,
+    difficulty: str = "intermediate",
+    examples: list = None,
+) -> dict:
+    """
+    Process and structure educational content contributed by users.
+    Enhances content with exercises and related topics.
+    """
     # Enhance with LLM if available
+    fallback_reason = "unavailable"
     if LANGGRAPH_AVAILABLE:
         anthropic_key = os.getenv("ANTHROPIC_API_KEY", "")
+        fallback_reason = "no_llm"
         if anthropic_key:
             try:
-                from langchain_anthropic import ChatAnthropic
-                
-                llm = ChatAnthropic(
-                    model="claude-haiku-4-5-20251001",
-                    api_key=anthropic_key,
-                    max_tokens=1000,
-                )
-                
-                prompt = f"""You are an educational content curator. Process this teaching contribution:
-
-**Topic:** {topic}
-**Content:** {content}
-**Difficulty:** {difficulty}
-**Examples:** {examples_str}
+                llm = bind_schema(_chat_model("teaching"), TeachingResult)
+                prompt = _teaching_prompt(topic, content, difficulty, examples)
+
+                async with llm_guard("teaching"):
+                    response = await invoke_llm(llm, prompt, agent="teaching")
+
+                result = extract(response, TeachingResult)
+                if result is not None:
+                    return result.model_dump()
+                fallback_reason = "parse_error"
+            except Exception as e:
+                fallback_reason = _fallback_reason(e)
+    
+    record_fallback("teaching", fallback_reason)
+    return _static_teaching(topic, content, difficulty, examples)
 
-Respond in JSON format with:
-- acknowledgment: Thank you message
-- structured_content: Well-formatted content (markdown)
-- suggested_exercises: List of 3-4 practical exercises
-- related_topics: List of 4 related topics to explore
 
-Make it educational and engaging."""
+def stream_teaching_agent(
+    topic: str,
+    content: str,
+    difficulty: str = "intermediate",
+    examples: list = None,
+) -> AsyncIterator[dict]:
+    """`run_teaching_agent` as a stream of field events (see `stream_structured`)."""
+    return stream_structured(
+        "teaching", TeachingResult, lambda: _teaching_prompt(topic, content, difficulty, examples),
+        lambda: _static_teaching(topic, content, difficulty, examples),
+    )
 
-                response = await llm.ainvoke(prompt)
-                content = response.content
-                
-                import json
-                import re
-                
-                json_match = re.search(r'\{[\s\S]*\}', content)
-                if json_match:
-                    try:
-                        result = json.loads(json_match.group())
-                        return {
-                            "acknowledgment": result.get("acknowledgment", acknowledgment),
-                            "structured_content": result.get("structured_content", structured_content),
-                            "suggested_exercises": result.get("suggested_exercises", suggested_exercises),
-                            "related_topics": result.get("related_topics", related_topics),
-                        }
-                    except json.JSONDecodeError:
-                        pass
-            except Exception:
-                pass
-    
-    return {
-        "acknowledgment": acknowledgment,
-        "structured_content": structured_content,
-        "suggested_exercises": suggested_exercises,
-        "related_topics": related_topics,
-    }
+
+# ─── Streaming ────────────────────────────────────────────────────────────────
+async def stream_structured(
+    agent_name: str,
+    schema: type,
+    prompt: Callable[[], list],
+    fallback: Callable[[], dict],
+) -> AsyncIterator[dict]:
+    """
+    Stream a structured agent answer as it is generated. Yields
+    `{"field", "delta"}` with new text of a string field, `{"field",
+    "value"}` when a field is complete, and finally `{"done": True, "mode",
+    "result"}`. `result` is the validated answer and is authoritative: when
+    the LLM fails or its output does not validate midway, the static
+    fallback fields are sent and `result` replaces anything streamed so far.
+
+    The LLM call runs in its own task under `llm_guard`, so its deadline
+    never fires while the client is being written to.
+    """
+    fallback_reason = "unavailable"
+    if LANGGRAPH_AVAILABLE:
+        fallback_reason = "no_llm"
+        if os.getenv("ANTHROPIC_API_KEY", ""):
+            events: asyncio.Queue = asyncio.Queue()
+
+            async def generate():
+                fields = JsonFieldStream()
+                message = None
+                try:
+                    llm = bind_schema(_chat_model(agent_name), schema)
+                    async with llm_guard(agent_name):
+                        async for chunk in stream_llm(llm, prompt(), agent=agent_name):
+                            message = chunk if message is None else message + chunk
+                            for event in fields.feed(chunk_text(chunk)):
+                                events.put_nowait(event)
+                    return message
+                finally:
+                    events.put_nowait(None)
+
+            task = asyncio.create_task(generate())
+            try:
+                while (event := await events.get()) is not None:
+                    kind, name, value = event
+                    yield {"field": name, kind: value}
+                answer = extract(await task, schema)
+                if answer is not None:
+                    yield {"done": True, "mode": "llm", "result": answer.model_dump()}
+                    return
+                fallback_reason = "parse_error"
+            except Exception as e:
+                fallback_reason = _fallback_reason(e)
+            finally:
+                task.cancel()
+
+    record_fallback(agent_name, fallback_reason)
+    result = {name: value for name, value in fallback().items() if name != "mode"}
+    for name, value in result.items():
+        yield {"field": name, "value": value}
+    yield {"done": True, "mode": "static", "result": result}
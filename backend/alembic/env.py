@@ -1 +1,51 @@
-"""Alembic migrations module."""
+"""Alembic migrations module.
+
+Uses the application's DATABASE_URL and model metadata, so
+`alembic upgrade head` migrates the same database the API verifies at startup.
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+
+import models  # noqa: F401 — registers tables on Base.metadata
+from database import DATABASE_URL, Base, engine
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+config.set_main_option("sqlalchemy.url", DATABASE_URL)
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Emit SQL to stdout without a database connection (`alembic upgrade --sql`)."""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # database.verify_schema passes the connection it upgrades in bootstrap mode
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
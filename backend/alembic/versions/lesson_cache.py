@@ -0,0 +1,44 @@
+"""Add lesson_cache table
+
+Revision ID: lesson_cache
+Revises: initial
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'lesson_cache'
+down_revision: Union[str, None] = 'initial'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('lesson_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('topic', sa.String(length=200), nullable=False),
+    sa.Column('level', sa.String(length=50), nullable=False),
+    sa.Column('learning_style', sa.String(length=50), nullable=False),
+    sa.Column('lesson', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True),
+              server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_lesson_cache_cache_key'), 'lesson_cache', ['cache_key'], unique=True)
+    op.create_index(op.f('ix_lesson_cache_id'), 'lesson_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_lesson_cache_last_used_at'), 'lesson_cache', ['last_used_at'],
+                    unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_lesson_cache_last_used_at'), table_name='lesson_cache')
+    op.drop_index(op.f('ix_lesson_cache_id'), table_name='lesson_cache')
+    op.drop_index(op.f('ix_lesson_cache_cache_key'), table_name='lesson_cache')
+    op.drop_table('lesson_cache')
@@ -0,0 +1,29 @@
+"""Add lesson_claims table
+
+Revision ID: lesson_claims
+Revises: lesson_cache
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'lesson_claims'
+down_revision: Union[str, None] = 'lesson_cache'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('lesson_claims',
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('claimed_until', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('cache_key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('lesson_claims')
@@ -0,0 +1,236 @@
+"""
+Anthropic Messages API Mock
+===========================
+A local stand-in for `POST /v1/messages` (streaming and non-streaming) that
+models prompt caching, so the agents' cache markers can be exercised
+without network access or spend.
+
+Prompt caching is modelled the way the API reports it: the request prefix
+(tools → system → messages) up to the last `cache_control` breakpoint is
+hashed. The first request with that prefix reports it as
+`cache_creation_input_tokens`; later ones within the TTL report it as
+`cache_read_input_tokens`; everything else is `input_tokens`. Prefixes under
+`min_cacheable_tokens` (default 4096, claude-haiku-4-5's minimum) are not
+cached, like the real API. Tokens are estimated at ~4 characters each.
+
+Time to first token is simulated as `prefill_ms_per_1k` per 1,000 uncached
+input tokens (cache reads count a tenth), so cache hits are visibly faster.
+
+When `tool_choice` forces a tool and the responder's text is a JSON object,
+the reply is a `tool_use` block with that object as input (streamed as
+`input_json_delta`), like the API in structured-output mode.
+
+Point the agents at it with ANTHROPIC_BASE_URL (ChatAnthropic reads it).
+
+Run:
+    cd backend
+    python -m benchmarks.anthropic_mock --port 8765
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=test uvicorn main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+CHARS_PER_TOKEN = 4
+MIN_CACHEABLE_TOKENS = 4096
+CACHE_TTL = 300.0
+
+Responder = Callable[[dict], str]
+
+
+def _tokens(value) -> int:
+    text = value if isinstance(value, str) else json.dumps(value, sort_keys=True)
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _forced_tool(body: dict, text: str) -> Optional[Tuple[str, dict]]:
+    """(tool name, input) when the request forces a tool and text is an object."""
+    choice = body.get("tool_choice") or {}
+    if choice.get("type") != "tool":
+        return None
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return None
+    return (choice["name"], value) if isinstance(value, dict) else None
+
+
+def _blocks(content) -> List[dict]:
+    if isinstance(content, str):
+        return [{"type": "text", "text": content}]
+    return list(content or [])
+
+
+def prefix_parts(body: dict) -> List[dict]:
+    """The request flattened in cache-prefix order: tools, system, messages."""
+    parts = [dict(tool) for tool in body.get("tools") or []]
+    parts += _blocks(body.get("system"))
+    for message in body.get("messages", []):
+        parts += [{"role": message["role"], **block} for block in _blocks(message["content"])]
+    return parts
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):  # keep test output quiet
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("content-length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.startswith("/v1/messages"):
+            error = {"type": "not_found_error", "message": self.path}
+            self._json(404, {"type": "error", "error": error})
+            return
+        mock: AnthropicMock = self.server.mock
+        mock.requests.append(body)
+        usage = mock.usage_for(body)
+        text = mock.responder(body)
+        time.sleep(mock.prefill_seconds(usage))
+        tool = _forced_tool(body, text)
+        if body.get("stream"):
+            self._stream(body, usage, text, tool)
+        else:
+            if tool:
+                content = [
+                    {"type": "tool_use", "id": "toolu_mock", "name": tool[0], "input": tool[1]}
+                ]
+            else:
+                content = [{"type": "text", "text": text}]
+            self._json(200, {
+                "id": "msg_mock", "type": "message", "role": "assistant",
+                "model": body.get("model"), "content": content,
+                "stop_reason": "tool_use" if tool else "end_turn",
+                "stop_sequence": None, "usage": {**usage, "output_tokens": _tokens(text)},
+            })
+
+    def _json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, body: dict, usage: dict, text: str, tool: Optional[Tuple[str, dict]]) -> None:
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("cache-control", "no-cache")
+        self.send_header("connection", "close")
+        self.end_headers()
+        words = text.split(" ")
+        pieces = [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+        if tool:
+            block = {"type": "tool_use", "id": "toolu_mock", "name": tool[0], "input": {}}
+            deltas = [{"type": "input_json_delta", "partial_json": piece} for piece in pieces]
+        else:
+            block = {"type": "text", "text": ""}
+            deltas = [{"type": "text_delta", "text": piece} for piece in pieces]
+        events = [
+            ("message_start", {"type": "message_start", "message": {
+                "id": "msg_mock", "type": "message", "role": "assistant",
+                "model": body.get("model"), "content": [], "stop_reason": None,
+                "stop_sequence": None, "usage": {**usage, "output_tokens": 1},
+            }}),
+            ("content_block_start",
+             {"type": "content_block_start", "index": 0, "content_block": block}),
+            *(("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": delta})
+              for delta in deltas),
+            ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+            ("message_delta", {"type": "message_delta",
+                               "delta": {"stop_reason": "tool_use" if tool else "end_turn",
+                                         "stop_sequence": None},
+                               # Like the API, the final delta repeats the input usage
+                               "usage": {**usage, "output_tokens": _tokens(text)}}),
+            ("message_stop", {"type": "message_stop"}),
+        ]
+        for name, data in events:
+            self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+            self.wfile.flush()
+        self.close_connection = True
+
+
+class AnthropicMock(ThreadingHTTPServer):
+    """Context manager serving the mock on 127.0.0.1 (a free port by default)."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, responder: Optional[Responder] = None,
+                 min_cacheable_tokens: int = MIN_CACHEABLE_TOKENS, prefill_ms_per_1k: float = 0.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.mock = self
+        self.responder: Responder = responder or (lambda body: "Mock reply.")
+        self.min_cacheable_tokens = min_cacheable_tokens
+        self.prefill_ms_per_1k = prefill_ms_per_1k
+        self.requests: List[dict] = []
+        self._cache: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def usage_for(self, body: dict) -> dict:
+        """Input token accounting for one request, updating the cache."""
+        parts = prefix_parts(body)
+        total = sum(_tokens(part.get("text", part)) for part in parts)
+        breakpoint_at = max((i for i, p in enumerate(parts) if p.get("cache_control")), default=-1)
+        cached = sum(_tokens(part.get("text", part)) for part in parts[:breakpoint_at + 1])
+        read = write = 0
+        if breakpoint_at >= 0 and cached >= self.min_cacheable_tokens:
+            prefix = [
+                {k: v for k, v in p.items() if k != "cache_control"}
+                for p in parts[:breakpoint_at + 1]
+            ]
+            key = hashlib.sha256(json.dumps(prefix, sort_keys=True).encode()).hexdigest()
+            now = time.monotonic()
+            with self._lock:
+                if self._cache.get(key, 0.0) > now:
+                    read = cached
+                else:
+                    write = cached
+                self._cache[key] = now + CACHE_TTL
+        return {
+            "input_tokens": total - read - write,
+            "cache_creation_input_tokens": write,
+            "cache_read_input_tokens": read,
+        }
+
+    def prefill_seconds(self, usage: dict) -> float:
+        uncached = usage["input_tokens"] + usage["cache_creation_input_tokens"]
+        effective = uncached + usage["cache_read_input_tokens"] / 10
+        return self.prefill_ms_per_1k * effective / 1000 / 1000
+
+    def __enter__(self) -> "AnthropicMock":
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="anthropic-mock", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--min-cacheable-tokens", type=int, default=MIN_CACHEABLE_TOKENS)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=50.0)
+    args = parser.parse_args()
+    with AnthropicMock(args.port, min_cacheable_tokens=args.min_cacheable_tokens,
+                       prefill_ms_per_1k=args.prefill_ms_per_1k) as server:
+        print(f"Serving the Messages API mock on {server.url}")
+        threading.Event().wait()
@@ -0,0 +1,394 @@
+"""
+API Load Benchmark
+==================
+Drives the API with concurrent clients and reports throughput, latency
+percentiles (p50/p95/p99) and memory per scenario. Results can be saved as
+a JSON baseline and later runs diffed against it.
+
+Targets:
+    inprocess   The ASGI app via httpx.ASGITransport, no network or server.
+                Uses a throwaway SQLite DB seeded with videos, disables rate
+                limiting, and can mock the LLM so agent runs are reproducible.
+    <url>       A running server, e.g. http://localhost:7860. Start it with
+                RATELIMIT_ENABLED=false so /api/contact is not throttled;
+                pass --server-pid to sample the server's RSS. Mocked-LLM
+                scenarios are skipped (the mock only exists in-process).
+
+Scenarios: blog, contact, video_list, chat_static, chat_mock_llm,
+chat_stream, mcp_rpc.
+
+Baselines are machine-specific: compare runs from the same host.
+
+Run:
+    cd backend
+    python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --scenarios blog mcp_rpc --requests 2000 --concurrency 32
+    python -m benchmarks.bench_api --save benchmarks/baselines/inprocess.json
+    python -m benchmarks.bench_api --compare benchmarks/baselines/inprocess.json
+    python -m benchmarks.bench_api --target http://localhost:7860 --server-pid 1234
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+INPROCESS = "inprocess"
+# In-process runs vary by up to ~20% between runs on a quiet machine, so only
+# larger throughput drops or p95 increases are flagged as regressions
+DEFAULT_REGRESSION_THRESHOLD = 0.25
+SEED_VIDEOS = 200
+MOCK_LLM_LATENCY = 0.05  # seconds, simulated Claude round trip
+
+
+# ─── Scenarios ────────────────────────────────────────────────────────────────
+@dataclass(slots=True)
+class Scenario:
+    name: str
+    method: str
+    path: str
+    body: Optional[dict] = None
+    stream: bool = False
+    inprocess_only: bool = False
+    # In-process patches active while the scenario runs
+    setup: Optional[Callable[[ExitStack], None]] = None
+
+
+def _static_agent(stack: ExitStack) -> None:
+    stack.enter_context(patch("agent.LANGGRAPH_AVAILABLE", False))
+
+
+def _mock_llm(stack: ExitStack) -> None:
+    """Run the real LangGraph agent with a fixed-latency fake model call."""
+    from langchain_core.messages import AIMessage
+
+    import agent
+
+    async def fake_invoke_llm(llm, messages, **kwargs):
+        await asyncio.sleep(MOCK_LLM_LATENCY)
+        return AIMessage(
+            content="Asadullah builds agentic AI systems with LangGraph and FastAPI.",
+            usage_metadata={"input_tokens": 420, "output_tokens": 24, "total_tokens": 444},
+        )
+
+    api_key = os.getenv("ANTHROPIC_API_KEY") or "bench"
+    stack.enter_context(patch.dict(os.environ, {"ANTHROPIC_API_KEY": api_key}))
+    stack.enter_context(patch("agent.invoke_llm", fake_invoke_llm))
+    stack.enter_context(patch("agent._compiled_graph", None))
+    if agent.get_graph() is None:
+        raise RuntimeError("LangGraph agent unavailable; cannot run chat_mock_llm")
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    s.name: s
+    for s in [
+        Scenario("blog", "GET", "/api/blog"),
+        Scenario(
+            "contact", "POST", "/api/contact",
+            body={
+                "name": "Bench User",
+                "email": "bench@example.com",
+                "subject": "Benchmark",
+                "message": "Load test message from the benchmark suite.",
+            },
+        ),
+        Scenario("video_list", "GET", "/api/video/list"),
+        Scenario(
+            "chat_static", "POST", "/api/agent/chat",
+            body={"message": "What are Asadullah's skills?"},
+            inprocess_only=True, setup=_static_agent,
+        ),
+        Scenario(
+            "chat_mock_llm", "POST", "/api/agent/chat",
+            body={"message": "What are Asadullah's skills?"},
+            inprocess_only=True, setup=_mock_llm,
+        ),
+        Scenario(
+            "chat_stream", "POST", "/api/agent/chat/stream",
+            body={"message": "Hi"}, stream=True, setup=_static_agent,
+        ),
+        Scenario(
+            "mcp_rpc", "POST", "/mcp/rpc",
+            body={"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                  "params": {"name": "get_skills", "arguments": {}}},
+        ),
+    ]
+}
+
+
+# ─── Measurement ──────────────────────────────────────────────────────────────
+@dataclass(slots=True)
+class ScenarioResult:
+    name: str
+    requests: int
+    concurrency: int
+    errors: int
+    status_codes: Dict[str, int]
+    duration_s: float
+    throughput_rps: float
+    latency_ms: Dict[str, float]
+    memory: Dict[str, Optional[float]] = field(default_factory=dict)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of unsorted samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, min(len(ordered), math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Current resident set size from /proc (Linux), or None if unavailable."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def _one_request(client: httpx.AsyncClient, scenario: Scenario) -> int:
+    if scenario.stream:
+        async with client.stream(scenario.method, scenario.path, json=scenario.body) as response:
+            async for _ in response.aiter_bytes():
+                pass
+            return response.status_code
+    response = await client.request(scenario.method, scenario.path, json=scenario.body)
+    return response.status_code
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int,
+                       concurrency: int, warmup: int = 10,
+                       server_pid: Optional[int] = None) -> ScenarioResult:
+    """Issue `requests` calls from `concurrency` workers and summarize them."""
+    for _ in range(min(warmup, requests)):
+        await _one_request(client, scenario)
+
+    latencies: List[float] = []
+    status_codes: Dict[str, int] = {}
+    errors = 0
+    remaining = requests
+    rss_before = rss_mb(server_pid)
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                status = await _one_request(client, scenario)
+            except httpx.HTTPError:
+                status = 0
+            latencies.append((time.perf_counter() - start) * 1000)
+            status_codes[str(status)] = status_codes.get(str(status), 0) + 1
+            if not 200 <= status < 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+    rss_after = rss_mb(server_pid)
+
+    return ScenarioResult(
+        name=scenario.name,
+        requests=len(latencies),
+        concurrency=concurrency,
+        errors=errors,
+        status_codes=status_codes,
+        duration_s=round(duration, 4),
+        throughput_rps=round(len(latencies) / duration, 2) if duration else 0.0,
+        latency_ms={
+            "mean": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(max(latencies, default=0.0), 3),
+        },
+        memory={
+            "rss_before_mb": round(rss_before, 2) if rss_before is not None else None,
+            "rss_after_mb": round(rss_after, 2) if rss_after is not None else None,
+            "peak_rss_mb": round(peak_rss_mb(), 2) if server_pid is None else None,
+        },
+    )
+
+
+# ─── In-process Target ────────────────────────────────────────────────────────
+@contextmanager
+def inprocess_app():
+    """Import the app against a throwaway SQLite DB seeded with videos."""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/bench.db")
+        os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+        import main
+        from database import Base, SessionLocal, engine
+        from models import Video
+
+        Base.metadata.create_all(bind=engine)
+        with SessionLocal() as db:
+            if db.query(Video).count() == 0:
+                db.add_all(
+                    Video(
+                        title=f"Video {i}",
+                        description="A short educational clip about agentic AI.",
+                        file_path=f"static_projects/video_{i}.mp4",
+                        duration="05:00",
+                        tags=["ai", "python", "fastapi"],
+                    )
+                    for i in range(SEED_VIDEOS)
+                )
+                db.commit()
+
+        previous = main.limiter.enabled
+        main.limiter.enabled = False
+        try:
+            yield main.app
+        finally:
+            main.limiter.enabled = previous
+
+
+async def run_suite(target: str, names: List[str], requests: int, concurrency: int,
+                    server_pid: Optional[int] = None) -> dict:
+    """Run the selected scenarios against `target` and return a results document."""
+    results = []
+    with ExitStack() as outer:
+        if target == INPROCESS:
+            app = outer.enter_context(inprocess_app())
+            transport = httpx.ASGITransport(app=app)
+            base_url = "http://bench"
+        else:
+            transport = None
+            base_url = target.rstrip("/")
+
+        async with httpx.AsyncClient(
+            transport=transport, base_url=base_url, timeout=60.0
+        ) as client:
+            for name in names:
+                scenario = SCENARIOS[name]
+                if scenario.inprocess_only and target != INPROCESS:
+                    print(f"  skip {name}: in-process only")
+                    continue
+                with ExitStack() as stack:
+                    if target == INPROCESS and scenario.setup:
+                        scenario.setup(stack)
+                    result = await run_scenario(
+                        client, scenario, requests, concurrency, server_pid=server_pid
+                    )
+                results.append(result)
+                print_result(result)
+
+    return {
+        "target": target,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "scenarios": {r.name: asdict(r) for r in results},
+    }
+
+
+# ─── Reporting ────────────────────────────────────────────────────────────────
+def print_header() -> None:
+    print(f"{'scenario':<14} | {'req/s':>9} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | "
+          f"{'errors':>6} | {'rss MB':>7}")
+    print("-" * 80)
+
+
+def print_result(r: ScenarioResult) -> None:
+    rss = r.memory.get("rss_after_mb")
+    print(f"{r.name:<14} | {r.throughput_rps:>9.1f} | {r.latency_ms['p50']:>8.2f} | "
+          f"{r.latency_ms['p95']:>8.2f} | {r.latency_ms['p99']:>8.2f} | {r.errors:>6} | "
+          f"{rss if rss is not None else '-':>7}")
+
+
+def compare(current: dict, baseline: dict,
+            threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[str]:
+    """
+    Diff two result documents. Returns human-readable regression lines for
+    scenarios whose throughput dropped or p95 rose by more than `threshold`.
+    """
+    regressions = []
+    for name, now in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        rps_before, p95_before = before["throughput_rps"], before["latency_ms"]["p95"]
+        rps_change = (now["throughput_rps"] - rps_before) / (rps_before or 1)
+        p95_change = (now["latency_ms"]["p95"] - p95_before) / (p95_before or 1)
+        print(f"{name:<14} | req/s {rps_change:+7.1%} | p95 {p95_change:+7.1%}")
+        if rps_change < -threshold:
+            regressions.append(f"{name}: throughput {rps_change:+.1%}")
+        if p95_change > threshold:
+            regressions.append(f"{name}: p95 latency {p95_change:+.1%}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--target", default=INPROCESS, help="'inprocess' or a base URL")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--server-pid", type=int, help="PID of a live server, to sample its RSS")
+    parser.add_argument("--save", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="diff against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+    # Per-request client logs would dominate both the output and the timings
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    print(f"target: {args.target}  requests: {args.requests}  concurrency: {args.concurrency}")
+    print_header()
+    document = asyncio.run(
+        run_suite(args.target, args.scenarios, args.requests, args.concurrency, args.server_pid)
+    )
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"\nbaseline written to {args.save}")
+
+    if args.compare:
+        print(f"\ncompared with {args.compare}:")
+        regressions = compare(document, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            print("\nREGRESSIONS:\n  " + "\n  ".join(regressions))
+            return 1
+        print("\nno regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
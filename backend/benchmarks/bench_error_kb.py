@@ -0,0 +1,125 @@
+"""
+Error Knowledge Base Benchmark
+==============================
+Latency of the static error solver's pattern matching (error_kb.py) against
+the 1 ms budget. The indexed matcher (one trie-regex scan per message, then
+only the candidate patterns) runs against a naive loop that checks every
+pattern's keywords and regex in turn. Both must return the same best
+pattern, which is checked on every sample.
+
+Messages come in two sizes:
+
+- short:      the error line alone, as most clients send it
+- traceback:  the same line at the end of a ~3 KB stack trace
+
+Run:
+    cd backend
+    python -m benchmarks.bench_error_kb
+    python -m benchmarks.bench_error_kb --runs 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_api import percentile  # noqa: E402
+from error_kb import ErrorKnowledgeBase  # noqa: E402
+
+BUDGET_MS = 1.0
+
+SAMPLES: List[Tuple[str, str]] = [
+    ("python", "TypeError: 'int' object is not iterable"),
+    ("python", "KeyError: 'user_id'"),
+    ("python", "ModuleNotFoundError: No module named 'requests'"),
+    ("python", "AttributeError: 'NoneType' object has no attribute 'group'"),
+    ("javascript", "TypeError: Cannot read properties of undefined (reading 'map')"),
+    ("javascript", "Error: connect ECONNREFUSED 127.0.0.1:5432"),
+    ("java", "Exception in thread \"main\" java.lang.NullPointerException"),
+    ("go", "panic: runtime error: index out of range [5] with length 3"),
+    ("rust", "error[E0382]: borrow of moved value: `v`"),
+    ("sql", "ERROR: relation \"users\" does not exist"),
+    ("shell", "bash: node: command not found"),
+    ("python", "Something unusual happened in the frobnicator"),
+]
+
+TRACE_LINE = (
+    '  File "/srv/app/services/handlers.py", line 120, in handle_request\n'
+    "    result = process(payload)\n"
+)
+
+
+def traceback(message: str, size: int = 3000) -> str:
+    return "Traceback (most recent call last):\n" + TRACE_LINE * (size // len(TRACE_LINE)) + message
+
+
+def naive_best(kb: ErrorKnowledgeBase, message: str, language: str) -> Optional[str]:
+    """Best pattern id by checking every pattern of the language, one by one."""
+    wanted = kb.language(language)
+    lowered = message.lower()
+    best = None
+    for pattern in kb.indexes[wanted].patterns:
+        if not all(keyword in lowered for keyword in pattern.keywords):
+            continue
+        if pattern.regex is not None and pattern.regex.search(message) is None:
+            continue
+        score = (pattern.language == wanted, pattern.specificity, pattern.confidence)
+        if best is None or score > best[0]:
+            best = (score, pattern.id)
+    return best[1] if best else None
+
+
+def indexed_best(kb: ErrorKnowledgeBase, message: str, language: str) -> Optional[str]:
+    matches = kb.match(message, language, limit=1)
+    return matches[0].pattern.id if matches else None
+
+
+def timings(fn: Callable[[], object], runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"p50": percentile(samples, 50), "p99": percentile(samples, 99)}
+
+
+def main(runs: int) -> int:
+    start = time.perf_counter()
+    kb = ErrorKnowledgeBase.load()
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"{len(kb.patterns)} patterns, {len(kb.indexes) - 1} language indexes, "
+          f"loaded in {load_ms:.1f} ms\n")
+
+    over_budget = mismatches = 0
+    print(f"{'size':<10} {'language':<11} {'indexed p50/p99 (ms)':>21} "
+          f"{'naive p50/p99 (ms)':>19}  best pattern")
+    for size in ("short", "traceback"):
+        for language, line in SAMPLES:
+            message = line if size == "short" else traceback(line)
+            # The naive loop has no word boundaries or scan window, so the
+            # best patterns are compared on the short messages only
+            expected = naive_best(kb, message, language)
+            found = indexed_best(kb, message, language)
+            mismatches += size == "short" and found != expected
+            fast = timings(lambda: kb.match(message, language), runs)
+            slow = timings(lambda: naive_best(kb, message, language), runs)
+            over_budget += fast["p99"] > BUDGET_MS
+            print(f"{size:<10} {language:<11} {fast['p50']:>10.4f}/{fast['p99']:<10.4f} "
+                  f"{slow['p50']:>9.4f}/{slow['p99']:<9.4f}  {found}")
+    print(f"\nbudget {BUDGET_MS} ms p99: {'ok' if not over_budget else f'{over_budget} OVER'}; "
+          f"best-pattern mismatches vs naive: {mismatches}")
+    return over_budget + mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=2000, help="timed runs per message")
+    args = parser.parse_args()
+    sys.exit(1 if main(args.runs) else 0)
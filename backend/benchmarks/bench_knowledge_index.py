@@ -0,0 +1,136 @@
+"""
+Knowledge Index Benchmark
+=========================
+Query latency and recall of the memory-mapped IVF index (knowledge_index.py)
+at 1M chunks. Vectors are synthetic: unit vectors drawn around many topic
+centres, which clusters them the way embeddings of real documents are
+clustered. Queries come from the same distribution. Recall@k is measured
+against an exact scan of every row, for a range of `nprobe` values (lists
+scanned per query).
+
+Also reported: build time (including k-means training and the grouped
+rewrite), size on disk, the cost of embedding a typical question, and the
+exact scan itself for comparison.
+
+Run:
+    cd backend
+    python -m benchmarks.bench_knowledge_index              # 1M chunks, 256 dimensions
+    python -m benchmarks.bench_knowledge_index --chunks 100000 --queries 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from benchmarks.bench_api import percentile  # noqa: E402
+from knowledge_index import BLOCK_ROWS, HashingEmbedder, VectorIndex  # noqa: E402
+
+NPROBES = (1, 4, 8, 16, 32, 64)
+
+
+def topic_vectors(
+    rng: np.random.Generator, centres: np.ndarray, rows: int, spread: float
+) -> np.ndarray:
+    """Unit vectors scattered around randomly chosen centres."""
+    dim = centres.shape[1]
+    vectors = centres[rng.integers(0, len(centres), rows)]
+    vectors = vectors + rng.normal(scale=spread / np.sqrt(dim), size=(rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(index: VectorIndex, query: np.ndarray, k: int) -> set:
+    """Chunk ids of the true top-k, by scanning every row."""
+    snapshot = index._snapshot
+    scores = np.empty(snapshot.rows, dtype=np.float32)
+    for start in range(0, snapshot.rows, BLOCK_ROWS):
+        scores[start:start + BLOCK_ROWS] = snapshot.vectors[start:start + BLOCK_ROWS] @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    return {int(snapshot.chunk_ids[row]) for row in top}
+
+
+def timed_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(chunks: int, dim: int, queries: int, k: int, topics: int, spread: float,
+         keep: bool) -> int:
+    topics = topics or max(chunks // 100, 1)
+    rng = np.random.default_rng(42)
+    centres = rng.normal(size=(topics, dim)).astype(np.float32)
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True)
+    path = Path(tempfile.mkdtemp(prefix="knowledge-bench-"))
+    try:
+        index = VectorIndex(path, dim)
+        start = time.perf_counter()
+        for first in range(0, chunks, BLOCK_ROWS):
+            rows = min(BLOCK_ROWS, chunks - first)
+            vectors = topic_vectors(rng, centres, rows, spread)
+            index.add(vectors, np.arange(first, first + rows), compact=False)
+        append_s = time.perf_counter() - start
+        index.compact()
+        build_s = time.perf_counter() - start
+        size_mb = sum(f.stat().st_size for f in path.iterdir()) / 1e6
+        lists = len(index._snapshot.centroids)
+        print(f"{chunks:,} chunks x {dim} dims: appended in {append_s:.1f} s, "
+              f"trained and grouped into {lists} lists in {build_s - append_s:.1f} s; "
+              f"{size_mb:.0f} MB on disk\n")
+
+        query_vectors = topic_vectors(rng, centres, queries, spread)
+        truth: List[set] = [exact_top_k(index, query, k) for query in query_vectors]
+        exact = [timed_ms(lambda: exact_top_k(index, query, k)) for query in query_vectors[:10]]
+
+        recall = f"recall@{k}"
+        print(f"{'nprobe':>6} {'rows scanned':>13} {'p50 ms':>8} {'p99 ms':>8} {recall:>10}")
+        for nprobe in NPROBES:
+            index.search(query_vectors[0], k, nprobe)  # warm the page cache for these lists
+            latencies, found = [], 0
+            for query, expected in zip(query_vectors, truth):
+                start = time.perf_counter()
+                hits = index.search(query, k, nprobe)
+                latencies.append((time.perf_counter() - start) * 1000)
+                found += len(expected & {chunk_id for chunk_id, _ in hits})
+            scanned = int(chunks * min(nprobe, lists) / lists)
+            print(f"{nprobe:>6} {scanned:>13,} {percentile(latencies, 50):>8.2f} "
+                  f"{percentile(latencies, 99):>8.2f} {found / (k * queries):>10.3f}")
+        print(f"{'exact':>6} {chunks:>13,} {percentile(exact, 50):>8.2f} "
+              f"{percentile(exact, 99):>8.2f} {1.0:>10.3f}")
+
+        embedder = HashingEmbedder(dim)
+        question = "How do I stream partial JSON from an LLM response to the browser with FastAPI?"
+        embed = [timed_ms(lambda: embedder.embed([question])) for _ in range(200)]
+        print(f"\nembedding a question: p50 {percentile(embed, 50):.3f} ms")
+    finally:
+        if keep:
+            print(f"index kept at {path}")
+        else:
+            shutil.rmtree(path, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--chunks", type=int, default=1_000_000, help="chunks in the index")
+    parser.add_argument("--dim", type=int, default=256, help="embedding dimensions")
+    parser.add_argument("--queries", type=int, default=200, help="timed queries per nprobe")
+    parser.add_argument("--k", type=int, default=10, help="neighbours per query (recall@k)")
+    parser.add_argument("--topics", type=int, default=0,
+                        help="topic centres the chunks cluster around (default: 1 per 100 chunks)")
+    parser.add_argument("--spread", type=float, default=1.0,
+                        help="distance of chunks from their topic centre")
+    parser.add_argument("--keep", action="store_true", help="keep the index directory")
+    args = parser.parse_args()
+    sys.exit(main(args.chunks, args.dim, args.queries, args.k, args.topics, args.spread, args.keep))
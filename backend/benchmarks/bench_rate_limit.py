@@ -0,0 +1,141 @@
+"""
+Rate-Limit Storage Microbenchmark
+=================================
+Measures the cost of one limiter check (`limiter.hit`) for each storage
+backend in rate_limit.py against the 0.2 ms budget, then runs several worker
+processes against one shared limit to show that together they admit exactly
+the limit, no more.
+
+The RESP backend runs against the pure-Python stand-in unless --resp-url
+points at a real Redis; the stand-in is slower than Redis, so treat its
+numbers as an upper bound.
+
+Run:
+    cd backend
+    python -m benchmarks.bench_rate_limit
+    python -m benchmarks.bench_rate_limit --checks 20000 --workers 8
+    python -m benchmarks.bench_rate_limit --resp-url resp://localhost:6379/0
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from limits import parse  # noqa: E402
+from limits.storage import storage_from_string  # noqa: E402
+from limits.strategies import STRATEGIES  # noqa: E402
+
+import rate_limit  # noqa: E402,F401 — registers the sqlite:// and resp:// schemes
+from benchmarks.bench_api import percentile  # noqa: E402
+from benchmarks.resp_standin import RespStandIn  # noqa: E402
+
+BUDGET_MS = 0.2
+DEFAULT_STRATEGY = "sliding-window-counter"
+
+
+def measure(uri: str, checks: int, keys: int = 100, strategy: str = DEFAULT_STRATEGY) -> Dict:
+    """Per-check latency of `hit()` over `keys` distinct clients, in ms."""
+    storage = storage_from_string(uri)
+    storage.reset()
+    limiter = STRATEGIES[strategy](storage)
+    item = parse(f"{checks * 10}/minute")
+    for i in range(min(100, checks)):  # warm connections and pages
+        limiter.hit(item, f"warmup-{i}")
+    samples: List[float] = []
+    for i in range(checks):
+        start = time.perf_counter()
+        limiter.hit(item, f"client-{i % keys}")
+        samples.append((time.perf_counter() - start) * 1000)
+    storage.reset()
+    return {
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": percentile(samples, 50),
+        "p99_ms": percentile(samples, 99),
+    }
+
+
+def _worker(uri: str, limit: int, attempts: int, strategy: str, results) -> None:
+    limiter = STRATEGIES[strategy](storage_from_string(uri))
+    item = parse(f"{limit}/hour")
+    results.put(sum(limiter.hit(item, "shared-client") for _ in range(attempts)))
+
+
+def shared_limit(uri: str, workers: int, limit: int, strategy: str = DEFAULT_STRATEGY) -> int:
+    """Total admitted when `workers` processes race for one client's limit."""
+    storage_from_string(uri).reset()
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=_worker, args=(uri, limit, limit, strategy, results))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    admitted = sum(results.get() for _ in procs)
+    for p in procs:
+        p.join()
+    return admitted
+
+
+def main(checks: int, workers: int, limit: int, resp_url: Optional[str]) -> int:
+    tmp = tempfile.TemporaryDirectory()
+    shm = Path("/dev/shm")
+    backends = {"memory": "memory://", "sqlite (disk)": f"sqlite:///{tmp.name}/rl.db"}
+    if shm.is_dir():
+        backends["sqlite (/dev/shm)"] = f"sqlite:///{shm}/devunity-bench-rl-{time.time_ns()}.db"
+
+    standin = None
+    if resp_url is None:
+        standin = RespStandIn().__enter__()
+        resp_url = standin.url
+        backends["resp (stand-in)"] = resp_url
+    else:
+        backends["resp"] = resp_url
+
+    over_budget = 0
+    try:
+        print(f"{'backend':<20} | {'mean (ms)':>9} | {'p50 (ms)':>8} | {'p99 (ms)':>8} | budget")
+        print("-" * 63)
+        for name, uri in backends.items():
+            r = measure(uri, checks)
+            ok = r["mean_ms"] < BUDGET_MS
+            over_budget += not ok
+            print(f"{name:<20} | {r['mean_ms']:>9.4f} | {r['p50_ms']:>8.4f} | "
+                  f"{r['p99_ms']:>8.4f} | {'ok' if ok else 'OVER'}")
+
+        print(f"\n{workers} processes racing for a {limit}/hour limit:")
+        for name, uri in backends.items():
+            if uri == "memory://":
+                continue  # per-process by design
+            admitted = shared_limit(uri, workers, limit)
+            print(f"  {name:<20} admitted {admitted} of {workers * limit} (limit {limit})")
+    finally:
+        if standin is not None:
+            standin.__exit__(None, None, None)
+        for uri in backends.values():
+            if uri.startswith("sqlite:///") and "/dev/shm/" in uri:
+                for suffix in ("", "-wal", "-shm"):
+                    Path(uri[len("sqlite:///"):] + suffix).unlink(missing_ok=True)
+        tmp.cleanup()
+    return over_budget
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--checks", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--resp-url",
+                        help="Benchmark a real Redis-protocol server instead of the stand-in")
+    args = parser.parse_args()
+    sys.exit(1 if main(args.checks, args.workers, args.limit, args.resp_url) else 0)
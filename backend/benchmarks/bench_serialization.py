@@ -0,0 +1,113 @@
+"""
+JSON Serialization Microbenchmark
+=================================
+Compares the default FastAPI response path (Pydantic model per row →
+response_model serialization → json.dumps) with the opt-in fast path
+(row → dict projection → orjson) for `/api/video/list`-shaped payloads.
+
+Run:
+    cd backend
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --sizes 10 1000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from fast_json import ORJSON_AVAILABLE, fast_json_response, video_to_dict  # noqa: E402
+from main import VideoUpload  # noqa: E402
+
+DEFAULT_SIZES = [10, 1_000, 100_000]
+
+
+def make_rows(n: int) -> list:
+    """Fake `models.Video` rows — attribute access only, no DB needed."""
+    now = datetime.now(timezone.utc)
+    return [
+        SimpleNamespace(
+            id=i,
+            title=f"Video {i}",
+            description="A short educational clip about agentic AI." * 2,
+            uploader="Anonymous",
+            upload_date=now,
+            file_path=f"static_projects/video_{i}.mp4",
+            thumbnail=None,
+            duration="05:00",
+            tags=["ai", "python", "fastapi"],
+        )
+        for i in range(n)
+    ]
+
+
+_response_field = create_model_field(
+    "Response_list_videos", List[VideoUpload], mode="serialization"
+)
+
+
+async def current_path(rows: list) -> bytes:
+    models = [
+        VideoUpload(
+            id=v.id,
+            title=v.title,
+            description=v.description,
+            uploader=v.uploader,
+            upload_date=v.upload_date.isoformat(),
+            file_path=v.file_path,
+            thumbnail=v.thumbnail,
+            duration=v.duration,
+            tags=v.tags,
+        )
+        for v in rows
+    ]
+    content = await serialize_response(field=_response_field, response_content=models)
+    return JSONResponse(content).body
+
+
+async def fast_path(rows: list) -> bytes:
+    return fast_json_response([video_to_dict(v) for v in rows]).body
+
+
+async def measure(fn, rows: list, repeat: int) -> float:
+    """Best-of-N wall time in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def main(sizes: list[int], repeat: int) -> None:
+    print(f"orjson available: {ORJSON_AVAILABLE}")
+    print(f"{'items':>8} | {'current (ms)':>13} | {'fast (ms)':>10} | {'speedup':>7}")
+    print("-" * 48)
+    for n in sizes:
+        rows = make_rows(n)
+        rounds = max(1, repeat if n < 100_000 else 1)
+        current = await measure(current_path, rows, rounds)
+        fast = await measure(fast_path, rows, rounds)
+        print(f"{n:>8} | {current:>13.3f} | {fast:>10.3f} | {current / fast:>6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat))
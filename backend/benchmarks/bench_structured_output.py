@@ -0,0 +1,146 @@
+"""
+Structured Output Benchmark
+===========================
+Throughput and fuzz check for the agents' JSON extraction
+(structured_output.py). It runs the brace-aware scanner against the greedy
+regex it replaced, on large and malformed model outputs:
+
+- valid:      a solution object wrapped in prose and a markdown fence
+- trailing:   the object followed by stray closing braces
+- braces:     string values full of `{`, `}` and escaped quotes
+- truncated:  output cut off mid-object (max_tokens reached)
+- unbalanced: thousands of `{` with no closing brace (regex worst case)
+
+The fuzz pass mutates valid replies at random (cut, duplicate, inject
+braces/quotes/backslashes). It checks that extraction never raises, and
+reports how often a valid solution is still recovered and the slowest case.
+
+Run:
+    cd backend
+    python -m benchmarks.bench_structured_output                # default sizes
+    python -m benchmarks.bench_structured_output --size 1000000 --fuzz 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+from typing import Callable, Dict
+
+from structured_output import ErrorSolution, parse_json_text
+
+_GREEDY = re.compile(r"\{[\s\S]*\}")
+
+SOLUTION = {
+    "explanation": "The variable is used before assignment.",
+    "solution": "Define it before the loop.",
+    "corrected_code": "total = 0\nfor x in xs:\n    total += x",
+    "confidence": 0.9,
+}
+
+
+def sample_outputs(size: int) -> Dict[str, str]:
+    """Model replies of roughly `size` characters, one per scenario."""
+    body = json.dumps({**SOLUTION, "explanation": "x" * max(size - 200, 0)})
+    escapes = ('use {} and "quotes" \\ ' * (size // 24 + 1))[:size]
+    tricky = json.dumps({**SOLUTION, "solution": escapes})
+    return {
+        "valid": f"Here is the fix:\n```json\n{body}\n```\nHope this helps!",
+        "trailing": body + "}}}",
+        "braces": tricky,
+        "truncated": body[: len(body) // 2],
+        "unbalanced": "{" * size,
+    }
+
+
+def regex_extract(text: str):
+    """The extraction the agents used before structured_output.py."""
+    match = _GREEDY.search(text)
+    if not match:
+        return None
+    try:
+        return ErrorSolution.model_validate(json.loads(match.group()))
+    except Exception:
+        return None
+
+
+def scanner_extract(text: str):
+    return parse_json_text(text, ErrorSolution)
+
+
+def mutate(text: str, rng: random.Random) -> str:
+    """One random corruption of a model reply."""
+    choice = rng.randrange(5)
+    pos = rng.randrange(len(text) + 1)
+    if choice == 0:
+        return text[:pos]
+    if choice == 1:
+        return text[:pos] + text[pos:pos + rng.randrange(1, 200)] + text[pos:]
+    junk = rng.choice(["{", "}", '"', "\\", "{}", '{"a":', "}}}}", "\\\""]) * rng.randrange(1, 50)
+    if choice == 2:
+        return text[:pos] + junk + text[pos:]
+    if choice == 3:
+        return junk + text
+    return text + junk
+
+
+def fuzz(cases: int, seed: int = 0) -> dict:
+    """Extract from `cases` mutated replies; report errors, recoveries and the slowest case."""
+    rng = random.Random(seed)
+    base = sample_outputs(2000)["valid"]
+    errors, slowest, found = 0, 0.0, 0
+    for _ in range(cases):
+        text = base
+        for _ in range(rng.randrange(1, 4)):
+            text = mutate(text, rng)
+        start = time.perf_counter()
+        try:
+            found += scanner_extract(text) is not None
+        except Exception:
+            errors += 1
+        slowest = max(slowest, time.perf_counter() - start)
+    return {
+        "cases": cases,
+        "errors": errors,
+        "extracted": found,
+        "slowest_ms": round(slowest * 1000, 3),
+    }
+
+
+def throughput(extract: Callable[[str], object], text: str, budget_s: float = 0.5) -> float:
+    """MB/s for `extract` on `text`, running for about `budget_s` seconds."""
+    runs, start = 0, time.perf_counter()
+    while True:
+        extract(text)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget_s:
+            return runs * len(text) / elapsed / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--size", type=int, default=200_000, help="characters per sample")
+    parser.add_argument("--fuzz", type=int, default=2000, help="fuzz cases")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<12} {'scanner MB/s':>13} {'regex MB/s':>11} "
+          f"{'scanner ok':>11} {'regex ok':>9}")
+    for name, text in sample_outputs(args.size).items():
+        # The greedy regex is quadratic on unbalanced input; cap its sample
+        regex_text = text if name != "unbalanced" else text[:20_000]
+        scanner_ok = scanner_extract(text) is not None
+        regex_ok = regex_extract(regex_text) is not None
+        print(f"{name:<12} {throughput(scanner_extract, text):>13.1f} "
+              f"{throughput(regex_extract, regex_text, budget_s=0.2):>11.1f} "
+              f"{str(scanner_ok):>11} {str(regex_ok):>9}")
+    print(json.dumps({"fuzz": fuzz(args.fuzz)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
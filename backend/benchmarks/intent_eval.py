@@ -0,0 +1,198 @@
+"""
+Intent Router Evaluation
+========================
+Offline accuracy check for the portfolio intent router (intent_router.py)
+against a labelled set of chat questions.
+
+Each case pairs a question with the `get_portfolio_info` topic it should be
+answered from directly. None means it should be escalated to the LLM
+(open-ended, off-topic, or a follow-up that needs the conversation). The
+report gives:
+
+- accuracy:           share of cases routed correctly (right topic, or escalated)
+- direct_precision:   share of direct answers that used the right topic
+                      (a wrong direct answer is the costly mistake)
+- coverage:           share of answerable cases answered without the LLM
+- escalation_recall:  share of LLM-only cases that were escalated
+- route_us:           mean routing time in microseconds
+
+Run:
+    cd backend
+    python -m benchmarks.intent_eval                  # report, exit 1 below the targets
+    python -m benchmarks.intent_eval --threshold 0.6  # try another confidence cut-off
+    python -m benchmarks.intent_eval --errors         # list misrouted questions
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from agent import PORTFOLIO_DATA
+from intent_router import IntentRouter
+
+# Targets the default threshold must meet
+MIN_ACCURACY = 0.9
+MIN_DIRECT_PRECISION = 0.97
+
+EVAL_SET: List[Tuple[str, Optional[str]]] = [
+    # skills
+    ("What are Asadullah's skills?", "skills"),
+    ("What are his skills?", "skills"),
+    ("What tech stack does he use?", "skills"),
+    ("Which programming languages does he know?", "skills"),
+    ("Does he know Python?", "skills"),
+    ("What frameworks is he proficient in?", "skills"),
+    ("Does he have experience with TypeScript?", "skills"),
+    ("List his technical skills", "skills"),
+    ("What technologies does Asadullah work with?", "skills"),
+    ("Is he familiar with Next.js and React?", "skills"),
+    # projects
+    ("Tell me about the projects", "projects"),
+    ("What projects has he built?", "projects"),
+    ("Show me his portfolio projects", "projects"),
+    ("What has he worked on?", "projects"),
+    ("What did he build with LangGraph?", "projects"),
+    ("Tell me about the Textbook RAG Chatbot", "projects"),
+    ("What apps has Asadullah created?", "projects"),
+    ("Any side projects?", "projects"),
+    ("What projects is he working on right now?", "projects"),
+    # hackathons
+    ("What hackathons has he done?", "hackathons"),
+    ("Has he participated in any hackathons?", "hackathons"),
+    ("Which competitions has he entered?", "hackathons"),
+    ("Tell me about the Panaversity hackathon", "hackathons"),
+    ("Did he compete in any contests?", "hackathons"),
+    # contact
+    ("How can I contact him?", "contact"),
+    ("What is his email?", "contact"),
+    ("Is he on Discord?", "contact"),
+    ("Where can I find his GitHub?", "contact"),
+    ("How do I get in touch with Asadullah?", "contact"),
+    ("How can I reach him?", "contact"),
+    ("I'd like to hire him, how do I reach out?", "contact"),
+    ("What's his e-mail address?", "contact"),
+    # education
+    ("Where does he study?", "education"),
+    ("What is his education?", "education"),
+    ("Is he a student?", "education"),
+    ("What is he studying?", "education"),
+    ("Which university or school does he attend?", "education"),
+    ("Did he study computer science?", "education"),
+    # about
+    ("Who is Asadullah?", "about"),
+    ("Tell me about Asadullah", "about"),
+    ("Can you introduce him?", "about"),
+    ("What is he interested in?", "about"),
+    ("What does he specialize in?", "about"),
+    ("What's his background?", "about"),
+    ("Give me a short bio", "about"),
+    # escalate: open-ended, comparative or context-dependent
+    ("Why should I hire him?", None),
+    ("Which of those is strongest?", None),
+    ("Tell me more about the second one", None),
+    ("Compare his React and Python experience", None),
+    ("What do you think is his best project?", None),
+    ("Explain how the RAG chatbot works", None),
+    ("Can you elaborate on that?", None),
+    ("What else has he done?", None),
+    ("Has he used Docker?", None),
+    ("skills and projects?", None),
+    # escalate: technologies the portfolio data does not mention (a canned
+    # skills list would neither confirm nor deny them)
+    ("Does he know Rust?", None),
+    ("Does he know Kubernetes?", None),
+    ("Is he familiar with Java?", None),
+    ("Has he worked with AWS?", None),
+    ("What is his experience with Django?", None),
+    ("Can he write Go?", None),
+    ("Does he use Vue or Angular?", None),
+    ("Did he build any projects with Flutter?", None),
+    ("Is he proficient in PostgreSQL?", None),
+    # escalate: portfolio-sounding but not covered by any topic
+    ("Is he available for freelance work?", None),
+    ("Where does he live?", None),
+    ("How many years of experience does he have?", None),
+    ("What is his hourly rate?", None),
+    ("Does he work remotely?", None),
+    ("What languages does he speak?", None),
+    ("Does he know anyone at Google?", None),
+    ("How much does he charge for a project?", None),
+    ("Has he won any hackathons?", None),
+    ("Does he do mobile apps?", None),
+    ("Can he help me learn Python?", None),
+    ("Can he build me a website?", None),
+    # escalate: off-topic or no signal
+    ("hi", None),
+    ("Hello there!", None),
+    ("What is RAG?", None),
+    ("What's the weather like today?", None),
+    ("Write me a poem", None),
+    ("Thanks!", None),
+    ("Tell me more", None),
+]
+
+
+def evaluate(router: IntentRouter, cases=EVAL_SET) -> dict:
+    answered = correct_direct = answerable = answered_answerable = 0
+    llm_only = escalated_llm_only = correct = 0
+    errors = []
+    elapsed = 0.0
+    for question, expected in cases:
+        start = time.perf_counter()
+        route = router.route(question)
+        elapsed += time.perf_counter() - start
+        topic = route.topic if router.answerable(route) else None
+
+        if expected is None:
+            llm_only += 1
+            escalated_llm_only += topic is None
+        else:
+            answerable += 1
+            answered_answerable += topic is not None
+        if topic is not None:
+            answered += 1
+            correct_direct += topic == expected
+        if topic == expected:
+            correct += 1
+        else:
+            errors.append({"question": question, "expected": expected, "got": topic,
+                           "confidence": route.confidence})
+
+    return {
+        "cases": len(cases),
+        "threshold": router.threshold,
+        "accuracy": round(correct / len(cases), 3),
+        "direct_precision": round(correct_direct / answered, 3) if answered else None,
+        "coverage": round(answered_answerable / answerable, 3) if answerable else None,
+        "escalation_recall": round(escalated_llm_only / llm_only, 3) if llm_only else None,
+        "route_us": round(elapsed / len(cases) * 1e6, 1),
+        "errors": errors,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--threshold", type=float, default=None)
+    parser.add_argument("--errors", action="store_true", help="list misrouted questions")
+    args = parser.parse_args()
+
+    report = evaluate(IntentRouter(PORTFOLIO_DATA, threshold=args.threshold))
+    errors = report.pop("errors")
+    print(json.dumps(report, indent=2))
+    if args.errors:
+        for error in errors:
+            print(f"  {error['question']!r}: expected {error['expected']}, "
+                  f"got {error['got']} ({error['confidence']})")
+    precision = report["direct_precision"] or 0
+    ok = report["accuracy"] >= MIN_ACCURACY and precision >= MIN_DIRECT_PRECISION
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
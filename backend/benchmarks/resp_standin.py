@@ -0,0 +1,169 @@
+"""
+Redis-Protocol Stand-in
+=======================
+A tiny threaded server speaking enough RESP2 for `rate_limit.RespStorage`
+(PING, GET, MGET, SET [NX] [PX], INCRBY, DECRBY, DEL, PTTL, KEYS, FLUSHDB,
+SELECT, AUTH), so tests and the rate-limit benchmark run without a Redis
+install. Commands execute under one lock, matching Redis' single-threaded
+atomicity. Not for production use.
+
+Run:
+    cd backend
+    python -m benchmarks.resp_standin --port 6390
+"""
+
+from __future__ import annotations
+
+import argparse
+import socketserver
+import threading
+import time
+from fnmatch import fnmatchcase
+from typing import Dict, Optional, Tuple
+
+
+class _Store:
+    def __init__(self):
+        self.data: Dict[str, Tuple[str, Optional[float]]] = {}
+        self.lock = threading.Lock()
+
+    def _live(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def execute(self, args: list):
+        name = args[0].upper()
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            return RuntimeError(f"ERR unknown command '{name}'")
+        with self.lock:
+            try:
+                return handler(*args[1:])
+            except (TypeError, ValueError):
+                return RuntimeError(f"ERR wrong arguments for '{name}'")
+
+    def cmd_ping(self):
+        return "+PONG"
+
+    def cmd_auth(self, *_):
+        return "+OK"
+
+    def cmd_select(self, _db):
+        return "+OK"
+
+    def cmd_flushdb(self):
+        self.data.clear()
+        return "+OK"
+
+    def cmd_get(self, key):
+        entry = self._live(key)
+        return entry[0] if entry else None
+
+    def cmd_mget(self, *keys):
+        return [self.cmd_get(k) for k in keys]
+
+    def cmd_set(self, key, value, *options):
+        options = [o.upper() for o in options]
+        if "NX" in options and self._live(key) is not None:
+            return None
+        expires = None
+        if "PX" in options:
+            expires = time.monotonic() + int(options[options.index("PX") + 1]) / 1000
+        self.data[key] = (value, expires)
+        return "+OK"
+
+    def cmd_incrby(self, key, amount):
+        entry = self._live(key)
+        value, expires = entry if entry else ("0", None)
+        new = int(value) + int(amount)
+        self.data[key] = (str(new), expires)
+        return new
+
+    def cmd_decrby(self, key, amount):
+        return self.cmd_incrby(key, -int(amount))
+
+    def cmd_del(self, *keys):
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+    def cmd_pttl(self, key):
+        entry = self._live(key)
+        if entry is None:
+            return -2
+        if entry[1] is None:
+            return -1
+        return int((entry[1] - time.monotonic()) * 1000)
+
+    def cmd_keys(self, pattern):
+        return [k for k in list(self.data) if self._live(k) and fnmatchcase(k, pattern)]
+
+
+def _encode(reply) -> bytes:
+    if isinstance(reply, RuntimeError):
+        return f"-{reply}\r\n".encode()
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(_encode(r) for r in reply)
+    if reply.startswith("+"):
+        return f"{reply}\r\n".encode()
+    data = reply.encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # Replies are small separate writes; with Nagle + delayed ACK each
+    # pipelined round trip would stall ~40 ms
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            count = int(line[1:-2])
+            args = []
+            for _ in range(count):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2].decode())
+            self.wfile.write(_encode(self.server.store.execute(args)))
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """Context manager that serves on 127.0.0.1 (a free port by default)."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.store = _Store()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"resp://127.0.0.1:{self.server_address[1]}/0"
+
+    def __enter__(self) -> "RespStandIn":
+        self._thread = threading.Thread(target=self.serve_forever, name="resp-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    with RespStandIn(args.port) as server:
+        print(f"Serving RESP on {server.url}")
+        threading.Event().wait()
@@ -0,0 +1,272 @@
+"""
+Blocking Work Offload & Event-Loop Block Detection
+==================================================
+`run_blocking()` runs synchronous work (SQLAlchemy sessions, file copies,
+zip extraction) on a dedicated, sized thread pool so async route handlers
+never stall the event loop. Pool utilisation is exported as metrics and via
+`pool_stats()`.
+
+`LoopBlockDetector` (dev/test) times every event-loop callback and attributes
+ones slower than LOOP_BLOCK_THRESHOLD_MS to the HTTP route whose task ran
+them. Tests use the `no_loop_blocking` fixture to fail when a handler blocks.
+
+Both the detector and the profiler's slow-callback logger hook asyncio's
+pure-Python `Handle._run` through `add_callback_observer()`, so they compose
+and cost nothing when no observer is registered (no effect under uvloop).
+
+Configuration:
+    BLOCKING_POOL_SIZE        Worker threads for run_blocking (default min(32, cpus + 4))
+    LOOP_BLOCK_THRESHOLD_MS   Record loop blocks longer than this, 0 = off (default 0)
+
+Usage:
+    from blocking import run_blocking
+
+    messages = await run_blocking(lambda: db.query(ContactMessage).all())
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, List, Optional, Tuple, TypeVar
+
+from metrics import Counter, Gauge, Histogram
+
+T = TypeVar("T")
+
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", str(min(32, (os.cpu_count() or 1) + 4))))
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "0"))
+
+logger = logging.getLogger("blocking")
+
+blocking_pool_active = Gauge("blocking_pool_active", "run_blocking calls currently executing")
+blocking_pool_queued = Gauge("blocking_pool_queued", "run_blocking calls waiting for a thread")
+blocking_pool_wait = Histogram(
+    "blocking_pool_wait_seconds", "Time run_blocking calls wait for a free thread",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0),
+)
+loop_blocks_total = Counter(
+    "event_loop_blocks_total", "Event-loop blocks over LOOP_BLOCK_THRESHOLD_MS by route", ["route"]
+)
+
+
+# ─── Offload Pool ─────────────────────────────────────────────────────────────
+class _PoolStats:
+    __slots__ = ("submitted", "completed", "failed", "active", "queued", "max_queued",
+                 "total_wait", "total_run", "lock")
+
+    def __init__(self):
+        self.submitted = self.completed = self.failed = 0
+        self.active = self.queued = self.max_queued = 0
+        self.total_wait = self.total_run = 0.0
+        self.lock = threading.Lock()
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_stats = _PoolStats()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking"
+        )
+    return _executor
+
+
+def _tracked(fn: Callable[[], T], submitted_at: float) -> T:
+    started = time.perf_counter()
+    wait = started - submitted_at
+    with _stats.lock:
+        _stats.queued -= 1
+        _stats.active += 1
+        _stats.total_wait += wait
+    blocking_pool_queued.dec()
+    blocking_pool_active.inc()
+    blocking_pool_wait.observe(wait)
+    failed = False
+    try:
+        return fn()
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        with _stats.lock:
+            _stats.active -= 1
+            _stats.completed += 1
+            _stats.failed += failed
+            _stats.total_run += time.perf_counter() - started
+        blocking_pool_active.dec()
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run `fn(*args, **kwargs)` on the blocking pool and await the result.
+
+    Context variables (e.g. the LLM session id) are propagated to the thread.
+    """
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    with _stats.lock:
+        _stats.submitted += 1
+        _stats.queued += 1
+        _stats.max_queued = max(_stats.max_queued, _stats.queued)
+    blocking_pool_queued.inc()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), _tracked, call, time.perf_counter())
+
+
+def pool_stats() -> dict:
+    """Current utilisation and lifetime totals of the blocking pool."""
+    with _stats.lock:
+        completed = _stats.completed
+        return {
+            "max_workers": BLOCKING_POOL_SIZE,
+            "active": _stats.active,
+            "queued": _stats.queued,
+            "max_queued": _stats.max_queued,
+            "utilisation": round(_stats.active / BLOCKING_POOL_SIZE, 3),
+            "submitted": _stats.submitted,
+            "completed": completed,
+            "failed": _stats.failed,
+            "avg_wait_ms": round(_stats.total_wait / completed * 1000, 3) if completed else None,
+            "avg_run_ms": round(_stats.total_run / completed * 1000, 3) if completed else None,
+        }
+
+
+def shutdown_blocking_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+# ─── Loop Callback Hook ───────────────────────────────────────────────────────
+CallbackObserver = Callable[[asyncio.Handle, float], None]
+
+_observers: List[Tuple[float, CallbackObserver]] = []
+_original_handle_run = None
+
+
+def _install_hook() -> None:
+    global _original_handle_run
+    if _original_handle_run is not None:
+        return
+    original = asyncio.events.Handle._run
+
+    def _timed_run(handle):
+        start = time.perf_counter()
+        try:
+            return original(handle)
+        finally:
+            elapsed = time.perf_counter() - start
+            for threshold, observer in _observers:
+                if elapsed > threshold:
+                    observer(handle, elapsed)
+
+    _original_handle_run = original
+    asyncio.events.Handle._run = _timed_run
+
+
+def add_callback_observer(threshold_ms: float, observer: CallbackObserver) -> None:
+    """Call `observer(handle, seconds)` for loop callbacks slower than `threshold_ms`."""
+    remove_callback_observer(observer)
+    _observers.append((threshold_ms / 1000, observer))
+    _install_hook()
+
+
+def remove_callback_observer(observer: CallbackObserver) -> None:
+    global _original_handle_run
+    # Bound methods are recreated on each access, so compare by equality
+    _observers[:] = [(t, o) for t, o in _observers if o != observer]
+    if not _observers and _original_handle_run is not None:
+        asyncio.events.Handle._run = _original_handle_run
+        _original_handle_run = None
+
+
+def describe_callback(handle: asyncio.Handle) -> str:
+    """Readable name for a loop callback (the coroutine, for task steps)."""
+    callback = getattr(handle, "_callback", None)
+    task = getattr(callback, "__self__", None)
+    if isinstance(task, asyncio.Task):
+        coro = task.get_coro()
+        return f"Task {task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+    return repr(handle)
+
+
+# ─── Per-route Block Detection ────────────────────────────────────────────────
+_request_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar(
+    "loop_block_request_scope", default=None
+)
+
+
+@dataclass(slots=True)
+class LoopBlock:
+    method: str
+    route: str
+    duration_ms: float
+    callback: str
+
+
+class LoopBlockDetector:
+    """Records loop callbacks over the threshold that ran on behalf of a request."""
+
+    def __init__(self, threshold_ms: Optional[float] = None, max_events: int = 1000):
+        self.threshold_ms = LOOP_BLOCK_THRESHOLD_MS if threshold_ms is None else threshold_ms
+        self.events: Deque[LoopBlock] = deque(maxlen=max_events)
+
+    @property
+    def enabled(self) -> bool:
+        return any(o == self._observe for _, o in _observers)
+
+    def enable(self) -> bool:
+        """Start observing; returns False when the threshold is 0 (disabled)."""
+        if self.threshold_ms <= 0:
+            return False
+        add_callback_observer(self.threshold_ms, self._observe)
+        return True
+
+    def disable(self) -> None:
+        remove_callback_observer(self._observe)
+
+    def clear(self) -> None:
+        self.events.clear()
+
+    def _observe(self, handle: asyncio.Handle, elapsed: float) -> None:
+        context = getattr(handle, "_context", None)
+        scope = context.get(_request_scope) if context is not None else None
+        if scope is None:
+            return
+        route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+        block = LoopBlock(
+            scope.get("method", ""), route, round(elapsed * 1000, 2), describe_callback(handle)
+        )
+        self.events.append(block)
+        loop_blocks_total.inc(route)
+        logger.warning("Event loop blocked %.1f ms in %s %s by %s",
+                       block.duration_ms, block.method, route, block.callback)
+
+
+loop_block_detector = LoopBlockDetector()
+
+
+class LoopBlockMiddleware:
+    """Pure ASGI middleware tagging each request's task for the detector."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            # Each request runs in its own task, so the value dies with the
+            # task; it is not reset so blocks in the final step still count.
+            _request_scope.set(scope)
+        await self.app(scope, receive, send)
@@ -9,21 +9,31 @@ Supports:
 
 Usage:
     from database import get_db, Base, engine
-    
+
     # Create tables
     Base.metadata.create_all(bind=engine)
-    
+
     # Use in FastAPI
     @app.get("/items")
     def get_items(db: Session = Depends(get_db)):
         ...
+
+    # On startup (main.lifespan): one query against alembic_version
+    verify_schema()
 """
 
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from contextlib import contextmanager
+import logging
 import os
+import re
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from sqlalchemy import Column, MetaData, String, Table, create_engine, inspect, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
 
 # Database URL - SQLite for dev, PostgreSQL for production
 DATABASE_URL = os.getenv(
@@ -71,7 +81,7 @@ def get_db_context():
 def get_db():
     """
     Dependency for FastAPI routes.
-    
+
     Usage:
         @app.get("/items")
         def get_items(db: Session = Depends(get_db)):
@@ -86,13 +96,181 @@ def get_db():
 
 def init_db():
     """Initialize database - create all tables."""
-    from models import ContactMessage, Video, LearningProgress, TaughtContent, BackendlessProject, NoTeachLLM
-    
+    import models  # noqa: F401 — registers tables on Base.metadata
+
     Base.metadata.create_all(bind=engine)
-    
+
     print("✅ Database initialized successfully!")
     print(f"📁 Database location: {DATABASE_URL}")
 
 
+# ─── Schema Verification ──────────────────────────────────────────────────────
+# DB_SCHEMA_MODE:
+#   bootstrap (default)  verify; a database without alembic_version (new, or
+#                        created by the old create_all startup) gets missing
+#                        tables created and is stamped at head once, and one
+#                        stamped at an older known revision is upgraded to head
+#   verify               require alembic_version == head (run `alembic upgrade head`)
+#   off                  skip the check
+DB_SCHEMA_MODE = os.getenv("DB_SCHEMA_MODE", "bootstrap").lower()
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", "2"))
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "alembic" / "versions"
+
+logger = logging.getLogger(__name__)
+
+_version_table = Table(
+    "alembic_version", MetaData(),
+    Column("version_num", String(32), primary_key=True),
+)
+_REVISION_RE = re.compile(r"^revision(?::[^=]*)?=\s*['\"]([^'\"]+)['\"]", re.MULTILINE)
+_DOWN_REVISION_RE = re.compile(
+    r"^down_revision(?::[^=]*)?=\s*(?:['\"]([^'\"]+)['\"]|None)", re.MULTILINE
+)
+
+
+class SchemaMismatchError(RuntimeError):
+    """Raised at startup when the database is not at the Alembic head revision."""
+
+
+@lru_cache(maxsize=4)
+def _revision_parents(versions_dir: Path = MIGRATIONS_DIR) -> dict:
+    """`{revision: down_revision}` of the migration scripts, read from their assignments."""
+    parents = {}
+    for script in versions_dir.glob("*.py"):
+        text = script.read_text()
+        revision = _REVISION_RE.search(text)
+        if revision is None:
+            continue
+        down = _DOWN_REVISION_RE.search(text)
+        parents[revision.group(1)] = down.group(1) if down else None
+    return parents
+
+
+@lru_cache(maxsize=1)
+def expected_head_revision(versions_dir: Path = MIGRATIONS_DIR) -> str:
+    """
+    Head revision of the migration scripts, read from their `revision` /
+    `down_revision` assignments (no Alembic import needed at startup).
+    """
+    parents = _revision_parents(versions_dir)
+    heads = set(parents) - set(parents.values())
+    if len(heads) != 1:
+        raise SchemaMismatchError(
+            f"Expected one Alembic head in {versions_dir}, found {sorted(heads)}"
+        )
+    return heads.pop()
+
+
+def current_revision(db_engine=None):
+    """Revision stamped in alembic_version, or None if the table is missing.
+
+    Connection errors propagate, so an unreachable database fails startup
+    with its real cause.
+    """
+    with (db_engine or engine).connect() as conn:
+        if not inspect(conn).has_table(_version_table.name):
+            return None
+        return conn.execute(select(_version_table.c.version_num)).scalar()
+
+
+def is_older_revision(revision: str, head: str, versions_dir: Path = MIGRATIONS_DIR) -> bool:
+    """True if `revision` is an ancestor of `head` in the migration scripts."""
+    parents = _revision_parents(versions_dir)
+    current = parents.get(head)
+    while current is not None:
+        if current == revision:
+            return True
+        current = parents.get(current)
+    return False
+
+
+def _upgrade_schema(db_engine, head: str) -> None:
+    """Run the migration scripts up to `head` on `db_engine` (imports Alembic)."""
+    from alembic import command
+    from alembic.config import Config
+
+    # No ini file: the app's logging configuration stays untouched
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR.parent))
+    with db_engine.begin() as conn:
+        config.attributes["connection"] = conn
+        command.upgrade(config, head)
+
+
+def _wait_for_revision(db_engine, head: str, timeout: float = 30.0):
+    """Poll until another worker's bootstrap or upgrade reaches `head`."""
+    deadline = time.monotonic() + timeout
+    revision = current_revision(db_engine)
+    while revision != head and time.monotonic() < deadline:
+        time.sleep(0.25)
+        revision = current_revision(db_engine)
+    return revision
+
+
+def _bootstrap_schema(db_engine, head: str) -> None:
+    import models  # noqa: F401 — registers tables on Base.metadata
+
+    Base.metadata.create_all(bind=db_engine)
+    with db_engine.begin() as conn:
+        _version_table.create(conn, checkfirst=True)
+        conn.execute(_version_table.insert().values(version_num=head))
+
+
+def verify_schema(db_engine=None, mode: str = None, head: str = None) -> str:
+    """
+    Check the database is at the Alembic head revision (a single query when
+    it is). In bootstrap mode an unstamped or older database is first brought
+    to head; see DB_SCHEMA_MODE.
+
+    Raises SchemaMismatchError so the worker fails fast instead of serving
+    against the wrong schema. Returns the verified revision.
+    """
+    db_engine = db_engine or engine
+    mode = (mode or DB_SCHEMA_MODE).lower()
+    if mode == "off":
+        return "unchecked"
+    head = head or expected_head_revision()
+
+    revision = current_revision(db_engine)
+    if revision == head:
+        return revision
+    if mode == "bootstrap" and (revision is None or is_older_revision(revision, head)):
+        try:
+            if revision is None:
+                _bootstrap_schema(db_engine, head)
+                logger.info(f"Database schema bootstrapped and stamped at '{head}'")
+            else:
+                _upgrade_schema(db_engine, head)
+                logger.info(f"Database schema upgraded from '{revision}' to '{head}'")
+        except SQLAlchemyError as e:
+            # Another worker may be bootstrapping or upgrading concurrently
+            logger.info(
+                f"Schema bootstrap/upgrade raced or failed ({type(e).__name__}); re-checking"
+            )
+            revision = _wait_for_revision(db_engine, head)
+        else:
+            revision = current_revision(db_engine)
+        if revision == head:
+            return revision
+    raise SchemaMismatchError(
+        f"Database schema revision is {revision!r}, expected {head!r}. "
+        f"Run `alembic upgrade head` before starting the API."
+    )
+
+
+def warm_pool(db_engine=None, connections: int = None) -> int:
+    """Open (then return) pool connections so first requests skip the connect."""
+    db_engine = db_engine or engine
+    count = DB_POOL_WARM if connections is None else connections
+    opened = []
+    try:
+        for _ in range(count):
+            opened.append(db_engine.connect())
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+
 if __name__ == "__main__":
     init_db()
@@ -0,0 +1,153 @@
+"""
+Error Solver Batches
+====================
+Solves many errors in one request (`POST /api/agent/solve-errors`) and
+streams each answer as soon as it is ready:
+
+1. **Deduplicate.** Items with identical (error_message, code_snippet,
+   language, context) are solved once. The answer is sent for every index
+   that asked for it.
+
+2. **Known patterns first.** Errors the knowledge base (error_kb.py)
+   matches with at least ERROR_KB_MIN_CONFIDENCE are answered from the
+   matched pattern with no LLM call (`agent.known_error_solution`). These
+   lines are sent before any LLM work starts.
+
+3. **Bounded fan-out.** The remaining unique errors go to
+   `run_error_solver_agent` concurrently, at most ERROR_BATCH_CONCURRENCY
+   at a time. Results are streamed in completion order, so one slow
+   answer does not hold back the rest. Each call keeps the agent's
+   deadline, circuit breaker and static fallback (llm_resilience.py). A
+   failing item therefore still gets an answer and never fails the batch.
+
+The whole batch counts as one request against the "solve-errors"
+concurrency gate. It is charged the expected cost of its LLM-bound items
+only (admission.py), so the deduplicated and pattern-matched items are free.
+
+Anthropic's Message Batches API is not used. Its results arrive minutes to
+hours later, which does not suit a streamed response.
+
+Configuration:
+    ERROR_BATCH_MAX_ITEMS     Errors accepted per batch (default 50)
+    ERROR_BATCH_CONCURRENCY   Concurrent LLM calls per batch (default 4)
+
+Usage:
+    from error_batch import plan_batch, solve_batch
+
+    plan = plan_batch([item.model_dump() for item in request.errors])
+    async for line in solve_batch(plan):
+        yield json.dumps(line) + "\\n"
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from agent import known_error_solution, run_error_solver_agent
+from metrics import Counter
+
+ERROR_BATCH_MAX_ITEMS = int(os.getenv("ERROR_BATCH_MAX_ITEMS", "50"))
+ERROR_BATCH_CONCURRENCY = int(os.getenv("ERROR_BATCH_CONCURRENCY", "4"))
+
+FIELDS = ("error_message", "code_snippet", "language", "context")
+
+Solver = Callable[..., Awaitable[dict]]
+
+error_batch_items_total = Counter(
+    "error_batch_items_total", "Batched error-solver items by how they were answered", ["source"],
+)
+
+
+@dataclass(slots=True)
+class BatchGroup:
+    """One unique error and every batch index that asked for it."""
+
+    item: dict
+    indices: List[int]
+    known: Optional[dict] = None
+
+
+@dataclass(slots=True)
+class BatchPlan:
+    """A batch split into pattern-answered and LLM-bound unique errors."""
+
+    size: int
+    known: List[BatchGroup] = field(default_factory=list)
+    pending: List[BatchGroup] = field(default_factory=list)
+
+    @property
+    def unique(self) -> int:
+        return len(self.known) + len(self.pending)
+
+
+def batch_key(item: dict) -> Tuple:
+    return tuple(item.get(name) for name in FIELDS)
+
+
+def plan_batch(items: List[dict]) -> BatchPlan:
+    """Group identical errors and answer the known patterns up front."""
+    groups: Dict[Tuple, BatchGroup] = {}
+    for index, item in enumerate(items):
+        key = batch_key(item)
+        if key in groups:
+            groups[key].indices.append(index)
+        else:
+            groups[key] = BatchGroup({name: item.get(name) for name in FIELDS}, [index])
+    plan = BatchPlan(size=len(items))
+    for group in groups.values():
+        item = group.item
+        group.known = known_error_solution(
+            item["error_message"], item["code_snippet"], item["language"]
+        )
+        (plan.known if group.known is not None else plan.pending).append(group)
+    return plan
+
+
+def _lines(group: BatchGroup, result: dict, source: str) -> List[dict]:
+    error_batch_items_total.inc(source)
+    if len(group.indices) > 1:
+        error_batch_items_total.inc("duplicate", amount=len(group.indices) - 1)
+    return [{"index": index, "source": source, **result} for index in group.indices]
+
+
+async def solve_batch(plan: BatchPlan, concurrency: Optional[int] = None,
+                      solver: Solver = run_error_solver_agent) -> AsyncIterator[dict]:
+    """
+    Yield one `{"index", "source", ...solution}` dict per batch item, in
+    completion order, then a final `{"done": true, ...}` summary. `source`
+    is "pattern" or "agent".
+    """
+    start = time.perf_counter()
+    for group in plan.known:
+        for line in _lines(group, group.known, "pattern"):
+            yield line
+
+    semaphore = asyncio.Semaphore(max(1, concurrency or ERROR_BATCH_CONCURRENCY))
+
+    async def solve(group: BatchGroup) -> Tuple[BatchGroup, dict]:
+        async with semaphore:
+            return group, await solver(**group.item)
+
+    tasks = [asyncio.create_task(solve(group)) for group in plan.pending]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            group, result = await next_done
+            for line in _lines(group, result, "agent"):
+                yield line
+    finally:
+        # The client went away mid-stream: stop the remaining LLM calls
+        for task in tasks:
+            task.cancel()
+
+    yield {
+        "done": True,
+        "items": plan.size,
+        "unique": plan.unique,
+        "pattern": len(plan.known),
+        "agent": len(plan.pending),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
@@ -0,0 +1,328 @@
+"""
+Error Pattern Knowledge Base
+============================
+Data-driven rules for the static error solver. The rules live in
+`error_patterns/<language>.json` (one file per language, plus
+`generic.json` for errors any language can hit). Each file lists:
+
+    {"language": "python", "aliases": ["py"], "patterns": [{
+        "id": "py-name-not-defined",
+        "keywords": ["nameerror", "is not defined"],
+        "regex": "name '(?P<name>[\\\\w.]+)' is not defined",
+        "explanation": "`$name` is used before it was defined ...",
+        "solution": "...", "corrected_code": "...", "confidence": 0.9}]}
+
+Matching is done once per message, not once per pattern:
+
+1. **Keyword pass.** Every keyword in the knowledge base is compiled into
+   one regex shaped like a trie (`type(?:error)?|...`), so a single
+   left-to-right scan of the lowercased message finds all of them, the
+   way an Aho-Corasick automaton would (overlaps included). The scan runs
+   in the regex engine's C loop and its cost does not grow with the number
+   of patterns. Long tracebacks are scanned at their head and tail only.
+
+2. **Candidates.** Each language index maps a pattern's longest keyword
+   to the pattern. Only patterns whose keywords were *all* found are
+   considered; their optional `regex` then has to match as well, starting
+   at the line where the keyword was found. Its named groups fill `$name`
+   placeholders in the answer, so the explanation can name the actual
+   variable, key or module.
+
+3. **Ranking.** Candidates are ordered by the requested language first,
+   then by specificity (matched keyword characters, plus a bonus for a
+   matching regex), then by confidence.
+
+Each language gets its own index: its own rules plus the generic ones.
+A message that matches nothing there is tried against every language,
+so a JavaScript error sent with the default `language="python"` is still
+recognised.
+
+Configuration:
+    ERROR_KB_PATH   Directory of pattern files (default backend/error_patterns)
+
+Usage:
+    from error_kb import knowledge_base
+
+    matches = knowledge_base().match("KeyError: 'user_id'", language="python")
+    if matches:
+        answer = matches[0].render(code_snippet)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from string import Template
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+ERROR_KB_PATH = Path(os.getenv("ERROR_KB_PATH", str(Path(__file__).parent / "error_patterns")))
+
+GENERIC = "generic"
+ALL_LANGUAGES = "*"
+
+# Ranking bonus for a pattern whose regex matched, in keyword characters
+REGEX_BONUS = 5
+
+# Longer messages are scanned at their head and tail only (see _scan_window)
+MAX_SCAN_CHARS = 4_096
+
+_WORD_CHAR = re.compile(r"\w")
+
+
+# ─── Patterns ─────────────────────────────────────────────────────────────────
+@dataclass(slots=True)
+class ErrorPattern:
+    """One rule: keywords that must all appear, an optional regex, the answer."""
+
+    id: str
+    language: str
+    keywords: Tuple[str, ...]
+    explanation: str
+    solution: str
+    corrected_code: Optional[str] = None
+    confidence: float = 0.8
+    regex: Optional[re.Pattern] = None
+
+    @property
+    def anchor(self) -> str:
+        """The keyword the pattern is indexed by: the longest, so the rarest-looking."""
+        return max(self.keywords, key=len)
+
+    @property
+    def specificity(self) -> int:
+        return sum(len(keyword) for keyword in self.keywords) + (REGEX_BONUS if self.regex else 0)
+
+    @classmethod
+    def from_dict(cls, data: dict, language: str) -> "ErrorPattern":
+        keywords = tuple(keyword.lower() for keyword in data.get("keywords", ()))
+        if not keywords:
+            raise ValueError(f"pattern {data.get('id')!r} has no keywords")
+        regex = data.get("regex")
+        return cls(
+            id=data["id"],
+            language=language,
+            keywords=keywords,
+            explanation=data["explanation"],
+            solution=data["solution"],
+            corrected_code=data.get("corrected_code"),
+            confidence=float(data.get("confidence", 0.8)),
+            regex=re.compile(regex, re.IGNORECASE) if regex else None,
+        )
+
+
+@dataclass(slots=True)
+class Match:
+    """A pattern that matched a message, with its regex captures."""
+
+    pattern: ErrorPattern
+    score: Tuple
+    groups: Dict[str, str] = field(default_factory=dict)
+
+    def render(self, code_snippet: Optional[str] = None) -> dict:
+        """The solver answer, with `$name` placeholders filled from the captures."""
+        def fill(text: str) -> str:
+            return Template(text).safe_substitute(self.groups) if self.groups else text
+
+        code = self.pattern.corrected_code
+        return {
+            "explanation": fill(self.pattern.explanation),
+            "solution": fill(self.pattern.solution),
+            "corrected_code": fill(code) if code is not None else code_snippet,
+            "confidence": self.pattern.confidence,
+        }
+
+
+# ─── Keyword Matcher ──────────────────────────────────────────────────────────
+def _scan_window(message: str) -> str:
+    """
+    The part of a message that is searched. Long tracebacks are cut to their
+    head and tail: Java and Go print the exception first, Python last.
+    """
+    if len(message) <= MAX_SCAN_CHARS:
+        return message
+    half = MAX_SCAN_CHARS // 2
+    return message[:half] + "\n" + message[-half:]
+
+
+def _trie_regex(keywords: Iterable[str]) -> str:
+    """
+    A regex matching any keyword, factored like a trie so each position is
+    tried in O(keyword length). Longer continuations come first, so the
+    longest keyword starting at a position wins.
+    """
+    trie: dict = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # The keyword can end here; try the longer ones first (greedy)
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    """
+    Finds every keyword in a text with one regex scan, and where each first
+    occurs. Keywords that start with a word character only match at the
+    start of a word ("keyerror" must not fire inside "monkeyerror"); the
+    boundary is tested once per position, before the trie, since a
+    lookbehind on every branch makes the scan an order of magnitude slower.
+    The few keywords starting with punctuation (".map is not a function")
+    cannot use that anchor and are found with a substring search instead.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: Set[str] = set(keywords)
+        # Keywords that are prefixes of a longer one; a match of the longer
+        # keyword at a position implies these matched there too
+        self._prefixes: Dict[str, List[str]] = {
+            keyword: [
+                other for other in self.keywords if other != keyword and keyword.startswith(other)
+            ]
+            for keyword in self.keywords
+        }
+        words = [keyword for keyword in self.keywords if _WORD_CHAR.match(keyword)]
+        self._others = sorted(self.keywords.difference(words))
+        self._regex = re.compile(r"\b(?=(" + _trie_regex(words) + "))") if words else None
+
+    def find(self, text: str) -> Dict[str, int]:
+        """Each keyword found in `text`, with the offset of its first occurrence."""
+        found: Dict[str, int] = {}
+        if self._regex is not None:
+            for match in self._regex.finditer(text):
+                keyword = match.group(1)
+                if keyword not in found:
+                    position = match.start()
+                    found[keyword] = position
+                    for prefix in self._prefixes[keyword]:
+                        found.setdefault(prefix, position)
+        for keyword in self._others:
+            position = text.find(keyword)
+            if position >= 0:
+                found[keyword] = position
+        return found
+
+
+class LanguageIndex:
+    """The patterns one language is matched against, by anchor keyword."""
+
+    def __init__(self, patterns: List[ErrorPattern]):
+        self.patterns = patterns
+        self.by_keyword: Dict[str, List[ErrorPattern]] = {}
+        for pattern in patterns:
+            self.by_keyword.setdefault(pattern.anchor, []).append(pattern)
+
+    def candidates(self, found: Dict[str, int]) -> List[ErrorPattern]:
+        """Patterns whose keywords were all found."""
+        return [
+            pattern
+            for keyword in found
+            for pattern in self.by_keyword.get(keyword, ())
+            if all(k in found for k in pattern.keywords)
+        ]
+
+
+# ─── Knowledge Base ───────────────────────────────────────────────────────────
+class ErrorKnowledgeBase:
+    """Pattern files compiled into one keyword matcher and one index per language."""
+
+    def __init__(self, patterns: List[ErrorPattern], aliases: Optional[Dict[str, str]] = None):
+        self.patterns = patterns
+        self.aliases = aliases or {}
+        self.matcher = KeywordMatcher(
+            keyword for pattern in patterns for keyword in pattern.keywords
+        )
+        languages = {pattern.language for pattern in patterns} - {GENERIC}
+        generic = [pattern for pattern in patterns if pattern.language == GENERIC]
+        self.indexes: Dict[str, LanguageIndex] = {
+            language: LanguageIndex([p for p in patterns if p.language == language] + generic)
+            for language in languages
+        }
+        self.indexes[ALL_LANGUAGES] = LanguageIndex(patterns)
+
+    @classmethod
+    def load(cls, path: Path = ERROR_KB_PATH) -> "ErrorKnowledgeBase":
+        patterns: List[ErrorPattern] = []
+        aliases: Dict[str, str] = {}
+        seen: Set[str] = set()
+        for file in sorted(Path(path).glob("*.json")):
+            data = json.loads(file.read_text(encoding="utf-8"))
+            language = data["language"].lower()
+            for alias in [language, *data.get("aliases", ())]:
+                aliases[alias.lower()] = language
+            for entry in data["patterns"]:
+                if entry["id"] in seen:
+                    raise ValueError(f"{file.name}: duplicate pattern id {entry['id']!r}")
+                seen.add(entry["id"])
+                patterns.append(ErrorPattern.from_dict(entry, language))
+        logger.info(f"Loaded {len(patterns)} error patterns from {path}")
+        return cls(patterns, aliases)
+
+    def language(self, name: Optional[str]) -> str:
+        """Canonical language for a request's `language` field (`*` if unknown)."""
+        language = self.aliases.get((name or "").strip().lower(), ALL_LANGUAGES)
+        return language if language in self.indexes else ALL_LANGUAGES
+
+    def match(self, message: str, language: Optional[str] = None, limit: int = 3) -> List[Match]:
+        """Best `limit` matches for an error message, best first."""
+        wanted = self.language(language)
+        text = _scan_window(message)
+        lowered = text.lower()
+        found = self.matcher.find(lowered)
+        if not found:
+            return []
+        # Offsets in the lowered text only carry over when lowering kept the length
+        if len(lowered) != len(text):
+            found = dict.fromkeys(found, 0)
+        matches = self._match(self.indexes[wanted], text, found, wanted)
+        if not matches and wanted != ALL_LANGUAGES:
+            matches = self._match(self.indexes[ALL_LANGUAGES], text, found, wanted)
+        matches.sort(key=lambda m: m.score, reverse=True)
+        return matches[:limit]
+
+    @staticmethod
+    def _match(index: LanguageIndex, text: str, found: Dict[str, int], wanted: str) -> List[Match]:
+        matches = []
+        for pattern in index.candidates(found):
+            groups: Dict[str, str] = {}
+            if pattern.regex is not None:
+                # Start at the line holding the anchor keyword, not the top of a long traceback
+                start = text.rfind("\n", 0, found[pattern.anchor]) + 1
+                hit = pattern.regex.search(text, start)
+                if hit is None:
+                    continue
+                groups = {k: v for k, v in hit.groupdict().items() if v is not None}
+            score = (pattern.language == wanted, pattern.specificity, pattern.confidence)
+            matches.append(Match(pattern, score, groups))
+        return matches
+
+    def stats(self) -> dict:
+        return {
+            "patterns": len(self.patterns),
+            "languages": {
+                name: len(index.patterns)
+                for name, index in sorted(self.indexes.items())
+                if name != ALL_LANGUAGES
+            },
+        }
+
+
+@lru_cache(maxsize=1)
+def knowledge_base() -> ErrorKnowledgeBase:
+    """The process-wide knowledge base, loaded from ERROR_KB_PATH on first use."""
+    return ErrorKnowledgeBase.load(ERROR_KB_PATH)
@@ -0,0 +1,72 @@
+"""
+Fast JSON Responses
+===================
+Opt-in orjson serialization path for high-volume list endpoints.
+
+When FAST_JSON_RESPONSES=true, routes project rows straight into plain dicts
+and return an orjson-backed response. Returning a Response object bypasses
+FastAPI's response_model validation and `jsonable_encoder`, so this is only
+used where the row → dict projection already matches the declared schema.
+
+Requires: orjson (falls back to the stdlib encoder if not installed).
+
+Usage:
+    from fast_json import FAST_JSON_ENABLED, fast_json_response, video_to_dict
+
+    if FAST_JSON_ENABLED:
+        return fast_json_response([video_to_dict(v) for v in videos])
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+# Graceful import — orjson is optional (falls back to json.dumps)
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+FAST_JSON_ENABLED = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
+
+FastJSONResponse = ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
+
+
+def fast_json_response(content: Any, status_code: int = 200) -> JSONResponse:
+    """Serialize already-projected content with the fastest available encoder."""
+    return FastJSONResponse(content=content, status_code=status_code)
+
+
+# ─── Row Projections (trusted schemas) ────────────────────────────────────────
+def video_to_dict(v) -> dict:
+    """Project a `models.Video` row onto the `VideoUpload` response schema."""
+    return {
+        "id": v.id,
+        "title": v.title,
+        "description": v.description,
+        "uploader": v.uploader,
+        "upload_date": v.upload_date.isoformat(),
+        "file_path": v.file_path,
+        "thumbnail": v.thumbnail,
+        "duration": v.duration,
+        "tags": v.tags or [],
+    }
+
+
+def contact_message_to_dict(m) -> dict:
+    """Project a `models.ContactMessage` row onto the admin messages schema."""
+    return {
+        "id": m.id,
+        "name": m.name,
+        "email": m.email,
+        "subject": m.subject,
+        "message": m.message,
+        "timestamp": m.timestamp.isoformat(),
+        "read": m.read,
+        "responded": m.responded,
+    }
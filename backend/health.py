@@ -0,0 +1,197 @@
+"""
+Liveness & Readiness Checks
+===========================
+`/health/live` answers as long as the event loop is running; `/health/ready`
+runs dependency probes and returns 503 when a critical one fails.
+
+Probes run concurrently, each bounded by HEALTH_PROBE_TIMEOUT, and the combined
+result is cached for HEALTH_CACHE_TTL seconds so frequent orchestrator probes
+(and concurrent callers) share one round of checks instead of hammering the
+database.
+
+Configuration:
+    HEALTH_PROBE_TIMEOUT     Seconds per probe before it counts as failed (default 2.0)
+    HEALTH_CACHE_TTL         Seconds a readiness result is reused (default 5.0)
+    HEALTH_MIN_FREE_MB       Minimum free disk for uploads, in MB (default 100)
+
+Usage:
+    from health import ReadinessChecker, db_probe
+
+    readiness = ReadinessChecker()
+    readiness.register("database", db_probe(engine))
+    report = await readiness.check()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "2.0"))
+HEALTH_CACHE_TTL = float(os.getenv("HEALTH_CACHE_TTL", "5.0"))
+HEALTH_MIN_FREE_MB = int(os.getenv("HEALTH_MIN_FREE_MB", "100"))
+
+# A probe returns a detail dict on success and raises on failure. Returning
+# {"status": "skipped"} marks a dependency that is not configured.
+Probe = Callable[[], Awaitable[dict]]
+
+
+class ProbeFailedError(Exception):
+    """Raised by a probe when its dependency is reachable but unhealthy."""
+
+
+@dataclass(slots=True)
+class _RegisteredProbe:
+    name: str
+    probe: Probe
+    critical: bool
+
+
+# ─── Checker ──────────────────────────────────────────────────────────────────
+class ReadinessChecker:
+    """Runs registered probes concurrently and caches the combined report."""
+
+    def __init__(self, timeout: Optional[float] = None, cache_ttl: Optional[float] = None):
+        self.timeout = HEALTH_PROBE_TIMEOUT if timeout is None else timeout
+        self.cache_ttl = HEALTH_CACHE_TTL if cache_ttl is None else cache_ttl
+        self._probes: List[_RegisteredProbe] = []
+        self._report: Optional[dict] = None
+        self._checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def register(self, name: str, probe: Probe, critical: bool = True) -> None:
+        """Add a probe; non-critical failures are reported but keep the pod ready."""
+        self._probes.append(_RegisteredProbe(name, probe, critical))
+
+    def invalidate(self) -> None:
+        self._report = None
+
+    def _fresh(self) -> bool:
+        return self._report is not None and time.monotonic() - self._checked_at < self.cache_ttl
+
+    async def check(self) -> dict:
+        """Return the cached report, or run every probe once if it has expired."""
+        if self._fresh():
+            return self._report
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another request may have refreshed while we waited on the lock
+            if not self._fresh():
+                self._report = await self._run()
+                self._checked_at = time.monotonic()
+        return self._report
+
+    async def _run(self) -> dict:
+        results = await asyncio.gather(*(self._run_probe(p) for p in self._probes))
+        checks = {p.name: result for p, result in zip(self._probes, results)}
+        ready = all(
+            result["status"] != "fail" for p, result in zip(self._probes, results) if p.critical
+        )
+        return {
+            "status": "ready" if ready else "unavailable",
+            "checked_at": time.time(),
+            "checks": checks,
+        }
+
+    async def _run_probe(self, registered: _RegisteredProbe) -> dict:
+        start = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(registered.probe(), timeout=self.timeout)
+            result = {"status": "ok", **(detail or {})}
+        except asyncio.TimeoutError:
+            result = {"status": "fail", "error": f"timed out after {self.timeout}s"}
+        except Exception as e:
+            result = {"status": "fail", "error": f"{type(e).__name__}: {e}"}
+        result["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        result["critical"] = registered.critical
+        return result
+
+
+# ─── Probes ───────────────────────────────────────────────────────────────────
+def db_probe(engine) -> Probe:
+    """`SELECT 1` through the engine's pool, so pool exhaustion shows up too."""
+    from sqlalchemy import text
+
+    def _ping() -> dict:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        pool = engine.pool
+        status = pool.status() if hasattr(pool, "status") else ""
+        return {"pool": status}
+
+    async def probe() -> dict:
+        return await run_in_threadpool(_ping)
+
+    return probe
+
+
+def disk_probe(path_getter: Callable[[], Path], min_free_mb: Optional[int] = None) -> Probe:
+    """Free space and writability of the upload directory."""
+    threshold = HEALTH_MIN_FREE_MB if min_free_mb is None else min_free_mb
+
+    def _check() -> dict:
+        path = Path(path_getter())
+        path.mkdir(parents=True, exist_ok=True)
+        if not os.access(path, os.W_OK):
+            raise ProbeFailedError(f"{path} is not writable")
+        free_mb = shutil.disk_usage(path).free // (1024 * 1024)
+        if free_mb < threshold:
+            raise ProbeFailedError(f"only {free_mb} MB free (need {threshold} MB)")
+        return {"free_mb": free_mb}
+
+    async def probe() -> dict:
+        return await run_in_threadpool(_check)
+
+    return probe
+
+
+def graph_probe(agent_module) -> Probe:
+    """The LangGraph portfolio agent is compiled (skipped when no LLM is configured)."""
+
+    def _compile() -> dict:
+        if not agent_module.LANGGRAPH_AVAILABLE:
+            return {"status": "skipped", "reason": "langgraph not installed"}
+        if not os.getenv("ANTHROPIC_API_KEY"):
+            return {"status": "skipped", "reason": "ANTHROPIC_API_KEY not set"}
+        if agent_module._compiled_graph is None:
+            # Compiling imports the LLM stack; leave that to warm-up / first use
+            return {"status": "pending", "reason": "compiles on warm-up or first agent request"}
+        return {}
+
+    async def probe() -> dict:
+        return await run_in_threadpool(_compile)
+
+    return probe
+
+
+def rate_limit_probe(storage) -> Probe:
+    """The shared rate-limit store answers (limits fall back to memory if not)."""
+
+    def _check() -> dict:
+        if not storage.check():
+            raise ProbeFailedError(
+                f"{type(storage).__name__} is unreachable; using in-memory fallback"
+            )
+        return {"backend": type(storage).__name__}
+
+    async def probe() -> dict:
+        return await run_in_threadpool(_check)
+
+    return probe
+
+
+def status_probe(status_fn: Callable[[], Dict]) -> Probe:
+    """Report an in-process component's state (e.g. a pool) without I/O."""
+
+    async def probe() -> dict:
+        return status_fn()
+
+    return probe
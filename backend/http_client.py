@@ -0,0 +1,58 @@
+"""
+Shared Outbound HTTP Client
+===========================
+One pooled `httpx.AsyncClient` per worker for GitHub and Discord calls,
+instead of a new client (and TCP/TLS handshake) per request.
+
+Usage:
+    from http_client import get_http_client
+
+    client = get_http_client()
+    response = await client.get(url, timeout=30.0)
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+import httpx
+
+from metrics import outbound_event_hooks
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use (or after close)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            ),
+            event_hooks=outbound_event_hooks(),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+def http_client_status() -> dict:
+    """Pool settings and state, for readiness probes."""
+    return {
+        "open": _client is not None and not _client.is_closed,
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "max_keepalive": HTTP_MAX_KEEPALIVE,
+    }
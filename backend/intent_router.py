@@ -0,0 +1,214 @@
+"""
+Portfolio Intent Router
+=======================
+Answers plain portfolio questions ("what are his skills?", "how do I contact
+him?") without the LLM. Each of those otherwise costs two Claude round trips:
+one to pick the `get_portfolio_info` tool, one to phrase its result.
+
+The router is a small keyword/n-gram classifier built once from
+PORTFOLIO_DATA. Every `get_portfolio_info` topic gets a few hand-picked cue
+words (weight 1.0) plus the terms in its own data: skill names, project
+names and tech, hackathon titles, and so on (weight 0.6). A feature that
+appears under several topics has its weight split between them. A question
+is scored by summing the weights of its unigrams and bigrams per topic.
+
+Confidence is the top topic's share of the two best scores, scaled down
+when there is less than one cue word of evidence. It is halved when the
+question is open-ended or refers back to earlier turns ("why", "compare",
+"which of those", "tell me more"); such questions need the LLM. It is
+zero when the question names a well-known technology that PORTFOLIO_DATA
+does not mention ("Does he know Rust?"): the skills template would answer
+without ever saying yes or no. Only
+questions at or above the threshold are answered from the precomputed
+templates. Everything else goes to the LangGraph agent. Routing takes a few
+microseconds.
+
+Accuracy is tracked offline with `python -m benchmarks.intent_eval`.
+
+Configuration:
+    INTENT_ROUTER_ENABLED     Answer confident questions without the LLM (default true)
+    INTENT_ROUTER_THRESHOLD   Minimum confidence for a direct answer (default 0.75)
+
+Usage:
+    from intent_router import IntentRouter
+
+    router = IntentRouter(PORTFOLIO_DATA)
+    route = router.route("What are his skills?")   # Route(topic="skills", confidence=1.0)
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+INTENT_ROUTER_THRESHOLD = float(os.getenv("INTENT_ROUTER_THRESHOLD", "0.75"))
+
+CUE_WEIGHT = 1.0
+DATA_WEIGHT = 0.6
+# Confidence multiplier for open-ended or context-dependent questions
+ESCALATION_PENALTY = 0.5
+
+# Hand-picked cue words per get_portfolio_info topic
+TOPIC_CUES: Dict[str, List[str]] = {
+    "skills": [
+        "skill", "tech", "tech stack", "stack", "technology", "technologies", "language",
+        "programming", "framework", "tool", "know", "familiar", "expertise", "proficient",
+        "experience with",
+    ],
+    "projects": [
+        "project", "built", "build", "building", "work on", "worked on", "portfolio",
+        "app", "application", "made", "created", "side project",
+    ],
+    "hackathons": [
+        "hackathon", "competition", "compete", "competed", "contest", "participated", "event",
+    ],
+    "contact": [
+        "contact", "email", "e-mail", "mail", "discord", "reach", "hire", "in touch",
+        "message him", "github", "connect", "talk to",
+    ],
+    "education": [
+        "education", "study", "studying", "student", "school", "university", "degree",
+        "course", "learning", "studied", "college",
+    ],
+    "about": [
+        "who", "who is", "about him", "about asadullah", "background", "introduce",
+        "introduction", "bio", "interest", "interested", "focus", "specialize", "specializes",
+    ],
+}
+
+# Words that make a question open-ended or dependent on earlier turns
+ESCALATION_CUES = frozenset([
+    "why", "compare", "comparison", "versus", "vs", "difference", "better", "best",
+    "strongest", "weakest", "favorite", "favourite", "recommend", "should", "opinion",
+    "think", "explain", "elaborate", "more", "detail", "details", "those", "these", "them",
+    "it", "that", "second", "third", "last", "previous", "earlier", "else",
+    # Asks what the data cannot answer: prices, spoken languages, results, people
+    "charge", "price", "pricing", "cost", "rate", "hourly", "speak", "won", "win", "anyone",
+])
+
+# Technologies visitors ask about; any not in the portfolio data escalates
+TECHNOLOGY_TERMS = frozenset([
+    "rust", "go", "golang", "java", "kotlin", "swift", "objective-c", "c++", "c#", ".net",
+    "ruby", "rails", "php", "laravel", "scala", "elixir", "haskell", "perl", "dart", "flutter",
+    "lua", "julia", "matlab", "solidity", "zig", "kubernetes", "k8s", "helm", "terraform",
+    "ansible", "aws", "azure", "gcp", "google cloud", "firebase", "supabase", "heroku",
+    "angular", "vue", "svelte", "nuxt", "remix", "django", "flask", "spring", "spring boot",
+    "express", "nestjs", "node.js", "nodejs", "deno", "graphql", "mongodb", "postgresql",
+    "postgres", "mysql", "sqlite", "redis", "kafka", "rabbitmq", "elasticsearch", "spark",
+    "hadoop", "tensorflow", "pytorch", "keras", "scikit-learn", "pandas", "unity", "unreal",
+    "blockchain", "webassembly", "wasm", "jenkins", "linux", "sql", "tailwind", "redux",
+    "jquery", "wordpress", "android", "ios", "mobile", "react native", "electron",
+])
+
+STOPWORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "has", "have", "he", "him", "his", "i", "in", "is", "me", "my", "of", "on", "or", "s", "she",
+    "the", "their", "to", "was", "what", "with", "you", "your", "&", "-",
+])
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9.+#-]*")
+
+
+def _normalize(token: str) -> str:
+    token = token.rstrip(".-")
+    # Cheap plural folding; "skills" and "skill" share a feature
+    if token.isalpha() and len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        token = token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in (_normalize(m) for m in _TOKEN.findall(text.lower())) if t]
+
+
+def features(text: str) -> List[str]:
+    """Unigrams (minus stopwords) and bigrams of `text`."""
+    tokens = tokenize(text)
+    grams = [t for t in tokens if t not in STOPWORDS]
+    grams += [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return grams
+
+
+@dataclass(slots=True)
+class Route:
+    topic: Optional[str]  # None when nothing matched
+    confidence: float
+
+
+class IntentRouter:
+    """Keyword/n-gram classifier over the get_portfolio_info topics."""
+
+    def __init__(self, portfolio: dict, threshold: Optional[float] = None):
+        self.threshold = INTENT_ROUTER_THRESHOLD if threshold is None else threshold
+        data = self._portfolio_phrases(portfolio)
+        self.weights = self._build_index(data)
+        self._escalation = frozenset(" ".join(tokenize(cue)) for cue in ESCALATION_CUES)
+        known = {feature for phrases in data.values() for phrase in phrases
+                 for feature in features(phrase)}
+        terms = frozenset(" ".join(tokenize(term)) for term in TECHNOLOGY_TERMS)
+        self._unknown_tech = terms - known
+
+    @staticmethod
+    def _portfolio_phrases(portfolio: dict) -> Dict[str, List[str]]:
+        """Data phrases per topic: skill names, project names and tech, and so on."""
+        return {
+            "skills": portfolio.get("skills", []),
+            "projects": [
+                text for project in portfolio.get("projects", [])
+                for text in (project["name"], *project.get("tech", []))
+            ],
+            "hackathons": portfolio.get("hackathons", []),
+            "contact": [portfolio.get(k, "") for k in ("email", "discord", "github")],
+            "education": [portfolio.get("education", "")],
+            # Not the name: nearly every question mentions it
+            "about": portfolio.get("interests", []),
+        }
+
+    @staticmethod
+    def _build_index(data: Dict[str, List[str]]) -> Dict[str, Dict[str, float]]:
+        """feature -> {topic: weight}, split between topics sharing a feature."""
+        raw: Dict[str, Dict[str, float]] = defaultdict(dict)
+
+        def add(topic: str, grams: Iterable[str], weight: float) -> None:
+            for feature in grams:
+                raw[feature][topic] = max(raw[feature].get(topic, 0.0), weight)
+
+        for topic, cues in TOPIC_CUES.items():
+            # A cue counts only as a whole ("about him" does not add "about")
+            add(topic, (" ".join(tokenize(cue)) for cue in cues), CUE_WEIGHT)
+        for topic, phrases in data.items():
+            add(topic, (feature for phrase in phrases for feature in features(phrase)), DATA_WEIGHT)
+
+        return {
+            feature: {topic: weight / len(topics) for topic, weight in topics.items()}
+            for feature, topics in raw.items()
+        }
+
+    def scores(self, question: str) -> Dict[str, float]:
+        totals: Dict[str, float] = defaultdict(float)
+        for feature in set(features(question)):
+            for topic, weight in self.weights.get(feature, {}).items():
+                totals[topic] += weight
+        return dict(totals)
+
+    def route(self, question: str) -> Route:
+        """Best topic for `question` and how sure the router is (0..1)."""
+        ranked = sorted(self.scores(question).items(), key=lambda item: item[1], reverse=True)
+        if not ranked:
+            return Route(None, 0.0)
+        topic, best = ranked[0]
+        grams = set(features(question))
+        if self._unknown_tech.intersection(grams):
+            return Route(topic, 0.0)
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        confidence = best / (best + runner_up) * min(1.0, best / CUE_WEIGHT)
+        if self._escalation.intersection(grams):
+            confidence *= ESCALATION_PENALTY
+        return Route(topic, round(confidence, 3))
+
+    def answerable(self, route: Route) -> bool:
+        return route.topic is not None and route.confidence >= self.threshold
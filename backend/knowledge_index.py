@@ -0,0 +1,617 @@
+"""
+Knowledge Index
+===============
+Retrieval for the portfolio agent over approved taught content and blog
+posts. The agent asks for the few chunks relevant to the question through
+the `search_knowledge` tool instead of receiving whole documents in its
+prompt.
+
+- **Chunking.** Documents are split into overlapping windows of
+  CHUNK_WORDS words, each prefixed with the document title.
+
+- **Local embeddings.** `HashingEmbedder` maps word unigrams and bigrams
+  into RAG_EMBED_DIM signed buckets (the hashing trick), with sublinear
+  term weights and L2 normalisation. It needs no model download or GPU
+  and is deterministic across workers. Anything with an `embed(texts)`
+  method returning unit float32 rows can replace it.
+
+- **Memory-mapped IVF index.** Vectors are stored as float32 in flat
+  files under RAG_INDEX_PATH and memory-mapped, so the OS page cache is
+  shared by every worker and startup does not load them. (float16 would
+  halve the files, but numpy converts it in software, which costs several
+  times the matrix product itself.) Once there are
+  MIN_TRAIN_ROWS chunks, k-means centroids partition them into inverted
+  lists stored contiguously. A query scores the centroids and then only
+  the RAG_NPROBE closest lists.
+
+- **Incremental updates.** New chunks are appended to the files and
+  searched exhaustively until they outgrow a fraction of the index. A
+  compaction then files them into their lists (retraining the centroids
+  when the index has grown 4x since the last training) and atomically
+  swaps the files. Searches running meanwhile keep their old mapping.
+
+- **Several workers.** Every uvicorn worker opens the same directory.
+  Writes (appends, compactions, crash recovery) hold an exclusive `flock`
+  on its `lock` file, and each write replaces `meta.json`; a worker that
+  sees `meta.json` change reloads the index, so content indexed by one
+  worker is searchable in all of them.
+
+Configuration:
+    RAG_ENABLED             Index documents and give the agent the search tool (default true)
+    RAG_INDEX_PATH          Directory of the index files (default backend/knowledge_index)
+    RAG_EMBED_DIM           Embedding dimensions; changing it needs a new index (default 256)
+    RAG_TOP_K               Chunks returned to the agent per search (default 4)
+    RAG_NPROBE              Inverted lists scanned per query (default 8)
+    RAG_MAX_CONTEXT_CHARS   Characters of retrieved text per tool result (default 2000)
+
+Usage:
+    from knowledge_index import knowledge_index
+
+    index = knowledge_index()  # None without numpy or with RAG_ENABLED=false
+    index.add_document("taught:12", "Python decorators", text)
+    hits = index.search("how do decorators work?")
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter as TermCounter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple
+
+from metrics import Counter, Histogram
+
+# numpy takes ~80 ms to import, so keep it out of worker startup: only check
+# that it is installed here and import it where vectors are touched
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+if TYPE_CHECKING:
+    import numpy as np
+# POSIX only; elsewhere writes are serialised within the process alone
+FCNTL_AVAILABLE = importlib.util.find_spec("fcntl") is not None
+if FCNTL_AVAILABLE:
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+RAG_ENABLED = os.getenv("RAG_ENABLED", "true").lower() == "true"
+RAG_INDEX_PATH = Path(os.getenv("RAG_INDEX_PATH", Path(__file__).parent / "knowledge_index"))
+RAG_EMBED_DIM = int(os.getenv("RAG_EMBED_DIM", "256"))
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "4"))
+RAG_NPROBE = int(os.getenv("RAG_NPROBE", "8"))
+RAG_MAX_CONTEXT_CHARS = int(os.getenv("RAG_MAX_CONTEXT_CHARS", "2000"))
+
+CHUNK_WORDS = 120
+CHUNK_OVERLAP = 30
+# Below this many chunks every query is exhaustive (and exact)
+MIN_TRAIN_ROWS = 2048
+# Appended rows are filed into lists once they exceed this share of the index
+PENDING_FRACTION = 0.1
+MIN_PENDING_ROWS = 1024
+# k-means trains on this many sampled rows per list
+KMEANS_POINTS_PER_LIST = 256
+KMEANS_ITERATIONS = 10
+# Rows scored per matrix product when scanning or assigning
+BLOCK_ROWS = 65536
+
+_TOKEN = re.compile(r"\w+(?:[+#]+|(?:[.\-]\w+)*)")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can do for from has have how i if in into is it its of on "
+    "or so that the their then there these this to was we what when where which who why will "
+    "with you your".split()
+)
+
+knowledge_chunks_indexed_total = Counter(
+    "knowledge_chunks_indexed_total", "Chunks added to the knowledge index"
+)
+knowledge_search_seconds = Histogram(
+    "knowledge_search_seconds", "Knowledge index query latency (embedding included)",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+
+# ─── Chunking & Embedding ─────────────────────────────────────────────────────
+def chunk_text(text: str, max_words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """Overlapping windows of `max_words` words (the whole text if it fits in one)."""
+    words = text.split()
+    if len(words) <= max_words:
+        return [" ".join(words)] if words else []
+    step = max_words - overlap
+    return [
+        " ".join(words[start:start + max_words]) for start in range(0, len(words) - overlap, step)
+    ]
+
+
+class HashingEmbedder:
+    """Signed feature hashing of word unigrams and bigrams into `dim` buckets."""
+
+    def __init__(self, dim: int = RAG_EMBED_DIM):
+        self.dim = dim
+
+    def features(self, text: str) -> TermCounter:
+        words = [word for word in _TOKEN.findall(text.lower()) if word not in _STOPWORDS]
+        terms = TermCounter(words)
+        terms.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+        return terms
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        """Unit-length float32 rows, one per text (all zeros for a text with no words)."""
+        import numpy as np
+
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for term, count in self.features(text).items():
+                digest = zlib.crc32(term.encode())
+                weight = 1.0 + math.log(count)
+                if " " in term:
+                    weight *= 0.5  # bigrams refine, unigrams carry the topic
+                matrix[row, digest % self.dim] += weight if digest & 0x80000000 else -weight
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+
+# ─── Vector Index ─────────────────────────────────────────────────────────────
+class _IndexLock:
+    """
+    Exclusive, reentrant lock on an index directory, held against other
+    threads (RLock) and other processes (`flock` on the lock file).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self) -> "_IndexLock":
+        self._thread_lock.acquire()
+        if not self._depth:
+            try:
+                self._file = open(self.path, "ab")
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(self._file, fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._depth -= 1
+        if not self._depth:
+            self._file.close()  # releases the flock
+            self._file = None
+        self._thread_lock.release()
+
+
+@dataclass(slots=True)
+class _Snapshot:
+    """What a search reads; replaced as a whole by appends and compactions."""
+
+    rows: int
+    sorted_rows: int
+    vectors: Optional["np.ndarray"]
+    chunk_ids: Optional["np.ndarray"]
+    centroids: Optional["np.ndarray"]
+    offsets: Optional["np.ndarray"]
+
+
+def kmeans(
+    sample: "np.ndarray", k: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0
+) -> "np.ndarray":
+    """Spherical k-means centroids (unit rows) of unit-length `sample` rows."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _nearest(sample, centroids)
+        counts = np.bincount(assignment, minlength=k)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        empty = counts == 0
+        sums = np.zeros_like(centroids)
+        grouped = sample[np.argsort(assignment, kind="stable")]
+        sums[~empty] = np.add.reduceat(grouped, starts[~empty], axis=0)
+        # Re-seed empty lists with random sample rows
+        sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return centroids.astype(np.float32)
+
+
+def _nearest(vectors: "np.ndarray", centroids: "np.ndarray") -> "np.ndarray":
+    """Index of the highest-scoring centroid for every row, in blocks."""
+    import numpy as np
+
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), BLOCK_ROWS):
+        block = vectors[start:start + BLOCK_ROWS]
+        out[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+class VectorIndex:
+    """
+    IVF index over float32 vectors in memory-mapped files:
+
+        meta.json       dim, row counts, list count, trained size
+        vectors.f32     rows x dim; rows [0, sorted_rows) grouped by list
+        chunk_ids.i64   chunk id of every row
+        centroids.npy   list centroids (once trained)
+        offsets.npy     first row of every list, plus the end
+        lock            flock target serialising writers across processes
+
+    Rows past `sorted_rows` were appended since the last compaction and are
+    always scanned. Writers hold `lock` (threads and processes); readers use
+    the current snapshot without locking and reload it, under the lock, when
+    another process has replaced meta.json.
+    """
+
+    def __init__(self, path: Path, dim: int):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.lock = _IndexLock(self.path / "lock")
+        self._stamp = None
+        with self.lock:
+            self._reload()
+
+    def __len__(self) -> int:
+        return self._snapshot.rows
+
+    def _meta_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.path / "meta.json")
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _reload(self) -> None:
+        """Open the files as meta.json describes them (lock held)."""
+        stamp = self._meta_stamp()
+        meta = json.loads((self.path / "meta.json").read_text()) if stamp else {}
+        if meta.get("dim", self.dim) != self.dim:
+            raise ValueError(f"Index at {self.path} has {meta['dim']} dimensions, not {self.dim}")
+        self.trained_rows = meta.get("trained_rows", 0)
+        rows = meta.get("rows", 0)
+        self._drop_tail(rows)
+        self._snapshot = self._open(rows, meta.get("sorted_rows", 0))
+        self._stamp = stamp
+
+    def _drop_tail(self, rows: int) -> None:
+        """Drop anything an interrupted append wrote past the recorded rows (lock held)."""
+        for name, width in (("vectors.f32", 4 * self.dim), ("chunk_ids.i64", 8)):
+            file = self.path / name
+            file.touch()
+            if file.stat().st_size != rows * width:
+                os.truncate(file, rows * width)
+
+    def refresh(self) -> bool:
+        """Pick up rows written by other processes; True if the index changed."""
+        if self._meta_stamp() == self._stamp:
+            return False
+        with self.lock:
+            if self._meta_stamp() != self._stamp:
+                self._reload()
+        return True
+
+    def _write_meta(self, snapshot: _Snapshot) -> None:
+        meta = {
+            "dim": self.dim,
+            "rows": snapshot.rows,
+            "sorted_rows": snapshot.sorted_rows,
+            "trained_rows": self.trained_rows,
+        }
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self.path / "meta.json")
+        self._stamp = self._meta_stamp()
+
+    def _open(self, rows: int, sorted_rows: int) -> _Snapshot:
+        import numpy as np
+
+        vectors = chunk_ids = centroids = offsets = None
+        if rows:
+            vectors = np.memmap(
+                self.path / "vectors.f32", dtype=np.float32, mode="r", shape=(rows, self.dim)
+            )
+            chunk_ids = np.memmap(
+                self.path / "chunk_ids.i64", dtype=np.int64, mode="r", shape=(rows,)
+            )
+        if sorted_rows:
+            centroids = np.load(self.path / "centroids.npy")
+            offsets = np.load(self.path / "offsets.npy")
+        return _Snapshot(rows, sorted_rows, vectors, chunk_ids, centroids, offsets)
+
+    # ─── Writes ───
+    def add(self, vectors: "np.ndarray", chunk_ids: "np.ndarray", compact: bool = True) -> None:
+        """
+        Append unit-length rows, compacting when the unsorted tail is large.
+        Bulk loads pass `compact=False` per batch and call `compact()` once.
+        """
+        import numpy as np
+
+        with self.lock:
+            self.refresh()
+            current = self._snapshot
+            self._drop_tail(current.rows)
+            with open(self.path / "vectors.f32", "ab") as f:
+                f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            with open(self.path / "chunk_ids.i64", "ab") as f:
+                f.write(np.ascontiguousarray(chunk_ids, dtype=np.int64).tobytes())
+            snapshot = self._open(current.rows + len(vectors), current.sorted_rows)
+            self._write_meta(snapshot)
+            self._snapshot = snapshot
+            pending = snapshot.rows - snapshot.sorted_rows
+            threshold = max(MIN_PENDING_ROWS, PENDING_FRACTION * snapshot.sorted_rows)
+            if compact and snapshot.rows >= MIN_TRAIN_ROWS and (
+                not snapshot.sorted_rows or pending > threshold
+            ):
+                self._compact()
+
+    def compact(self) -> None:
+        """File every row into its list now (trains the lists on first use)."""
+        with self.lock:
+            self.refresh()
+            if self._snapshot.rows > self._snapshot.sorted_rows:
+                self._compact()
+
+    def _compact(self) -> None:
+        import numpy as np
+
+        current = self._snapshot
+        rows, vectors = current.rows, current.vectors
+        if not self.trained_rows or rows >= 4 * self.trained_rows:
+            nlist = int(min(max(math.isqrt(rows), 16), 4096))
+            rng = np.random.default_rng(rows)
+            sample_size = min(rows, KMEANS_POINTS_PER_LIST * nlist)
+            sample_ids = np.sort(rng.choice(rows, size=sample_size, replace=False))
+            centroids = kmeans(vectors[sample_ids], nlist)
+            assignment = _nearest(vectors, centroids)
+            self.trained_rows = rows
+        else:
+            # Sorted rows keep their list; only the tail is assigned
+            centroids, offsets = current.centroids, current.offsets
+            sorted_lists = np.repeat(np.arange(len(centroids), dtype=np.int32), np.diff(offsets))
+            tail = _nearest(vectors[current.sorted_rows:], centroids)
+            assignment = np.concatenate([sorted_lists, tail])
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=len(centroids))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        for name, source, dtype in (
+            ("vectors.f32", vectors, np.float32),
+            ("chunk_ids.i64", current.chunk_ids, np.int64),
+        ):
+            tmp = self.path / f"{name}.tmp"
+            with open(tmp, "wb") as f:
+                for start in range(0, rows, BLOCK_ROWS):
+                    block = source[order[start:start + BLOCK_ROWS]]
+                    f.write(np.ascontiguousarray(block, dtype=dtype).tobytes())
+            os.replace(tmp, self.path / name)
+        np.save(self.path / "centroids.npy", centroids)
+        np.save(self.path / "offsets.npy", offsets.astype(np.int64))
+        snapshot = self._open(rows, rows)
+        self._write_meta(snapshot)
+        self._snapshot = snapshot
+        logger.info(f"Knowledge index compacted: {rows} rows in {len(centroids)} lists")
+
+    # ─── Reads ───
+    def search(
+        self, query: "np.ndarray", k: int, nprobe: int = RAG_NPROBE
+    ) -> List[Tuple[int, float]]:
+        """`(chunk_id, score)` of the best `k` rows by inner product, best first."""
+        import numpy as np
+
+        self.refresh()
+        snapshot = self._snapshot
+        if not snapshot.rows:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        blocks = []
+        if snapshot.sorted_rows:
+            offsets = snapshot.offsets
+            scores = snapshot.centroids @ query
+            nprobe = min(nprobe, len(scores))
+            lists = np.argpartition(-scores, nprobe - 1)[:nprobe]
+            blocks = [(offsets[i], offsets[i + 1]) for i in lists if offsets[i + 1] > offsets[i]]
+        if snapshot.rows > snapshot.sorted_rows:
+            blocks.append((snapshot.sorted_rows, snapshot.rows))
+        if not blocks:
+            return []
+        rows = np.concatenate([np.arange(start, end) for start, end in blocks])
+        candidates = np.concatenate([snapshot.vectors[start:end] for start, end in blocks])
+        scores = candidates @ query
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(int(snapshot.chunk_ids[rows[i]]), float(scores[i])) for i in top]
+
+
+# ─── Knowledge Index ──────────────────────────────────────────────────────────
+@dataclass(slots=True)
+class Hit:
+    """One retrieved chunk."""
+
+    score: float
+    source: str
+    title: str
+    text: str
+
+
+class KnowledgeIndex:
+    """
+    Chunks and their vectors. `source` keys ("blog:<slug>", "taught:<id>")
+    make adds idempotent.
+    """
+
+    def __init__(self, path: Path = RAG_INDEX_PATH, dim: int = RAG_EMBED_DIM, embedder=None):
+        self.path = Path(path)
+        self.embedder = embedder or HashingEmbedder(dim)
+        self.vectors = VectorIndex(self.path, dim)
+        self._chunks = self.path / "chunks.jsonl"
+        # Chunk id (= vector row order of insertion) -> byte offset of its line
+        self._offsets: List[int] = []
+        self._end = 0
+        self.sources = set()
+        with self.vectors.lock:
+            self._chunks.touch()
+            self.vectors.refresh()
+            self._read_chunks()
+            # Lines written by an add whose vectors never were (the vectors commit it)
+            os.truncate(self._chunks, self._end)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _read_chunks(self) -> None:
+        """Extend the offsets to every chunk with a vector (lines are never rewritten)."""
+        with self.vectors.lock:
+            rows = len(self.vectors)
+            if len(self._offsets) >= rows:
+                return
+            with open(self._chunks, "rb") as f:
+                f.seek(self._end)
+                for line in f:
+                    if len(self._offsets) == rows or not line.endswith(b"\n"):
+                        break
+                    self._offsets.append(self._end)
+                    self._end += len(line)
+                    source = json.loads(line).get("source")
+                    if source:
+                        self.sources.add(source)
+            if len(self._offsets) < rows:
+                raise ValueError(f"{self._chunks} has fewer chunks than the index has vectors")
+
+    def refresh(self) -> None:
+        """Pick up chunks indexed by other processes."""
+        if self.vectors.refresh() or len(self._offsets) < len(self.vectors):
+            self._read_chunks()
+
+    def add_document(self, source: str, title: str, text: str) -> int:
+        """Chunk, embed and index a document. Returns the chunks added (0 if already indexed)."""
+        self.refresh()
+        if source in self.sources:
+            return 0
+        chunks = chunk_text(text)
+        if not chunks:
+            return 0
+        records = [{"source": source, "title": title, "text": chunk} for chunk in chunks]
+        vectors = self.embedder.embed([f"{title}\n{chunk}" for chunk in chunks])
+        with self.vectors.lock:
+            # Another worker may have indexed it since the check above
+            self.refresh()
+            if source in self.sources:
+                return 0
+            self.add_chunks(vectors, records)
+        return len(chunks)
+
+    def add_chunks(self, vectors: "np.ndarray", records: Sequence[dict]) -> None:
+        """Index precomputed unit vectors with their `{"source", "title", "text"}` records."""
+        import numpy as np
+
+        with self.vectors.lock:
+            self.refresh()
+            first, end = len(self._offsets), self._end
+            os.truncate(self._chunks, end)  # lines of an add that crashed in another process
+            try:
+                with open(self._chunks, "ab") as f:
+                    for record in records:
+                        line = (json.dumps(record, ensure_ascii=False) + "\n").encode()
+                        f.write(line)
+                        self._offsets.append(self._end)
+                        self._end += len(line)
+                self.vectors.add(vectors, np.arange(first, first + len(records), dtype=np.int64))
+            except BaseException:
+                if len(self.vectors) <= first:  # the vectors were never committed
+                    del self._offsets[first:]
+                    self._end = end
+                raise
+            self.sources.update(record["source"] for record in records if record.get("source"))
+        knowledge_chunks_indexed_total.inc(amount=len(records))
+
+    def chunk(self, chunk_id: int) -> dict:
+        if chunk_id >= len(self._offsets):
+            self._read_chunks()
+        with open(self._chunks, "rb") as f:
+            f.seek(self._offsets[chunk_id])
+            return json.loads(f.readline())
+
+    def search(self, query: str, k: int = RAG_TOP_K, nprobe: int = RAG_NPROBE) -> List[Hit]:
+        """The `k` chunks most similar to `query` (none if it shares no words with the index)."""
+        start = time.perf_counter()
+        self.refresh()
+        vector = self.embedder.embed([query])[0]
+        hits = []
+        if vector.any():
+            for chunk_id, score in self.vectors.search(vector, k, nprobe):
+                if score <= 0:
+                    continue
+                record = self.chunk(chunk_id)
+                hits.append(Hit(
+                    score, record.get("source") or "", record.get("title") or "", record["text"]
+                ))
+        knowledge_search_seconds.observe(time.perf_counter() - start)
+        return hits
+
+
+def format_hits(hits: Iterable[Hit], max_chars: int = RAG_MAX_CONTEXT_CHARS) -> str:
+    """Tool result text: best chunks first, cut at `max_chars` so retrieval cannot flood it."""
+    parts, used = [], 0
+    for hit in hits:
+        block = f"[{hit.title}] ({hit.source})\n{hit.text}"
+        if used + len(block) > max_chars:
+            block = block[:max(max_chars - used, 0)]
+        if not block:
+            break
+        parts.append(block)
+        used += len(block) + 2
+    return "\n\n".join(parts)
+
+
+# ─── Documents ────────────────────────────────────────────────────────────────
+def blog_document(post: dict) -> Tuple[str, str, str]:
+    text = f"{post.get('excerpt', '')}\n\n{post.get('content', '')}"
+    return f"blog:{post['slug']}", post["title"], text
+
+
+def taught_document(row) -> Tuple[str, str, str]:
+    """(source, title, text) of a TaughtContent row."""
+    examples = "\n".join(row.examples or [])
+    return f"taught:{row.id}", row.topic, f"{row.content}\n\n{examples}".strip()
+
+
+_index: Optional[KnowledgeIndex] = None
+_index_lock = threading.Lock()
+
+
+def knowledge_index() -> Optional[KnowledgeIndex]:
+    """The shared index, opened on first use; None when disabled, without numpy, or unreadable."""
+    global _index
+    if _index is None and RAG_ENABLED and NUMPY_AVAILABLE:
+        with _index_lock:
+            if _index is None:
+                try:
+                    _index = KnowledgeIndex()
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Knowledge index unavailable: {e}")
+    return _index
+
+
+def sync_documents(documents: Iterable[Tuple[str, str, str]]) -> int:
+    """Index the documents not indexed yet (blocking). Returns the chunks added."""
+    index = knowledge_index()
+    if index is None:
+        return 0
+    return sum(index.add_document(*document) for document in documents)
@@ -0,0 +1,326 @@
+"""
+Lesson Cache
+============
+Generated lesson plans for `/api/learn`, stored in the database and reused
+across requests and workers. Most requests ask for the same popular
+(topic, level, learning_style) triples, and each one otherwise costs a
+5-10 s Claude call with up to 1500 output tokens.
+
+- **Keying.** Topic, level and style are normalised (case, whitespace)
+  and hashed together with the model and the learning prompt, so a prompt
+  or model change starts a fresh cache instead of serving stale lessons.
+  Requests with questions are personal and bypass the cache entirely.
+
+- **TTL + LRU.** Entries expire after LESSON_CACHE_TTL. Past
+  LESSON_CACHE_MAX_ENTRIES the least recently used are deleted. A hit
+  refreshes `last_used_at` at most once a minute, so hot lessons cost
+  a read, not a write, per request.
+
+- **Only real lessons.** Static fallback lessons (no API key, open
+  circuit, parse error) are never stored.
+
+- **Precompute.** A background job takes the top LESSON_PRECOMPUTE_TOP_N
+  triples from the LearningProgress history every
+  LESSON_PRECOMPUTE_INTERVAL seconds. It generates the ones that are
+  missing or will expire before the next run, one at a time. Popular
+  lessons are therefore usually cached before anyone asks. Each worker
+  runs the job. Before generating a lesson a worker claims its key in
+  `lesson_claims`; a worker that loses the claim, or finds the lesson
+  stored once it holds the claim, skips it, so each lesson is generated
+  once per run across all workers.
+
+Configuration:
+    LESSON_CACHE_ENABLED          Serve and store cached lessons (default true)
+    LESSON_CACHE_TTL              Seconds a cached lesson is served (default 604800, 7 days)
+    LESSON_CACHE_MAX_ENTRIES      Lessons kept before LRU eviction (default 1000)
+    LESSON_PRECOMPUTE_TOP_N       Popular triples kept warm, 0 = off (default 20)
+    LESSON_PRECOMPUTE_INTERVAL    Seconds between precompute runs, 0 = off (default 3600)
+
+Usage:
+    from lesson_cache import lesson_cache, lesson_key
+
+    key = lesson_key(topic, level, learning_style, questions)  # None = bypass
+    lesson = await run_blocking(lesson_cache.get, key) if key else None
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import desc, func
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from agent import LEARNING_SYSTEM_PROMPT, LLM_MODEL, run_learning_agent
+from blocking import run_blocking
+from database import SessionLocal
+from metrics import Counter
+from models import CachedLesson, LearningProgress, LessonClaim
+
+logger = logging.getLogger(__name__)
+
+LESSON_CACHE_ENABLED = os.getenv("LESSON_CACHE_ENABLED", "true").lower() == "true"
+LESSON_CACHE_TTL = float(os.getenv("LESSON_CACHE_TTL", str(7 * 24 * 3600)))
+LESSON_CACHE_MAX_ENTRIES = int(os.getenv("LESSON_CACHE_MAX_ENTRIES", "1000"))
+LESSON_PRECOMPUTE_TOP_N = int(os.getenv("LESSON_PRECOMPUTE_TOP_N", "20"))
+LESSON_PRECOMPUTE_INTERVAL = float(os.getenv("LESSON_PRECOMPUTE_INTERVAL", "3600"))
+
+# A hit moves an entry up the LRU at most this often
+TOUCH_SECONDS = 60.0
+# The first precompute run waits for startup and the first requests
+PRECOMPUTE_START_DELAY = 30.0
+# A precompute claim lapses after this long, in case its worker died mid-generation
+PRECOMPUTE_CLAIM_SECONDS = 600.0
+
+# Model and prompt are part of every key: changing either misses the old lessons
+_GENERATION = hashlib.sha256(f"{LLM_MODEL}\x1f{LEARNING_SYSTEM_PROMPT}".encode()).hexdigest()[:16]
+
+lesson_cache_requests_total = Counter(
+    "lesson_cache_requests_total", "/api/learn lesson cache lookups by result", ["result"]
+)
+lesson_precompute_total = Counter(
+    "lesson_precompute_total", "Precomputed lessons by outcome", ["outcome"]
+)
+
+
+# ─── Keys ─────────────────────────────────────────────────────────────────────
+def normalise(
+    topic: str, level: Optional[str], learning_style: Optional[str]
+) -> Tuple[str, str, str]:
+    """The (topic, level, style) triple as it is keyed: case- and whitespace-insensitive."""
+    return (
+        " ".join(topic.split()).casefold(),
+        (level or "beginner").strip().lower(),
+        (learning_style or "interactive").strip().lower(),
+    )
+
+
+def lesson_key(
+    topic: str,
+    level: Optional[str] = None,
+    learning_style: Optional[str] = None,
+    questions: Optional[Sequence[str]] = None,
+) -> Optional[str]:
+    """Cache key for a lesson request, or None when it must bypass the cache."""
+    if not LESSON_CACHE_ENABLED or any(question.strip() for question in questions or ()):
+        return None
+    triple = normalise(topic, level, learning_style)
+    if not triple[0]:
+        return None
+    return hashlib.sha256("\x1f".join((_GENERATION, *triple)).encode()).hexdigest()
+
+
+# ─── Store ────────────────────────────────────────────────────────────────────
+def _utc(value: datetime) -> datetime:
+    """Naive UTC, whether the driver returned a naive (SQLite) or aware (PostgreSQL) value."""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+class LessonCache:
+    """Lesson plans in the `lesson_cache` table. Methods block; call them via run_blocking."""
+
+    def __init__(
+        self,
+        session_factory: Callable = SessionLocal,
+        ttl: float = LESSON_CACHE_TTL,
+        max_entries: int = LESSON_CACHE_MAX_ENTRIES,
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @contextmanager
+    def _session(self):
+        db = self.session_factory()
+        try:
+            yield db
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get(self, key: str) -> Optional[dict]:
+        """The cached lesson for `key`, or None if missing, expired or unreadable."""
+        now = datetime.utcnow()
+        try:
+            with self._session() as db:
+                row = db.query(CachedLesson).filter(
+                    CachedLesson.cache_key == key, CachedLesson.expires_at > now
+                ).first()
+                lesson = dict(row.lesson) if row is not None else None
+                touch = timedelta(seconds=TOUCH_SECONDS)
+                if row is not None and now - _utc(row.last_used_at) >= touch:
+                    row.last_used_at = now
+        except SQLAlchemyError as e:
+            # A cache outage degrades to generating the lesson
+            logger.warning(f"Lesson cache read failed: {e}")
+            lesson = None
+        lesson_cache_requests_total.inc("miss" if lesson is None else "hit")
+        return lesson
+
+    def fresh(self, key: str, horizon: float = 0.0) -> bool:
+        """Whether `key` is cached and still valid `horizon` seconds from now."""
+        cutoff = datetime.utcnow() + timedelta(seconds=horizon)
+        with self._session() as db:
+            return db.query(CachedLesson.id).filter(
+                CachedLesson.cache_key == key, CachedLesson.expires_at > cutoff
+            ).first() is not None
+
+    def claim(self, key: str, hold: float = PRECOMPUTE_CLAIM_SECONDS) -> bool:
+        """
+        Claim `key` for `hold` seconds. False while another worker holds it:
+        a lapsed claim is taken over by a conditional UPDATE and a new one
+        by a primary-key INSERT, so only one worker can win either way.
+        """
+        now = datetime.utcnow()
+        until = now + timedelta(seconds=hold)
+        try:
+            with self._session() as db:
+                if db.query(LessonClaim).filter(
+                    LessonClaim.cache_key == key, LessonClaim.claimed_until <= now
+                ).update({LessonClaim.claimed_until: until}, synchronize_session=False):
+                    return True
+            with self._session() as db:
+                db.add(LessonClaim(cache_key=key, claimed_until=until))
+            return True
+        except IntegrityError:
+            return False
+
+    def release(self, key: str) -> None:
+        """Drop the claim on `key`."""
+        with self._session() as db:
+            db.query(LessonClaim).filter(
+                LessonClaim.cache_key == key
+            ).delete(synchronize_session=False)
+
+    def put(self, key: str, topic: str, level: Optional[str], learning_style: Optional[str],
+            lesson: dict) -> None:
+        """Store (or replace) a lesson, then evict expired and least recently used entries."""
+        now = datetime.utcnow()
+        fields = {
+            "lesson": {
+                name: lesson[name]
+                for name in ("lesson_plan", "resources", "quiz_questions", "next_steps")
+            },
+            "last_used_at": now,
+            "expires_at": now + timedelta(seconds=self.ttl),
+        }
+        topic, level, learning_style = normalise(topic, level, learning_style)
+        try:
+            with self._session() as db:
+                row = db.query(CachedLesson).filter(CachedLesson.cache_key == key).first()
+                if row is None:
+                    db.add(CachedLesson(cache_key=key, topic=topic[:200], level=level[:50],
+                                        learning_style=learning_style[:50], **fields))
+                else:
+                    for name, value in fields.items():
+                        setattr(row, name, value)
+            self.evict()
+        except IntegrityError:
+            # Another worker stored the same lesson first
+            pass
+        except SQLAlchemyError as e:
+            logger.warning(f"Lesson cache write failed: {e}")
+
+    def evict(self) -> int:
+        """Delete expired entries and those past max_entries (least recently used first)."""
+        with self._session() as db:
+            removed = db.query(CachedLesson).filter(
+                CachedLesson.expires_at <= datetime.utcnow()
+            ).delete(synchronize_session=False)
+            stale = [
+                row_id for (row_id,) in db.query(CachedLesson.id)
+                .order_by(desc(CachedLesson.last_used_at)).offset(self.max_entries)
+            ]
+            if stale:
+                removed += db.query(CachedLesson).filter(
+                    CachedLesson.id.in_(stale)
+                ).delete(synchronize_session=False)
+            return removed
+
+    def popular(self, limit: int) -> List[Tuple[str, str, str]]:
+        """The `limit` most requested (topic, level, style) triples in LearningProgress."""
+        topic = func.lower(LearningProgress.topic)
+        level = func.coalesce(LearningProgress.level, "beginner")
+        style = func.coalesce(LearningProgress.learning_style, "interactive")
+        with self._session() as db:
+            rows = (
+                db.query(func.min(LearningProgress.topic), level, style)
+                .group_by(topic, level, style)
+                .order_by(desc(func.count(LearningProgress.id)))
+                .limit(limit)
+                .all()
+            )
+        return [tuple(row) for row in rows]
+
+
+lesson_cache = LessonCache()
+
+
+# ─── Precompute ───────────────────────────────────────────────────────────────
+async def precompute(
+    limit: int = LESSON_PRECOMPUTE_TOP_N,
+    horizon: float = LESSON_PRECOMPUTE_INTERVAL,
+    cache: LessonCache = None,
+) -> int:
+    """
+    Generate the popular lessons that are missing or expire within
+    `horizon` seconds, skipping those another worker has claimed.
+    Returns the number stored.
+    """
+    cache = cache or lesson_cache
+    if limit <= 0 or not LESSON_CACHE_ENABLED:
+        return 0
+    stored = 0
+    for topic, level, learning_style in await run_blocking(cache.popular, limit):
+        key = lesson_key(topic, level, learning_style)
+        if key is None or await run_blocking(cache.fresh, key, horizon):
+            lesson_precompute_total.inc("fresh")
+            continue
+        if not await run_blocking(cache.claim, key):
+            lesson_precompute_total.inc("claimed")
+            continue
+        try:
+            # Another worker may have stored it between the check and the claim
+            if await run_blocking(cache.fresh, key, horizon):
+                lesson_precompute_total.inc("fresh")
+                continue
+            try:
+                result = await run_learning_agent(
+                    topic=topic, level=level, learning_style=learning_style
+                )
+            except Exception as e:
+                logger.warning(f"Lesson precompute failed for {topic!r}: {e}")
+                lesson_precompute_total.inc("error")
+                continue
+            if result.get("mode") != "llm":
+                # No LLM right now; leave the rest for the next run
+                lesson_precompute_total.inc("fallback")
+                break
+            await run_blocking(cache.put, key, topic, level, learning_style, result)
+            lesson_precompute_total.inc("generated")
+            stored += 1
+        finally:
+            await run_blocking(cache.release, key)
+    return stored
+
+
+async def precompute_forever(interval: float = LESSON_PRECOMPUTE_INTERVAL) -> None:
+    """Run `precompute` every `interval` seconds until cancelled."""
+    await asyncio.sleep(PRECOMPUTE_START_DELAY)
+    while True:
+        if os.getenv("ANTHROPIC_API_KEY"):
+            try:
+                stored = await precompute()
+                if stored:
+                    logger.info(f"📚 Precomputed {stored} popular lessons")
+            except Exception as e:
+                logger.warning(f"Lesson precompute run failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,285 @@
+"""
+LLM Resilience
+==============
+Keeps a slow or failing Anthropic API from tying up the agents. The agents
+fall back to their static answers quickly instead of piling up waiting
+requests.
+
+1. **Deadlines.** `llm_guard(agent)` bounds an agent's whole LLM
+   interaction: every call of a LangGraph run, retries included. The
+   limit is LLM_DEADLINE_<AGENT> seconds. Past it the work is cancelled
+   and `TimeoutError` is raised, so the agent answers statically. The
+   SDK request timeout is set to the same value.
+
+2. **Circuit breaker.** One breaker per agent. It opens after
+   LLM_BREAKER_FAILURES consecutive outage-type failures: timeouts,
+   connection errors, 408/429/5xx/529. While open, `llm_guard` raises
+   `CircuitOpenError` immediately. After LLM_BREAKER_COOLDOWN seconds a
+   single probe request is let through. Success closes the breaker;
+   failure re-opens it for another cooldown. Budget and parse errors
+   say nothing about the API's health and are not counted.
+
+3. **Hedged requests** (optional, LLM_HEDGE_ENABLED). If a streamed call
+   has produced no output by the agent's recent p95 time to first token,
+   `hedged()` sends an identical second request. Whichever answers first
+   wins and the other is cancelled. This trades a few duplicate calls on
+   the slow tail for a shorter tail. The cancelled call may still be
+   billed for its input tokens.
+
+Configuration:
+    LLM_DEADLINE_PORTFOLIO      Seconds for a portfolio chat run (default 20)
+    LLM_DEADLINE_ERROR_SOLVER   Seconds for an error-solver call (default 30)
+    LLM_DEADLINE_LEARNING       Seconds for a learning-plan call (default 45)
+    LLM_DEADLINE_TEACHING       Seconds for a teaching call (default 30)
+    LLM_BREAKER_FAILURES        Consecutive failures that open a breaker, 0 = off (default 5)
+    LLM_BREAKER_COOLDOWN        Seconds before an open breaker lets a probe through (default 30)
+    LLM_HEDGE_ENABLED           Send a hedged second request on slow first tokens (default false)
+    LLM_HEDGE_MIN_DELAY         Never hedge earlier than this many seconds (default 1.0)
+
+Usage:
+    from llm_resilience import llm_guard
+
+    async with llm_guard("learning"):
+        response = await invoke_llm(llm, prompt, agent="learning")
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from metrics import Counter, Gauge
+
+T = TypeVar("T")
+
+DEFAULT_DEADLINES = {"portfolio": 20.0, "error_solver": 30.0, "learning": 45.0, "teaching": 30.0}
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0"))
+# Samples needed before the p95 is trusted for hedging
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+# Errors that indicate the API itself is unhealthy (also the retryable ones)
+TRANSIENT_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504, 529})
+TRANSIENT_NAMES = frozenset({
+    "APIConnectionError", "APITimeoutError", "TimeoutError", "ConnectError", "ReadTimeout",
+})
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+llm_circuit_state = Gauge(
+    "llm_circuit_state", "LLM circuit breaker state by agent (0 closed, 1 half-open, 2 open)",
+    ["agent"],
+)
+llm_circuit_rejected_total = Counter(
+    "llm_circuit_rejected_total", "LLM calls skipped because the agent's breaker was open",
+    ["agent"],
+)
+llm_deadline_exceeded_total = Counter(
+    "llm_deadline_exceeded_total", "Agent LLM work cancelled at its deadline", ["agent"]
+)
+llm_hedges_total = Counter(
+    "llm_hedges_total", "Hedged second LLM requests by agent and which request won",
+    ["agent", "winner"],
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the agent's breaker is open."""
+
+
+def is_transient(exc: BaseException) -> bool:
+    """True for errors that say the API is slow, overloaded or unreachable."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    if getattr(exc, "status_code", None) in TRANSIENT_STATUS:
+        return True
+    return type(exc).__name__ in TRANSIENT_NAMES
+
+
+def deadline_for(agent: str) -> float:
+    default = DEFAULT_DEADLINES.get(agent, 30.0)
+    return float(os.getenv(f"LLM_DEADLINE_{agent.upper()}", str(default)))
+
+
+# ─── Circuit Breaker ──────────────────────────────────────────────────────────
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 cooldown: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = (
+            LLM_BREAKER_FAILURES if failure_threshold is None else failure_threshold
+        )
+        self.cooldown = LLM_BREAKER_COOLDOWN if cooldown is None else cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; in half-open only one probe at a time."""
+        if self.failure_threshold <= 0 or self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self._set(HALF_OPEN)
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probing = False
+        if self.state != CLOSED:
+            self._set(CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or (
+            self.failure_threshold > 0 and self.failures >= self.failure_threshold
+        ):
+            self.opened_at = time.monotonic()
+            self._set(OPEN)
+
+    def record_neutral(self) -> None:
+        """The call ended without telling us anything about the API's health."""
+        self._probing = False
+
+    def _set(self, state: str) -> None:
+        self.state = state
+        llm_circuit_state.set(_STATE_VALUE[state], self.name)
+
+    def status(self) -> dict:
+        retry_in = 0.0
+        if self.state == OPEN:
+            retry_in = max(self.cooldown - (time.monotonic() - self.opened_at), 0.0)
+        return {"state": self.state, "failures": self.failures, "retry_in_s": round(retry_in, 1)}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def breaker_for(agent: str) -> CircuitBreaker:
+    if agent not in _breakers:
+        _breakers[agent] = CircuitBreaker(agent)
+    return _breakers[agent]
+
+
+def circuit_status() -> dict:
+    return {name: breaker.status() for name, breaker in sorted(_breakers.items())}
+
+
+@asynccontextmanager
+async def llm_guard(agent: str):
+    """
+    Run the block under the agent's breaker and deadline. Raises CircuitOpenError
+    without running it while the breaker is open, and TimeoutError when the
+    deadline passes.
+    """
+    breaker = breaker_for(agent)
+    if not breaker.allow():
+        llm_circuit_rejected_total.inc(agent)
+        raise CircuitOpenError(f"{agent} LLM calls are paused after repeated failures")
+    try:
+        async with asyncio.timeout(deadline_for(agent)):
+            yield
+    except TimeoutError:
+        llm_deadline_exceeded_total.inc(agent)
+        breaker.record_failure()
+        raise
+    except BaseException as exc:
+        if is_transient(exc):
+            breaker.record_failure()
+        else:
+            breaker.record_neutral()
+        raise
+    else:
+        breaker.record_success()
+
+
+# ─── Hedging ──────────────────────────────────────────────────────────────────
+class LatencyWindow:
+    """Recent samples of one latency (time to first token) for percentiles."""
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+_ttft_windows: Dict[str, LatencyWindow] = {}
+
+
+def ttft_window(agent: str) -> LatencyWindow:
+    if agent not in _ttft_windows:
+        _ttft_windows[agent] = LatencyWindow()
+    return _ttft_windows[agent]
+
+
+def hedge_delay(agent: str) -> Optional[float]:
+    """When to send the hedge: the agent's p95 first-token time, or None."""
+    window = ttft_window(agent)
+    if not LLM_HEDGE_ENABLED or len(window.samples) < HEDGE_MIN_SAMPLES:
+        return None
+    return max(window.percentile(95), LLM_HEDGE_MIN_DELAY)
+
+
+Attempt = Callable[[asyncio.Event], Awaitable[Tuple[T, Optional[float]]]]
+
+
+async def hedged(agent: str, attempt: Attempt) -> Tuple[T, Optional[float]]:
+    """
+    Run `attempt(first_output)` and, when hedging is on and it has not set
+    `first_output` by the hedge delay, race an identical second attempt.
+    Attempts return `(result, ttft)`; the winner's ttft feeds the p95.
+    """
+    delay = hedge_delay(agent)
+    first_output = asyncio.Event()
+    primary = asyncio.create_task(attempt(first_output))
+    tasks = [primary]
+    try:
+        if delay is not None:
+            started = asyncio.create_task(first_output.wait())
+            await asyncio.wait(
+                {primary, started}, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+            )
+            started.cancel()
+            if not primary.done() and not first_output.is_set():
+                tasks.append(asyncio.create_task(attempt(asyncio.Event())))
+
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    result, ttft = task.result()
+                    if ttft is not None:
+                        ttft_window(agent).add(ttft)
+                    if len(tasks) > 1:
+                        llm_hedges_total.inc(agent, "hedge" if task is not primary else "primary")
+                    return result, ttft
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
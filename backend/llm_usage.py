@@ -0,0 +1,355 @@
+"""
+LLM Call Instrumentation
+========================
+Single entry point for every Claude call made by agent.py.
+
+`invoke_llm()` streams the response so it can record:
+- input / output / cache tokens (from LangChain `usage_metadata`)
+- time-to-first-token and total latency
+- retries (the SDK's own retries are disabled so they are visible here)
+- hedged second requests on a slow first token (llm_resilience.py)
+- estimated cost per agent type
+
+and enforces an optional per-session token budget. `stream_llm()` does the
+same for callers that forward the chunks as they arrive (the SSE lesson
+endpoints). Static fallbacks are
+recorded with `record_fallback()`. Everything is exported as Prometheus
+metrics and summarised for the admin endpoint by `usage_summary()`.
+
+Configuration:
+    LLM_MAX_RETRIES            Retries for transient API errors (default 2)
+    LLM_SESSION_TOKEN_BUDGET   Max tokens per session_id, 0 = unlimited (default 0)
+
+Usage:
+    from llm_usage import invoke_llm, session_scope
+
+    with session_scope(session_id):
+        message = await invoke_llm(llm, messages, agent="portfolio")
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional
+
+from llm_resilience import hedged, is_transient
+from metrics import SLOW_BUCKETS, Counter, Histogram, track_outbound
+
+LLM_MODEL = "claude-haiku-4-5-20251001"
+# Shortest prefix (tools + system + messages up to the breakpoint) LLM_MODEL caches
+LLM_MIN_CACHEABLE_TOKENS = 4096
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = 0.5  # seconds, doubled per attempt with jitter
+LLM_SESSION_TOKEN_BUDGET = int(os.getenv("LLM_SESSION_TOKEN_BUDGET", "0"))
+MAX_TRACKED_SESSIONS = 10_000
+
+# USD per million tokens
+MODEL_PRICING: Dict[str, Dict[str, float]] = {
+    "claude-haiku-4-5-20251001": {
+        "input": 1.00,
+        "output": 5.00,
+        "cache_read": 0.10,
+        "cache_write": 1.25,
+    },
+}
+
+current_session_id: ContextVar[Optional[str]] = ContextVar("current_session_id", default=None)
+
+
+class LLMBudgetExceededError(Exception):
+    """Raised when a session has used up its token budget."""
+
+
+# ─── Metrics ──────────────────────────────────────────────────────────────────
+llm_calls_total = Counter("llm_calls_total", "LLM calls by agent and outcome", ["agent", "outcome"])
+llm_tokens_total = Counter("llm_tokens_total", "LLM tokens by agent and kind", ["agent", "kind"])
+llm_cost_usd_total = Counter("llm_cost_usd_total", "Estimated LLM spend in USD by agent", ["agent"])
+llm_retries_total = Counter("llm_retries_total", "LLM call retries by agent", ["agent"])
+llm_fallbacks_total = Counter(
+    "llm_fallbacks_total", "Static fallbacks by agent and reason", ["agent", "reason"]
+)
+llm_latency = Histogram(
+    "llm_request_duration_seconds", "Total LLM call latency by agent", ["agent"],
+    buckets=SLOW_BUCKETS,
+)
+llm_ttft = Histogram(
+    "llm_time_to_first_token_seconds", "LLM time to first token by agent", ["agent"],
+    buckets=SLOW_BUCKETS,
+)
+
+
+# ─── Aggregates (admin summary) ───────────────────────────────────────────────
+@dataclass(slots=True)
+class AgentUsage:
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    fallbacks: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    cost_usd: float = 0.0
+    total_latency: float = 0.0
+    total_ttft: float = 0.0
+    ttft_samples: int = 0
+
+
+_agent_usage: Dict[str, AgentUsage] = {}
+# session_id -> tokens used, LRU-bounded so abandoned sessions age out
+_session_tokens: "OrderedDict[str, int]" = OrderedDict()
+
+
+def _usage_for(agent: str) -> AgentUsage:
+    usage = _agent_usage.get(agent)
+    if usage is None:
+        usage = _agent_usage[agent] = AgentUsage()
+    return usage
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int,
+                  cache_read: int = 0, cache_write: int = 0) -> float:
+    """Estimate USD cost of one call. `input_tokens` includes cached tokens."""
+    pricing = MODEL_PRICING.get(model)
+    if pricing is None:
+        return 0.0
+    uncached = max(input_tokens - cache_read - cache_write, 0)
+    return (
+        uncached * pricing["input"]
+        + cache_read * pricing["cache_read"]
+        + cache_write * pricing["cache_write"]
+        + output_tokens * pricing["output"]
+    ) / 1_000_000
+
+
+# ─── Sessions & Budgets ───────────────────────────────────────────────────────
+@contextmanager
+def session_scope(session_id: Optional[str]):
+    """Attribute LLM calls made inside the block to `session_id`."""
+    token = current_session_id.set(session_id)
+    try:
+        yield
+    finally:
+        current_session_id.reset(token)
+
+
+def session_tokens(session_id: Optional[str]) -> int:
+    return _session_tokens.get(session_id, 0) if session_id else 0
+
+
+def session_over_budget(session_id: Optional[str]) -> bool:
+    """True when the session has used its LLM_SESSION_TOKEN_BUDGET."""
+    if not session_id or LLM_SESSION_TOKEN_BUDGET <= 0:
+        return False
+    return session_tokens(session_id) >= LLM_SESSION_TOKEN_BUDGET
+
+
+def _charge_session(session_id: Optional[str], tokens: int) -> None:
+    if not session_id:
+        return
+    _session_tokens[session_id] = _session_tokens.get(session_id, 0) + tokens
+    _session_tokens.move_to_end(session_id)
+    while len(_session_tokens) > MAX_TRACKED_SESSIONS:
+        _session_tokens.popitem(last=False)
+
+
+# ─── Recording ────────────────────────────────────────────────────────────────
+def record_fallback(agent: str, reason: str) -> None:
+    """Record that an agent answered from its static path instead of the LLM."""
+    llm_fallbacks_total.inc(agent, reason)
+    _usage_for(agent).fallbacks += 1
+
+
+def record_usage(agent: str, message: Any, latency: float, ttft: Optional[float],
+                 model: str = LLM_MODEL) -> None:
+    """Record tokens, cost and latency from a completed LangChain AI message."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    input_tokens = int(usage.get("input_tokens", 0))
+    output_tokens = int(usage.get("output_tokens", 0))
+    cache_read = int(details.get("cache_read", 0) or 0)
+    cache_write = int(details.get("cache_creation", 0) or 0)
+    cost = estimate_cost(model, input_tokens, output_tokens, cache_read, cache_write)
+
+    llm_calls_total.inc(agent, "ok")
+    llm_tokens_total.inc(agent, "input", amount=input_tokens)
+    llm_tokens_total.inc(agent, "output", amount=output_tokens)
+    if cache_read:
+        llm_tokens_total.inc(agent, "cache_read", amount=cache_read)
+    if cache_write:
+        llm_tokens_total.inc(agent, "cache_write", amount=cache_write)
+    llm_cost_usd_total.inc(agent, amount=cost)
+    llm_latency.observe(latency, agent)
+    if ttft is not None:
+        llm_ttft.observe(ttft, agent)
+
+    stats = _usage_for(agent)
+    stats.calls += 1
+    stats.input_tokens += input_tokens
+    stats.output_tokens += output_tokens
+    stats.cache_read_tokens += cache_read
+    stats.cache_write_tokens += cache_write
+    stats.cost_usd += cost
+    stats.total_latency += latency
+    if ttft is not None:
+        stats.total_ttft += ttft
+        stats.ttft_samples += 1
+
+    _charge_session(current_session_id.get(), input_tokens + output_tokens)
+
+
+def _has_output(chunk: Any) -> bool:
+    return bool(getattr(chunk, "content", None) or getattr(chunk, "tool_call_chunks", None))
+
+
+def _collapse_text_blocks(message: Any) -> Any:
+    """Streamed chunks merge into a list of content blocks; callers expect the
+    plain string `ainvoke` returns, so collapse text-only block lists."""
+    content = message.content
+    if isinstance(content, list) and all(
+        isinstance(block, dict) and block.get("type") == "text" for block in content
+    ):
+        message.content = "".join(block.get("text", "") for block in content)
+    return message
+
+
+# ─── Invocation ───────────────────────────────────────────────────────────────
+async def invoke_llm(llm: Any, messages: Any, agent: str, model: str = LLM_MODEL) -> Any:
+    """
+    Call `llm` with full instrumentation and return the aggregated AI message.
+
+    Streams internally so time-to-first-token can be measured; the chunks are
+    merged back into one message (content, tool calls and usage included).
+    Raises LLMBudgetExceededError when the current session is over budget.
+    """
+    session_id = current_session_id.get()
+    if session_over_budget(session_id):
+        raise LLMBudgetExceededError(f"Session '{session_id}' exceeded its token budget")
+
+    async def stream_once(first_output: asyncio.Event):
+        start = time.perf_counter()
+        ttft: Optional[float] = None
+        message = None
+        async with track_outbound("anthropic"):
+            async for chunk in llm.astream(messages):
+                if ttft is None and _has_output(chunk):
+                    ttft = time.perf_counter() - start
+                    first_output.set()
+                message = chunk if message is None else message + chunk
+        return message, ttft
+
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            message, ttft = await hedged(agent, stream_once)
+        except Exception as exc:
+            if attempt < LLM_MAX_RETRIES and is_transient(exc):
+                attempt += 1
+                llm_retries_total.inc(agent)
+                _usage_for(agent).retries += 1
+                delay = min(LLM_RETRY_BASE_DELAY * 2 ** (attempt - 1), 4.0)
+                await asyncio.sleep(delay * (0.5 + random.random()))
+                continue
+            llm_calls_total.inc(agent, "error")
+            _usage_for(agent).errors += 1
+            raise
+        if message is None:
+            llm_calls_total.inc(agent, "error")
+            _usage_for(agent).errors += 1
+            raise RuntimeError("LLM returned an empty stream")
+        record_usage(agent, message, time.perf_counter() - start, ttft, model)
+        return _collapse_text_blocks(message)
+
+
+async def stream_llm(
+    llm: Any, messages: Any, agent: str, model: str = LLM_MODEL
+) -> AsyncIterator[Any]:
+    """
+    Call `llm` with the same instrumentation as `invoke_llm`, yielding each
+    chunk as it arrives. Usage is recorded when the stream ends.
+
+    Transient errors are retried only until the first chunk with output
+    has been yielded; after that the caller has already forwarded it. The
+    call is never hedged, since a half-consumed stream cannot be swapped
+    for another.
+    """
+    session_id = current_session_id.get()
+    if session_over_budget(session_id):
+        raise LLMBudgetExceededError(f"Session '{session_id}' exceeded its token budget")
+
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        ttft: Optional[float] = None
+        message = None
+        try:
+            async with track_outbound("anthropic"):
+                async for chunk in llm.astream(messages):
+                    if ttft is None and _has_output(chunk):
+                        ttft = time.perf_counter() - start
+                    message = chunk if message is None else message + chunk
+                    yield chunk
+        except Exception as exc:
+            if ttft is None and attempt < LLM_MAX_RETRIES and is_transient(exc):
+                attempt += 1
+                llm_retries_total.inc(agent)
+                _usage_for(agent).retries += 1
+                delay = min(LLM_RETRY_BASE_DELAY * 2 ** (attempt - 1), 4.0)
+                await asyncio.sleep(delay * (0.5 + random.random()))
+                continue
+            llm_calls_total.inc(agent, "error")
+            _usage_for(agent).errors += 1
+            raise
+        if message is None:
+            llm_calls_total.inc(agent, "error")
+            _usage_for(agent).errors += 1
+            raise RuntimeError("LLM returned an empty stream")
+        record_usage(agent, message, time.perf_counter() - start, ttft, model)
+        return
+
+
+def usage_summary(top_sessions: int = 10) -> dict:
+    """Per-agent totals plus the heaviest sessions, for the admin endpoint."""
+    agents = {}
+    for agent, stats in sorted(_agent_usage.items()):
+        agents[agent] = {
+            "calls": stats.calls,
+            "errors": stats.errors,
+            "retries": stats.retries,
+            "fallbacks": stats.fallbacks,
+            "input_tokens": stats.input_tokens,
+            "output_tokens": stats.output_tokens,
+            "cache_read_tokens": stats.cache_read_tokens,
+            "cache_write_tokens": stats.cache_write_tokens,
+            # Share of input tokens served from the prompt cache
+            "cache_hit_ratio": (
+                round(stats.cache_read_tokens / stats.input_tokens, 3)
+                if stats.input_tokens else None
+            ),
+            "estimated_cost_usd": round(stats.cost_usd, 6),
+            "avg_latency_ms": (
+                round(stats.total_latency / stats.calls * 1000, 1) if stats.calls else None
+            ),
+            "avg_ttft_ms": (
+                round(stats.total_ttft / stats.ttft_samples * 1000, 1)
+                if stats.ttft_samples else None
+            ),
+        }
+    heaviest = sorted(
+        _session_tokens.items(), key=lambda item: item[1], reverse=True
+    )[:top_sessions]
+    return {
+        "model": LLM_MODEL,
+        "session_token_budget": LLM_SESSION_TOKEN_BUDGET or None,
+        "agents": agents,
+        "total_cost_usd": round(sum(s.cost_usd for s in _agent_usage.values()), 6),
+        "top_sessions": [{"session_id": sid, "tokens": tokens} for sid, tokens in heaviest],
+    }
@@ -9,10 +9,14 @@ Endpoints:
   - /api/github/stats   GitHub profile stats proxy
   - /api/agent/chat     LangGraph agentic portfolio assistant
   - /api/agent/solve-error  AI agent that solves coding errors
+  - /api/agent/solve-errors Batch error solving, streamed as NDJSON
   - /api/video/upload   Video upload endpoint
   - /api/video/list     List uploaded videos
   - /api/learn          Learn through LLM feature
+  - /api/learn/stream   Lesson streamed field by field as SSE
   - /api/teach          Teach to LLM feature
+  - /api/teach/stream   Structured contribution streamed as SSE
+  - /api/admin/teach/{id}/approve  Approve taught content into the knowledge index
   - /api/noteachllm     NoTeachLLM - Opt-out of AI training
   - /api/backendless    Backendless project support
   - /mcp/*              MCP (Model Context Protocol) server tools
@@ -29,16 +33,20 @@ Supports:
   - NoTeachLLM privacy controls
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, UploadFile, File, Form, Depends
+from fastapi import (
+    FastAPI, HTTPException, BackgroundTasks, Request, Response, UploadFile, File, Form, Depends,
+    Query,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Dict, Any, AsyncIterator
+from contextlib import asynccontextmanager
 from datetime import datetime
 import asyncio
 import httpx
+import time
 import os
 import logging
 import base64
@@ -52,9 +60,43 @@ from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 
 # Local modules
-from agent import run_agent, run_error_solver_agent, run_learning_agent, run_teaching_agent
+import agent
+from agent import (
+    answer_from_router, run_agent, run_error_solver_agent, run_learning_agent, run_teaching_agent,
+    stream_learning_agent, stream_teaching_agent,
+)
+from error_batch import ERROR_BATCH_MAX_ITEMS, plan_batch, solve_batch
+from intent_router import INTENT_ROUTER_ENABLED
+from knowledge_index import (
+    RAG_ENABLED, blog_document, knowledge_index, sync_documents, taught_document,
+)
+from lesson_cache import (
+    LESSON_PRECOMPUTE_INTERVAL, LESSON_PRECOMPUTE_TOP_N, lesson_cache, lesson_cache_requests_total,
+    lesson_key, precompute_forever,
+)
+from llm_resilience import circuit_status
 from mcp_server import router as mcp_router
-from database import engine, get_db, init_db, Base
+from static_cache import (
+    SPA_FALLBACK_DEFAULT, build_manifest, get_manifest, drop_manifest, set_spa_fallback,
+    normalize_request_path, cached_file_response,
+)
+from access_log import AccessLogMiddleware, start_access_logging
+from metrics import MetricsMiddleware, render_metrics, instrument_engine, app_info
+from http_client import get_http_client, close_http_client, http_client_status
+from health import (
+    ReadinessChecker, db_probe, disk_probe, graph_probe, rate_limit_probe, status_probe,
+)
+from profiler import (
+    MIN_STALL_MS, ProfilerBusyError, capture_profile, install_slow_callback_logger,
+)
+from rate_limit import RATE_LIMIT_STORAGE, RATE_LIMIT_STRATEGY
+from admission import LLMAdmission
+from blocking import (
+    run_blocking, pool_stats, shutdown_blocking_pool, loop_block_detector, LoopBlockMiddleware,
+)
+from llm_usage import usage_summary
+from fast_json import FAST_JSON_ENABLED, fast_json_response, video_to_dict, contact_message_to_dict
+from database import engine, get_db, get_db_context, init_db, verify_schema, warm_pool
 from models import ContactMessage, Video, LearningProgress, TaughtContent, BackendlessProject, NoTeachLLM
 from db_helpers import (
     create_contact_message, get_contact_messages, mark_message_read,
@@ -73,8 +115,85 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ─── Lifespan ─────────────────────────────────────────────────────────────────
+async def warm_up_agents() -> None:
+    """Load the LLM stack in the background so the first agent request is fast."""
+    try:
+        elapsed = await run_blocking(agent.warm_up)
+        logger.info(f"🤖 Agent warm-up finished in {elapsed:.2f}s")
+    except Exception as e:
+        logger.warning(f"Agent warm-up failed (will load on first use): {e}")
+
+
+def index_knowledge() -> int:
+    """Add blog posts and approved taught content missing from the knowledge index (blocking)."""
+    documents = [blog_document(post) for post in blog_posts_data]
+    with get_db_context() as db:
+        rows = db.query(TaughtContent).filter(TaughtContent.approved.is_(True)).all()
+        documents += [taught_document(row) for row in rows]
+    return sync_documents(documents)
+
+
+async def build_knowledge_index() -> None:
+    """Bring the knowledge index up to date in the background."""
+    try:
+        added = await run_blocking(index_knowledge)
+        if added:
+            logger.info(f"📚 Indexed {added} knowledge chunks")
+    except Exception as e:
+        logger.warning(f"Knowledge indexing failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup: check the schema revision (see DB_SCHEMA_MODE), warm the DB pool
+    and outbound client, prime the readiness report and start the agent
+    warm-up, knowledge indexing and popular-lesson precompute in the
+    background. Shutdown: close pools.
+
+    DB_SCHEMA_MODE decides what the schema check does:
+      bootstrap (default)  a database at head costs one query; a new or
+                           unstamped one gets its tables created and is
+                           stamped at head, and one at an older revision is
+                           upgraded to head, before the worker serves
+      verify               fail fast unless the database is at head (apply
+                           migrations with `alembic upgrade head` on deploy)
+      off                  no check
+    """
+    start = time.perf_counter()
+    revision = await run_blocking(verify_schema)
+    connections = await run_blocking(warm_pool)
+    get_http_client()
+    if install_slow_callback_logger():
+        logger.info("Slow event-loop callback logging enabled")
+    await readiness.check()
+    warmup_task = asyncio.create_task(warm_up_agents()) if AGENT_WARMUP else None
+    knowledge_task = asyncio.create_task(build_knowledge_index()) if RAG_ENABLED else None
+    precompute_task = (
+        asyncio.create_task(precompute_forever())
+        if LESSON_PRECOMPUTE_INTERVAL > 0 and LESSON_PRECOMPUTE_TOP_N > 0 else None
+    )
+    logger.info(
+        f"✅ Startup complete in {(time.perf_counter() - start) * 1000:.0f} ms "
+        f"(schema '{revision}', {connections} pooled connections)"
+    )
+    try:
+        yield
+    finally:
+        for task in (warmup_task, knowledge_task, precompute_task):
+            if task is not None:
+                task.cancel()
+        await close_http_client()
+        shutdown_blocking_pool()
+
+
 # ─── App Setup ───────────────────────────────────────────────────────────────
+# Reported by the OpenAPI schema, /, /health, /api and the app_info metric
+APP_VERSION = "2.3.0"
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Asadullah.dev Portfolio API",
     description="""
 ## Backend API for Asadullah Shafique's Portfolio
@@ -98,15 +217,26 @@ Currently open for demo purposes. Add API key authentication before production u
 ### Database
 Uses SQLite for development, PostgreSQL for production.
     """,
-    version="2.3.0",
+    version=APP_VERSION,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
 )
 
 # ─── Rate Limiting Setup ──────────────────────────────────────────────────────
-limiter = Limiter(key_func=get_remote_address)
+# RATELIMIT_ENABLED=false turns limits off for load tests (benchmarks/bench_api.py).
+# RATE_LIMIT_STORAGE shares counters across workers (see rate_limit.py); if a
+# shared store is unreachable, limits fall back to per-process memory.
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=RATE_LIMIT_STORAGE,
+    strategy=RATE_LIMIT_STRATEGY,
+    in_memory_fallback_enabled=not RATE_LIMIT_STORAGE.startswith("memory://"),
+    enabled=os.getenv("RATELIMIT_ENABLED", "true").lower() == "true",
+)
 app.state.limiter = limiter
+# Token budgets and concurrency caps for the Claude-backed endpoints
+admission = LLMAdmission(limiter)
 app.add_middleware(SlowAPIMiddleware)
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -137,18 +267,12 @@ app.add_middleware(
 # Mount MCP server router
 app.include_router(mcp_router)
 
-# ─── Database Initialization ──────────────────────────────────────────────────
-@app.on_event("startup")
-async def startup_db():
-    """Initialize database on startup."""
-    Base.metadata.create_all(bind=engine)
-    logger.info("✅ Database initialized")
-
 # ─── Environment Variables ────────────────────────────────────────────────────
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL", "")
 GITHUB_USERNAME = os.getenv("GITHUB_USERNAME", "asadullah48")
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 ADMIN_SECRET = os.getenv("ADMIN_SECRET", "")
+AGENT_WARMUP = os.getenv("AGENT_WARMUP", "true").lower() == "true"
 
 
 def require_admin(request: Request) -> None:
@@ -222,6 +346,13 @@ backendless_projects: list[dict] = []
 STATIC_DIR = Path("static_projects")
 STATIC_DIR.mkdir(exist_ok=True)
 
+
+def _save_upload(file: UploadFile, destination: Path) -> None:
+    """Copy an upload to disk (blocking; call through run_blocking)."""
+    with open(destination, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+
 blog_posts_data: list[dict] = [
     {
         "id": 1,
@@ -313,10 +444,10 @@ async def send_discord_notification(contact: ContactRequest) -> None:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(DISCORD_WEBHOOK_URL, json={"embeds": [embed]})
-            response.raise_for_status()
-            logger.info(f"Discord notification sent for contact from {contact.name}")
+        client = get_http_client()
+        response = await client.post(DISCORD_WEBHOOK_URL, json={"embeds": [embed]})
+        response.raise_for_status()
+        logger.info(f"Discord notification sent for contact from {contact.name}")
     except httpx.HTTPError as e:
         logger.error(f"Discord webhook error: {e}")
     except Exception as e:
@@ -330,6 +461,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail, "status_code": exc.status_code},
+        headers=exc.headers,  # e.g. Retry-After from admission.py
     )
 
 
@@ -343,13 +475,19 @@ async def general_exception_handler(request: Request, exc: Exception):
 
 
 # ─── Middleware ───────────────────────────────────────────────────────────────
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all incoming requests for debugging and monitoring."""
-    logger.info(f"{request.method} {request.url.path}")
-    response = await call_next(request)
-    logger.info(f"Response: {response.status_code}")
-    return response
+# Prometheus request metrics (see /metrics)
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+app_info.set(1, APP_VERSION)
+
+# Dev/test only: attribute event-loop blocks to routes (LOOP_BLOCK_THRESHOLD_MS)
+if loop_block_detector.enable():
+    app.add_middleware(LoopBlockMiddleware)
+
+# Structured access log: one JSON record per request, written by a background
+# thread. Added last so it wraps every other middleware.
+start_access_logging()
+app.add_middleware(AccessLogMiddleware)
 
 
 # ─── Routes ───────────────────────────────────────────────────────────────────
@@ -360,7 +498,7 @@ async def root():
     """Health check endpoint."""
     return HealthResponse(
         status="healthy",
-        version="2.1.0",
+        version=APP_VERSION,
         timestamp=datetime.utcnow().isoformat(),
         environment="production" if ANTHROPIC_API_KEY else "development",
     )
@@ -371,12 +509,79 @@ async def health():
     """Detailed health check endpoint."""
     return HealthResponse(
         status="healthy",
-        version="2.1.0",
+        version=APP_VERSION,
         timestamp=datetime.utcnow().isoformat(),
         environment="production" if ANTHROPIC_API_KEY else "development",
     )
 
 
+# Liveness only proves the worker's event loop is serving requests; readiness
+# checks dependencies and is what load balancers should route on.
+readiness = ReadinessChecker()
+readiness.register("database", db_probe(engine))
+readiness.register("disk", disk_probe(lambda: STATIC_DIR))
+readiness.register("agent_graph", graph_probe(agent), critical=False)
+readiness.register("http_client", status_probe(http_client_status), critical=False)
+readiness.register("blocking_pool", status_probe(pool_stats), critical=False)
+readiness.register("rate_limit", rate_limit_probe(limiter._storage), critical=False)
+
+
+@app.get("/health/live", tags=["Health"])
+async def health_live():
+    """Liveness probe: no dependency checks."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["Health"])
+async def health_ready():
+    """Readiness probe: 503 when a critical dependency check fails."""
+    report = await readiness.check()
+    status_code = 200 if report["status"] == "ready" else 503
+    return JSONResponse(status_code=status_code, content=report)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (text exposition format)."""
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/api/admin/profile", tags=["Health"])
+async def profile_worker(
+    seconds: float = Query(5.0, gt=0, le=60),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    stall_ms: float = Query(50.0, ge=MIN_STALL_MS),
+    all_threads: bool = True,
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+    _: None = Depends(require_admin),
+):
+    """
+    Sample this worker's stacks for `seconds` and return a flamegraph-ready
+    collapsed-stack file. Event-loop stalls longer than `stall_ms` are tagged
+    `[loop-stall]`; `format=json` adds a stall summary.
+
+    Requires the `X-Admin-Token` header to match the `ADMIN_SECRET` env var.
+    Only profiles the worker that receives the request.
+    """
+    try:
+        profile = await capture_profile(seconds, interval_ms, stall_ms, all_threads)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if format == "json":
+        return {**profile.summary(), "collapsed": profile.collapsed()}
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{os.getpid()}.collapsed"',
+            "X-Profile-Samples": str(profile.samples),
+            "X-Loop-Stalls": str(len(profile.stalls)),
+        },
+    )
+
+
 # ─── Contact ──────────────────────────────────────────────────────────────────
 @app.post("/api/contact", response_model=ContactResponse, tags=["Contact"])
 @limiter.limit("5/minute")  # Rate limit: 5 submissions per minute
@@ -403,10 +608,14 @@ async def submit_contact(
         subject=contact.subject,
         message=contact.message,
     )
-    db.add(db_message)
-    db.commit()
-    db.refresh(db_message)
-    
+
+    def _save() -> None:
+        db.add(db_message)
+        db.commit()
+        db.refresh(db_message)
+
+    await run_blocking(_save)
+
     # Send Discord notification
     background_tasks.add_task(send_discord_notification, contact)
     logger.info(f"📬 Contact from {contact.name} <{contact.email}>: {contact.subject}")
@@ -429,23 +638,16 @@ async def get_messages(
     Requires the `X-Admin-Token` header to match the `ADMIN_SECRET` env var.
     Returns 401 Unauthorized if the token is missing or incorrect.
     """
-    messages = db.query(ContactMessage).order_by(ContactMessage.timestamp.desc()).all()
-    return {
-        "messages": [
-            {
-                "id": m.id,
-                "name": m.name,
-                "email": m.email,
-                "subject": m.subject,
-                "message": m.message,
-                "timestamp": m.timestamp.isoformat(),
-                "read": m.read,
-                "responded": m.responded,
-            }
-            for m in messages
-        ],
+    messages = await run_blocking(
+        lambda: db.query(ContactMessage).order_by(ContactMessage.timestamp.desc()).all()
+    )
+    content = {
+        "messages": [contact_message_to_dict(m) for m in messages],
         "total": len(messages),
     }
+    if FAST_JSON_ENABLED:
+        return fast_json_response(content)
+    return content
 
 
 # ─── Blog ─────────────────────────────────────────────────────────────────────
@@ -462,6 +664,9 @@ async def get_blog_posts(featured: Optional[bool] = None, limit: Optional[int] =
         posts = [p for p in posts if p["featured"] == featured]
     if limit:
         posts = posts[:limit]
+    if FAST_JSON_ENABLED:
+        # blog_posts_data already matches BlogPost — skip per-item validation
+        return fast_json_response(posts)
     return posts
 
 
@@ -489,22 +694,24 @@ async def get_github_stats():
         if github_token:
             headers["Authorization"] = f"token {github_token}"
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Fetch user profile
-            user_res = await client.get(
-                f"https://api.github.com/users/{GITHUB_USERNAME}",
-                headers=headers,
-            )
-            user_res.raise_for_status()
-            user_data = user_res.json()
-
-            # Fetch repos to calculate stars
-            repos_res = await client.get(
-                f"https://api.github.com/users/{GITHUB_USERNAME}/repos?per_page=100",
-                headers=headers,
-            )
-            repos_res.raise_for_status()
-            repos_data = repos_res.json()
+        client = get_http_client()
+        # Fetch user profile
+        user_res = await client.get(
+            f"https://api.github.com/users/{GITHUB_USERNAME}",
+            headers=headers,
+            timeout=30.0,
+        )
+        user_res.raise_for_status()
+        user_data = user_res.json()
+
+        # Fetch repos to calculate stars
+        repos_res = await client.get(
+            f"https://api.github.com/users/{GITHUB_USERNAME}/repos?per_page=100",
+            headers=headers,
+            timeout=30.0,
+        )
+        repos_res.raise_for_status()
+        repos_data = repos_res.json()
 
         total_stars = sum(repo.get("stargazers_count", 0) for repo in repos_data)
 
@@ -554,7 +761,7 @@ class AgentRequest(BaseModel):
 
 class AgentResponse(BaseModel):
     answer: str
-    mode: str  # "langgraph" or "static"
+    mode: str  # "router", "langgraph" or "static"
     session_id: Optional[str] = None
     confidence: Optional[float] = None
 
@@ -583,6 +790,10 @@ class ErrorSolverResponse(BaseModel):
     confidence: float
 
 
+class ErrorSolverBatchRequest(BaseModel):
+    errors: List[ErrorSolverRequest] = Field(min_length=1, max_length=ERROR_BATCH_MAX_ITEMS)
+
+
 class LearnRequest(BaseModel):
     topic: str
     level: Optional[str] = "beginner"  # beginner, intermediate, advanced
@@ -684,6 +895,7 @@ class BackendlessProject(BaseModel):
     tech_stack: List[str] = []
     features: List[str] = []
     screenshots: List[str] = []
+    spa_fallback: bool = SPA_FALLBACK_DEFAULT  # serve index.html for unknown client-side routes
     created_date: str
     updated_date: str
 
@@ -696,6 +908,7 @@ class BackendlessProjectCreate(BaseModel):
     demo_url: Optional[str] = None
     tech_stack: List[str] = []
     features: List[str] = []
+    spa_fallback: bool = SPA_FALLBACK_DEFAULT
 
 
 class BackendlessProjectResponse(BaseModel):
@@ -705,24 +918,33 @@ class BackendlessProjectResponse(BaseModel):
 
 
 @app.post("/api/agent/chat", response_model=AgentResponse, tags=["Agent"])
-async def agent_chat(request: AgentRequest):
+async def agent_chat(body: AgentRequest, request: Request):
     """
     Portfolio AI assistant powered by LangGraph.
 
     - If **ANTHROPIC_API_KEY** is set: uses Claude + LangGraph tool-calling agent
     - Otherwise: falls back to static portfolio responses (no API key required)
+    - Pass the same **session_id** on follow-ups to keep the conversation context
 
     Try asking:
     - "What are Asadullah's skills?"
     - "Tell me about his projects"
     - "How can I contact him?"
+
+    Questions the intent router answers make no LLM call and are not charged
+    against the LLM admission budget.
     """
-    result = await run_agent(request.message)
+    result = await answer_from_router(body.message, session_id=body.session_id)
+    if result is None:
+        await admission.admit(request, "chat", "portfolio")
+        async with admission.slot("chat"):
+            result = await run_agent(body.message, session_id=body.session_id)
     return AgentResponse(
         answer=result["answer"],
         mode=result.get("mode", "static"),
-        session_id=request.session_id,
-        confidence=0.95 if result.get("mode") == "langgraph" else 0.7,
+        session_id=body.session_id,
+        # The router reports its own confidence
+        confidence=result.get("confidence", 0.95 if result.get("mode") == "langgraph" else 0.7),
     )
 
 
@@ -732,19 +954,37 @@ async def chat_stream(body: dict, request: Request):
 
     POST body: {"message": "...", "session_id": "optional"}
     Returns: text/event-stream with data: {"token": "..."} events,
-             ending with data: {"done": true}
+             ending with data: {"done": true, "mode": "router|langgraph|static"}
     """
     message = body.get("message", "")
-    # session_id is accepted for API compatibility but run_agent is stateless
-    session_id = body.get("session_id", "default")  # noqa: F841
+    # session_id attributes LLM usage (and its token budget) to the caller
+    session_id = body.get("session_id")
 
     if not message:
         return JSONResponse({"error": "message is required"}, status_code=400)
 
+    # Router answers make no LLM call, so they skip admission entirely
+    routed = await answer_from_router(message, session_id=session_id)
+    # Otherwise the slot is taken inside generate(), once streaming starts;
+    # shed here while a clean 429/503 can still be sent
+    gate = admission.gate("chat")
+    if routed is None:
+        await admission.admit(request, "chat", "portfolio")
+        if admission.enabled:
+            gate.check_room()
+
+    async def run() -> dict:
+        if routed is not None:
+            return routed
+        if not admission.enabled:
+            return await run_agent(message, session_id=session_id)
+        async with gate.slot():
+            return await run_agent(message, session_id=session_id)
+
     async def generate():
         try:
             # run_agent is async — await it directly (no executor needed)
-            result = await run_agent(message)
+            result = await run()
             answer = result.get(
                 "answer",
                 "I'm not sure. Feel free to contact Asadullah directly!",
@@ -757,7 +997,7 @@ async def chat_stream(body: dict, request: Request):
                 yield f"data: {json.dumps({'token': chunk})}\n\n"
                 await asyncio.sleep(0.03)
 
-            yield f"data: {json.dumps({'done': True})}\n\n"
+            yield f"data: {json.dumps({'done': True, 'mode': result.get('mode', 'static')})}\n\n"
         except Exception as e:
             logger.error(f"Stream error: {e}")
             yield f"data: {json.dumps({'error': str(e)})}\n\n"
@@ -785,20 +1025,38 @@ async def agent_info():
 
     mode = "langgraph" if (has_key and lg_available) else "static"
     logger.info(f"Agent mode: {mode}")
+    tools = ["get_portfolio_info"]
+    # Opening the index on first use reads its files, so keep it off the loop
+    if await run_blocking(knowledge_index) is not None:
+        tools.append("search_knowledge")
 
     return {
         "agent_type": "LangGraph StateGraph with tool-calling",
         "llm": "claude-haiku-4-5-20251001 (Anthropic)",
-        "tools": ["get_portfolio_info"],
+        "tools": tools,
         "langgraph_installed": lg_available,
         "llm_configured": has_key,
         "mode": mode,
+        "intent_router": INTENT_ROUTER_ENABLED,
         "fallback": "Static portfolio responses when LLM not configured",
     }
 
 
+@app.get("/api/admin/llm-usage", tags=["Agent"])
+async def llm_usage(_: None = Depends(require_admin)):
+    """
+    LLM token usage, latency, retries, fallbacks and estimated cost per agent,
+    plus the admission queues and budget of the LLM endpoints and the state
+    of each agent's circuit breaker.
+
+    Requires the `X-Admin-Token` header to match the `ADMIN_SECRET` env var.
+    """
+    return {**usage_summary(), "admission": admission.status(), "circuits": circuit_status()}
+
+
 # ─── Error Solver Agent ───────────────────────────────────────────────────────
-@app.post("/api/agent/solve-error", response_model=ErrorSolverResponse, tags=["Agent"])
+@app.post("/api/agent/solve-error", response_model=ErrorSolverResponse, tags=["Agent"],
+          dependencies=[Depends(admission.guard("solve-error", "error_solver"))])
 async def solve_error(request: ErrorSolverRequest):
     """
     AI-powered error solver agent.
@@ -817,9 +1075,59 @@ async def solve_error(request: ErrorSolverRequest):
     return ErrorSolverResponse(**result)
 
 
+@app.post("/api/agent/solve-errors", tags=["Agent"])
+async def solve_errors(batch: ErrorSolverBatchRequest, request: Request):
+    """
+    Solve up to ERROR_BATCH_MAX_ITEMS errors in one request.
+
+    Identical errors are solved once and known error patterns are answered
+    without the LLM. The rest run concurrently. Returns application/x-ndjson:
+    one `{"index", "source", "explanation", "solution", "corrected_code",
+    "confidence"}` line per error in completion order (`index` is its
+    position in `errors`), then `{"done": true, ...}` with batch totals.
+    """
+    plan = plan_batch([item.model_dump() for item in batch.errors])
+
+    # Only the LLM-bound items are charged; the slot is taken inside
+    # generate() because the body streams after the handler returns
+    await admission.admit(request, "solve-errors", "error_solver", llm_calls=len(plan.pending))
+    gate = admission.gate("solve-errors")
+    if admission.enabled and plan.pending:
+        gate.check_room()
+
+    async def lines():
+        async for line in solve_batch(plan):
+            yield json.dumps(line) + "\n"
+
+    async def generate():
+        if not admission.enabled or not plan.pending:
+            async for line in lines():
+                yield line
+            return
+        async with gate.slot():
+            async for line in lines():
+                yield line
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ─── Learning Features ────────────────────────────────────────────────────────
+def record_learning(topic: str, level: str, learning_style: str) -> None:
+    """Persist a /api/learn request; the lesson precompute ranks topics from these rows."""
+    try:
+        with get_db_context() as db:
+            create_learning_progress(db, topic=topic, level=level, learning_style=learning_style)
+    except Exception as e:
+        logger.warning(f"Could not record learning progress: {e}")
+
+
 @app.post("/api/learn", response_model=LearnResponse, tags=["Learning"])
-async def learn_topic(request: LearnRequest):
+async def learn_topic(body: LearnRequest, request: Request, response: Response,
+                      background_tasks: BackgroundTasks):
     """
     Learn through LLM - Get personalized lessons on any topic.
     
@@ -828,25 +1136,127 @@ async def learn_topic(request: LearnRequest):
     - Recommended resources
     - Quiz questions to test understanding
     - Next steps for continued learning
+
+    Lessons without `questions` are served from the lesson cache when one
+    was generated for the same topic, level and style (`X-Lesson-Cache:
+    hit`); cache hits are not charged against the LLM admission budget.
     """
-    result = await run_learning_agent(
-        topic=request.topic,
-        level=request.level,
-        learning_style=request.learning_style,
-        questions=request.questions,
-    )
-    
+    key = lesson_key(body.topic, body.level, body.learning_style, body.questions)
+    result = await run_blocking(lesson_cache.get, key) if key else None
+    if key is None:
+        lesson_cache_requests_total.inc("bypass")
+
+    if result is not None:
+        response.headers["X-Lesson-Cache"] = "hit"
+    else:
+        await admission.admit(request, "learn", "learning")
+        async with admission.slot("learn"):
+            result = await run_learning_agent(
+                topic=body.topic,
+                level=body.level,
+                learning_style=body.learning_style,
+                questions=body.questions,
+            )
+        if key and result.get("mode") == "llm":
+            background_tasks.add_task(
+                lesson_cache.put, key, body.topic, body.level, body.learning_style, result
+            )
+        response.headers["X-Lesson-Cache"] = "miss" if key else "bypass"
+
     # Save learning progress
     learning_progress.append({
         "id": len(learning_progress) + 1,
-        "topic": request.topic,
-        "level": request.level,
+        "topic": body.topic,
+        "level": body.level,
         "timestamp": datetime.utcnow().isoformat(),
     })
+    background_tasks.add_task(
+        record_learning, body.topic, body.level or "beginner", body.learning_style or "interactive"
+    )
     
     return LearnResponse(**result)
 
 
+def sse_response(events: AsyncIterator[dict],
+                 headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """Send `events` as Server-Sent Events; a failure ends the stream with an error event."""
+    async def generate():
+        try:
+            async for event in events:
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            logger.error(f"Stream error: {e}")
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **(headers or {})},
+    )
+
+
+@app.post("/api/learn/stream", tags=["Learning"])
+async def learn_topic_stream(body: LearnRequest, request: Request,
+                             background_tasks: BackgroundTasks):
+    """
+    `/api/learn` streamed as Server-Sent Events, so the lesson shows while
+    it is being written.
+
+    Returns text/event-stream with data events:
+    - {"field": "lesson_plan", "delta": "..."}: more lesson plan markdown
+    - {"field": "resources", "value": [...]}: a completed section
+    - {"done": true, "mode": "llm|static", "result": {...}}: the validated
+      lesson, which replaces anything streamed before it
+    - {"error": "..."} if the stream failed
+
+    Cached lessons arrive as whole sections at once (`X-Lesson-Cache: hit`).
+    """
+    key = lesson_key(body.topic, body.level, body.learning_style, body.questions)
+    cached = await run_blocking(lesson_cache.get, key) if key else None
+    if key is None:
+        lesson_cache_requests_total.inc("bypass")
+    if cached is None:
+        # The slot is taken inside events() because the body streams after
+        # the handler returns; shed here while a clean 429/503 can be sent
+        await admission.admit(request, "learn", "learning")
+        if admission.enabled:
+            admission.gate("learn").check_room()
+
+    learning_progress.append({
+        "id": len(learning_progress) + 1,
+        "topic": body.topic,
+        "level": body.level,
+        "timestamp": datetime.utcnow().isoformat(),
+    })
+    background_tasks.add_task(
+        record_learning, body.topic, body.level or "beginner", body.learning_style or "interactive"
+    )
+
+    async def events():
+        if cached is not None:
+            for name, value in cached.items():
+                yield {"field": name, "value": value}
+            yield {"done": True, "mode": "llm", "result": cached}
+            return
+        done = {}
+        async with admission.slot("learn"):
+            async for event in stream_learning_agent(
+                topic=body.topic,
+                level=body.level,
+                learning_style=body.learning_style,
+                questions=body.questions,
+            ):
+                done = event
+                yield event
+        if key and done.get("mode") == "llm":
+            await run_blocking(
+                lesson_cache.put, key, body.topic, body.level, body.learning_style, done["result"]
+            )
+
+    cache_status = "hit" if cached is not None else "miss" if key else "bypass"
+    return sse_response(events(), headers={"X-Lesson-Cache": cache_status})
+
+
 @app.get("/api/learn/progress", tags=["Learning"])
 async def get_learning_progress():
     """Get user's learning progress history."""
@@ -854,8 +1264,21 @@ async def get_learning_progress():
 
 
 # ─── Teaching Features ────────────────────────────────────────────────────────
-@app.post("/api/teach", response_model=TeachResponse, tags=["Learning"])
-async def teach_topic(request: TeachRequest):
+def record_taught_content(topic: str, content: str, difficulty: str,
+                          examples: Optional[List[str]]) -> None:
+    """Persist a contribution for review; approved ones are added to the knowledge index."""
+    try:
+        with get_db_context() as db:
+            create_taught_content(
+                db, topic=topic, content=content, difficulty=difficulty, examples=examples
+            )
+    except Exception as e:
+        logger.warning(f"Could not record taught content: {e}")
+
+
+@app.post("/api/teach", response_model=TeachResponse, tags=["Learning"],
+          dependencies=[Depends(admission.guard("teach", "teaching"))])
+async def teach_topic(request: TeachRequest, background_tasks: BackgroundTasks):
     """
     Teach to LLM - Contribute knowledge to the AI system.
     
@@ -879,10 +1302,74 @@ async def teach_topic(request: TeachRequest):
         "difficulty": request.difficulty,
         "timestamp": datetime.utcnow().isoformat(),
     })
+    background_tasks.add_task(
+        record_taught_content, request.topic, request.content, request.difficulty or "intermediate",
+        request.examples,
+    )
     
     return TeachResponse(**result)
 
 
+@app.post("/api/teach/stream", tags=["Learning"])
+async def teach_topic_stream(body: TeachRequest, request: Request,
+                             background_tasks: BackgroundTasks):
+    """
+    `/api/teach` streamed as Server-Sent Events: `structured_content`
+    markdown as {"field", "delta"} events while it is written, the other
+    sections as {"field", "value"} events when complete, then
+    {"done": true, "mode", "result"} (see `/api/learn/stream`).
+    """
+    await admission.admit(request, "teach", "teaching")
+    if admission.enabled:
+        admission.gate("teach").check_room()
+
+    taught_content.append({
+        "id": len(taught_content) + 1,
+        "topic": body.topic,
+        "content": body.content,
+        "difficulty": body.difficulty,
+        "timestamp": datetime.utcnow().isoformat(),
+    })
+    background_tasks.add_task(
+        record_taught_content, body.topic, body.content, body.difficulty or "intermediate",
+        body.examples,
+    )
+
+    async def events():
+        async with admission.slot("teach"):
+            async for event in stream_teaching_agent(
+                topic=body.topic,
+                content=body.content,
+                difficulty=body.difficulty,
+                examples=body.examples,
+            ):
+                yield event
+
+    return sse_response(events())
+
+
+@app.post("/api/admin/teach/{content_id}/approve", tags=["Learning"])
+async def approve_teaching(content_id: int, _: None = Depends(require_admin)):
+    """
+    Approve a taught-content contribution and add it to the knowledge index,
+    where the portfolio agent's `search_knowledge` tool finds it.
+
+    Requires the `X-Admin-Token` header to match the `ADMIN_SECRET` env var.
+    """
+    def approve() -> Optional[int]:
+        with get_db_context() as db:
+            row = approve_taught_content(db, content_id)
+            if row is None:
+                return None
+            index = knowledge_index()
+            return index.add_document(*taught_document(row)) if index is not None else 0
+
+    chunks = await run_blocking(approve)
+    if chunks is None:
+        raise HTTPException(status_code=404, detail="Content not found")
+    return {"id": content_id, "approved": True, "chunks_indexed": chunks}
+
+
 @app.get("/api/teach/content", tags=["Learning"])
 async def get_taught_content(topic: Optional[str] = None):
     """Get all user-contributed teaching content."""
@@ -920,11 +1407,11 @@ async def upload_video(
         file_path = f"/uploads/{file.filename}" if file else "/uploads/placeholder.mp4"
         if file:
             file_path = STATIC_DIR / file.filename
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+            await run_blocking(_save_upload, file, file_path)
 
         # Save to database
-        db_video = create_video(
+        db_video = await run_blocking(
+            create_video,
             db=db,
             title=title,
             description=description,
@@ -947,7 +1434,7 @@ async def upload_video(
                 file_path=db_video.file_path,
                 thumbnail=db_video.thumbnail,
                 duration=db_video.duration,
-                tags=db_video.tags,
+                tags=db_video.tags or [],
             ),
         )
     except Exception as e:
@@ -958,7 +1445,9 @@ async def upload_video(
 @app.get("/api/video/list", response_model=List[VideoUpload], tags=["Video"])
 async def list_videos(tag: Optional[str] = None, db: Session = Depends(get_db)):
     """Get all uploaded videos, optionally filtered by tag."""
-    videos = get_videos(db, tag=tag)
+    videos = await run_blocking(get_videos, db, tag=tag)
+    if FAST_JSON_ENABLED:
+        return fast_json_response([video_to_dict(v) for v in videos])
     return [
         VideoUpload(
             id=v.id,
@@ -969,7 +1458,7 @@ async def list_videos(tag: Optional[str] = None, db: Session = Depends(get_db)):
             file_path=v.file_path,
             thumbnail=v.thumbnail,
             duration=v.duration,
-            tags=v.tags,
+            tags=v.tags or [],
         )
         for v in videos
     ]
@@ -978,12 +1467,12 @@ async def list_videos(tag: Optional[str] = None, db: Session = Depends(get_db)):
 @app.get("/api/video/{video_id}", response_model=VideoUpload, tags=["Video"])
 async def get_video(video_id: int, db: Session = Depends(get_db)):
     """Get a specific video by ID."""
-    video = get_video(db, video_id)
+    video = await run_blocking(get_video, db, video_id)
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
     # Increment view count
-    increment_video_views(db, video_id)
+    await run_blocking(increment_video_views, db, video_id)
     
     return VideoUpload(
         id=video.id,
@@ -994,14 +1483,14 @@ async def get_video(video_id: int, db: Session = Depends(get_db)):
         file_path=video.file_path,
         thumbnail=video.thumbnail,
         duration=video.duration,
-        tags=video.tags,
+        tags=video.tags or [],
     )
 
 
 @app.delete("/api/video/{video_id}", tags=["Video"])
 async def delete_video_endpoint(video_id: int, db: Session = Depends(get_db)):
     """Delete a video by ID."""
-    success = delete_video(db, video_id)
+    success = await run_blocking(delete_video, db, video_id)
     if not success:
         raise HTTPException(status_code=404, detail="Video not found")
     return {"success": True, "message": "Video deleted successfully"}
@@ -1156,11 +1645,16 @@ async def update_backendless_project(project_id: int, updates: Dict[str, Any]):
         raise HTTPException(status_code=404, detail="Project not found")
     
     # Update allowed fields
-    allowed_fields = ["name", "description", "github_url", "demo_url", "tech_stack", "features"]
+    allowed_fields = [
+        "name", "description", "github_url", "demo_url", "tech_stack", "features", "spa_fallback",
+    ]
     for field, value in updates.items():
         if field in allowed_fields:
             project[field] = value
     
+    if "spa_fallback" in updates:
+        set_spa_fallback(project_id, bool(project["spa_fallback"]))
+    
     project["updated_date"] = datetime.utcnow().isoformat()
     
     return BackendlessProject(**project)
@@ -1174,6 +1668,7 @@ async def delete_backendless_project(project_id: int):
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     backendless_projects = [p for p in backendless_projects if p["id"] != project_id]
+    drop_manifest(project_id)
     return {"success": True, "message": "Project deleted successfully"}
 
 
@@ -1192,23 +1687,31 @@ async def upload_backendless_project(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # Create project directory
     project_dir = STATIC_DIR / f"project_{project_id}"
-    project_dir.mkdir(exist_ok=True)
-    
-    # Save the uploaded file
     file_path = project_dir / file.filename
-    try:
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
+
+    def _store() -> None:
+        # Create project directory and save the uploaded file
+        project_dir.mkdir(exist_ok=True)
+        _save_upload(file, file_path)
+
         # If it's a zip, extract it
         if file.filename.endswith(".zip"):
             import zipfile
             with zipfile.ZipFile(file_path, 'r') as zip_ref:
                 zip_ref.extractall(project_dir)
             file_path.unlink()  # Remove zip after extraction
-        
+
+        # Rebuild the served-file manifest (ETags, cache policy, SPA fallback)
+        build_manifest(
+            project_id, project_dir,
+            spa_fallback=project.get("spa_fallback", SPA_FALLBACK_DEFAULT),
+        )
+
+    try:
+        # Disk and zip work runs off the event loop
+        await run_blocking(_store)
+
         logger.info(f"📦 Uploaded backendless project files for: {project['name']}")
         
         return {
@@ -1222,29 +1725,29 @@ async def upload_backendless_project(
 
 
 @app.get("/api/backendless/{project_id}/serve/{path:path}", tags=["Backendless"])
-async def serve_backendless_project(project_id: int, path: str):
-    """Serve static files for a backendless project."""
-    project_dir = STATIC_DIR / f"project_{project_id}"
+async def serve_backendless_project(project_id: int, path: str, request: Request):
+    """
+    Serve static files for a backendless project.
+
+    Files are resolved through the project's in-memory manifest (no per-request
+    filesystem checks). Unknown extension-less routes fall back to `index.html`
+    when the project has `spa_fallback` enabled. Responses carry ETag,
+    Last-Modified and Cache-Control headers; conditional requests get a 304
+    and content-hashed assets are cached as `immutable`.
+    """
+    rel_path = normalize_request_path(path)
+    if rel_path is None:
+        raise HTTPException(status_code=403, detail="Access denied")
     
-    if not project_dir.exists():
+    manifest = await get_manifest(project_id, STATIC_DIR / f"project_{project_id}")
+    if manifest is None:
         raise HTTPException(status_code=404, detail="Project files not found")
     
-    file_path = project_dir / path
-    
-    # Security: Ensure path is within project directory
-    try:
-        file_path.resolve().relative_to(project_dir.resolve())
-    except ValueError:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    if not file_path.exists():
-        # Try index.html for root
-        if path == "" or path.endswith("/"):
-            file_path = project_dir / "index.html"
-        else:
-            raise HTTPException(status_code=404, detail="File not found")
+    meta = manifest.lookup(rel_path)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="File not found")
     
-    return FileResponse(file_path)
+    return await cached_file_response(request, meta)
 
 
 # ─── API Info ─────────────────────────────────────────────────────────────────
@@ -1253,7 +1756,7 @@ async def api_info():
     """Get API information and available endpoints."""
     return {
         "name": "Asadullah.dev Portfolio API",
-        "version": "2.3.0",
+        "version": APP_VERSION,
         "description": "Backend API for Asadullah Shafique's portfolio",
         "features": [
             "Contact & Blog API",
@@ -1266,11 +1769,13 @@ async def api_info():
         ],
         "endpoints": {
             "health": "/health",
+            "health_ready": "/health/ready",
             "contact": "/api/contact",
             "blog": "/api/blog",
             "github": "/api/github/stats",
             "agent_chat": "/api/agent/chat",
             "agent_solve_error": "/api/agent/solve-error",
+            "agent_solve_errors": "/api/agent/solve-errors",
             "learn": "/api/learn",
             "teach": "/api/teach",
             "video": "/api/video",
@@ -12,6 +12,8 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import Any
 
+from fast_json import FAST_JSON_ENABLED, fast_json_response
+
 router = APIRouter(prefix="/mcp", tags=["MCP"])
 
 # ─── MCP Models (JSON-RPC 2.0 compatible) ─────────────────────────────────────
@@ -58,6 +60,8 @@ TOOLS = [
     },
 ]
 
+TOOLS_LIST_RESULT = {"tools": TOOLS}
+
 # ─── Tool Implementations ─────────────────────────────────────────────────────
 TOOL_RESULTS = {
     "get_skills": {
@@ -141,6 +145,11 @@ async def mcp_rpc(request: MCPRequest):
 
     # List available tools
     if method == "tools/list":
+        if FAST_JSON_ENABLED:
+            # TOOLS is static and trusted — skip encoding it through MCPResponse
+            return fast_json_response(
+                {"jsonrpc": "2.0", "id": request.id, "result": TOOLS_LIST_RESULT, "error": None}
+            )
         return MCPResponse(id=request.id, result={"tools": TOOLS})
 
     # Call a tool
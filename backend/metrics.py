@@ -0,0 +1,313 @@
+"""
+Prometheus Metrics
+==================
+Dependency-free counters, gauges and histograms rendered in the Prometheus
+text exposition format (v0.0.4) at `GET /metrics`.
+
+Instrumented:
+- HTTP requests: count + latency histogram by method, route template, status
+- In-flight HTTP requests
+- DB pool: connection checkout (acquire) time and checked-out connections
+- Outbound HTTP latency to GitHub / Discord / Anthropic
+- Portfolio agent runs by mode (langgraph vs static)
+
+Each uvicorn worker keeps its own registry; scrape every worker (or put the
+pod behind a ServiceMonitor per pod) to see the whole picture.
+
+Usage:
+    from metrics import MetricsMiddleware, render_metrics, instrument_engine
+
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine)
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+_registry: List["_Metric"] = []
+
+
+# ─── Metric Types ─────────────────────────────────────────────────────────────
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and not value.is_integer():
+        return repr(float(value))
+    return str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labelvalues, value in sorted(self._values.items()):
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value that can go up and down per label set."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labelvalues, value in sorted(self._values.items()):
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Bucketed observations (cumulative buckets are computed at render time)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labelvalues: str) -> int:
+        series = self._series.get(labelvalues)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labelvalues, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                bucket_labels = _format_labels(self.labelnames, labelvalues, le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render_metrics() -> str:
+    """Render every registered metric in Prometheus text format."""
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ─── Metric Definitions ───────────────────────────────────────────────────────
+app_info = Gauge("app_info", "Application build information", ["version"])
+process_start_time = Gauge(
+    "process_start_time_seconds", "Start time of the worker since unix epoch"
+)
+process_start_time.set(time.time())
+
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests by method, route template and status",
+    ["method", "route", "status"],
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by method, route template and status",
+    ["method", "route", "status"],
+)
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+db_pool_checkout_duration = Histogram(
+    "db_pool_checkout_seconds", "Time to acquire a connection from the SQLAlchemy pool",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0),
+)
+db_pool_checked_out = Gauge("db_pool_checked_out", "Connections currently checked out of the pool")
+
+outbound_request_duration = Histogram(
+    "outbound_request_duration_seconds", "Latency of outbound calls by target and outcome",
+    ["target", "status"], buckets=SLOW_BUCKETS,
+)
+
+agent_runs_total = Counter("agent_runs_total", "Portfolio agent runs by mode", ["mode"])
+
+
+# ─── HTTP Middleware ──────────────────────────────────────────────────────────
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request counts, latency and in-flight gauge."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            # Unmatched paths collapse into one label to keep cardinality bounded
+            template = getattr(route, "path", None) or "unmatched"
+            labels = (scope["method"], template, str(status))
+            http_requests_total.inc(*labels)
+            http_request_duration.observe(elapsed, *labels)
+
+
+# ─── Database Pool ────────────────────────────────────────────────────────────
+def instrument_engine(engine) -> None:
+    """Time pool checkouts and track checked-out connections for an Engine."""
+    from sqlalchemy import event
+
+    pool = engine.pool
+    if getattr(pool, "_metrics_instrumented", False):
+        return
+    original_connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return original_connect()
+        finally:
+            db_pool_checkout_duration.observe(time.perf_counter() - start)
+
+    pool.connect = timed_connect
+    pool._metrics_instrumented = True
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checked_out.inc()
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        db_pool_checked_out.dec()
+
+
+# ─── Outbound Calls ───────────────────────────────────────────────────────────
+OUTBOUND_TARGETS = {
+    "api.github.com": "github",
+    "discord.com": "discord",
+    "discordapp.com": "discord",
+    "api.anthropic.com": "anthropic",
+}
+
+
+def outbound_event_hooks(target: Optional[str] = None) -> dict:
+    """
+    httpx `event_hooks` that time every request made by a client. Without an
+    explicit target, the label is derived from the request host.
+    """
+
+    async def on_request(request: httpx.Request) -> None:
+        request.extensions["metrics_start"] = time.perf_counter()
+
+    async def on_response(response: httpx.Response) -> None:
+        start = response.request.extensions.get("metrics_start")
+        if start is not None:
+            label = target or OUTBOUND_TARGETS.get(response.request.url.host, "other")
+            outbound_request_duration.observe(
+                time.perf_counter() - start, label, str(response.status_code)
+            )
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+@asynccontextmanager
+async def track_outbound(target: str):
+    """Time an outbound call made through an SDK we cannot hook (e.g. Anthropic)."""
+    start = time.perf_counter()
+    status: Optional[str] = "error"
+    try:
+        yield
+        status = "ok"
+    finally:
+        outbound_request_duration.observe(time.perf_counter() - start, target, status)
@@ -10,6 +10,7 @@ Models:
 - TaughtContent: User-contributed teaching content
 - BackendlessProject: Frontend-only projects
 - NoTeachLLM: Privacy opt-out registry
+- CachedLesson: Generated lesson plans reused across /api/learn requests
 """
 
 from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Float, JSON
@@ -121,6 +122,31 @@ class NoTeachLLM(Base):
     revoked_at = Column(DateTime(timezone=True), nullable=True)
 
 
+class CachedLesson(Base):
+    """Generated lesson plan, keyed by normalised (topic, level, learning_style)."""
+
+    __tablename__ = "lesson_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)
+    topic = Column(String(200), nullable=False)
+    level = Column(String(50), nullable=False)
+    learning_style = Column(String(50), nullable=False)
+    lesson = Column(JSON, nullable=False)  # LearnResponse fields
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), nullable=False, index=True)  # LRU order
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class LessonClaim(Base):
+    """A worker's claim on precomputing one lesson, so other workers skip it."""
+
+    __tablename__ = "lesson_claims"
+
+    cache_key = Column(String(64), primary_key=True)
+    claimed_until = Column(DateTime(timezone=True), nullable=False)
+
+
 # Index for faster lookups
 from sqlalchemy import Index
 
@@ -0,0 +1,235 @@
+"""
+On-demand Sampling Profiler
+===========================
+Time-boxed, in-process sampling of the running worker for the admin profile
+endpoint. Nothing runs until a capture is requested.
+
+During a capture a background thread snapshots every thread's Python stack
+(`sys._current_frames()`) at a fixed interval, while a heartbeat coroutine on
+the event loop lets the sampler spot loop stalls: when the heartbeat is late
+by more than `stall_ms`, samples of the loop thread are tagged `[loop-stall]`
+and the stall is recorded with the stack that was blocking it.
+
+Output is the collapsed-stack format read by flamegraph.pl, speedscope and
+inferno (`frame;frame;frame count` per line).
+
+Separately, an optional slow-callback logger (SLOW_CALLBACK_MS) times every
+event-loop callback and logs the ones that block longer than the threshold.
+It hooks asyncio's pure-Python `Handle._run` (see blocking.py), so it has no
+effect under uvloop.
+
+Configuration:
+    SLOW_CALLBACK_MS   Log loop callbacks slower than this, 0 = off (default 0)
+
+Usage:
+    from profiler import capture_profile
+
+    profile = await capture_profile(seconds=5, interval_ms=5)
+    text = profile.collapsed()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter as _StackCounter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from blocking import add_callback_observer, describe_callback, remove_callback_observer
+from metrics import Counter
+
+SLOW_CALLBACK_MS = float(os.getenv("SLOW_CALLBACK_MS", "0"))
+MAX_PROFILE_SECONDS = 60.0
+MAX_STACK_DEPTH = 128
+STALL_TAG = "[loop-stall]"
+# Floor for the heartbeat sleep, so a tiny interval or stall threshold cannot
+# turn the heartbeat into a busy loop that is itself the main load on the loop
+MIN_HEARTBEAT_MS = 5.0
+# Lowest stall threshold: heartbeats arrive every MIN_HEARTBEAT_MS plus timer
+# and GIL jitter, so a threshold close to it reports an idle loop as stalled
+MIN_STALL_MS = 4 * MIN_HEARTBEAT_MS
+
+logger = logging.getLogger("profiler")
+
+event_loop_slow_callbacks_total = Counter(
+    "event_loop_slow_callbacks_total", "Event-loop callbacks slower than SLOW_CALLBACK_MS"
+)
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a capture is requested while another one is running."""
+
+
+# ─── Stack Sampling ───────────────────────────────────────────────────────────
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    parts = code.co_filename.replace("\\", "/").rsplit("/", 2)
+    filename = "/".join(parts[-2:])
+    return f"{code.co_name} ({filename}:{frame.f_lineno})"
+
+
+def _collapse(frame) -> List[str]:
+    """Root-first list of frame labels for one stack."""
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+@dataclass(slots=True)
+class LoopStall:
+    started_at: float  # seconds since capture start
+    duration_ms: float
+    stack: str
+
+
+@dataclass(slots=True)
+class Profile:
+    seconds: float
+    interval_ms: float
+    stall_ms: float
+    samples: int = 0
+    stacks: _StackCounter = field(default_factory=_StackCounter)
+    stalls: List[LoopStall] = field(default_factory=list)
+
+    def collapsed(self) -> str:
+        """Flamegraph collapsed-stack text, heaviest stacks first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> Dict:
+        return {
+            "seconds": self.seconds,
+            "interval_ms": self.interval_ms,
+            "stall_ms": self.stall_ms,
+            "samples": self.samples,
+            "unique_stacks": len(self.stacks),
+            "loop_stalls": [
+                {
+                    "started_at": round(s.started_at, 4),
+                    "duration_ms": round(s.duration_ms, 2),
+                    "stack": s.stack,
+                }
+                for s in self.stalls
+            ],
+        }
+
+
+class _Sampler(threading.Thread):
+    """Samples all thread stacks until stopped; tracks loop heartbeat lag."""
+
+    def __init__(self, profile: Profile, loop_thread_id: int, all_threads: bool):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.profile = profile
+        self.loop_thread_id = loop_thread_id
+        self.all_threads = all_threads
+        self.heartbeat = time.perf_counter()
+        self.stop_event = threading.Event()
+        self.start_time = 0.0
+
+    def run(self) -> None:
+        interval = self.profile.interval_ms / 1000
+        stall_threshold = self.profile.stall_ms / 1000
+        names = {t.ident: t.name for t in threading.enumerate()}
+        own_id = threading.get_ident()
+        stall_start: Optional[float] = None
+        stall_stack = ""
+        self.start_time = time.perf_counter()
+
+        while not self.stop_event.wait(interval):
+            now = time.perf_counter()
+            stalled = now - self.heartbeat > stall_threshold
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                is_loop = thread_id == self.loop_thread_id
+                if not is_loop and not self.all_threads:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = _collapse(frame)
+                root = ["event-loop" if is_loop else names.get(thread_id, f"thread-{thread_id}")]
+                if is_loop and stalled:
+                    root.append(STALL_TAG)
+                    if stall_start is None:
+                        stall_start = self.heartbeat
+                        stall_stack = ";".join(stack)
+                self.profile.stacks[";".join(root + stack)] += 1
+            self.profile.samples += 1
+            if not stalled and stall_start is not None:
+                self._record_stall(stall_start, now, stall_stack)
+                stall_start = None
+
+        if stall_start is not None:
+            self._record_stall(stall_start, time.perf_counter(), stall_stack)
+
+    def _record_stall(self, started: float, ended: float, stack: str) -> None:
+        self.profile.stalls.append(
+            LoopStall(
+                started_at=started - self.start_time,
+                duration_ms=(ended - started) * 1000,
+                stack=stack,
+            )
+        )
+
+
+_capture_lock = threading.Lock()
+
+
+async def capture_profile(seconds: float = 5.0, interval_ms: float = 5.0,
+                          stall_ms: float = 50.0, all_threads: bool = True) -> Profile:
+    """
+    Sample the current worker for `seconds` and return the profile.
+
+    Must be awaited on the worker's event loop (that thread is tagged
+    `event-loop`). Raises ProfilerBusyError if a capture is already running.
+    `stall_ms` is raised to MIN_STALL_MS.
+    """
+    seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+    stall_ms = max(stall_ms, MIN_STALL_MS)
+    if not _capture_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile capture is already running")
+    try:
+        profile = Profile(seconds=seconds, interval_ms=interval_ms, stall_ms=stall_ms)
+        sampler = _Sampler(profile, threading.get_ident(), all_threads)
+        heartbeat_interval = max(min(interval_ms, stall_ms) / 2, MIN_HEARTBEAT_MS) / 1000
+        sampler.start()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            sampler.heartbeat = time.perf_counter()
+            await asyncio.sleep(heartbeat_interval)
+        sampler.stop_event.set()
+        await asyncio.to_thread(sampler.join)
+        return profile
+    finally:
+        _capture_lock.release()
+
+
+# ─── Slow Callback Logger ─────────────────────────────────────────────────────
+def _log_slow_callback(handle: asyncio.Handle, elapsed: float) -> None:
+    event_loop_slow_callbacks_total.inc()
+    logger.warning(
+        "Event loop blocked for %.1f ms by %s", elapsed * 1000, describe_callback(handle)
+    )
+
+
+def install_slow_callback_logger(threshold_ms: Optional[float] = None) -> bool:
+    """
+    Log any event-loop callback (a task step or call_soon callback) that runs
+    longer than `threshold_ms`. Returns False when disabled (threshold <= 0).
+    """
+    threshold_ms = SLOW_CALLBACK_MS if threshold_ms is None else threshold_ms
+    if threshold_ms <= 0:
+        return False
+    add_callback_observer(threshold_ms, _log_slow_callback)
+    return True
+
+
+def uninstall_slow_callback_logger() -> None:
+    remove_callback_observer(_log_slow_callback)
@@ -0,0 +1,414 @@
+"""
+Shared Rate-Limit Storage
+=========================
+slowapi keeps counters in process memory by default, so with
+`uvicorn --workers N` every worker enforces its own copy of each limit and a
+client gets N times the budget. This module registers two extra storage
+backends with the `limits` library (which slowapi uses), selected by
+RATE_LIMIT_STORAGE:
+
+    memory://                   Per-process (default; fine for one worker)
+    sqlite:////dev/shm/rl.db    One SQLite file shared by every worker on the
+                                host. Put it on tmpfs (/dev/shm) for speed.
+    resp://host:6379/0          Any server speaking the Redis protocol
+                                (Redis, Valkey, KeyDB, ...) for multi-host
+                                deployments. Talks RESP directly, so redis-py
+                                is not required. (`redis://` still selects
+                                limits' own redis-py backend if installed.)
+
+Both backends implement the sliding-window-counter strategy atomically: the
+SQLite one reads and updates both windows inside one `BEGIN IMMEDIATE`
+transaction, the RESP one increments first and rolls back on overflow, so
+concurrent workers can never admit more than the limit. A check costs one
+local transaction or one pipelined round trip (benchmarks/bench_rate_limit.py).
+
+Both are synchronous, as `limits` storages are, so a check blocks the event
+loop for its duration. For SQLite that is a local transaction; for RESP it is
+a network round trip, so its socket connect and reads are bounded by
+RATE_LIMIT_RESP_TIMEOUT. A slow or unreachable server then costs at most that
+long per request before the check fails and slowapi falls back to memory.
+
+If a shared store becomes unreachable, slowapi falls back to in-memory limits
+instead of failing requests.
+
+Configuration:
+    RATE_LIMIT_STORAGE    Storage URI (default memory://)
+    RATE_LIMIT_STRATEGY   limits strategy (default sliding-window-counter)
+    RATE_LIMIT_RESP_TIMEOUT  Socket timeout for resp:// in seconds (default 0.25)
+
+Usage:
+    from rate_limit import RATE_LIMIT_STORAGE, RATE_LIMIT_STRATEGY
+
+    limiter = Limiter(key_func=get_remote_address,
+                      storage_uri=RATE_LIMIT_STORAGE, strategy=RATE_LIMIT_STRATEGY)
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+
+RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "memory://")
+RATE_LIMIT_STRATEGY = os.getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter")
+
+# Upper bound on each RESP connect or reply wait; these block the event loop
+RATE_LIMIT_RESP_TIMEOUT = float(os.getenv("RATE_LIMIT_RESP_TIMEOUT", "0.25"))
+
+# Expired SQLite rows are purged once every this many writes
+SQLITE_PURGE_EVERY = 1000
+
+
+def _window_info(
+    previous_count: int, current_count: int, expiry: int, now: float
+) -> Tuple[int, float, int, float]:
+    """(previous count, previous TTL, current count, current TTL) as limits expects."""
+    previous_ttl = 0.0 if previous_count == 0 else (1 - (((now - expiry) / expiry) % 1)) * expiry
+    current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+    return previous_count, previous_ttl, current_count, current_ttl
+
+
+def _weighted(previous_count: int, previous_ttl: float, current_count: int, expiry: int) -> float:
+    return previous_count * previous_ttl / expiry + current_count
+
+
+# ─── SQLite ───────────────────────────────────────────────────────────────────
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Counters in a SQLite file shared by all workers on one host.
+
+    `sqlite:///relative.db` or `sqlite:////absolute/path.db`. Each thread
+    keeps its own connection; WAL mode lets readers and the single writer
+    overlap, and `busy_timeout` queues concurrent writers instead of failing.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, busy_timeout_ms: int = 5000,
+                 **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        path = uri.split("://", 1)[1][1:]
+        if not path:
+            raise ValueError(
+                "sqlite rate-limit storage needs a file path, e.g. sqlite:////dev/shm/rl.db"
+            )
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._writes = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+        finally:
+            conn.close()
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        # Counters are disposable: losing the last writes on power loss is fine
+        conn.execute("PRAGMA synchronous = OFF")
+        return conn
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _read(self, conn: sqlite3.Connection, keys: List[str], now: float) -> List[int]:
+        placeholders = ",".join("?" * len(keys))
+        rows = dict(conn.execute(
+            f"SELECT key, count FROM rate_limits "
+            f"WHERE key IN ({placeholders}) AND expires_at > ?",
+            (*keys, now),
+        ).fetchall())
+        return [rows.get(k, 0) for k in keys]
+
+    def _add(self, conn: sqlite3.Connection, key: str, amount: int, expires_at: float,
+             now: float) -> int:
+        # A row left over from an expired window restarts at `amount`
+        row = conn.execute(
+            "INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "count = CASE WHEN expires_at > ?4 "
+            "THEN count + excluded.count ELSE excluded.count END, "
+            "expires_at = CASE WHEN expires_at > ?4 THEN expires_at ELSE excluded.expires_at END "
+            "RETURNING count",
+            (key, amount, expires_at, now),
+        ).fetchone()
+        self._writes += 1
+        if self._writes % SQLITE_PURGE_EVERY == 0:
+            conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+        return row[0]
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        now = time.time()
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            count = self._add(conn, key, amount, now + expiry, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def get(self, key: str) -> int:
+        return self._read(self._conn, [key], time.time())[0]
+
+    def get_expiry(self, key: str) -> float:
+        row = self._conn.execute(
+            "SELECT expires_at FROM rate_limits WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def clear(self, key: str) -> None:
+        self._conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    def check(self) -> bool:
+        try:
+            self._conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        return self._conn.execute("DELETE FROM rate_limits").rowcount
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int,
+                                     amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        conn = self._conn
+        # IMMEDIATE takes the write lock up front, so the read-check-write
+        # below cannot interleave with another worker's
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            previous_count, current_count = self._read(conn, [previous_key, current_key], now)
+            previous_count, previous_ttl, current_count, _ = _window_info(
+                previous_count, current_count, expiry, now
+            )
+            weighted = _weighted(previous_count, previous_ttl, current_count, expiry)
+            allowed = math.floor(weighted) + amount <= limit
+            if allowed:
+                self._add(conn, current_key, amount, now + 2 * expiry, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count, current_count = self._read(self._conn, [previous_key, current_key], now)
+        return _window_info(previous_count, current_count, expiry, now)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self._conn.execute(
+            "DELETE FROM rate_limits WHERE key IN (?, ?)", (previous_key, current_key)
+        )
+
+
+# ─── Redis Protocol ───────────────────────────────────────────────────────────
+class RespError(Exception):
+    """An error reply (`-ERR ...`) from the server."""
+
+
+class RespConnection:
+    """Minimal blocking RESP2 client: one socket, pipelined commands."""
+
+    def __init__(self, host: str, port: int, db: int = 0, password: Optional[str] = None,
+                 timeout: float = RATE_LIMIT_RESP_TIMEOUT):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+        if password:
+            self.execute("AUTH", password)
+        if db:
+            self.execute("SELECT", db)
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("RESP server closed the connection")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RespError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2].decode()
+        if kind == b"*":
+            length = int(body)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise RespError(f"unexpected reply {line!r}")
+
+    def pipeline(self, *commands) -> list:
+        """Send all commands in one write and read every reply."""
+        self.sock.sendall(b"".join(self._encode(c) for c in commands))
+        replies, error = [], None
+        for _ in commands:
+            try:
+                replies.append(self._read_reply())
+            except RespError as e:
+                # Keep reading so the connection stays in sync
+                error = error or e
+                replies.append(None)
+        if error:
+            raise error
+        return replies
+
+    def execute(self, *args):
+        return self.pipeline(args)[0]
+
+    def close(self) -> None:
+        self.reader.close()
+        self.sock.close()
+
+
+class RespStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Counters on a Redis-protocol server: `resp://[:password@]host:port[/db]`.
+
+    Uses only GET/MGET/SET/INCRBY/DECRBY/DEL/PTTL/KEYS/PING, so any
+    Redis-compatible server works, including the test stand-in. Calls are
+    blocking; `timeout` bounds every connect and reply wait.
+    """
+
+    STORAGE_SCHEME = ["resp"]
+    PREFIX = "LIMITS"
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False,
+                 timeout: float = RATE_LIMIT_RESP_TIMEOUT, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        parsed = urlparse(uri)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.strip("/") or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @property
+    def base_exceptions(self):
+        return (OSError, RespError)
+
+    def _call(self, *commands) -> list:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = RespConnection(
+                self.host, self.port, self.db, self.password, self.timeout
+            )
+        try:
+            return conn.pipeline(*commands)
+        except OSError:
+            # Reconnect on the next call rather than reuse a broken socket
+            conn.close()
+            self._local.conn = None
+            raise
+
+    def _key(self, key: str) -> str:
+        return f"{self.PREFIX}:{key}"
+
+    def _window_keys(self, key: str, expiry: int, now: float) -> Tuple[str, str]:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        return self._key(previous_key), self._key(current_key)
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        key = self._key(key)
+        _, count = self._call(
+            ("SET", key, 0, "NX", "PX", max(1, int(expiry * 1000))),
+            ("INCRBY", key, amount),
+        )
+        return count
+
+    def get(self, key: str) -> int:
+        return int(self._call(("GET", self._key(key)))[0] or 0)
+
+    def get_expiry(self, key: str) -> float:
+        ttl_ms = self._call(("PTTL", self._key(key)))[0]
+        return time.time() + max(ttl_ms, 0) / 1000
+
+    def clear(self, key: str) -> None:
+        self._call(("DEL", self._key(key)))
+
+    def check(self) -> bool:
+        try:
+            return self._call(("PING",))[0] == "PONG"
+        except self.base_exceptions:
+            return False
+
+    def reset(self) -> Optional[int]:
+        keys = self._call(("KEYS", f"{self.PREFIX}:*"))[0]
+        if not keys:
+            return 0
+        return self._call(("DEL", *keys))[0]
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int,
+                                     amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self._window_keys(key, expiry, now)
+        # One round trip: ensure the window exists with its TTL, count the
+        # hit, read the previous window. INCRBY is atomic, so each caller
+        # sees a distinct total and overflowing callers undo their own hit.
+        _, current_count, previous_count = self._call(
+            ("SET", current_key, 0, "NX", "PX", 2 * expiry * 1000),
+            ("INCRBY", current_key, amount),
+            ("GET", previous_key),
+        )
+        previous_count, previous_ttl, current_count, _ = _window_info(
+            int(previous_count or 0), current_count, expiry, now
+        )
+        if math.floor(_weighted(previous_count, previous_ttl, current_count, expiry)) > limit:
+            self._call(("DECRBY", current_key, amount))
+            return False
+        return True
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        now = time.time()
+        previous_key, current_key = self._window_keys(key, expiry, now)
+        previous_count, current_count = self._call(("MGET", previous_key, current_key))[0]
+        return _window_info(int(previous_count or 0), int(current_count or 0), expiry, now)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self._window_keys(key, expiry, time.time())
+        self._call(("DEL", previous_key, current_key))
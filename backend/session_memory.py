@@ -0,0 +1,353 @@
+"""
+Conversation Memory
+===================
+Per-`session_id` history for the portfolio agent, so follow-up questions
+keep their context without the client resending the conversation.
+
+Each session keeps a rolling window of recent turns bounded by both turn
+count and estimated tokens (~4 chars per token). Turns pushed out of the
+window are folded into a short extractive summary (first sentence-ish of
+each turn, itself capped in tokens), so prompt size stays flat however long
+the conversation runs. Nothing extra is sent to the LLM to summarise.
+
+With SESSION_STORE_PATH set, sessions live in a SQLite file shared by
+every worker process: it is the source of truth, each append is a
+read-modify-write in one IMMEDIATE transaction, and a per-session version
+tells a worker whether its in-memory copy is current. Follow-ups that reach
+a different uvicorn worker therefore keep their context. The in-memory LRU
+(SESSION_MAX_SESSIONS, ordered by last use) is then only a read-through
+cache; evicting from it loses nothing. Rows idle past SESSION_IDLE_TTL are
+ignored and purged.
+
+Without SESSION_STORE_PATH the LRU is the only copy: sessions are per
+process, so run a single worker (or set the path) or follow-ups routed to
+another worker start cold, and capacity evictions are forgotten.
+
+Configuration:
+    SESSION_MAX_TURNS        Turns kept verbatim per session (default 12)
+    SESSION_MAX_TOKENS       Token cap for the verbatim window (default 1500)
+    SESSION_SUMMARY_TOKENS   Token cap for the summary of older turns (default 300)
+    SESSION_IDLE_TTL         Seconds before an idle session is dropped (default 1800)
+    SESSION_MAX_SESSIONS     Sessions cached in memory per process (default 10000)
+    SESSION_STORE_PATH       SQLite file shared by the workers, empty = per process
+                             (default off; SESSION_SPILL_PATH is read as a fallback)
+
+Usage:
+    from session_memory import session_memory
+
+    context = session_memory.get(session_id)   # summary + recent turns
+    session_memory.append(session_id, question, answer)
+
+    # Both block on SQLite with a store; from async code go through run_blocking
+    context = await run_blocking(session_memory.get, session_id)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, List, Optional
+
+from metrics import Counter, Gauge
+
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "12"))
+SESSION_MAX_TOKENS = int(os.getenv("SESSION_MAX_TOKENS", "1500"))
+SESSION_SUMMARY_TOKENS = int(os.getenv("SESSION_SUMMARY_TOKENS", "300"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "1800"))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", os.getenv("SESSION_SPILL_PATH", ""))
+
+CHARS_PER_TOKEN = 4
+# Characters of each evicted turn kept in the summary
+SUMMARY_CHARS_PER_TURN = 160
+# Idle rows are purged from the store once every this many appends
+PURGE_EVERY = 1000
+
+session_memory_sessions = Gauge(
+    "session_memory_sessions", "Conversation sessions held in memory"
+)
+session_memory_evictions_total = Counter(
+    "session_memory_evictions_total", "Sessions dropped from memory by reason", ["reason"]
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+@dataclass(slots=True)
+class Turn:
+    role: str  # "user" or "assistant"
+    text: str
+    tokens: int
+
+
+@dataclass(slots=True)
+class SessionContext:
+    """What the agent prepends to a new question."""
+
+    summary: str
+    turns: List[Turn]
+
+    @property
+    def tokens(self) -> int:
+        summary_tokens = estimate_tokens(self.summary) if self.summary else 0
+        return summary_tokens + sum(t.tokens for t in self.turns)
+
+
+@dataclass(slots=True)
+class _Session:
+    turns: Deque[Turn] = field(default_factory=deque)
+    summary: str = ""
+    window_tokens: int = 0
+    last_used: float = 0.0
+    version: int = 0  # of the stored row this copy was read from
+
+
+# ─── Store ────────────────────────────────────────────────────────────────────
+class _SessionStore:
+    """SQLite table of sessions (one JSON row per session) shared across processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False, timeout=5.0
+        )
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_memory ("
+            "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, last_used REAL NOT NULL, "
+            "version INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(session_memory)")}
+        if "version" not in columns:  # spill files written before the shared store
+            self._conn.execute(
+                "ALTER TABLE session_memory ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+            )
+        self._lock = threading.Lock()
+
+    def version(self, session_id: str, idle_ttl: float) -> Optional[int]:
+        """Version of the live row, or None if there is none (or it is idle)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, last_used FROM session_memory WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        if row is None or time.time() - row[1] > idle_ttl:
+            return None
+        return row[0]
+
+    def load(self, session_id: str) -> Optional[_Session]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, last_used, version FROM session_memory WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        return _decode(*row) if row else None
+
+    def update(self, session_id: str, idle_ttl: float, change) -> _Session:
+        """Apply `change(session)` to the stored session atomically across processes."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT data, last_used, version FROM session_memory WHERE session_id = ?",
+                    (session_id,),
+                ).fetchone()
+                session = _decode(*row) if row else None
+                if session is None or now - session.last_used > idle_ttl:
+                    session = _Session(version=session.version if session else 0)
+                change(session)
+                session.last_used = now
+                session.version += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO session_memory VALUES (?, ?, ?, ?)",
+                    (session_id, _encode(session), now, session.version),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return session
+
+    def purge(self, idle_ttl: float) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM session_memory WHERE last_used < ?", (time.time() - idle_ttl,)
+            ).rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM session_memory").fetchone()[0]
+
+
+def _encode(session: _Session) -> str:
+    return json.dumps({
+        "summary": session.summary,
+        "turns": [[t.role, t.text, t.tokens] for t in session.turns],
+    })
+
+
+def _decode(data: str, last_used: float, version: int) -> _Session:
+    payload = json.loads(data)
+    turns = deque(Turn(role, text, tokens) for role, text, tokens in payload["turns"])
+    return _Session(turns, payload["summary"], sum(t.tokens for t in turns), last_used, version)
+
+
+# ─── Memory ───────────────────────────────────────────────────────────────────
+class SessionMemory:
+    """Bounded per-session history with LRU/idle eviction, optionally shared via SQLite."""
+
+    def __init__(self, max_turns: Optional[int] = None, max_tokens: Optional[int] = None,
+                 summary_tokens: Optional[int] = None, idle_ttl: Optional[float] = None,
+                 max_sessions: Optional[int] = None, store_path: Optional[str] = None):
+        self.max_turns = SESSION_MAX_TURNS if max_turns is None else max_turns
+        self.max_tokens = SESSION_MAX_TOKENS if max_tokens is None else max_tokens
+        self.summary_tokens = SESSION_SUMMARY_TOKENS if summary_tokens is None else summary_tokens
+        self.idle_ttl = SESSION_IDLE_TTL if idle_ttl is None else idle_ttl
+        self.max_sessions = SESSION_MAX_SESSIONS if max_sessions is None else max_sessions
+        store_path = SESSION_STORE_PATH if store_path is None else store_path
+        self._store = _SessionStore(store_path) if store_path else None
+        if self._store is not None:
+            self._store.purge(self.idle_ttl)  # stale rows from earlier runs
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._appends = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: Optional[str]) -> SessionContext:
+        """Summary and recent turns for `session_id` (empty for new sessions)."""
+        if not session_id:
+            return SessionContext("", [])
+        with self._lock:
+            session = self._lookup(session_id)
+            if session is None:
+                return SessionContext("", [])
+            return SessionContext(session.summary, list(session.turns))
+
+    def append(self, session_id: Optional[str], question: str, answer: str) -> None:
+        """Record one exchange and compact the session to its bounds."""
+        if not session_id:
+            return
+
+        def change(session: _Session) -> None:
+            for role, text in (("user", question), ("assistant", answer)):
+                turn = Turn(role, text, estimate_tokens(text))
+                session.turns.append(turn)
+                session.window_tokens += turn.tokens
+            self._compact(session)
+
+        with self._lock:
+            if self._store is not None:
+                session = self._store.update(session_id, self.idle_ttl, change)
+                self._cache(session_id, session)
+                self._appends += 1
+                if self._appends % PURGE_EVERY == 0:
+                    self._store.purge(self.idle_ttl)
+                return
+            session = self._lookup(session_id) or self._cache(session_id, _Session())
+            change(session)
+            session.last_used = time.time()
+
+    def clear(self, session_id: Optional[str] = None) -> None:
+        """Forget cached sessions (the shared store keeps them until they idle out)."""
+        with self._lock:
+            if session_id is None:
+                self._sessions.clear()
+            else:
+                self._sessions.pop(session_id, None)
+            session_memory_sessions.set(len(self._sessions))
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "stored": self._store.count() if self._store else None,
+            "max_sessions": self.max_sessions,
+            "max_turns": self.max_turns,
+            "max_tokens": self.max_tokens,
+        }
+
+    # Callers hold self._lock
+    def _lookup(self, session_id: str) -> Optional[_Session]:
+        """The live session, refreshed from the store if another worker changed it."""
+        now = time.time()
+        self._expire_idle(now)
+        session = self._sessions.get(session_id)
+        if self._store is not None:
+            version = self._store.version(session_id, self.idle_ttl)
+            if version is None:
+                self._sessions.pop(session_id, None)
+                return None
+            if session is None or session.version != version:
+                session = self._store.load(session_id)
+                if session is None:
+                    return None
+                self._cache(session_id, session)
+        if session is None:
+            return None
+        self._sessions.move_to_end(session_id)
+        session.last_used = now
+        return session
+
+    def _cache(self, session_id: str, session: _Session) -> _Session:
+        self._sessions[session_id] = session
+        self._sessions.move_to_end(session_id)
+        self._evict_over_capacity()
+        return session
+
+    def _expire_idle(self, now: float) -> None:
+        # Least recently used first, so stop at the first live session
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.idle_ttl:
+                break
+            del self._sessions[session_id]
+            session_memory_evictions_total.inc("idle")
+        session_memory_sessions.set(len(self._sessions))
+
+    def _evict_over_capacity(self) -> None:
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            # With a store the session is only dropped from the cache
+            session_memory_evictions_total.inc("uncached" if self._store else "capacity")
+        session_memory_sessions.set(len(self._sessions))
+
+    def _compact(self, session: _Session) -> None:
+        """Fold the oldest exchanges into the summary until the window fits."""
+        folded = []
+        while session.turns and (
+            len(session.turns) > self.max_turns or session.window_tokens > self.max_tokens
+        ):
+            # Whole exchanges, so the window always starts with a user turn
+            for _ in range(min(2, len(session.turns))):
+                turn = session.turns.popleft()
+                session.window_tokens -= turn.tokens
+                folded.append(f"{turn.role}: {_excerpt(turn.text)}")
+        if folded:
+            summary = " | ".join(filter(None, [session.summary, *folded]))
+            max_chars = self.summary_tokens * CHARS_PER_TOKEN
+            if len(summary) > max_chars:
+                # Drop the oldest part of the summary first
+                summary = "…" + summary[-(max_chars - 1):]
+            session.summary = summary
+
+
+def _excerpt(text: str) -> str:
+    text = " ".join(text.split())
+    if len(text) <= SUMMARY_CHARS_PER_TURN:
+        return text
+    return text[:SUMMARY_CHARS_PER_TURN - 1].rstrip() + "…"
+
+
+session_memory = SessionMemory()
@@ -0,0 +1,360 @@
+"""
+Backendless Static File Serving
+===============================
+Manifest-backed, HTTP-cached serving for `/api/backendless/{id}/serve/{path}`.
+
+Features:
+- Per-project manifest (request path → size, mtime, ETag, content type)
+  built at upload time, O(1) lookups, no per-request stat/resolve calls
+- Out-of-band changes picked up every few seconds: directory mtimes catch
+  added or removed files, file size and mtime catch in-place rewrites
+- Traversal-safe path normalization done purely on strings
+- Configurable SPA fallback to `index.html` for unknown routes
+- Conditional requests (If-None-Match / If-Modified-Since → 304)
+- Long-lived `immutable` caching for content-hashed filenames
+- Short, revalidated caching for `index.html`
+- In-memory LRU of small hot files so repeat hits skip the filesystem
+
+Usage:
+    from static_cache import build_manifest, get_manifest, cached_file_response
+
+    build_manifest(project_id, project_dir)             # after upload/extract
+    manifest = await get_manifest(project_id, project_dir)
+    meta = manifest.lookup(normalize_request_path(path))
+    return await cached_file_response(request, meta)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+from blocking import run_blocking
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+# Files at or below this size are eligible for the in-memory LRU
+STATIC_CACHE_MAX_FILE_BYTES = int(os.getenv("STATIC_CACHE_MAX_FILE_BYTES", str(64 * 1024)))
+# Total memory budget for the LRU across all projects
+STATIC_CACHE_MAX_BYTES = int(os.getenv("STATIC_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+# Re-stat a manifest's directories and files at most this often to pick up out-of-band changes
+MANIFEST_RECHECK_SECONDS = float(os.getenv("STATIC_MANIFEST_RECHECK_SECONDS", "5"))
+# Serve index.html for unknown extension-less routes (client-side routing)
+SPA_FALLBACK_DEFAULT = os.getenv("BACKENDLESS_SPA_FALLBACK", "true").lower() == "true"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+INDEX_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+DEFAULT_CACHE_CONTROL = "public, max-age=3600, must-revalidate"
+
+# Build-tool fingerprints: a hex digest of 8+ characters with digits and
+# letters (main.3f2a9b1c.js, chunk.8f3e2d1a9b.css) or an 8-character base64url
+# one mixing digits and both cases (index-BxY3z9_a.js). Date stamps and words
+# (photo-20240101.jpg, report-v2final.pdf) do not qualify: a wrongly immutable
+# file stays stale in browsers for a year, a missed hash only revalidates.
+_HASHED_NAME_RE = re.compile(
+    r"[.-](?:"
+    r"(?=[0-9a-f]*[a-f])(?=[0-9a-f]*\d)[0-9a-f]{8,}"
+    r"|(?=[\w-]*[a-z])(?=[\w-]*[A-Z])(?=[\w-]*\d)[A-Za-z0-9_-]{8}"
+    r")\.[A-Za-z0-9]+$",
+    re.ASCII,
+)
+
+
+# ─── File Metadata ────────────────────────────────────────────────────────────
+@dataclass(frozen=True, slots=True)
+class FileMeta:
+    """Precomputed HTTP metadata for one static file."""
+
+    path: Path
+    size: int
+    mtime: float
+    etag: str
+    last_modified: str
+    content_type: str
+    cache_control: str
+
+
+def cache_control_for(rel_path: str) -> str:
+    """Pick a Cache-Control policy from the file name."""
+    name = rel_path.rsplit("/", 1)[-1]
+    if name == "index.html":
+        return INDEX_CACHE_CONTROL
+    if _HASHED_NAME_RE.search(name):
+        return IMMUTABLE_CACHE_CONTROL
+    return DEFAULT_CACHE_CONTROL
+
+
+def compute_file_meta(path: Path, rel_path: str) -> FileMeta:
+    """Hash and stat a single file. The ETag is derived from the file content."""
+    digest = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    st = path.stat()
+    content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    return FileMeta(
+        path=path,
+        size=st.st_size,
+        mtime=st.st_mtime,
+        etag=f'"{digest.hexdigest()}"',
+        last_modified=formatdate(st.st_mtime, usegmt=True),
+        content_type=content_type,
+        cache_control=cache_control_for(rel_path),
+    )
+
+
+def normalize_request_path(path: str) -> Optional[str]:
+    """
+    Collapse a request path into a manifest key without touching the filesystem.
+
+    Returns None when the path would escape the project root.
+    """
+    if "\\" in path or "\x00" in path:
+        return None
+    parts: list[str] = []
+    for segment in path.split("/"):
+        if segment in ("", "."):
+            continue
+        if segment == "..":
+            if not parts:
+                return None
+            parts.pop()
+            continue
+        parts.append(segment)
+    return "/".join(parts)
+
+
+# ─── Project Manifest ─────────────────────────────────────────────────────────
+class ProjectManifest:
+    """In-memory map of request path → FileMeta for one uploaded project."""
+
+    def __init__(self, project_dir: Path, files: Dict[str, FileMeta],
+                 dir_signature: Dict[Path, int], spa_fallback: bool):
+        self.project_dir = project_dir
+        self.files = files
+        self.dir_signature = dir_signature
+        self.spa_fallback = spa_fallback
+        self.checked_at = time.monotonic()
+
+    def lookup(self, path: str) -> Optional[FileMeta]:
+        """
+        Resolve a normalized request path to a file, honouring directory
+        indexes and the SPA fallback. Only dict lookups, no filesystem access.
+        """
+        meta = self.files.get(path)
+        if meta is not None:
+            return meta
+        meta = self.files.get(f"{path}/index.html" if path else "index.html")
+        if meta is not None:
+            return meta
+        # Extension-less unknown paths are client-side routes; missing assets stay 404
+        if self.spa_fallback and "." not in path.rsplit("/", 1)[-1]:
+            return self.files.get("index.html")
+        return None
+
+    def recheck_due(self) -> bool:
+        """True at most once every MANIFEST_RECHECK_SECONDS."""
+        now = time.monotonic()
+        if now - self.checked_at < MANIFEST_RECHECK_SECONDS:
+            return False
+        self.checked_at = now
+        return True
+
+    def is_stale(self) -> bool:
+        """
+        Whether the project changed on disk since the manifest was built.
+        Directory mtimes reveal added, removed and renamed files; a file
+        rewritten in place only changes its own size and mtime. Blocking:
+        one stat per directory and file.
+        """
+        for directory, mtime_ns in self.dir_signature.items():
+            try:
+                if directory.stat().st_mtime_ns != mtime_ns:
+                    return True
+            except OSError:
+                return True
+        for meta in self.files.values():
+            try:
+                st = meta.path.stat()
+            except OSError:
+                return True
+            if st.st_size != meta.size or st.st_mtime != meta.mtime:
+                return True
+        return False
+
+
+# project_id -> ProjectManifest
+_manifests: Dict[int, ProjectManifest] = {}
+
+
+def build_manifest(project_id: int, project_dir: Path,
+                   spa_fallback: Optional[bool] = None) -> ProjectManifest:
+    """Walk a project directory and (re)build its manifest."""
+    if spa_fallback is None:
+        previous = _manifests.get(project_id)
+        spa_fallback = previous.spa_fallback if previous else SPA_FALLBACK_DEFAULT
+
+    root = project_dir.resolve()
+    files: Dict[str, FileMeta] = {}
+    dir_signature: Dict[Path, int] = {}
+    for dirpath, _dirnames, filenames in os.walk(project_dir):
+        directory = Path(dirpath)
+        dir_signature[directory] = directory.stat().st_mtime_ns
+        for filename in filenames:
+            path = directory / filename
+            # Symlinks are the only way out of the tree; check them once here
+            if path.is_symlink() and not path.resolve().is_relative_to(root):
+                continue
+            if not path.is_file():
+                continue
+            rel_path = path.relative_to(project_dir).as_posix()
+            files[rel_path] = compute_file_meta(path, rel_path)
+
+    manifest = ProjectManifest(project_dir, files, dir_signature, spa_fallback)
+    _manifests[project_id] = manifest
+    file_cache.invalidate_project(project_dir)
+    return manifest
+
+
+async def get_manifest(project_id: int, project_dir: Path) -> Optional[ProjectManifest]:
+    """
+    Return the manifest for a project, rebuilding it off the event loop when it
+    is missing (e.g. after a restart) or its directories have changed.
+    Returns None when the project has no uploaded files.
+    """
+    manifest = _manifests.get(project_id)
+    if manifest is not None and manifest.project_dir == project_dir:
+        if not manifest.recheck_due() or not await run_blocking(manifest.is_stale):
+            return manifest
+    if not project_dir.is_dir():
+        drop_manifest(project_id)
+        return None
+    return await run_blocking(build_manifest, project_id, project_dir)
+
+
+def set_spa_fallback(project_id: int, enabled: bool) -> None:
+    """Update the SPA fallback setting of an already-built manifest."""
+    manifest = _manifests.get(project_id)
+    if manifest is not None:
+        manifest.spa_fallback = enabled
+
+
+def drop_manifest(project_id: int) -> None:
+    """Forget the manifest for a project (e.g. after it is deleted)."""
+    manifest = _manifests.pop(project_id, None)
+    if manifest is not None:
+        file_cache.invalidate_project(manifest.project_dir)
+
+
+# ─── Small File LRU ───────────────────────────────────────────────────────────
+class SmallFileCache:
+    """Byte-bounded LRU of small file bodies keyed by (path, etag)."""
+
+    def __init__(self, max_bytes: int, max_file_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple[Path, str], bytes]" = OrderedDict()
+
+    def accepts(self, meta: FileMeta) -> bool:
+        return meta.size <= self.max_file_bytes and meta.size <= self.max_bytes
+
+    def get(self, meta: FileMeta) -> Optional[bytes]:
+        key = (meta.path, meta.etag)
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, meta: FileMeta, body: bytes) -> None:
+        key = (meta.path, meta.etag)
+        if key in self._entries:
+            return
+        self._entries[key] = body
+        self.current_bytes += len(body)
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= len(evicted)
+
+    def invalidate_project(self, project_dir: Path) -> None:
+        stale = [key for key in self._entries if key[0].is_relative_to(project_dir)]
+        for key in stale:
+            self.current_bytes -= len(self._entries.pop(key))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+file_cache = SmallFileCache(STATIC_CACHE_MAX_BYTES, STATIC_CACHE_MAX_FILE_BYTES)
+
+
+# ─── Conditional Responses ────────────────────────────────────────────────────
+def is_not_modified(request: Request, meta: FileMeta) -> bool:
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against the file."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return meta.etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(meta.mtime) <= int(since)
+    return False
+
+
+def _cache_headers(meta: FileMeta) -> dict:
+    return {
+        "ETag": meta.etag,
+        "Last-Modified": meta.last_modified,
+        "Cache-Control": meta.cache_control,
+    }
+
+
+async def cached_file_response(request: Request, meta: FileMeta) -> Response:
+    """
+    Build the response for a static file: 304 when the client copy is fresh,
+    the LRU body for small hot files, or a streamed FileResponse otherwise.
+    """
+    headers = _cache_headers(meta)
+    if is_not_modified(request, meta):
+        return Response(status_code=304, headers=headers)
+
+    if file_cache.accepts(meta):
+        body = file_cache.get(meta)
+        if body is None:
+            body = await run_blocking(meta.path.read_bytes)
+            file_cache.put(meta, body)
+        return Response(content=body, media_type=meta.content_type, headers=headers)
+
+    return FileResponse(meta.path, media_type=meta.content_type, headers=headers)
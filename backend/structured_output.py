@@ -0,0 +1,427 @@
+"""
+Structured Agent Output
+=======================
+Turns Claude's replies into validated objects for the error-solver,
+learning and teaching agents.
+
+1. **Native mode.** `bind_schema()` binds the response schema as a forced
+   tool, so the model returns its answer as tool arguments. Those are
+   already-parsed JSON, and `extract()` only validates them. The tool
+   definition comes before the system prompt, so prompt caching covers it.
+
+2. **Text fallback.** When the model (or a test double) answers in plain
+   text, `scan_json_objects()` finds candidate objects in one linear pass.
+   It tracks brace depth and string/escape state, so braces inside strings,
+   prose around the JSON, markdown fences, trailing braces and truncated
+   output are all handled. Outermost balanced objects are tried first, then
+   the largest nested ones, up to MAX_CANDIDATES. Each candidate is
+   validated against the schema. The old greedy `\\{[\\s\\S]*\\}` regex
+   spanned from the first brace to the last. It broke on trailing braces
+   and went quadratic on unbalanced input.
+
+3. **Streaming.** `JsonFieldStream` parses the same JSON while it is
+   still arriving, token by token, for the SSE endpoints. String fields
+   are reported as decoded text deltas as soon as their characters
+   arrive; every field is reported with its parsed value when it ends.
+   The final answer is still validated with `extract()` on the whole
+   message.
+
+The schemas coerce the usual near-misses (a list of steps where text was
+asked for, a confidence given as a string), so a validated result always
+fits the API response models.
+
+Configuration:
+    STRUCTURED_OUTPUT_NATIVE   Ask for tool-call output instead of JSON text (default true)
+
+Usage:
+    from structured_output import ErrorSolution, bind_schema, extract
+
+    llm = bind_schema(_chat_model("error_solver"), ErrorSolution)
+    solution = extract(await invoke_llm(llm, prompt, agent="error_solver"), ErrorSolution)
+
+    fields = JsonFieldStream()
+    for kind, name, value in fields.feed(chunk_text(chunk)):
+        ...  # ("delta", "lesson_plan", "## Intro") or ("value", "resources", [...])
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+STRUCTURED_OUTPUT_NATIVE = os.getenv("STRUCTURED_OUTPUT_NATIVE", "true").lower() == "true"
+
+# Nested candidates tried after the outermost ones fail to validate
+MAX_CANDIDATES = 8
+
+# The only characters that change scanner state, inside an object and
+# inside one of its strings
+_OBJECT_TOKENS = re.compile(r'[{}"]')
+_STRING_TOKENS = re.compile(r'["\\]')
+# Characters that matter inside a non-string field value
+_VALUE_TOKENS = re.compile(r'[{}\[\]",]')
+_WHITESPACE = re.compile(r"\s*")
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+# (kind, field, value): ("delta", name, text) or ("value", name, parsed value)
+FieldEvent = Tuple[str, str, Any]
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def _as_text(value: Any) -> Any:
+    if isinstance(value, list):
+        return "\n".join(str(item) for item in value)
+    return value
+
+
+def _as_list(value: Any) -> Any:
+    if isinstance(value, str):
+        return [line.strip("-* ").strip() for line in value.splitlines() if line.strip()]
+    return value
+
+
+# ─── Schemas ──────────────────────────────────────────────────────────────────
+class ErrorSolution(BaseModel):
+    """Explanation and fix for a coding error."""
+
+    explanation: str = Field(description="Clear explanation of what went wrong (2-3 sentences)")
+    solution: str = Field(description="Step-by-step solution")
+    corrected_code: Optional[str] = Field(None, description="The fixed code, if applicable")
+    confidence: float = Field(0.8, ge=0.0, le=1.0, description="Confidence score from 0.0 to 1.0")
+
+    coerce_text = field_validator("solution", "explanation", mode="before")(_as_text)
+
+
+class LearningPlan(BaseModel):
+    """Personalized learning plan for a topic."""
+
+    lesson_plan: str = Field(description="Detailed lesson plan in markdown")
+    resources: List[str] = Field(description="4-5 learning resources (URLs or titles)")
+    quiz_questions: List[str] = Field(description="3 quiz questions")
+    next_steps: str = Field(description="Recommended next steps")
+
+    coerce_text = field_validator("lesson_plan", "next_steps", mode="before")(_as_text)
+    coerce_lists = field_validator("resources", "quiz_questions", mode="before")(_as_list)
+
+
+class TeachingResult(BaseModel):
+    """Structured version of a teaching contribution."""
+
+    acknowledgment: str = Field(description="Thank-you message")
+    structured_content: str = Field(description="Well-formatted content in markdown")
+    suggested_exercises: List[str] = Field(description="3-4 practical exercises")
+    related_topics: List[str] = Field(description="4 related topics to explore")
+
+    coerce_text = field_validator("acknowledgment", "structured_content", mode="before")(_as_text)
+    coerce_lists = field_validator("suggested_exercises", "related_topics", mode="before")(_as_list)
+
+
+# ─── Scanner ──────────────────────────────────────────────────────────────────
+def scan_json_objects(text: str) -> Iterator[Tuple[int, int, int]]:
+    """
+    Yield `(start, end, depth)` for every balanced `{...}` span, in one pass.
+    String contents (and escapes in them) are skipped, so braces in string
+    values do not count. Unmatched `}` are ignored and unclosed `{` never
+    yield, so trailing braces and truncated output are harmless.
+    """
+    stack: List[int] = []
+    in_string = False
+    pos = 0
+    while True:
+        if not stack:
+            # Outside any object only an opening brace matters
+            pos = text.find("{", pos)
+            if pos < 0:
+                return
+            stack.append(pos)
+            pos += 1
+            continue
+        match = (_STRING_TOKENS if in_string else _OBJECT_TOKENS).search(text, pos)
+        if match is None:
+            return
+        i = pos = match.start()
+        pos += 1
+        ch = text[i]
+        if in_string:
+            if ch == "\\":
+                pos += 1  # skip the escaped character
+            else:
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            stack.append(i)
+        else:
+            yield stack.pop(), i + 1, len(stack)
+
+
+def json_candidates(text: str) -> List[dict]:
+    """Parsed JSON objects in `text`: outermost first, then largest nested."""
+    outer, nested = [], []
+    for start, end, depth in scan_json_objects(text):
+        (outer if depth == 0 else nested).append((start, end))
+    nested.sort(key=lambda span: span[0] - span[1])
+    found = []
+    for start, end in outer + nested[:MAX_CANDIDATES]:
+        try:
+            # strict=False: models often put raw newlines in markdown strings
+            value = json.loads(text[start:end], strict=False)
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            found.append(value)
+    return found
+
+
+def parse_json_text(text: str, schema: Type[M]) -> Optional[M]:
+    """First JSON object in `text` that validates against `schema`."""
+    for candidate in json_candidates(text):
+        try:
+            return schema.model_validate(candidate)
+        except ValidationError:
+            continue
+    return None
+
+
+# ─── Native Mode ──────────────────────────────────────────────────────────────
+def bind_schema(llm: Any, schema: Type[BaseModel]) -> Any:
+    """Force the answer into a `schema` tool call when the model supports it."""
+    if not STRUCTURED_OUTPUT_NATIVE or not hasattr(llm, "bind_tools"):
+        return llm
+    return llm.bind_tools([schema], tool_choice=schema.__name__)
+
+
+def message_text(message: Any) -> str:
+    """Plain text of a reply (text blocks joined)."""
+    content = getattr(message, "content", message)
+    if isinstance(content, list):
+        return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return content if isinstance(content, str) else str(content)
+
+
+def extract(message: Any, schema: Type[M]) -> Optional[M]:
+    """Validated `schema` from a tool call or JSON text in `message`, else None."""
+    for call in getattr(message, "tool_calls", None) or []:
+        if call.get("name") == schema.__name__:
+            try:
+                return schema.model_validate(call.get("args") or {})
+            except ValidationError:
+                break
+    return parse_json_text(message_text(message), schema)
+
+
+# ─── Streaming ────────────────────────────────────────────────────────────────
+_START, _BETWEEN, _KEY, _COLON, _VALUE, _STRING, _RAW, _END = range(8)
+
+
+def chunk_text(chunk: Any) -> str:
+    """JSON text a streamed chunk adds: its tool-call argument deltas, else its text."""
+    calls = getattr(chunk, "tool_call_chunks", None)
+    if calls:
+        return "".join(call.get("args") or "" for call in calls)
+    return message_text(chunk)
+
+
+def _unescape(text: str, pos: int) -> Tuple[Optional[str], int]:
+    """
+    Decode the escape at `text[pos]` (a backslash). Returns the decoded text
+    and the position after it, or `(None, pos)` when the escape is cut off
+    at the end of `text` and needs the next chunk.
+    """
+    if pos + 1 >= len(text):
+        return None, pos
+    code = text[pos + 1]
+    if code != "u":
+        return _ESCAPES.get(code, code), pos + 2
+    digits = text[pos + 2:pos + 6]
+    if len(digits) < 4:
+        return None, pos
+    try:
+        value = int(digits, 16)
+    except ValueError:
+        return "\ufffd", pos + 6
+    if 0xD800 <= value < 0xDC00:
+        # High surrogate: decode together with the low one that follows
+        low = text[pos + 6:pos + 12]
+        if len(low) < 6 and "\\u".startswith(low[:2]):
+            return None, pos
+        if low.startswith("\\u"):
+            try:
+                second = int(low[2:], 16)
+            except ValueError:
+                second = 0
+            if 0xDC00 <= second < 0xE000:
+                return chr(0x10000 + ((value - 0xD800) << 10) + second - 0xDC00), pos + 12
+        return "\ufffd", pos + 6
+    return chr(value), pos + 6
+
+
+class JsonFieldStream:
+    """
+    Incremental parser for the top-level fields of one JSON object whose
+    text arrives in pieces. `feed()` returns the events each piece
+    completes: `("delta", name, text)` with newly decoded text of a string
+    field, and `("value", name, value)` when any field's value ends.
+
+    Every character is scanned once (regex jumps to the next quote,
+    backslash or bracket), so a whole reply costs O(n). Text before the
+    opening brace (prose, a markdown fence) and after the closing one is
+    ignored. Raw newlines inside strings are accepted, as in `json_candidates`.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self._state = _START
+        self._rest = ""  # an escape cut off at the end of the last piece
+        self._key: List[str] = []
+        self._name = ""
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+
+    @property
+    def done(self) -> bool:
+        """Whether the object's closing brace has been seen."""
+        return self._state == _END
+
+    def feed(self, text: str) -> List[FieldEvent]:
+        events: List[FieldEvent] = []
+        text = self._rest + text
+        self._rest = ""
+        pos, end = 0, len(text)
+        while pos < end and self._state != _END:
+            state = self._state
+            if state == _START:
+                pos = text.find("{", pos)
+                if pos < 0:
+                    break
+                pos += 1
+                self._state = _BETWEEN
+            elif state == _BETWEEN:
+                # Whitespace and commas between fields; a quote opens a key
+                ch = text[pos]
+                pos += 1
+                if ch == '"':
+                    self._key = []
+                    self._state = _KEY
+                elif ch == "}":
+                    self._state = _END
+            elif state == _COLON:
+                if text[pos] == ":":
+                    self._state = _VALUE
+                pos += 1
+            elif state == _VALUE:
+                pos = _WHITESPACE.match(text, pos).end()
+                if pos == end:
+                    break
+                self._parts = []
+                if text[pos] == '"':
+                    pos += 1
+                    self._state = _STRING
+                else:
+                    self._depth = 0
+                    self._in_string = False
+                    self._state = _RAW
+            elif state in (_KEY, _STRING):
+                pos = self._scan_string(text, pos, events)
+            else:
+                pos = self._scan_raw(text, pos, events)
+        return events
+
+    def _scan_string(self, text: str, pos: int, events: List[FieldEvent]) -> int:
+        """Decode string contents up to the closing quote or the end of `text`."""
+        parts = self._key if self._state == _KEY else self._parts
+        decoded: List[str] = []
+        end = len(text)
+        while pos < end:
+            match = _STRING_TOKENS.search(text, pos)
+            stop = match.start() if match else end
+            if stop > pos:
+                decoded.append(text[pos:stop])
+            pos = stop
+            if match is None:
+                break
+            if text[pos] == '"':
+                self._emit(parts, decoded, events)
+                self._close_string(events)
+                return pos + 1
+            value, pos = _unescape(text, pos)
+            if value is None:
+                self._rest = text[pos:]
+                pos = end
+                break
+            decoded.append(value)
+        self._emit(parts, decoded, events)
+        return pos
+
+    def _emit(self, parts: List[str], decoded: List[str], events: List[FieldEvent]) -> None:
+        parts.extend(decoded)
+        if decoded and self._state == _STRING:
+            events.append(("delta", self._name, "".join(decoded)))
+
+    def _close_string(self, events: List[FieldEvent]) -> None:
+        if self._state == _KEY:
+            self._name = "".join(self._key)
+            self._state = _COLON
+        else:
+            self._finish("".join(self._parts), events)
+
+    def _scan_raw(self, text: str, pos: int, events: List[FieldEvent]) -> int:
+        """Collect a non-string value (number, list, object...) up to its end."""
+        start, end = pos, len(text)
+        while pos < end:
+            if self._in_string:
+                match = _STRING_TOKENS.search(text, pos)
+                if match is None:
+                    pos = end
+                    break
+                pos = match.end()
+                if match.group() == "\\":
+                    if pos == end:
+                        # Keep the backslash with the character it escapes
+                        self._parts.append(text[start:pos - 1])
+                        self._rest = "\\"
+                        return end
+                    pos += 1
+                else:
+                    self._in_string = False
+                continue
+            match = _VALUE_TOKENS.search(text, pos)
+            if match is None:
+                pos = end
+                break
+            pos = match.end()
+            ch = match.group()
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif self._depth and ch in "}]":
+                self._depth -= 1
+            elif not self._depth and ch in ",}":
+                self._parts.append(text[start:pos - 1])
+                self._finish_raw(events)
+                if ch == "}":
+                    self._state = _END
+                return pos
+        self._parts.append(text[start:pos])
+        return pos
+
+    def _finish_raw(self, events: List[FieldEvent]) -> None:
+        try:
+            value = json.loads("".join(self._parts), strict=False)
+        except ValueError:
+            self._state = _BETWEEN
+            return
+        self._finish(value, events)
+
+    def _finish(self, value: Any, events: List[FieldEvent]) -> None:
+        self.fields[self._name] = value
+        events.append(("value", self._name, value))
+        self._state = _BETWEEN
@@ -1,13 +1,25 @@
 # Test fixtures and configuration
-import pytest
-from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock, patch
+import os
 import sys
+import tempfile
 from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# Record event-loop blocks per route (see blocking.py); must be set before
+# main is imported so the detector middleware is installed.
+os.environ.setdefault("LOOP_BLOCK_THRESHOLD_MS", "100")
+# Agents load lazily on first use; skip the background warm-up per client
+os.environ.setdefault("AGENT_WARMUP", "false")
+# Keep the knowledge index built by each client out of the source tree
+os.environ.setdefault("RAG_INDEX_PATH", tempfile.mkdtemp(prefix="knowledge-index-"))
+
+from blocking import loop_block_detector
 from main import app
 
 
@@ -18,6 +30,20 @@ def client():
         yield test_client
 
 
+@pytest.fixture
+def no_loop_blocking():
+    """Fail the test if any request handler blocked the event loop."""
+    loop_block_detector.clear()
+    yield loop_block_detector
+    blocks = list(loop_block_detector.events)
+    if blocks:
+        details = "\n".join(
+            f"  {b.method} {b.route}: {b.duration_ms} ms in {b.callback}" for b in blocks
+        )
+        threshold = loop_block_detector.threshold_ms
+        pytest.fail(f"Event loop blocked for more than {threshold} ms:\n{details}")
+
+
 @pytest.fixture
 def mock_discord_webhook():
     """Mock Discord webhook for testing."""
@@ -0,0 +1,89 @@
+# Access Logging Tests
+# =====================
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import access_log
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.entries = []
+
+    def emit(self, record):
+        self.entries.append(record.access)
+
+
+@pytest.fixture
+def access_records():
+    """Capture access records synchronously, before they reach the queue."""
+    handler = _ListHandler()
+    access_log.access_logger.addHandler(handler)
+    yield handler.entries
+    access_log.access_logger.removeHandler(handler)
+
+
+class TestAccessLog:
+    """Test the structured access logging middleware."""
+
+    def test_one_record_per_request(self, client: TestClient, access_records):
+        """Test that a request produces a single structured record."""
+        response = client.get("/api/blog/spec-first-development")
+
+        assert response.status_code == 200
+        assert len(access_records) == 1
+        entry = access_records[0]
+        assert entry["method"] == "GET"
+        assert entry["route"] == "/api/blog/{slug}"
+        assert entry["path"] == "/api/blog/spec-first-development"
+        assert entry["status"] == 200
+        assert entry["bytes"] == len(response.content)
+        assert entry["duration_ms"] >= 0
+
+    def test_request_id_echoed(self, client: TestClient, access_records):
+        """Test that an incoming X-Request-ID is logged and echoed back."""
+        response = client.get("/health", headers={"X-Request-ID": "req-abc"})
+
+        assert response.headers["x-request-id"] == "req-abc"
+        assert access_records[0]["request_id"] == "req-abc"
+
+    def test_request_id_generated(self, client: TestClient, access_records):
+        """Test that a request id is generated when the client sends none."""
+        response = client.get("/health")
+
+        assert len(response.headers["x-request-id"]) == 32
+        assert access_records[0]["request_id"] == response.headers["x-request-id"]
+
+    def test_sampling_skips_success_but_keeps_errors(self, access_records):
+        """Test that 2xx are sampled out while errors are always logged."""
+        sampled_app = FastAPI()
+
+        @sampled_app.get("/ok")
+        async def ok():
+            return {"ok": True}
+
+        sampled_app.add_middleware(access_log.AccessLogMiddleware, sample_rate=0.0)
+        with TestClient(sampled_app) as sampled_client:
+            sampled_client.get("/ok")
+            sampled_client.get("/missing")
+
+        assert [entry["status"] for entry in access_records] == [404]
+
+
+class TestJSONAccessFormatter:
+    """Test access record formatting."""
+
+    def test_formats_single_json_line(self):
+        """Test that records render as compact single-line JSON."""
+        record = logging.LogRecord("access", logging.INFO, __file__, 1, "access", None, None)
+        record.access = {"method": "GET", "status": 200}
+
+        line = access_log.JSONAccessFormatter().format(record)
+
+        assert "\n" not in line
+        assert '"method":"GET"' in line
+        assert '"status":200' in line
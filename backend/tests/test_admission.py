@@ -0,0 +1,171 @@
+# LLM Admission Control Tests
+# ============================
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from limits.storage import MemoryStorage
+
+import main
+from admission import ConcurrencyGate, TokenBudget
+
+
+@pytest.fixture
+def fresh_budget():
+    """Isolate the app's token budget from other tests."""
+    budget = TokenBudget(MemoryStorage(), tokens_per_minute=1000)
+    with patch.object(main.admission, "budget", budget):
+        yield main.admission.budget
+
+
+class TestConcurrencyGate:
+    """Test the per-endpoint semaphore and bounded queue."""
+
+    async def test_sheds_when_queue_full(self):
+        """Test that requests beyond slots + queue get 503 without waiting."""
+        gate = ConcurrencyGate("chat", max_concurrent=1, max_queued=1, queue_timeout=5)
+        release = asyncio.Event()
+
+        async def hold():
+            async with gate.slot():
+                await release.wait()
+
+        holders = [asyncio.create_task(hold()) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert (gate.active, gate.waiting) == (1, 1)
+
+        start = time.perf_counter()
+        with pytest.raises(HTTPException) as exc:
+            async with gate.slot():
+                pass
+        assert time.perf_counter() - start < 0.05
+        assert exc.value.status_code == 503
+        assert int(exc.value.headers["Retry-After"]) >= 1
+
+        release.set()
+        await asyncio.gather(*holders)
+        assert (gate.active, gate.waiting) == (0, 0)
+
+    async def test_queue_timeout(self):
+        """Test that a queued request gives up after the timeout."""
+        gate = ConcurrencyGate("learn", max_concurrent=1, max_queued=4, queue_timeout=0.05)
+        release = asyncio.Event()
+
+        async def hold():
+            async with gate.slot():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as exc:
+            async with gate.slot():
+                pass
+        assert exc.value.status_code == 503
+        assert gate.waiting == 0
+
+        release.set()
+        await holder
+
+
+class TestTokenBudget:
+    """Test cost-weighted per-client budgets."""
+
+    def test_charges_expected_cost(self):
+        """Test that expensive requests use up the budget faster."""
+        budget = TokenBudget(MemoryStorage(), tokens_per_minute=1000)
+
+        budget.charge("learn", ["ip:1.2.3.4"], 600)
+        with pytest.raises(HTTPException) as exc:
+            budget.charge("learn", ["ip:1.2.3.4"], 600)
+        assert exc.value.status_code == 429
+        assert int(exc.value.headers["Retry-After"]) >= 1
+
+        budget.charge("learn", ["ip:5.6.7.8"], 600)
+
+    def test_session_and_ip_both_charged(self):
+        """Test that a fresh session_id does not escape the IP's budget."""
+        budget = TokenBudget(MemoryStorage(), tokens_per_minute=1000)
+
+        budget.charge("chat", ["ip:1.2.3.4", "session:a"], 700)
+        with pytest.raises(HTTPException):
+            budget.charge("chat", ["ip:1.2.3.4", "session:b"], 700)
+
+    def test_disabled_budget(self):
+        """Test that a zero budget admits everything."""
+        budget = TokenBudget(MemoryStorage(), tokens_per_minute=0)
+
+        for _ in range(10):
+            budget.charge("chat", ["ip:1.2.3.4"], 10_000)
+
+
+class TestLLMEndpointAdmission:
+    """Test the guards on the LLM-backed routes."""
+
+    @patch("agent.LANGGRAPH_AVAILABLE", False)
+    def test_chat_over_budget_returns_429(self, client: TestClient, fresh_budget):
+        """Test that the second chat exceeds a 1000-token budget."""
+        # Escalated past the intent router, so both chats are LLM-bound
+        first = client.post("/api/agent/chat", json={"message": "Why should I hire him?"})
+        second = client.post("/api/agent/chat", json={"message": "Why should I hire him?"})
+
+        assert first.status_code == 200
+        assert second.status_code == 429
+        assert int(second.headers["Retry-After"]) >= 1
+
+    @patch("agent.LANGGRAPH_AVAILABLE", False)
+    def test_router_answers_are_not_charged(self, client: TestClient, fresh_budget):
+        """Test that chats the intent router answers take no budget and no slot."""
+        # No slots at all: anything that needs one is shed with 503
+        gates = {"chat": ConcurrencyGate("chat", max_concurrent=0, max_queued=0)}
+        routed = {"message": "What are his skills?"}
+        with patch.object(main.admission, "gates", gates):
+            chats = [client.post("/api/agent/chat", json=routed) for _ in range(5)]
+            stream = client.post("/api/agent/chat/stream", json=routed)
+
+        assert [(r.status_code, r.json()["mode"]) for r in chats] == [(200, "router")] * 5
+        assert stream.status_code == 200
+        assert '"mode": "router"' in stream.text
+        # The whole 1000-token budget is still there for one LLM-bound chat
+        first = client.post("/api/agent/chat", json={"message": "Why should I hire him?"})
+        second = client.post("/api/agent/chat", json={"message": "Why should I hire him?"})
+        assert (first.status_code, second.status_code) == (200, 429)
+
+    def test_stream_over_budget_returns_429(self, client: TestClient, fresh_budget):
+        """Test that the SSE chat is charged before streaming starts."""
+        fresh_budget.charge("chat", ["ip:testclient"], 1000)
+
+        response = client.post("/api/agent/chat/stream", json={"message": "hi"})
+
+        assert response.status_code == 429
+
+    async def test_flood_is_shed_and_other_routes_stay_fast(self, fresh_budget):
+        """Test that excess chats get 503 quickly while /health answers."""
+        gates = {"chat": ConcurrencyGate("chat", max_concurrent=1, max_queued=1, queue_timeout=5)}
+        fresh_budget.tokens_per_minute = 0
+
+        async def slow_agent(message, session_id=None):
+            await asyncio.sleep(0.3)
+            return {"answer": "ok", "mode": "static"}
+
+        transport = httpx.ASGITransport(app=main.app)
+        with patch.object(main.admission, "gates", gates), patch("main.run_agent", slow_agent):
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                chats = [
+                    asyncio.create_task(http.post("/api/agent/chat", json={"message": f"q{i}"}))
+                    for i in range(4)
+                ]
+                await asyncio.sleep(0.05)
+                start = time.perf_counter()
+                health = await http.get("/health/live")
+                health_ms = (time.perf_counter() - start) * 1000
+                responses = await asyncio.gather(*chats)
+
+        codes = sorted(r.status_code for r in responses)
+        assert codes == [200, 200, 503, 503]
+        assert all("Retry-After" in r.headers for r in responses if r.status_code == 503)
+        assert health.status_code == 200
+        assert health_ms < 100
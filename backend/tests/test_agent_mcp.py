@@ -17,7 +17,7 @@ class TestAgentEndpoint:
         data = response.json()
         assert "answer" in data
         assert "mode" in data
-        assert data["mode"] in ["langgraph", "static"]
+        assert data["mode"] in ["router", "langgraph", "static"]
 
     def test_agent_chat_with_session(self, client: TestClient):
         """Test agent chat with session ID."""
@@ -75,6 +75,14 @@ class TestAgentInfo:
         else:
             assert data["mode"] == "static"
 
+    def test_agent_info_lists_search_tool(self, client: TestClient):
+        """Test that search_knowledge is listed only when the index is available."""
+        with patch("main.knowledge_index", lambda: None):
+            assert client.get("/api/agent/info").json()["tools"] == ["get_portfolio_info"]
+        with patch("main.knowledge_index", lambda: object()):
+            tools = client.get("/api/agent/info").json()["tools"]
+        assert tools == ["get_portfolio_info", "search_knowledge"]
+
 
 class TestMCPEndpoints:
     """Test MCP server endpoints."""
@@ -148,6 +156,18 @@ class TestMCPEndpoints:
         assert result["id"] == 1
         assert "result" in result
 
+    @patch("mcp_server.FAST_JSON_ENABLED", True)
+    def test_mcp_rpc_tools_list_fast_json(self, client: TestClient):
+        """Test MCP tools/list through the opt-in orjson response path."""
+        data = {"jsonrpc": "2.0", "id": 7, "method": "tools/list", "params": {}}
+        response = client.post("/mcp/rpc", json=data)
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result["id"] == 7
+        assert result["error"] is None
+        assert len(result["result"]["tools"]) > 0
+
     def test_mcp_rpc_unknown_method(self, client: TestClient):
         """Test MCP JSON-RPC with unknown method."""
         data = {
@@ -0,0 +1,81 @@
+# Agent Tool Execution Tests
+# ===========================
+import time
+
+import pytest
+
+import agent
+
+
+class _SlowTool:
+    """Minimal LangChain-style tool that sleeps before answering."""
+
+    def __init__(self, name: str, delay: float):
+        self.name = name
+        self.delay = delay
+        self.calls = 0
+
+    def invoke(self, args):
+        self.calls += 1
+        time.sleep(self.delay)
+        return f"{self.name}:{args}"
+
+
+@pytest.fixture(autouse=True)
+def empty_tool_cache(monkeypatch):
+    monkeypatch.setattr(agent, "_tool_cache", type(agent._tool_cache)())
+
+
+class TestToolExecution:
+    """Test the call_tools node helpers."""
+
+    async def test_tool_calls_run_concurrently(self):
+        """Test that a multi-tool turn takes about as long as its slowest tool."""
+        tools = {name: _SlowTool(name, 0.2) for name in ("a", "b", "c")}
+        calls = [{"name": name, "args": {"x": i}} for i, name in enumerate(tools)]
+
+        start = time.perf_counter()
+        results = await agent.run_tool_calls(tools, calls)
+        elapsed = time.perf_counter() - start
+
+        assert results == ["a:{'x': 0}", "b:{'x': 1}", "c:{'x': 2}"]
+        assert elapsed < 0.35
+
+    async def test_unknown_tool(self):
+        """Test that a tool name the model invented gets a plain error result."""
+        assert await agent.run_tool_calls({}, [{"name": "nope", "args": {}}]) == ["Tool not found"]
+
+    async def test_pure_tool_results_memoized(self):
+        """Test that a pure tool runs once per distinct arguments."""
+        tool = _SlowTool("get_portfolio_info", 0.0)
+        tools = {tool.name: tool}
+        calls = [{"name": tool.name, "args": {"topic": "skills"}}]
+
+        first = await agent.run_tool_calls(tools, calls)
+        second = await agent.run_tool_calls(tools, calls)
+
+        assert first == second
+        assert tool.calls == 1
+
+    async def test_precomputed_topics_skip_the_tool(self):
+        """Test that static portfolio topics are served from the precomputed cache."""
+        agent.precompute_tool_results()
+        tool = _SlowTool("get_portfolio_info", 0.0)
+
+        results = await agent.run_tool_calls({tool.name: tool}, [
+            {"name": tool.name, "args": {"topic": topic}} for topic in agent.PORTFOLIO_TOPICS
+        ])
+
+        assert tool.calls == 0
+        assert results[0] == agent.get_portfolio_info("skills")
+
+    async def test_cache_is_bounded(self, monkeypatch):
+        """Test that invented topics cannot grow the cache without limit."""
+        monkeypatch.setattr(agent, "MAX_TOOL_CACHE_ENTRIES", 3)
+        tool = _SlowTool("get_portfolio_info", 0.0)
+
+        await agent.run_tool_calls({tool.name: tool}, [
+            {"name": tool.name, "args": {"topic": f"t{i}"}} for i in range(10)
+        ])
+
+        assert len(agent._tool_cache) == 3
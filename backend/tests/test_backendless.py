@@ -0,0 +1,218 @@
+# Backendless Project Tests
+# ==========================
+import io
+import os
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+import static_cache
+
+
+@pytest.fixture
+def static_dir(tmp_path, monkeypatch):
+    """Serve backendless uploads from a temporary directory."""
+    monkeypatch.setattr("main.STATIC_DIR", tmp_path)
+    static_cache.file_cache.clear()
+    return tmp_path
+
+
+@pytest.fixture
+def uploaded_project(client: TestClient, static_dir, no_loop_blocking):
+    """Create a backendless project and upload a small built site (loop must not block)."""
+    response = client.post(
+        "/api/backendless",
+        json={"name": "Demo Site", "description": "Static demo", "framework": "react"},
+    )
+    project_id = response.json()["project"]["id"]
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("index.html", "<html><body>Demo</body></html>")
+        zf.writestr("assets/main.3f2a9b1c.js", "console.log('hashed');")
+        zf.writestr("robots.txt", "User-agent: *")
+    archive.seek(0)
+
+    response = client.post(
+        f"/api/backendless/{project_id}/upload",
+        files={"file": ("site.zip", archive.getvalue(), "application/zip")},
+    )
+    assert response.status_code == 200
+    return project_id
+
+
+class TestBackendlessCaching:
+    """Test HTTP caching headers on served backendless files."""
+
+    def test_serve_sets_cache_headers(self, client: TestClient, uploaded_project):
+        """Test that served files carry ETag, Last-Modified and Cache-Control."""
+        response = client.get(f"/api/backendless/{uploaded_project}/serve/robots.txt")
+
+        assert response.status_code == 200
+        assert response.text == "User-agent: *"
+        assert response.headers["etag"].startswith('"')
+        assert "last-modified" in response.headers
+        assert "must-revalidate" in response.headers["cache-control"]
+
+    def test_hashed_asset_is_immutable(self, client: TestClient, uploaded_project):
+        """Test that content-hashed filenames get long-lived immutable caching."""
+        response = client.get(f"/api/backendless/{uploaded_project}/serve/assets/main.3f2a9b1c.js")
+
+        assert response.status_code == 200
+        assert "immutable" in response.headers["cache-control"]
+
+    def test_index_html_short_cache(self, client: TestClient, uploaded_project):
+        """Test that index.html is served for the root with a short max-age."""
+        response = client.get(f"/api/backendless/{uploaded_project}/serve/")
+
+        assert response.status_code == 200
+        assert "Demo" in response.text
+        assert response.headers["cache-control"] == static_cache.INDEX_CACHE_CONTROL
+
+    def test_if_none_match_returns_304(self, client: TestClient, uploaded_project):
+        """Test that a matching If-None-Match header yields 304 Not Modified."""
+        url = f"/api/backendless/{uploaded_project}/serve/robots.txt"
+        etag = client.get(url).headers["etag"]
+
+        response = client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_if_modified_since_returns_304(self, client: TestClient, uploaded_project):
+        """Test that a fresh If-Modified-Since header yields 304 Not Modified."""
+        url = f"/api/backendless/{uploaded_project}/serve/robots.txt"
+        last_modified = client.get(url).headers["last-modified"]
+
+        response = client.get(url, headers={"If-Modified-Since": last_modified})
+
+        assert response.status_code == 304
+
+    def test_stale_etag_returns_body(self, client: TestClient, uploaded_project):
+        """Test that a non-matching ETag returns the full file."""
+        url = f"/api/backendless/{uploaded_project}/serve/robots.txt"
+        response = client.get(url, headers={"If-None-Match": '"stale"'})
+
+        assert response.status_code == 200
+        assert response.text == "User-agent: *"
+
+    def test_small_files_served_from_memory(self, client: TestClient, uploaded_project):
+        """Test that repeat hits on small files are answered from the LRU."""
+        url = f"/api/backendless/{uploaded_project}/serve/robots.txt"
+        client.get(url)
+        hits_before = static_cache.file_cache.hits
+
+        response = client.get(url)
+
+        assert response.status_code == 200
+        assert static_cache.file_cache.hits == hits_before + 1
+
+    def test_missing_file_404(self, client: TestClient, uploaded_project):
+        """Test that unknown files return 404."""
+        response = client.get(f"/api/backendless/{uploaded_project}/serve/missing.css")
+
+        assert response.status_code == 404
+
+
+class TestBackendlessManifest:
+    """Test manifest-based path resolution and SPA fallback."""
+
+    def test_spa_fallback_serves_index(self, client: TestClient, uploaded_project):
+        """Test that unknown client-side routes are answered with index.html."""
+        response = client.get(f"/api/backendless/{uploaded_project}/serve/dashboard/settings")
+
+        assert response.status_code == 200
+        assert "Demo" in response.text
+
+    def test_spa_fallback_disabled(self, client: TestClient, uploaded_project):
+        """Test that unknown routes 404 once SPA fallback is turned off."""
+        client.put(f"/api/backendless/{uploaded_project}", json={"spa_fallback": False})
+
+        response = client.get(f"/api/backendless/{uploaded_project}/serve/dashboard/settings")
+
+        assert response.status_code == 404
+
+    def test_manifest_reloads_on_change(self, client: TestClient, uploaded_project,
+                                        static_dir, monkeypatch):
+        """Test that files added out-of-band are picked up on the next recheck."""
+        monkeypatch.setattr(static_cache, "MANIFEST_RECHECK_SECONDS", 0)
+        (static_dir / f"project_{uploaded_project}" / "late.txt").write_text("late")
+
+        response = client.get(f"/api/backendless/{uploaded_project}/serve/late.txt")
+
+        assert response.status_code == 200
+        assert response.text == "late"
+
+    def test_manifest_reloads_on_rewrite(self, client: TestClient, uploaded_project,
+                                         static_dir, monkeypatch):
+        """Test that a file rewritten in place is not served from stale metadata or memory."""
+        url = f"/api/backendless/{uploaded_project}/serve/robots.txt"
+        old_etag = client.get(url).headers["etag"]
+        client.get(url)  # now in the LRU
+        monkeypatch.setattr(static_cache, "MANIFEST_RECHECK_SECONDS", 0)
+        path = static_dir / f"project_{uploaded_project}" / "robots.txt"
+        path.write_text("Disallow: /")
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+
+        response = client.get(url)
+
+        assert response.text == "Disallow: /"
+        assert response.headers["etag"] != old_etag
+
+    @pytest.mark.parametrize(
+        "raw, expected",
+        [
+            ("", ""),
+            ("assets/./main.js", "assets/main.js"),
+            ("assets//main.js", "assets/main.js"),
+            ("assets/../index.html", "index.html"),
+            ("../secret.txt", None),
+            ("assets/../../secret.txt", None),
+            ("..\\secret.txt", None),
+        ],
+    )
+    def test_normalize_request_path(self, raw, expected):
+        """Test that request paths are normalized and traversal is rejected."""
+        assert static_cache.normalize_request_path(raw) == expected
+
+    @pytest.mark.parametrize(
+        "name",
+        ["main.3f2a9b1c.js", "chunk.8f3e2d1a9b4c5d6e7f80.css", "index-BxY3z9_a.js",
+         "assets/vendor-Dq4-xH2k.js"],
+    )
+    def test_fingerprinted_names_are_immutable(self, name):
+        """Test that build-tool content hashes get the immutable policy."""
+        assert static_cache.cache_control_for(name) == static_cache.IMMUTABLE_CACHE_CONTROL
+
+    @pytest.mark.parametrize(
+        "name",
+        ["photo-20240101.jpg", "report_v2final.pdf", "report-v2final.pdf", "IMG-20240101.png",
+         "scan.deadbeef.png", "holiday-IMG_1234.jpg", "backup-2024-01-01.zip"],
+    )
+    def test_ordinary_names_are_revalidated(self, name):
+        """Test that date stamps and words are not mistaken for content hashes."""
+        assert static_cache.cache_control_for(name) == static_cache.DEFAULT_CACHE_CONTROL
+
+
+class TestSmallFileCache:
+    """Test the byte-bounded LRU directly."""
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test that the oldest entry is evicted once the byte budget is exceeded."""
+        cache = static_cache.SmallFileCache(max_bytes=10, max_file_bytes=10)
+        metas = []
+        for name in ("a.txt", "b.txt", "c.txt"):
+            path = tmp_path / name
+            path.write_bytes(b"12345")
+            metas.append(static_cache.compute_file_meta(path, name))
+
+        cache.put(metas[0], b"12345")
+        cache.put(metas[1], b"12345")
+        cache.get(metas[0])
+        cache.put(metas[2], b"12345")
+
+        assert cache.get(metas[0]) == b"12345"
+        assert cache.get(metas[1]) is None
+        assert cache.current_bytes == 10
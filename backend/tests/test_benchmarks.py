@@ -0,0 +1,44 @@
+# Benchmark Harness Tests
+# ========================
+import httpx
+
+from benchmarks.bench_api import SCENARIOS, compare, percentile, run_scenario
+from main import app
+
+
+def _document(rps: float, p95: float) -> dict:
+    return {"scenarios": {"blog": {"throughput_rps": rps, "latency_ms": {"p95": p95}}}}
+
+
+class TestBenchmarkHarness:
+    """Keep the load benchmark runnable and its math honest."""
+
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentiles on a known distribution."""
+        samples = [float(i) for i in range(1, 101)]
+
+        assert percentile(samples, 50) == 50.0
+        assert percentile(samples, 95) == 95.0
+        assert percentile(samples, 99) == 99.0
+        assert percentile([], 95) == 0.0
+
+    def test_compare_flags_regressions(self):
+        """Test that only changes beyond the threshold are reported."""
+        baseline = _document(rps=1000, p95=10.0)
+
+        assert compare(_document(rps=950, p95=10.5), baseline, threshold=0.1) == []
+        regressions = compare(_document(rps=500, p95=20.0), baseline, threshold=0.1)
+        assert len(regressions) == 2
+
+    async def test_scenario_runs_in_process(self):
+        """Test a short in-process run of the blog scenario."""
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            result = await run_scenario(
+                client, SCENARIOS["blog"], requests=20, concurrency=4, warmup=2
+            )
+
+        assert result.requests == 20
+        assert result.errors == 0
+        assert result.throughput_rps > 0
+        assert result.latency_ms["p50"] <= result.latency_ms["p99"]
@@ -0,0 +1,112 @@
+# Event-Loop Blocking Tests
+# ==========================
+import asyncio
+import contextvars
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import blocking
+from blocking import LoopBlockDetector, LoopBlockMiddleware, pool_stats, run_blocking
+
+
+@pytest.fixture
+def blocking_app():
+    """Small app with one blocking and one offloaded handler."""
+    app = FastAPI()
+
+    @app.get("/blocks/{item}")
+    async def blocks(item: str):
+        time.sleep(0.15)
+        return {"item": item}
+
+    @app.get("/offloaded")
+    async def offloaded():
+        await run_blocking(time.sleep, 0.15)
+        return {"ok": True}
+
+    app.add_middleware(LoopBlockMiddleware)
+    detector = LoopBlockDetector(threshold_ms=50)
+    detector.enable()
+    try:
+        yield TestClient(app), detector
+    finally:
+        detector.disable()
+
+
+class TestLoopBlockDetector:
+    """Test per-route event-loop block detection."""
+
+    def test_blocking_handler_is_attributed_to_route(self, blocking_app):
+        """Test that a sync sleep in an async handler is recorded with its route template."""
+        client, detector = blocking_app
+
+        client.get("/blocks/a")
+
+        assert len(detector.events) == 1
+        block = detector.events[0]
+        assert block.method == "GET"
+        assert block.route == "/blocks/{item}"
+        assert block.duration_ms >= 100
+
+    def test_offloaded_handler_is_clean(self, blocking_app):
+        """Test that run_blocking keeps the same work off the loop."""
+        client, detector = blocking_app
+
+        response = client.get("/offloaded")
+
+        assert response.status_code == 200
+        assert list(detector.events) == []
+
+    def test_disabled_when_threshold_zero(self):
+        """Test that a zero threshold does not hook the loop."""
+        assert LoopBlockDetector(threshold_ms=0).enable() is False
+
+
+class TestRunBlocking:
+    """Test the offload pool."""
+
+    async def test_runs_concurrently_off_loop(self):
+        """Test that blocking calls overlap and the loop stays responsive."""
+        start = time.perf_counter()
+        await asyncio.gather(*(run_blocking(time.sleep, 0.1) for _ in range(4)))
+
+        assert time.perf_counter() - start < 0.35
+
+    async def test_propagates_context_and_errors(self):
+        """Test that context variables reach the thread and exceptions surface."""
+        var = contextvars.ContextVar("var", default=None)
+        var.set("session-1")
+
+        assert await run_blocking(var.get) == "session-1"
+        with pytest.raises(ValueError):
+            await run_blocking(int, "not a number")
+
+    async def test_pool_stats(self):
+        """Test that utilisation counters settle after calls complete."""
+        before = pool_stats()["completed"]
+        await run_blocking(sum, [1, 2, 3])
+
+        stats = pool_stats()
+        assert stats["completed"] == before + 1
+        assert stats["active"] == 0
+        assert stats["queued"] == 0
+        assert stats["max_workers"] == blocking.BLOCKING_POOL_SIZE
+
+
+class TestOffloadedRoutes:
+    """Routes that touch the DB or disk must not block the loop."""
+
+    def test_contact_submission(self, client: TestClient, no_loop_blocking, sample_contact_data):
+        """Test contact submission under the blocking guard."""
+        response = client.post("/api/contact", json=sample_contact_data)
+
+        assert response.status_code == 200
+
+    def test_video_list(self, client: TestClient, no_loop_blocking):
+        """Test video listing under the blocking guard."""
+        response = client.get("/api/video/list")
+
+        assert response.status_code == 200
@@ -1,8 +1,13 @@
 # Blog API Tests
 # ===============
+from unittest.mock import patch
+
 import pytest
 from fastapi.testclient import TestClient
 
+from database import get_db_context
+from models import Video
+
 
 class TestBlogEndpoints:
     """Test blog post endpoints."""
@@ -98,3 +103,40 @@ class TestBlogPostStructure:
             # Date should be in format like "Feb 2026"
             assert isinstance(post["date"], str)
             assert len(post["date"]) > 0
+
+
+class TestBlogFastJSON:
+    """Test the opt-in orjson response path."""
+
+    @patch("main.FAST_JSON_ENABLED", True)
+    def test_fast_path_matches_default(self, client: TestClient):
+        """Test that the fast path returns the same payload as the default path."""
+        fast = client.get("/api/blog?featured=true")
+
+        with patch("main.FAST_JSON_ENABLED", False):
+            default = client.get("/api/blog?featured=true")
+
+        assert fast.status_code == 200
+        assert fast.headers["content-type"] == "application/json"
+        assert fast.json() == default.json()
+
+    def test_video_without_tags_matches(self, client: TestClient):
+        """Test that a video with NULL tags lists as [] on both paths."""
+        with get_db_context() as db:
+            video = Video(title="Untagged", description="No tags", file_path="v.mp4", tags=None)
+            db.add(video)
+            db.commit()
+            video_id = video.id
+        try:
+            with patch("main.FAST_JSON_ENABLED", True):
+                fast = client.get("/api/video/list")
+            with patch("main.FAST_JSON_ENABLED", False):
+                default = client.get("/api/video/list")
+        finally:
+            with get_db_context() as db:
+                db.query(Video).filter(Video.id == video_id).delete()
+                db.commit()
+
+        assert default.status_code == 200
+        assert fast.json() == default.json()
+        assert next(v for v in default.json() if v["id"] == video_id)["tags"] == []
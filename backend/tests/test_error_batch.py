@@ -0,0 +1,96 @@
+# Error Solver Batch Tests
+# ========================
+import asyncio
+import json
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from limits.storage import MemoryStorage
+
+import main
+from admission import TokenBudget
+from error_batch import plan_batch, solve_batch
+
+NOT_ITERABLE = "TypeError: 'int' object is not iterable"
+
+
+def _item(error_message: str, code_snippet: str = None) -> dict:
+    return {"error_message": error_message, "code_snippet": code_snippet, "language": "python",
+            "context": None}
+
+
+class TestPlan:
+    """Test deduplication and the known-pattern split."""
+
+    def test_duplicates_are_grouped(self):
+        """Test that identical errors are solved once for every index."""
+        plan = plan_batch([_item("boom"), _item(NOT_ITERABLE), _item("boom"), _item("boom", "x()")])
+
+        assert plan.size == 4 and plan.unique == 3
+        assert [group.indices for group in plan.known] == [[1]]
+        assert [group.indices for group in plan.pending] == [[0, 2], [3]]
+
+
+class TestSolveBatch:
+    """Test streaming order and the concurrency bound."""
+
+    async def test_completion_order_and_bound(self):
+        """Test that fast answers are not held back and at most N run at once."""
+        delays = {"slow": 0.2, "fast": 0.01, "mid": 0.05}
+        active = peak = 0
+
+        async def solver(error_message, **_):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(delays[error_message])
+            active -= 1
+            return {"explanation": error_message, "solution": "s", "corrected_code": None,
+                    "confidence": 0.9}
+
+        plan = plan_batch([
+            _item("slow"), _item(NOT_ITERABLE), _item("fast"), _item("mid"), _item("fast"),
+        ])
+        lines = [line async for line in solve_batch(plan, concurrency=2, solver=solver)]
+
+        assert [(line["index"], line["source"]) for line in lines[:-1]] == [
+            (1, "pattern"), (2, "agent"), (4, "agent"), (3, "agent"), (0, "agent"),
+        ]
+        assert peak == 2
+        assert lines[-1]["done"] and lines[-1]["unique"] == 4 and lines[-1]["agent"] == 3
+
+
+class TestSolveErrorsEndpoint:
+    """Test the NDJSON batch endpoint."""
+
+    def test_streams_one_line_per_error(self, client: TestClient, monkeypatch):
+        """Test that every index gets an answer without an API key."""
+        monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+        errors = [_item(NOT_ITERABLE), _item("SyntaxError: invalid syntax"), _item(NOT_ITERABLE)]
+
+        response = client.post("/api/agent/solve-errors", json={"errors": errors})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["index"] for line in lines[:-1]) == [0, 1, 2]
+        assert {line["source"] for line in lines[:-1] if line["index"] != 1} == {"pattern"}
+        assert lines[-1] == {**lines[-1], "done": True, "items": 3, "unique": 2}
+
+    def test_rejects_empty_and_oversized_batches(self, client: TestClient):
+        """Test the batch size limits."""
+        assert client.post("/api/agent/solve-errors", json={"errors": []}).status_code == 422
+        too_many = [_item(f"E{i}") for i in range(main.ERROR_BATCH_MAX_ITEMS + 1)]
+        assert client.post("/api/agent/solve-errors", json={"errors": too_many}).status_code == 422
+
+    def test_budget_charges_llm_items_only(self, client: TestClient):
+        """Test that pattern-matched items do not count against the token budget."""
+        budget = TokenBudget(MemoryStorage(), tokens_per_minute=3000)
+        with patch.object(main.admission, "budget", budget):
+            known = client.post("/api/agent/solve-errors",
+                                json={"errors": [_item(NOT_ITERABLE)] * 20})
+            unknown = client.post("/api/agent/solve-errors",
+                                  json={"errors": [_item(f"E{i}") for i in range(5)]})
+
+        assert known.status_code == 200
+        assert unknown.status_code == 429
@@ -0,0 +1,212 @@
+# Error Knowledge Base Tests
+# ==========================
+import json
+import re
+import time
+
+import pytest
+
+import agent
+from error_kb import (
+    ERROR_KB_PATH,
+    MAX_SCAN_CHARS,
+    ErrorKnowledgeBase,
+    ErrorPattern,
+    KeywordMatcher,
+    knowledge_base,
+)
+
+
+def _pattern(id: str, keywords, language: str = "python", regex: str = None,
+             confidence: float = 0.9) -> ErrorPattern:
+    return ErrorPattern.from_dict(
+        {"id": id, "keywords": keywords, "regex": regex, "confidence": confidence,
+         "explanation": f"{id} explanation", "solution": f"{id} solution", "corrected_code": None},
+        language,
+    )
+
+
+class TestKeywordMatcher:
+    """Test the one-pass keyword scan."""
+
+    def test_overlapping_keywords(self):
+        """Test that keywords sharing a prefix or nested in a match are all found."""
+        matcher = KeywordMatcher(["type", "typeerror", "error", "not iterable", "iterable"])
+
+        found = matcher.find("typeerror: 'int' object is not iterable")
+
+        assert set(found) == {"type", "typeerror", "not iterable", "iterable"}
+        assert found["typeerror"] == 0 and found["type"] == 0
+
+    def test_word_start_boundary(self):
+        """Test that word keywords only match at the start of a word."""
+        matcher = KeywordMatcher(["keyerror", ".map is not a function"])
+
+        assert matcher.find("monkeyerror happened") == {}
+        assert set(matcher.find("x keyerror: 'a'")) == {"keyerror"}
+        found = matcher.find("typeerror: data.map is not a function")
+
+        assert set(found) == {".map is not a function"}
+
+    def test_first_occurrence(self):
+        """Test that each keyword reports where it first occurs."""
+        matcher = KeywordMatcher(["error"])
+
+        assert matcher.find("ok\nerror one\nerror two") == {"error": 3}
+
+
+class TestMatching:
+    """Test candidate selection, captures and ranking."""
+
+    def test_all_keywords_and_regex_required(self):
+        """Test that a pattern needs every keyword and a matching regex."""
+        kb = ErrorKnowledgeBase([
+            _pattern("both", ["typeerror", "not iterable"]),
+            _pattern("regex", ["keyerror"], regex=r"KeyError: (?P<key>'\w+')"),
+        ])
+
+        assert kb.match("TypeError: bad operand") == []
+        matches = kb.match("TypeError: 'int' object is not iterable")
+
+        assert [m.pattern.id for m in matches] == ["both"]
+        assert kb.match("KeyError: 3") == []
+
+    def test_captures_fill_the_answer(self):
+        """Test that named groups are templated into the rendered answer."""
+        kb = ErrorKnowledgeBase([ErrorPattern.from_dict({
+            "id": "key", "keywords": ["keyerror"], "regex": r"KeyError: (?P<key>'[^']*')",
+            "explanation": "No key $key.", "solution": "Use .get($key).",
+            "corrected_code": "value = data.get($key)", "confidence": 0.9,
+        }, "python")])
+
+        answer = kb.match("KeyError: 'user_id'")[0].render("print(data['user_id'])")
+
+        assert answer["explanation"] == "No key 'user_id'."
+        assert answer["corrected_code"] == "value = data.get('user_id')"
+        assert answer["confidence"] == 0.9
+
+    def test_snippet_used_without_corrected_code(self):
+        """Test that the user's snippet is echoed when the pattern has no code."""
+        kb = ErrorKnowledgeBase([_pattern("plain", ["nameerror"])])
+
+        assert kb.match("NameError: x")[0].render("print(x)")["corrected_code"] == "print(x)"
+
+    def test_specific_beats_generic(self):
+        """Test that the most specific pattern ranks first."""
+        kb = ErrorKnowledgeBase([
+            _pattern("generic", ["typeerror"], confidence=0.99),
+            _pattern("specific", ["typeerror", "not iterable"], confidence=0.8),
+            _pattern("captured", ["typeerror", "not iterable"], regex=r"'(?P<type>\w+)' object",
+                     confidence=0.8),
+        ])
+
+        ranked = [m.pattern.id for m in kb.match("TypeError: 'int' object is not iterable")]
+
+        assert ranked == ["captured", "specific", "generic"]
+
+    def test_language_precedence_and_fallback(self):
+        """Test that the requested language wins, and other languages are tried if it has none."""
+        kb = ErrorKnowledgeBase([
+            _pattern("py", ["typeerror"], "python"),
+            _pattern("js", ["cannot read properties"], "javascript"),
+            _pattern("net", ["connection refused"], "generic"),
+        ], aliases={"python": "python", "javascript": "javascript", "node": "javascript"})
+        message = "TypeError: Cannot read properties of undefined"
+
+        assert kb.match(message, "python")[0].pattern.id == "py"
+        assert kb.match(message, "node")[0].pattern.id == "js"
+        assert kb.match("ReferenceError: cannot read properties", "python")[0].pattern.id == "js"
+        assert kb.match("Connection refused", "javascript")[0].pattern.id == "net"
+
+    def test_long_traceback_head_and_tail(self):
+        """Test that errors printed first (Java) or last (Python) in a long trace are both found."""
+        kb = ErrorKnowledgeBase([
+            _pattern("npe", ["nullpointerexception"], "java"),
+            _pattern("key", ["keyerror"], "python"),
+        ], aliases={"java": "java", "python": "python"})
+        frames = "  at frame(File.java:1)\n" * (MAX_SCAN_CHARS // 10)
+
+        assert kb.match("java.lang.NullPointerException\n" + frames, "java")[0].pattern.id == "npe"
+        assert kb.match(frames + "KeyError: 'a'", "python")[0].pattern.id == "key"
+
+
+class TestPatternFiles:
+    """Test the shipped pattern files."""
+
+    def test_files_load(self):
+        """Test that every file loads with unique ids and compiling regexes."""
+        kb = ErrorKnowledgeBase.load(ERROR_KB_PATH)
+        files = sorted(ERROR_KB_PATH.glob("*.json"))
+
+        assert len(kb.patterns) >= 300
+        assert len({p.id for p in kb.patterns}) == len(kb.patterns)
+        languages = {"python", "javascript", "java", "go", "rust", "cpp", "sql", "shell"}
+
+        assert languages <= set(kb.indexes)
+        for file in files:
+            for entry in json.loads(file.read_text(encoding="utf-8"))["patterns"]:
+                assert all(keyword == keyword.lower() for keyword in entry["keywords"]), entry["id"]
+                assert 0 < entry["confidence"] <= 1, entry["id"]
+                if entry.get("regex"):
+                    re.compile(entry["regex"])
+
+    def test_placeholders_have_groups(self):
+        """Test that every `$name` in an answer is a group of the pattern's regex."""
+        for pattern in knowledge_base().patterns:
+            groups = set(pattern.regex.groupindex) if pattern.regex else set()
+            for text in (pattern.explanation, pattern.solution):
+                names = set(re.findall(r"\$(\w+)", text)) - {"HOME", "PATH", "USER"}
+                assert names <= groups, (pattern.id, names - groups)
+
+    @pytest.mark.parametrize("message, language, expected", [
+        ("TypeError: 'int' object is not iterable", "python", "py-not-iterable"),
+        ("KeyError: 'user_id'", "python", "py-key-error-named"),
+        ("TypeError: Cannot read properties of undefined (reading 'map')", "python",
+         "js-read-properties-of-undefined"),
+        ("panic: runtime error: index out of range [5] with length 3", "golang",
+         "go-index-out-of-range"),
+        ('ERROR:  relation "users" does not exist', "postgres", "sql-relation-does-not-exist"),
+        ("bash: node: command not found", "bash", "sh-command-not-found"),
+    ])
+    def test_real_messages(self, message, language, expected):
+        """Test that common real-world messages hit their pattern."""
+        assert knowledge_base().match(message, language)[0].pattern.id == expected
+
+    def test_sub_millisecond(self):
+        """Test that a typical error matches well within a millisecond."""
+        kb = knowledge_base()
+        kb.match("warm up")
+        start = time.perf_counter()
+        for _ in range(200):
+            kb.match("AttributeError: 'NoneType' object has no attribute 'group'", "python")
+        assert (time.perf_counter() - start) / 200 < 0.001
+
+
+class TestStaticSolver:
+    """Test the agent's static error solver on top of the knowledge base."""
+
+    def test_match_is_rendered(self):
+        """Test that a matched error names the missing key."""
+        result = agent.get_static_error_solution("KeyError: 'user_id'", "data['user_id']", "python")
+
+        assert "'user_id'" in result["explanation"]
+        assert result["confidence"] >= 0.9
+
+    def test_unknown_error_falls_back(self):
+        """Test the generic answer for an error nothing matches."""
+        result = agent.get_static_error_solution("boom", "x()", "python")
+
+        assert result == {
+            "explanation": "The error 'boom' indicates an issue in your code.",
+            "solution": "Review the error message, check the line mentioned in the traceback, "
+                        "and verify your logic.",
+            "corrected_code": "x()",
+            "confidence": 0.70,
+        }
+
+    def test_known_solution_threshold(self, monkeypatch):
+        """Test that only confident matches skip the LLM."""
+        monkeypatch.setattr(agent, "ERROR_KB_MIN_CONFIDENCE", 0.8)
+        assert agent.known_error_solution("TypeError: 'int' object is not iterable") is not None
+        assert agent.known_error_solution("request timed out") is None
+        assert agent.get_static_error_solution("request timed out")["confidence"] < 0.8
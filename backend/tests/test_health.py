@@ -1,8 +1,14 @@
 # Health Check Tests
 # ===================
+import asyncio
+import time
+
 import pytest
 from fastapi.testclient import TestClient
 
+from health import ReadinessChecker
+from main import APP_VERSION
+
 
 class TestHealthEndpoints:
     """Test health check endpoints."""
@@ -25,7 +31,7 @@ class TestHealthEndpoints:
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "healthy"
-        assert data["version"] == "2.1.0"
+        assert data["version"] == APP_VERSION
 
     def test_health_response_format(self, client: TestClient):
         """Test health endpoint response format."""
@@ -64,3 +70,83 @@ class TestAPIInfo:
         assert "blog" in endpoints
         assert "github" in endpoints
         assert "agent" in endpoints
+
+
+class TestProbeEndpoints:
+    """Test liveness and readiness probes."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_readiness(self, tmp_path, monkeypatch):
+        """Point the disk probe at a temp dir and drop cached reports."""
+        import main
+
+        monkeypatch.setattr("main.STATIC_DIR", tmp_path)
+        main.readiness.invalidate()
+        yield
+        main.readiness.invalidate()
+
+    def test_liveness(self, client: TestClient):
+        """Test that liveness always answers without dependency checks."""
+        response = client.get("/health/live")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "alive"}
+
+    def test_readiness_ok(self, client: TestClient):
+        """Test that readiness reports every probe and is ready with a working DB."""
+        response = client.get("/health/ready")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert set(data["checks"]) == {
+            "database", "disk", "agent_graph", "http_client", "blocking_pool", "rate_limit",
+        }
+        assert data["checks"]["database"]["status"] == "ok"
+        assert data["checks"]["disk"]["free_mb"] > 0
+
+    def test_readiness_is_cached(self, client: TestClient):
+        """Test that repeat probes within the TTL reuse the same report."""
+        first = client.get("/health/ready").json()
+        second = client.get("/health/ready").json()
+
+        assert first["checked_at"] == second["checked_at"]
+
+    def test_critical_failure_returns_503(self, client: TestClient, monkeypatch):
+        """Test that a failing critical probe marks the worker unavailable."""
+        import main
+
+        async def broken():
+            raise ConnectionError("db down")
+
+        monkeypatch.setattr(main.readiness._probes[0], "probe", broken)
+        main.readiness.invalidate()  # startup already primed the cache
+
+        response = client.get("/health/ready")
+
+        assert response.status_code == 503
+        data = response.json()
+        assert data["status"] == "unavailable"
+        assert data["checks"]["database"]["error"] == "ConnectionError: db down"
+
+
+class TestReadinessChecker:
+    """Test the probe runner directly."""
+
+    async def test_slow_probe_times_out(self):
+        """Test that probes are time-boxed and run concurrently."""
+        async def slow():
+            await asyncio.sleep(1)
+            return {}
+
+        checker = ReadinessChecker(timeout=0.05, cache_ttl=0)
+        checker.register("slow_a", slow)
+        checker.register("slow_b", slow)
+        checker.register("optional", slow, critical=False)
+
+        start = time.perf_counter()
+        report = await checker.check()
+
+        assert time.perf_counter() - start < 0.5
+        assert report["status"] == "unavailable"
+        assert "timed out" in report["checks"]["slow_a"]["error"]
@@ -0,0 +1,131 @@
+# Intent Router Tests
+# ===================
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import agent
+from benchmarks.intent_eval import MIN_ACCURACY, MIN_DIRECT_PRECISION, evaluate
+from intent_router import IntentRouter
+from session_memory import SessionMemory
+
+
+class _CountingGraph:
+    """Stands in for the LangGraph agent; a call means the router escalated."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, state):
+        from langchain_core.messages import AIMessage
+
+        self.calls += 1
+        return {"messages": state["messages"] + [AIMessage(content="from the graph")]}
+
+
+@pytest.fixture
+def graph():
+    fake = _CountingGraph()
+    with patch("agent.LANGGRAPH_AVAILABLE", True), patch("agent._compiled_graph", fake), \
+            patch("agent.session_memory", SessionMemory()):
+        yield fake
+
+
+class TestIntentRouter:
+    """Test the keyword/n-gram classifier."""
+
+    @pytest.fixture(scope="class")
+    def router(self):
+        return IntentRouter(agent.PORTFOLIO_DATA, threshold=0.75)
+
+    @pytest.mark.parametrize("question, topic", [
+        ("What are Asadullah's skills?", "skills"),
+        ("Tell me about the projects", "projects"),
+        ("How can I contact him?", "contact"),
+        ("Does he know FastAPI?", "skills"),
+    ])
+    def test_plain_questions_are_answerable(self, router, question, topic):
+        """Test that direct portfolio questions route with high confidence."""
+        route = router.route(question)
+
+        assert route.topic == topic
+        assert router.answerable(route)
+
+    @pytest.mark.parametrize("question", [
+        "Why should I hire him?",
+        "Which of those is strongest?",
+        "skills and projects?",
+        "What is RAG?",
+        "hello",
+        "Does he know Rust?",
+        "Does he know Kubernetes?",
+    ])
+    def test_ambiguous_questions_escalate(self, router, question):
+        """Test that open-ended, mixed or off-topic questions go to the LLM."""
+        assert not router.answerable(router.route(question))
+
+    def test_index_built_from_portfolio_data(self):
+        """Test that data terms (not only cue words) feed the index."""
+        data = {**agent.PORTFOLIO_DATA, "skills": ["Haskell"]}
+
+        assert IntentRouter(data).route("Haskell?").topic == "skills"
+
+    def test_eval_set_meets_targets(self):
+        """Test routing accuracy on the offline eval set."""
+        report = evaluate(IntentRouter(agent.PORTFOLIO_DATA))
+
+        assert report["accuracy"] >= MIN_ACCURACY
+        assert report["direct_precision"] >= MIN_DIRECT_PRECISION
+
+
+class TestAgentFastPath:
+    """Test that run_agent answers routed questions without the graph."""
+
+    async def test_routed_question_skips_llm(self, graph):
+        """Test a template answer with the router's mode and confidence."""
+        result = await agent.run_agent("What is his email?")
+
+        assert graph.calls == 0
+        assert result["mode"] == "router"
+        assert result["confidence"] >= 0.75
+        assert agent.PORTFOLIO_DATA["email"] in result["answer"]
+
+    async def test_ambiguous_question_uses_graph(self, graph):
+        """Test that low-confidence questions escalate to LangGraph."""
+        result = await agent.run_agent("Why should I hire him?")
+
+        assert graph.calls == 1
+        assert result["mode"] == "langgraph"
+
+    async def test_router_answers_without_langgraph(self):
+        """Test that the LLM-free fast path also works when LangGraph is not installed."""
+        with patch("agent.LANGGRAPH_AVAILABLE", False), \
+                patch("agent.session_memory", SessionMemory()):
+            routed = await agent.run_agent("What is his email?")
+            escalated = await agent.run_agent("Why should I hire him?")
+
+        assert routed["mode"] == "router"
+        assert escalated["mode"] == "static"
+
+    async def test_routed_answer_kept_in_session(self, graph):
+        """Test that an LLM follow-up sees the routed exchange."""
+        await agent.run_agent("What are his skills?", session_id="s1")
+
+        context = agent.session_memory.get("s1")
+        assert [t.text for t in context.turns][0] == "What are his skills?"
+
+    async def test_router_can_be_disabled(self, graph):
+        """Test INTENT_ROUTER_ENABLED=false sends everything to the graph."""
+        with patch("agent.INTENT_ROUTER_ENABLED", False):
+            result = await agent.run_agent("What is his email?")
+
+        assert (graph.calls, result["mode"]) == (1, "langgraph")
+
+    def test_endpoint_reports_mode_and_confidence(self, client: TestClient, graph):
+        """Test that AgentResponse carries the router's mode and confidence."""
+        response = client.post("/api/agent/chat", json={"message": "How can I contact him?"})
+
+        data = response.json()
+        assert data["mode"] == "router"
+        assert 0.75 <= data["confidence"] <= 1.0
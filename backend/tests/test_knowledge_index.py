@@ -0,0 +1,234 @@
+# Knowledge Index Tests
+# =====================
+import multiprocessing
+from unittest.mock import patch
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import agent  # noqa: E402
+import knowledge_index as ki  # noqa: E402
+from database import get_db_context  # noqa: E402
+from db_helpers import create_taught_content  # noqa: E402
+
+
+def _unit(rng, rows: int, dim: int = 32) -> "np.ndarray":
+    vectors = rng.normal(size=(rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _index_documents(path: str, tag: str) -> None:
+    """Worker process body: index its own documents and ones every worker adds."""
+    index = ki.KnowledgeIndex(path)
+    for i in range(60):
+        index.add_document(f"{tag}:{i}", f"{tag} {i}", f"{tag}word{i} about python")
+        index.add_document(f"shared:{i}", f"shared {i}", f"sharedword{i} text")
+
+
+def _clustered(rng, rows: int, dim: int = 32, clusters: int = 64) -> "np.ndarray":
+    centres = _unit(rng, clusters, dim)
+    noise = 0.1 * rng.normal(size=(rows, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, rows)] + noise
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def small_train(monkeypatch):
+    """Train and compact at test-sized row counts."""
+    monkeypatch.setattr(ki, "MIN_TRAIN_ROWS", 512)
+    monkeypatch.setattr(ki, "MIN_PENDING_ROWS", 128)
+
+
+class TestChunkingAndEmbedding:
+    """Test chunking and the hashing embedder."""
+
+    def test_overlapping_windows(self):
+        """Test that long texts are split into overlapping windows covering every word."""
+        words = [f"w{i}" for i in range(300)]
+
+        chunks = ki.chunk_text(" ".join(words), max_words=120, overlap=30)
+
+        assert [len(chunk.split()) for chunk in chunks] == [120, 120, 120]
+        assert chunks[1].split()[0] == "w90"
+        assert chunks[-1].split()[-1] == "w299"
+        assert ki.chunk_text("  short text ") == ["short text"]
+        assert ki.chunk_text("   ") == []
+
+    def test_embeddings(self):
+        """Test that embeddings are unit length, deterministic and rank related text higher."""
+        embedder = ki.HashingEmbedder(256)
+        texts = ["Python decorators wrap functions", "Docker containers and images"]
+        docs = embedder.embed(texts)
+        query = embedder.embed(["how do decorators wrap a function in python"])[0]
+
+        assert np.allclose(np.linalg.norm(docs, axis=1), 1.0, atol=1e-5)
+        assert np.array_equal(docs, embedder.embed(texts))
+        assert docs[0] @ query > docs[1] @ query
+        assert not embedder.embed(["the and of"]).any()
+
+
+class TestVectorIndex:
+    """Test the memory-mapped IVF index."""
+
+    def test_exact_before_training(self, tmp_path):
+        """Test that a small index is searched exhaustively."""
+        vectors = _unit(np.random.default_rng(0), 100)
+        index = ki.VectorIndex(tmp_path, 32)
+        index.add(vectors, np.arange(100))
+
+        expected = np.argsort(-(vectors @ vectors[7]))[:5]
+
+        assert [chunk_id for chunk_id, _ in index.search(vectors[7], 5)] == list(expected)
+        assert index._snapshot.sorted_rows == 0
+
+    def test_recall_after_training(self, tmp_path, small_train):
+        """Test that probing a few lists finds nearly all true neighbours."""
+        rng = np.random.default_rng(1)
+        vectors = _clustered(rng, 4000)
+        index = ki.VectorIndex(tmp_path, 32)
+        index.add(vectors, np.arange(4000))
+        assert index._snapshot.sorted_rows == 4000
+
+        queries = _clustered(rng, 50)
+        found = 0
+        for query in queries:
+            truth = set(np.argsort(-(vectors @ query))[:10])
+            found += len(truth & {chunk_id for chunk_id, _ in index.search(query, 10, nprobe=12)})
+
+        assert found / (10 * len(queries)) >= 0.9
+
+    def test_incremental_adds_and_reopen(self, tmp_path, small_train):
+        """Test that appended rows are found at once, filed by compaction, and survive a reopen."""
+        rng = np.random.default_rng(2)
+        index = ki.VectorIndex(tmp_path, 32)
+        index.add(_clustered(rng, 1000), np.arange(1000))
+        extra = _unit(rng, 50)
+        index.add(extra, np.arange(1000, 1050))
+
+        assert index._snapshot.sorted_rows == 1000
+        assert index.search(extra[3], 1)[0][0] == 1003
+
+        index.add(_unit(rng, 100), np.arange(1050, 1150))  # past the pending threshold
+        assert index._snapshot.sorted_rows == 1150
+
+        reopened = ki.VectorIndex(tmp_path, 32)
+        assert len(reopened) == 1150
+        assert reopened.search(extra[3], 1, nprobe=64)[0][0] == 1003
+
+    def test_torn_append_is_dropped(self, tmp_path):
+        """Test that bytes past the recorded row count are truncated on open."""
+        index = ki.VectorIndex(tmp_path, 32)
+        index.add(_unit(np.random.default_rng(3), 10), np.arange(10))
+        with open(tmp_path / "vectors.f32", "ab") as f:
+            f.write(b"\x00" * 10)
+
+        assert len(ki.VectorIndex(tmp_path, 32)) == 10
+        with pytest.raises(ValueError):
+            ki.VectorIndex(tmp_path, 64)
+
+
+class TestKnowledgeIndex:
+    """Test documents, search and the agent tool."""
+
+    def test_documents_are_indexed_once(self, tmp_path):
+        """Test that a source is indexed once, also after a reopen."""
+        index = ki.KnowledgeIndex(tmp_path)
+
+        title = "Python decorators"
+
+        assert index.add_document("blog:decorators", title, "Decorators wrap functions.") == 1
+        assert index.add_document("blog:decorators", title, "Changed") == 0
+        assert ki.KnowledgeIndex(tmp_path).add_document("blog:decorators", title, "x") == 0
+
+    def test_search_finds_the_relevant_document(self, tmp_path):
+        """Test that the chunk about the question ranks first."""
+        index = ki.KnowledgeIndex(tmp_path)
+        index.add_document("blog:docker", "Docker for Python apps",
+                           "Build slim images with multi-stage builds.")
+        index.add_document("taught:1", "Python decorators",
+                           "A decorator wraps a function; use functools.wraps.")
+
+        hits = index.search("What does functools.wraps do in a decorator?")
+
+        assert hits[0].source == "taught:1"
+        assert index.search("zebra xylophone") == []
+
+    def test_format_hits_is_bounded(self):
+        """Test that tool results never exceed the context budget."""
+        hits = [ki.Hit(0.9, f"taught:{i}", "Title", "word " * 200) for i in range(5)]
+
+        text = ki.format_hits(hits, max_chars=700)
+
+        assert len(text) <= 700
+        assert text.startswith("[Title] (taught:0)")
+
+    def test_other_workers_see_new_documents(self, tmp_path):
+        """Test that a document indexed through one handle is found through another."""
+        first, second = ki.KnowledgeIndex(tmp_path), ki.KnowledgeIndex(tmp_path)
+        first.add_document("taught:7", "Asyncio", "The event loop runs coroutines cooperatively.")
+
+        assert second.search("asyncio event loop")[0].source == "taught:7"
+        assert second.add_document("taught:7", "Asyncio", "Again") == 0
+
+    @pytest.mark.skipif(not ki.FCNTL_AVAILABLE, reason="needs fcntl")
+    def test_concurrent_writer_processes(self, tmp_path):
+        """Test that two processes writing one index keep every vector paired with its chunk."""
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=_index_documents, args=(str(tmp_path), tag)) for tag in "ab"
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        index = ki.KnowledgeIndex(tmp_path)
+        snapshot = index.vectors._snapshot
+        assert [worker.exitcode for worker in workers] == [0, 0]
+        assert len(index) == len(index.sources) == 180
+        assert sorted(snapshot.chunk_ids.tolist()) == list(range(180))
+        for row, chunk_id in enumerate(snapshot.chunk_ids):
+            record = index.chunk(int(chunk_id))
+            expected = index.embedder.embed([f"{record['title']}\n{record['text']}"])[0]
+            assert np.allclose(snapshot.vectors[row], expected, atol=1e-6)
+
+    def test_agent_tool(self, tmp_path):
+        """Test the search_knowledge tool with and without an index."""
+        index = ki.KnowledgeIndex(tmp_path)
+        index.add_document("blog:rag", "RAG chatbots",
+                           "Retrieval augmented generation grounds answers in documents.")
+
+        with patch("agent.knowledge_index", lambda: index):
+            found = agent.search_knowledge("retrieval augmented generation")
+            assert "[RAG chatbots] (blog:rag)" in found
+            assert agent.search_knowledge("zebra") == "No relevant passages found."
+        with patch("agent.knowledge_index", lambda: None):
+            assert "not available" in agent.search_knowledge("rag")
+
+
+class TestApproval:
+    """Test that approving taught content indexes it."""
+
+    @patch("main.ADMIN_SECRET", "secret")
+    def test_approve_indexes_content(self, client, tmp_path):
+        """Test that an approved contribution becomes searchable."""
+        index = ki.KnowledgeIndex(tmp_path)
+        with get_db_context() as db:
+            content = create_taught_content(
+                db, "Asyncio", "The event loop runs coroutines cooperatively."
+            )
+            content_id = content.id
+        headers = {"X-Admin-Token": "secret"}
+
+        with patch("main.knowledge_index", lambda: index):
+            response = client.post(f"/api/admin/teach/{content_id}/approve", headers=headers)
+            missing = client.post("/api/admin/teach/999999/approve", headers=headers)
+
+        assert response.json() == {"id": content_id, "approved": True, "chunks_indexed": 1}
+        assert index.search("asyncio event loop coroutines")[0].source == f"taught:{content_id}"
+        assert missing.status_code == 404
+
+    def test_approve_requires_admin(self, client):
+        """Test that approval is admin-only."""
+        assert client.post("/api/admin/teach/1/approve").status_code == 401
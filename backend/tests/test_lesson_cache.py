@@ -0,0 +1,217 @@
+# Lesson Cache Tests
+# ==================
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import lesson_cache as lc
+from database import Base
+from models import CachedLesson, LearningProgress
+
+LESSON = {
+    "lesson_plan": "Plan",
+    "resources": ["Docs"],
+    "quiz_questions": ["Why?"],
+    "next_steps": "Practice",
+    "mode": "llm",
+}
+
+
+@pytest.fixture
+def sessions():
+    """A fresh in-memory database with the app's tables."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def cache(sessions):
+    return lc.LessonCache(sessions, ttl=3600, max_entries=3)
+
+
+class TestKeys:
+    """Test lesson cache keys."""
+
+    def test_normalised(self):
+        """Test that case and whitespace do not change the key."""
+        assert lc.lesson_key("Python  Decorators", "Beginner", "interactive") == \
+            lc.lesson_key(" python decorators ", "beginner", None)
+        assert lc.lesson_key("python", "beginner") != lc.lesson_key("python", "advanced")
+
+    def test_questions_bypass(self):
+        """Test that personalised requests are never cached."""
+        assert lc.lesson_key("python", questions=["How do generators work?"]) is None
+        assert lc.lesson_key("python", questions=["  "]) is not None
+        assert lc.lesson_key("   ") is None
+
+    def test_disabled(self, monkeypatch):
+        """Test that a disabled cache bypasses every request."""
+        monkeypatch.setattr(lc, "LESSON_CACHE_ENABLED", False)
+        assert lc.lesson_key("python") is None
+
+
+class TestLessonCache:
+    """Test the database-backed store."""
+
+    def test_round_trip(self, cache):
+        """Test that a stored lesson is served without the mode field."""
+        key = lc.lesson_key("python")
+        assert cache.get(key) is None
+
+        cache.put(key, "Python", None, None, LESSON)
+
+        assert cache.get(key) == {k: v for k, v in LESSON.items() if k != "mode"}
+
+    def test_replace(self, cache, sessions):
+        """Test that storing a key again replaces the lesson."""
+        key = lc.lesson_key("python")
+        cache.put(key, "python", None, None, LESSON)
+        cache.put(key, "python", None, None, {**LESSON, "lesson_plan": "New plan"})
+
+        assert cache.get(key)["lesson_plan"] == "New plan"
+        with sessions() as db:
+            assert db.query(CachedLesson).count() == 1
+
+    def test_expiry(self, cache, sessions):
+        """Test that expired lessons are neither served nor fresh."""
+        key = lc.lesson_key("python")
+        cache.put(key, "python", None, None, LESSON)
+        assert cache.fresh(key) and not cache.fresh(key, horizon=7200)
+
+        with sessions() as db:
+            db.query(CachedLesson).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+            db.commit()
+
+        assert cache.get(key) is None
+        assert cache.evict() == 1
+
+    def test_lru_eviction(self, cache, sessions):
+        """Test that the least recently used lessons go past max_entries."""
+        keys = [lc.lesson_key(f"topic {i}") for i in range(4)]
+        for i, key in enumerate(keys[:3]):
+            cache.put(key, f"topic {i}", None, None, LESSON)
+            with sessions() as db:
+                db.query(CachedLesson).filter(CachedLesson.cache_key == key).update(
+                    {"last_used_at": datetime.utcnow() - timedelta(hours=10 - i)}
+                )
+                db.commit()
+        assert cache.get(keys[0]) is not None  # topic 0 becomes the most recent
+
+        cache.put(keys[3], "topic 3", None, None, LESSON)
+
+        assert cache.get(keys[1]) is None
+        assert all(cache.get(key) is not None for key in (keys[0], keys[2], keys[3]))
+
+    def test_popular(self, cache, sessions):
+        """Test that triples are ranked by how often they were requested."""
+        with sessions() as db:
+            for topic, level, count in (("Python", "beginner", 3), ("python", "beginner", 1),
+                                        ("Rust", "advanced", 2), ("Go", "beginner", 1)):
+                db.add_all(LearningProgress(topic=topic, level=level, learning_style="interactive")
+                           for _ in range(count))
+            db.commit()
+
+        popular = cache.popular(2)
+
+        assert [(topic.lower(), level) for topic, level, _ in popular] == [
+            ("python", "beginner"), ("rust", "advanced"),
+        ]
+
+    def test_database_errors_degrade(self):
+        """Test that a broken cache misses instead of failing the request."""
+        broken = lc.LessonCache(sessionmaker(bind=create_engine("sqlite://")))
+
+        assert broken.get(lc.lesson_key("python")) is None
+        broken.put(lc.lesson_key("python"), "python", None, None, LESSON)
+
+
+class TestPrecompute:
+    """Test the popular-lesson precompute."""
+
+    async def test_generates_missing_lessons(self, cache, sessions):
+        """Test that only missing lessons are generated, and fallbacks are not stored."""
+        with sessions() as db:
+            db.add_all(LearningProgress(topic=topic, level="beginner", learning_style="interactive")
+                       for topic in ("python", "python", "rust", "go"))
+            db.commit()
+        cache.put(lc.lesson_key("rust"), "rust", "beginner", "interactive", LESSON)
+        agent = AsyncMock(side_effect=[LESSON, {**LESSON, "mode": "static"}])
+
+        with patch("lesson_cache.run_learning_agent", agent):
+            stored = await lc.precompute(limit=5, horizon=0, cache=cache)
+
+        assert stored == 1
+        assert [call.kwargs["topic"] for call in agent.await_args_list] == ["python", "go"]
+        assert cache.get(lc.lesson_key("python")) is not None
+        assert cache.get(lc.lesson_key("go")) is None
+
+    async def test_claimed_lessons_are_skipped(self, cache, sessions):
+        """Test that a lesson another worker has claimed is not generated again."""
+        with sessions() as db:
+            db.add_all(LearningProgress(topic=topic, level="beginner", learning_style="interactive")
+                       for topic in ("python", "rust"))
+            db.commit()
+        assert cache.claim(lc.lesson_key("python"))  # another worker is generating it
+        agent = AsyncMock(return_value=LESSON)
+
+        with patch("lesson_cache.run_learning_agent", agent):
+            stored = await lc.precompute(limit=5, horizon=0, cache=cache)
+
+        assert stored == 1
+        assert [call.kwargs["topic"] for call in agent.await_args_list] == ["rust"]
+        assert cache.claim(lc.lesson_key("rust"))  # released after generating
+
+    def test_claim(self, cache):
+        """Test that one claim wins until it is released or lapses."""
+        assert cache.claim("k")
+        assert not cache.claim("k")
+        cache.release("k")
+        assert cache.claim("k", hold=-1)
+        assert cache.claim("k")  # the previous claim had lapsed
+
+
+class TestLearnEndpoint:
+    """Test /api/learn on top of the cache."""
+
+    def test_miss_then_hit(self, client, cache):
+        """Test that a generated lesson is stored and then served without the LLM."""
+        agent = AsyncMock(return_value=LESSON)
+        with patch("main.lesson_cache", cache), patch("main.run_learning_agent", agent), \
+                patch("main.record_learning"):
+            first = client.post("/api/learn", json={"topic": "Python"})
+            second = client.post("/api/learn", json={"topic": "python "})
+
+        assert first.headers["X-Lesson-Cache"] == "miss"
+        assert second.headers["X-Lesson-Cache"] == "hit"
+        assert second.json() == first.json()
+        assert agent.await_count == 1
+
+    def test_questions_bypass(self, client, cache):
+        """Test that requests with questions always reach the agent."""
+        agent = AsyncMock(return_value=LESSON)
+        body = {"topic": "python", "questions": ["What is a closure?"]}
+        with patch("main.lesson_cache", cache), patch("main.run_learning_agent", agent), \
+                patch("main.record_learning"):
+            responses = [client.post("/api/learn", json=body) for _ in range(2)]
+
+        assert [r.headers["X-Lesson-Cache"] for r in responses] == ["bypass", "bypass"]
+        assert agent.await_count == 2
+
+    def test_fallback_not_cached(self, client, cache):
+        """Test that static fallback lessons are not stored."""
+        agent = AsyncMock(return_value={**LESSON, "mode": "static"})
+        with patch("main.lesson_cache", cache), patch("main.run_learning_agent", agent), \
+                patch("main.record_learning"):
+            client.post("/api/learn", json={"topic": "python"})
+            second = client.post("/api/learn", json={"topic": "python"})
+
+        assert second.headers["X-Lesson-Cache"] == "miss"
+        assert agent.await_count == 2
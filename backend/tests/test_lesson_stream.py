@@ -0,0 +1,236 @@
+# Lesson Streaming Tests
+# ======================
+import asyncio
+import json
+import random
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import agent
+import llm_usage
+from database import Base
+from lesson_cache import LessonCache
+from structured_output import JsonFieldStream
+
+PLAN = {
+    "lesson_plan": "# Decorators\n\nA decorator wraps a \"function\" \\ é 😀",
+    "resources": ["PEP 318", "Real Python, decorators"],
+    "quiz_questions": ["What does @ do?", "Why functools.wraps?", "Name one use {case}"],
+    "next_steps": "Write a timing decorator",
+}
+
+
+def _feed(text: str, sizes) -> tuple:
+    """Feed `text` in pieces; returns (concatenated deltas, completed values)."""
+    stream = JsonFieldStream()
+    deltas, values, pos = {}, {}, 0
+    for size in sizes:
+        for kind, name, value in stream.feed(text[pos:pos + size]):
+            if kind == "delta":
+                deltas[name] = deltas.get(name, "") + value
+            else:
+                values[name] = value
+        pos += size
+    assert stream.done
+    return deltas, values
+
+
+class StreamingLLM:
+    """Streams `text` in small chunks, pausing after the first ones until released."""
+
+    def __init__(self, text: str, native: bool = False, chunk: int = 12):
+        self.pieces = [text[i:i + chunk] for i in range(0, len(text), chunk)]
+        self.native = native
+        self.release = asyncio.Event()
+
+    async def astream(self, messages):
+        for i, piece in enumerate(self.pieces):
+            if i == 3:
+                await self.release.wait()
+            if self.native:
+                first = i == 0
+                yield AIMessageChunk(content="", tool_call_chunks=[
+                    {"name": "LearningPlan" if first else None, "args": piece,
+                     "id": "call_1" if first else None, "index": 0}
+                ])
+            else:
+                yield AIMessageChunk(content=piece)
+        yield AIMessageChunk(
+            content="",
+            usage_metadata={"input_tokens": 100, "output_tokens": 50, "total_tokens": 150},
+        )
+
+
+@pytest.fixture
+def llm_enabled(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setattr(agent, "LANGGRAPH_AVAILABLE", True)
+
+
+class TestJsonFieldStream:
+    """Test the incremental field parser."""
+
+    @pytest.mark.parametrize("indent", [None, 2])
+    def test_any_split_gives_the_same_fields(self, indent):
+        """Test that every way of cutting the text yields the same deltas and values."""
+        value = {**PLAN, "confidence": 0.9, "meta": {"tags": ["a", "}"]}, "ok": True}
+        text = json.dumps(value, indent=indent)
+        rng = random.Random(7)
+        for _ in range(200):
+            sizes = [rng.randint(1, 9) for _ in range(len(text))]
+            deltas, values = _feed(text, sizes)
+
+            assert values == {**PLAN, "confidence": 0.9, "meta": {"tags": ["a", "}"]}, "ok": True}
+            assert deltas["lesson_plan"] == PLAN["lesson_plan"]
+
+    def test_escapes_split_across_pieces(self):
+        """Test that escapes (surrogate pairs included) cut mid-way are decoded once complete."""
+        text = json.dumps({"lesson_plan": "line\n😀\"end"})
+        for cut in range(1, len(text)):
+            deltas, values = _feed(text, [cut, len(text)])
+            assert values["lesson_plan"] == "line\n😀\"end"
+            assert deltas["lesson_plan"] == "line\n😀\"end"
+
+    def test_surrounding_prose_ignored(self):
+        """Test that prose and markdown fences around the object are skipped."""
+        plan = json.dumps({"next_steps": "Practice"})
+        text = "Here is your plan:\n```json\n" + plan + "\n```\n{\"x\": 1}"
+
+        deltas, values = _feed(text, [5] * len(text))
+
+        assert values == {"next_steps": "Practice"}
+
+    def test_text_streams_before_the_field_ends(self):
+        """Test that string text is reported as soon as it arrives."""
+        stream = JsonFieldStream()
+
+        assert stream.feed('{"lesson_plan": "# Intro') == [("delta", "lesson_plan", "# Intro")]
+        assert stream.feed('\\nMore"') == [
+            ("delta", "lesson_plan", "\nMore"), ("value", "lesson_plan", "# Intro\nMore"),
+        ]
+        assert stream.fields == {"lesson_plan": "# Intro\nMore"}
+
+
+class TestStreamedAgents:
+    """Test the streamed learning and teaching agents."""
+
+    @pytest.mark.parametrize("native", [False, True])
+    async def test_first_content_before_the_answer_ends(self, llm_enabled, native):
+        """Test that lesson text is yielded while the model is still generating."""
+        llm = StreamingLLM(json.dumps(PLAN), native=native)
+        with patch("agent._chat_model", lambda name: llm):
+            events = agent.stream_learning_agent("decorators")
+            first = await asyncio.wait_for(events.__anext__(), timeout=1)
+            assert first["field"] == "lesson_plan" and "delta" in first
+            llm.release.set()
+            rest = [event async for event in events]
+
+        assert rest[-1] == {"done": True, "mode": "llm", "result": PLAN}
+        assert [e["field"] for e in rest if "value" in e] == list(PLAN)
+        streamed = first["delta"] + "".join(
+            e.get("delta", "") for e in rest if e.get("field") == "lesson_plan"
+        )
+        assert streamed == PLAN["lesson_plan"]
+
+    async def test_invalid_answer_falls_back(self, llm_enabled):
+        """Test that output that does not validate ends with the static lesson."""
+        llm = StreamingLLM('{"lesson_plan": "only this"}')
+        llm.release.set()
+        with patch("agent._chat_model", lambda name: llm):
+            events = [event async for event in agent.stream_learning_agent("decorators")]
+
+        assert "".join(e.get("delta", "") for e in events) == "only this"
+        assert events[-1]["mode"] == "static"
+        assert events[-1]["result"]["lesson_plan"].startswith("# decorators - Beginner Lesson Plan")
+        assert llm_usage.llm_fallbacks_total.value("learning", "parse_error") >= 1
+
+    @patch("agent.LANGGRAPH_AVAILABLE", False)
+    async def test_teaching_without_llm(self):
+        """Test that the static teaching answer is sent as completed sections."""
+        stream = agent.stream_teaching_agent("asyncio", "Event loops", "advanced")
+        events = [event async for event in stream]
+
+        assert [e["field"] for e in events[:-1]] == [
+            "acknowledgment", "structured_content", "suggested_exercises", "related_topics"
+        ]
+        assert events[-1]["done"] and events[-1]["mode"] == "static"
+
+    async def test_stream_llm_retries_before_output_only(self, monkeypatch):
+        """Test that a transient error before any output is retried and usage is recorded."""
+        monkeypatch.setattr(llm_usage, "LLM_RETRY_BASE_DELAY", 0)
+
+        class Flaky(StreamingLLM):
+            failures = 1
+
+            async def astream(self, messages):
+                if self.failures:
+                    self.failures -= 1
+                    error = Exception("overloaded")
+                    error.status_code = 529
+                    raise error
+                async for chunk in super().astream(messages):
+                    yield chunk
+
+        llm = Flaky('{"a": "b"}')
+        llm.release.set()
+        retries = llm_usage.llm_retries_total.value("stream_test")
+
+        chunks = [chunk async for chunk in llm_usage.stream_llm(llm, [], agent="stream_test")]
+
+        assert "".join(chunk.content for chunk in chunks) == '{"a": "b"}'
+        assert llm_usage.llm_retries_total.value("stream_test") == retries + 1
+        assert llm_usage.usage_summary()["agents"]["stream_test"]["output_tokens"] >= 50
+
+
+class TestStreamEndpoints:
+    """Test the SSE endpoints."""
+
+    @staticmethod
+    def _events(response) -> list:
+        lines = response.text.splitlines()
+        return [json.loads(line[6:]) for line in lines if line.startswith("data: ")]
+
+    def test_learn_stream_caches_generated_lessons(self, client, llm_enabled):
+        """Test that a streamed LLM lesson is cached and then replayed without the LLM."""
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(engine)
+        llm = StreamingLLM(json.dumps(PLAN))
+        llm.release.set()
+        calls = []
+
+        def chat_model(name):
+            calls.append(name)
+            return llm
+
+        with patch("main.lesson_cache", LessonCache(sessionmaker(bind=engine))), \
+                patch("agent._chat_model", chat_model), patch("main.record_learning"):
+            first = client.post("/api/learn/stream", json={"topic": "Decorators"})
+            second = client.post("/api/learn/stream", json={"topic": "decorators"})
+
+        assert first.headers["content-type"].startswith("text/event-stream")
+        assert first.headers["X-Lesson-Cache"] == "miss"
+        assert self._events(first)[0]["field"] == "lesson_plan"
+        assert self._events(first)[-1] == {"done": True, "mode": "llm", "result": PLAN}
+        assert second.headers["X-Lesson-Cache"] == "hit"
+        assert self._events(second)[-1]["result"] == PLAN
+        assert calls == ["learning"]
+
+    @patch("agent.LANGGRAPH_AVAILABLE", False)
+    def test_teach_stream(self, client):
+        """Test that /api/teach/stream ends with the complete answer."""
+        response = client.post("/api/teach/stream",
+                               json={"topic": "asyncio", "content": "Event loops"})
+
+        events = self._events(response)
+        assert response.status_code == 200
+        assert events[-1]["done"] is True
+        assert set(events[-1]["result"]) == {
+            "acknowledgment", "structured_content", "suggested_exercises", "related_topics",
+        }
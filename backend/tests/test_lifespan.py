@@ -0,0 +1,114 @@
+# Startup Lifespan & Schema Verification Tests
+# =============================================
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, text
+
+import database
+from database import (
+    SchemaMismatchError,
+    current_revision,
+    expected_head_revision,
+    verify_schema,
+    warm_pool,
+)
+from main import app
+
+
+@pytest.fixture
+def tmp_engine(tmp_path):
+    """Empty SQLite database."""
+    db_engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    yield db_engine
+    db_engine.dispose()
+
+
+class TestSchemaVerification:
+    """Test the startup schema check."""
+
+    def test_head_revision_from_migrations(self):
+        """Test that the shipped migrations resolve to the 'lesson_claims' head."""
+        assert expected_head_revision() == "lesson_claims"
+
+    def test_head_follows_revision_chain(self, tmp_path):
+        """Test that the head is the revision nothing else revises."""
+        (tmp_path / "a.py").write_text("revision = 'a1'\ndown_revision = None\n")
+        (tmp_path / "b.py").write_text(
+            "revision: str = 'b2'\ndown_revision: Union[str, None] = 'a1'\n"
+        )
+
+        assert expected_head_revision(tmp_path) == "b2"
+
+    def test_bootstrap_stamps_empty_database(self, tmp_engine):
+        """Test that bootstrap mode creates tables once and stamps the head."""
+        assert verify_schema(tmp_engine, mode="bootstrap", head="initial") == "initial"
+
+        assert current_revision(tmp_engine) == "initial"
+        assert "contact_messages" in inspect(tmp_engine).get_table_names()
+
+    def test_at_head_skips_create_all(self, tmp_engine):
+        """Test that a stamped database is verified without schema introspection."""
+        verify_schema(tmp_engine, mode="bootstrap", head="initial")
+
+        with patch.object(database.Base.metadata, "create_all") as create_all:
+            assert verify_schema(tmp_engine, mode="bootstrap", head="initial") == "initial"
+        create_all.assert_not_called()
+
+    def test_bootstrap_upgrades_older_revision(self, tmp_engine):
+        """Test that a database stamped at an earlier migration is upgraded to head."""
+        verify_schema(tmp_engine, mode="bootstrap", head="initial")
+        with tmp_engine.begin() as conn:
+            # As stamped before the later migrations
+            conn.execute(text("DROP TABLE lesson_cache"))
+            conn.execute(text("DROP TABLE lesson_claims"))
+
+        with pytest.raises(SchemaMismatchError, match="'initial'"):
+            verify_schema(tmp_engine, mode="verify")
+        assert verify_schema(tmp_engine, mode="bootstrap") == expected_head_revision()
+
+        assert current_revision(tmp_engine) == expected_head_revision()
+        assert {"lesson_cache", "lesson_claims"} <= set(inspect(tmp_engine).get_table_names())
+
+    def test_verify_mode_rejects_unstamped_database(self, tmp_engine):
+        """Test that strict mode fails fast on a database without alembic_version."""
+        with pytest.raises(SchemaMismatchError, match="alembic upgrade head"):
+            verify_schema(tmp_engine, mode="verify", head="initial")
+
+    def test_revision_mismatch_fails_fast(self, tmp_engine):
+        """Test that a database at another revision is rejected in every mode."""
+        verify_schema(tmp_engine, mode="bootstrap", head="initial")
+        with tmp_engine.begin() as conn:
+            conn.execute(text("UPDATE alembic_version SET version_num = 'old'"))
+
+        for mode in ("bootstrap", "verify"):
+            with pytest.raises(SchemaMismatchError, match="'old'"):
+                verify_schema(tmp_engine, mode=mode, head="initial")
+
+    def test_off_mode_skips_check(self, tmp_engine):
+        """Test that the check can be disabled."""
+        assert verify_schema(tmp_engine, mode="off") == "unchecked"
+        assert current_revision(tmp_engine) is None
+
+    def test_warm_pool(self, tmp_engine):
+        """Test that pool warming opens and returns the requested connections."""
+        assert warm_pool(tmp_engine, 2) == 2
+
+
+class TestLifespan:
+    """Test the application lifespan."""
+
+    def test_startup_fails_on_schema_mismatch(self):
+        """Test that the app refuses to start against the wrong schema."""
+        with patch("main.verify_schema", side_effect=SchemaMismatchError("wrong schema")):
+            with pytest.raises(SchemaMismatchError):
+                with TestClient(app):
+                    pass
+
+    def test_startup_primes_readiness(self, client: TestClient):
+        """Test that readiness is already computed when startup completes."""
+        import main
+
+        assert main.readiness._report is not None
+        assert main.readiness._report["checks"]["database"]["status"] == "ok"
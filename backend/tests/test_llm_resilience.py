@@ -0,0 +1,199 @@
+# LLM Resilience Tests
+# ====================
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+import agent
+import llm_resilience
+import llm_usage
+from llm_resilience import CircuitBreaker, CircuitOpenError, hedged, llm_guard
+
+
+class OverloadedError(Exception):
+    status_code = 529
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    """Isolate breakers, latency windows and usage between tests."""
+    monkeypatch.setattr(llm_resilience, "_breakers", {})
+    monkeypatch.setattr(llm_resilience, "_ttft_windows", {})
+    monkeypatch.setattr(llm_usage, "_agent_usage", {})
+    monkeypatch.setattr(llm_usage, "LLM_MAX_RETRIES", 0)
+
+
+class TestCircuitBreaker:
+    """Test the consecutive-failure breaker."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the breaker opens at the threshold and a success resets the count."""
+        breaker = CircuitBreaker("chat", failure_threshold=3, cooldown=60)
+
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.allow()
+
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+    def test_half_open_lets_one_probe_through(self):
+        """Test recovery probing after the cooldown."""
+        breaker = CircuitBreaker("chat", failure_threshold=1, cooldown=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        assert breaker.allow()
+        assert not breaker.allow()  # the probe is still in flight
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.allow() and breaker.allow()
+
+    def test_disabled_breaker(self):
+        """Test that a zero threshold never opens."""
+        breaker = CircuitBreaker("chat", failure_threshold=0)
+
+        for _ in range(10):
+            breaker.record_failure()
+
+        assert breaker.allow()
+
+
+class TestGuard:
+    """Test deadlines and failure classification in llm_guard."""
+
+    async def test_deadline_cancels_slow_work(self, monkeypatch):
+        """Test that the block is cut off at the agent's deadline."""
+        monkeypatch.setenv("LLM_DEADLINE_LEARNING", "0.05")
+
+        start = time.perf_counter()
+        with pytest.raises(TimeoutError):
+            async with llm_guard("learning"):
+                await asyncio.sleep(5)
+
+        assert time.perf_counter() - start < 0.5
+        assert llm_resilience.breaker_for("learning").failures == 1
+
+    async def test_only_outages_count(self):
+        """Test that non-API errors leave the breaker alone."""
+        with pytest.raises(ValueError):
+            async with llm_guard("teaching"):
+                raise ValueError("bad JSON")
+        with pytest.raises(OverloadedError):
+            async with llm_guard("teaching"):
+                raise OverloadedError()
+
+        assert llm_resilience.breaker_for("teaching").failures == 1
+
+    async def test_open_breaker_skips_the_block(self):
+        """Test that an open breaker raises before running anything."""
+        breaker = llm_resilience.breaker_for("chat")
+        breaker.failure_threshold = 1
+        breaker.record_failure()
+        ran = False
+
+        with pytest.raises(CircuitOpenError):
+            async with llm_guard("chat"):
+                ran = True
+
+        assert not ran
+
+
+class TestHedging:
+    """Test hedged second requests."""
+
+    def _warm(self, agent_name: str, ttft: float):
+        window = llm_resilience.ttft_window(agent_name)
+        for _ in range(llm_resilience.HEDGE_MIN_SAMPLES):
+            window.add(ttft)
+
+    async def test_slow_first_token_is_hedged(self, monkeypatch):
+        """Test that a stalled request is raced and the hedge wins."""
+        monkeypatch.setattr(llm_resilience, "LLM_HEDGE_ENABLED", True)
+        monkeypatch.setattr(llm_resilience, "LLM_HEDGE_MIN_DELAY", 0.05)
+        self._warm("portfolio", 0.05)
+        calls = []
+
+        async def attempt(first_output):
+            calls.append(len(calls))
+            await asyncio.sleep(5 if len(calls) == 1 else 0.01)
+            first_output.set()
+            return f"attempt {len(calls)}", 0.01
+
+        start = time.perf_counter()
+        result, _ = await hedged("portfolio", attempt)
+
+        assert result == "attempt 2"
+        assert time.perf_counter() - start < 0.5
+        assert llm_resilience.llm_hedges_total.value("portfolio", "hedge") >= 1
+
+    async def test_healthy_stream_is_not_hedged(self, monkeypatch):
+        """Test that no hedge is sent once the first token has arrived."""
+        monkeypatch.setattr(llm_resilience, "LLM_HEDGE_ENABLED", True)
+        monkeypatch.setattr(llm_resilience, "LLM_HEDGE_MIN_DELAY", 0.02)
+        self._warm("portfolio", 0.02)
+        calls = 0
+
+        async def attempt(first_output):
+            nonlocal calls
+            calls += 1
+            first_output.set()
+            await asyncio.sleep(0.1)  # long answer, but streaming
+            return "done", 0.0
+
+        assert (await hedged("portfolio", attempt))[0] == "done"
+        assert calls == 1
+
+    async def test_no_hedge_without_enough_samples(self, monkeypatch):
+        """Test that hedging waits for a trustworthy p95."""
+        monkeypatch.setattr(llm_resilience, "LLM_HEDGE_ENABLED", True)
+
+        assert llm_resilience.hedge_delay("portfolio") is None
+
+
+class _StalledLLM:
+    """Never answers, like an overloaded API."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def astream(self, messages):
+        self.calls += 1
+        await asyncio.sleep(30)
+        yield AIMessageChunk(content="late")
+
+
+class TestAgentFallbacks:
+    """Test that the agents degrade to static answers quickly."""
+
+    async def test_deadline_then_open_circuit(self, monkeypatch):
+        """Test timeouts fall back fast and then stop calling the LLM at all."""
+        monkeypatch.setenv("LLM_DEADLINE_ERROR_SOLVER", "0.05")
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        llm_resilience.breaker_for("error_solver").failure_threshold = 2
+        stalled = _StalledLLM()
+
+        with patch("agent.LANGGRAPH_AVAILABLE", True), \
+                patch("agent._chat_model", lambda name: stalled):
+            start = time.perf_counter()
+            for _ in range(3):
+                result = await agent.run_error_solver_agent("NameError: name 'x' is not defined")
+            elapsed = time.perf_counter() - start
+
+        assert result["explanation"]  # static answer
+        assert stalled.calls == 2  # the third call never reached the LLM
+        assert elapsed < 1.0
+        assert llm_usage.llm_fallbacks_total.value("error_solver", "timeout") >= 2
+        assert llm_usage.llm_fallbacks_total.value("error_solver", "circuit_open") >= 1
@@ -0,0 +1,131 @@
+# LLM Usage Instrumentation Tests
+# ================================
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessageChunk
+
+import llm_usage
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FakeLLM:
+    """Streams a fixed answer with Anthropic-style usage metadata."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = 0
+
+    async def astream(self, messages):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise RateLimitError("rate limited")
+        yield AIMessageChunk(
+            content="",
+            usage_metadata={"input_tokens": 1000, "output_tokens": 0, "total_tokens": 1000},
+        )
+        yield AIMessageChunk(
+            content="Hello!",
+            usage_metadata={"input_tokens": 0, "output_tokens": 200, "total_tokens": 200},
+        )
+
+
+@pytest.fixture(autouse=True)
+def fresh_usage(monkeypatch):
+    """Isolate aggregates between tests and skip retry backoff."""
+    monkeypatch.setattr(llm_usage, "_agent_usage", {})
+    monkeypatch.setattr(llm_usage, "_session_tokens", llm_usage.OrderedDict())
+    monkeypatch.setattr(llm_usage, "LLM_RETRY_BASE_DELAY", 0)
+
+
+class TestInvokeLLM:
+    """Test the instrumented LLM call wrapper."""
+
+    async def test_records_tokens_and_cost(self):
+        """Test that usage metadata is aggregated into tokens and cost."""
+        message = await llm_usage.invoke_llm(FakeLLM(), "hi", agent="test_agent")
+
+        assert message.content == "Hello!"
+        summary = llm_usage.usage_summary()["agents"]["test_agent"]
+        assert summary["calls"] == 1
+        assert summary["input_tokens"] == 1000
+        assert summary["output_tokens"] == 200
+        # 1000 * $1/MTok + 200 * $5/MTok
+        assert summary["estimated_cost_usd"] == pytest.approx(0.002)
+        assert summary["avg_ttft_ms"] is not None
+
+    async def test_retries_transient_errors(self):
+        """Test that retryable API errors are retried and counted."""
+        llm = FakeLLM(failures=2)
+
+        await llm_usage.invoke_llm(llm, "hi", agent="test_agent")
+
+        assert llm.calls == 3
+        assert llm_usage.usage_summary()["agents"]["test_agent"]["retries"] == 2
+
+    async def test_gives_up_after_max_retries(self):
+        """Test that errors surface once retries are exhausted."""
+        with pytest.raises(RateLimitError):
+            await llm_usage.invoke_llm(FakeLLM(failures=10), "hi", agent="test_agent")
+
+        assert llm_usage.usage_summary()["agents"]["test_agent"]["errors"] == 1
+
+    async def test_session_budget_trips(self, monkeypatch):
+        """Test that a session over its token budget is refused."""
+        monkeypatch.setattr(llm_usage, "LLM_SESSION_TOKEN_BUDGET", 1000)
+
+        with llm_usage.session_scope("budget-session"):
+            await llm_usage.invoke_llm(FakeLLM(), "hi", agent="test_agent")
+            assert llm_usage.session_tokens("budget-session") == 1200
+            with pytest.raises(llm_usage.LLMBudgetExceededError):
+                await llm_usage.invoke_llm(FakeLLM(), "hi", agent="test_agent")
+
+    async def test_text_blocks_collapse_to_string(self):
+        """Test that streamed text content blocks come back as a plain string."""
+
+        class BlockLLM:
+            async def astream(self, messages):
+                yield AIMessageChunk(content=[{"type": "text", "text": "Hel", "index": 0}])
+                yield AIMessageChunk(content=[{"type": "text", "text": "lo", "index": 0}])
+
+        message = await llm_usage.invoke_llm(BlockLLM(), "hi", agent="test_agent")
+
+        assert message.content == "Hello"
+
+
+
+class TestFallbackRecording:
+    """Test static fallback accounting."""
+
+    @patch("agent.LANGGRAPH_AVAILABLE", False)
+    def test_agent_chat_records_fallback(self, client: TestClient):
+        """Test that static answers are recorded as fallbacks."""
+        client.post("/api/agent/chat", json={"message": "Why should I hire him?"})
+
+        assert llm_usage.usage_summary()["agents"]["portfolio"]["fallbacks"] == 1
+
+
+class TestUsageEndpoint:
+    """Test the admin usage summary endpoint."""
+
+    def test_requires_admin(self, client: TestClient):
+        """Test that the summary is protected by the admin token."""
+        response = client.get("/api/admin/llm-usage")
+
+        assert response.status_code == 401
+
+    def test_summary_with_admin_token(self, client: TestClient):
+        """Test the summary shape with a valid admin token."""
+        with patch("main.ADMIN_SECRET", "secret"):
+            response = client.get("/api/admin/llm-usage", headers={"X-Admin-Token": "secret"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["model"] == llm_usage.LLM_MODEL
+        assert "agents" in data
+        assert "top_sessions" in data
@@ -0,0 +1,80 @@
+# Metrics Tests
+# ==============
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+import metrics
+
+
+class TestMetricsEndpoint:
+    """Test the Prometheus /metrics endpoint."""
+
+    def test_metrics_text_format(self, client: TestClient):
+        """Test that /metrics serves the Prometheus text exposition format."""
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE http_requests_total counter" in response.text
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+
+    def test_requests_labelled_by_route_template(self, client: TestClient):
+        """Test that request metrics use the route template, not the raw path."""
+        client.get("/api/blog/spec-first-development")
+
+        body = client.get("/metrics").text
+
+        assert 'http_requests_total{method="GET",route="/api/blog/{slug}",status="200"}' in body
+        assert "spec-first-development" not in body
+
+    def test_unmatched_paths_collapse(self, client: TestClient):
+        """Test that unknown paths share a single label value."""
+        client.get("/no/such/path/123")
+
+        assert metrics.http_requests_total.value("GET", "unmatched", "404") >= 1
+
+    @patch("agent.LANGGRAPH_AVAILABLE", False)
+    def test_agent_mode_counter(self, client: TestClient):
+        """Test that agent runs are counted by mode."""
+        before = metrics.agent_runs_total.value("static")
+
+        client.post("/api/agent/chat", json={"message": "Why should I hire him?"})
+
+        assert metrics.agent_runs_total.value("static") == before + 1
+
+    def test_db_pool_checkout_timed(self, client: TestClient):
+        """Test that DB pool checkouts are observed."""
+        before = metrics.db_pool_checkout_duration.count()
+
+        client.get("/api/video/list")
+
+        assert metrics.db_pool_checkout_duration.count() > before
+
+
+class TestMetricTypes:
+    """Test metric rendering."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that histogram buckets render cumulatively with +Inf, sum and count."""
+        histogram = metrics.Histogram("test_latency_seconds", "Test", ["route"], buckets=(0.1, 1.0))
+        metrics._registry.remove(histogram)
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(5.0, "/a")
+
+        lines = histogram.render()
+
+        assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+        assert 'test_latency_seconds_bucket{route="/a",le="1"} 2' in lines
+        assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+        assert 'test_latency_seconds_sum{route="/a"} 5.55' in lines
+        assert 'test_latency_seconds_count{route="/a"} 3' in lines
+
+    def test_label_values_escaped(self):
+        """Test that quotes and backslashes in label values are escaped."""
+        counter = metrics.Counter("test_escape_total", "Test", ["value"])
+        metrics._registry.remove(counter)
+        counter.inc('say "hi"\\')
+
+        assert 'test_escape_total{value="say \\"hi\\"\\\\"} 1' in counter.render()
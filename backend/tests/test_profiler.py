@@ -0,0 +1,150 @@
+# Profiler Tests
+# ===============
+import asyncio
+import logging
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import profiler
+
+
+def _block(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+class TestCaptureProfile:
+    """Test the sampling profiler directly."""
+
+    async def test_collapsed_stacks_and_stalls(self):
+        """Test that a blocking call on the loop shows up as a tagged stall."""
+
+        async def blocker():
+            await asyncio.sleep(0.05)
+            _block(0.2)
+
+        task = asyncio.create_task(blocker())
+        profile = await profiler.capture_profile(seconds=0.5, interval_ms=5, stall_ms=50)
+        await task
+
+        assert profile.samples > 0
+        lines = profile.collapsed().splitlines()
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+        stall_prefix = f"event-loop;{profiler.STALL_TAG};"
+        assert any(line.startswith(stall_prefix) and "_block" in line for line in lines)
+        assert len(profile.stalls) == 1
+        assert profile.stalls[0].duration_ms >= 100
+        assert "_block" in profile.stalls[0].stack
+
+    async def test_concurrent_capture_rejected(self):
+        """Test that only one capture runs at a time."""
+        first = asyncio.create_task(profiler.capture_profile(seconds=0.2))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(profiler.ProfilerBusyError):
+            await profiler.capture_profile(seconds=0.1)
+        await first
+
+    async def test_heartbeat_interval_has_floor(self):
+        """Test that tiny sampling settings cannot make the heartbeat spin."""
+        sleep = asyncio.sleep
+        delays = []
+
+        async def recording_sleep(delay):
+            delays.append(delay)
+            await sleep(delay)
+
+        with patch("profiler.asyncio.sleep", recording_sleep):
+            await profiler.capture_profile(seconds=0.1, interval_ms=0.01, stall_ms=0.01)
+
+        assert min(delays) == profiler.MIN_HEARTBEAT_MS / 1000
+
+    async def test_idle_loop_has_no_stalls_at_minimum_threshold(self):
+        """Test that heartbeat jitter is not reported as a stall at the lowest stall_ms."""
+        profile = await profiler.capture_profile(
+            seconds=0.5, interval_ms=1, stall_ms=profiler.MIN_STALL_MS
+        )
+
+        assert profile.samples > 0
+        assert profile.stalls == []
+        assert f"event-loop;{profiler.STALL_TAG}" not in profile.collapsed()
+
+    async def test_stall_threshold_has_floor(self):
+        """Test that a stall threshold below MIN_STALL_MS is raised to it."""
+        profile = await profiler.capture_profile(seconds=0.1, stall_ms=1)
+
+        assert profile.stall_ms == profiler.MIN_STALL_MS
+        assert profile.stalls == []
+
+
+class TestSlowCallbackLogger:
+    """Test the opt-in slow callback logger."""
+
+    async def test_logs_blocking_coroutine(self, caplog):
+        """Test that a coroutine step over the threshold is logged by name."""
+
+        async def slow_handler():
+            _block(0.05)
+
+        assert profiler.install_slow_callback_logger(threshold_ms=20)
+        try:
+            with caplog.at_level(logging.WARNING, logger="profiler"):
+                await asyncio.create_task(slow_handler())
+        finally:
+            profiler.uninstall_slow_callback_logger()
+
+        assert any("slow_handler" in record.getMessage() for record in caplog.records)
+
+    def test_disabled_by_default(self):
+        """Test that a zero threshold leaves asyncio untouched."""
+        original = asyncio.events.Handle._run
+
+        assert profiler.install_slow_callback_logger(threshold_ms=0) is False
+        assert asyncio.events.Handle._run is original
+
+
+class TestProfileEndpoint:
+    """Test the admin profile endpoint."""
+
+    def test_requires_admin(self, client: TestClient):
+        """Test that the endpoint is admin-only."""
+        response = client.get("/api/admin/profile?seconds=0.1")
+
+        assert response.status_code == 401
+
+    @patch("main.ADMIN_SECRET", "secret")
+    def test_returns_collapsed_stacks(self, client: TestClient):
+        """Test that an admin gets a collapsed-stack attachment."""
+        response = client.get(
+            "/api/admin/profile?seconds=0.2&interval_ms=5", headers={"X-Admin-Token": "secret"}
+        )
+
+        assert response.status_code == 200
+        assert "attachment" in response.headers["content-disposition"]
+        assert int(response.headers["x-profile-samples"]) > 0
+        assert "event-loop;" in response.text
+
+    @patch("main.ADMIN_SECRET", "secret")
+    def test_json_format(self, client: TestClient):
+        """Test the JSON variant with the stall summary."""
+        response = client.get(
+            "/api/admin/profile?seconds=0.1&format=json", headers={"X-Admin-Token": "secret"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["samples"] > 0
+        assert "loop_stalls" in data
+        assert "collapsed" in data
+
+    @patch("main.ADMIN_SECRET", "secret")
+    def test_rejects_stall_threshold_below_minimum(self, client: TestClient):
+        """Test that stall_ms cannot be set within heartbeat jitter."""
+        response = client.get(
+            f"/api/admin/profile?seconds=0.1&stall_ms={profiler.MIN_STALL_MS - 1}",
+            headers={"X-Admin-Token": "secret"},
+        )
+
+        assert response.status_code == 422
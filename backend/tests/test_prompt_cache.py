@@ -0,0 +1,95 @@
+# Prompt Caching Tests
+# ====================
+import json
+from unittest.mock import patch
+
+import pytest
+
+import agent
+import llm_usage
+from benchmarks.anthropic_mock import AnthropicMock
+
+SOLUTION = json.dumps({
+    "explanation": "The name is used before it is defined.",
+    "solution": "Define it first.",
+    "corrected_code": "x = 1\nprint(x)",
+    "confidence": 0.9,
+})
+
+
+@pytest.fixture
+def mock_api(monkeypatch):
+    """A local Messages API the agents talk to instead of Anthropic."""
+    with AnthropicMock(responder=lambda body: SOLUTION,
+                       min_cacheable_tokens=llm_usage.LLM_MIN_CACHEABLE_TOKENS) as server:
+        monkeypatch.setenv("ANTHROPIC_BASE_URL", server.url)
+        monkeypatch.delenv("ANTHROPIC_API_URL", raising=False)
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        monkeypatch.setattr(llm_usage, "_agent_usage", {})
+        yield server
+
+
+async def _solve(error_message: str) -> dict:
+    return await agent.run_error_solver_agent(error_message, "print(x)", "python")
+
+
+class TestPromptCaching:
+    """Test that stable prompt prefixes are marked and reported as cached."""
+
+    async def test_system_prompt_is_cacheable_and_input_last(self, mock_api):
+        """Test that the instructions carry cache_control and the error comes after them."""
+        result = await _solve("NameError: name 'x' is not defined")
+
+        assert result["confidence"] == 0.9
+        body = mock_api.requests[0]
+        assert body["system"] == [{
+            "type": "text", "text": agent.ERROR_SOLVER_SYSTEM_PROMPT,
+            "cache_control": {"type": "ephemeral"},
+        }]
+        assert body["messages"][-1]["role"] == "user"
+        assert "NameError" in json.dumps(body["messages"][-1])
+        assert "NameError" not in json.dumps(body["system"])
+
+    async def test_short_prefix_is_not_cached(self, mock_api):
+        """Test that today's prefix is under the model's minimum, so nothing is cached."""
+        await _solve("NameError: name 'x' is not defined")
+        await _solve("TypeError: unsupported operand type(s)")
+
+        stats = llm_usage.usage_summary()["agents"]["error_solver"]
+        assert stats["cache_read_tokens"] == stats["cache_write_tokens"] == 0
+        assert stats["input_tokens"] < 2 * llm_usage.LLM_MIN_CACHEABLE_TOKENS
+
+    async def test_repeat_traffic_reads_from_cache(self, mock_api):
+        """Test that a prefix over the minimum is written once and then read."""
+        # ~4 characters per token: comfortably past the minimum
+        long_prompt = agent.ERROR_SOLVER_SYSTEM_PROMPT + "\n" + "Example: x\n" * (
+            llm_usage.LLM_MIN_CACHEABLE_TOKENS * 4 // 10)
+        with patch("agent.ERROR_SOLVER_SYSTEM_PROMPT", long_prompt):
+            await _solve("NameError: name 'x' is not defined")
+            await _solve("TypeError: unsupported operand type(s)")
+
+        stats = llm_usage.usage_summary()["agents"]["error_solver"]
+        assert stats["cache_write_tokens"] >= llm_usage.LLM_MIN_CACHEABLE_TOKENS
+        assert stats["cache_read_tokens"] == stats["cache_write_tokens"]
+        assert 0 < stats["cache_hit_ratio"] < 1
+
+    async def test_cache_can_be_disabled(self, mock_api):
+        """Test that PROMPT_CACHE_ENABLED=false sends no cache markers."""
+        with patch("agent.PROMPT_CACHE_ENABLED", False):
+            await _solve("NameError: name 'x' is not defined")
+            await _solve("NameError: name 'x' is not defined")
+
+        assert "cache_control" not in json.dumps(mock_api.requests)
+        stats = llm_usage.usage_summary()["agents"]["error_solver"]
+        assert stats["cache_read_tokens"] == stats["cache_write_tokens"] == 0
+
+    async def test_prefill_is_faster_on_cache_hits(self, mock_api):
+        """Test that the mock's simulated time to first token drops on a hit."""
+        mock_api.prefill_ms_per_1k = 2000
+        system = [{"type": "text", "text": "x" * 20000, "cache_control": {"type": "ephemeral"}}]
+        body = {"system": system, "messages": [{"role": "user", "content": "hi"}]}
+
+        first = mock_api.prefill_seconds(mock_api.usage_for(body))
+        second = mock_api.prefill_seconds(mock_api.usage_for(body))
+
+        assert second < first / 5
@@ -0,0 +1,145 @@
+# Shared Rate-Limit Storage Tests
+# ================================
+import threading
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+from slowapi import Limiter, _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from slowapi.util import get_remote_address
+
+from benchmarks.resp_standin import RespStandIn
+from rate_limit import RespConnection, RespError, RespStorage, SQLiteStorage
+
+
+@pytest.fixture(scope="module")
+def resp_server():
+    with RespStandIn() as server:
+        yield server
+
+
+@pytest.fixture(params=["sqlite", "resp"])
+def storage_uri(request, tmp_path, resp_server):
+    """A fresh shared store of each backend."""
+    if request.param == "sqlite":
+        uri = f"sqlite:///{tmp_path}/limits.db"
+    else:
+        uri = resp_server.url
+        storage_from_string(uri).reset()
+    return uri
+
+
+def _limited_app(uri: str) -> FastAPI:
+    app = FastAPI()
+    limiter = Limiter(key_func=get_remote_address, storage_uri=uri,
+                      strategy="sliding-window-counter", in_memory_fallback_enabled=True)
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+    @app.get("/limited")
+    @limiter.limit("3/minute")
+    async def limited(request: Request):
+        return {"ok": True}
+
+    return app
+
+
+class TestSharedStorage:
+    """Test that every worker sees the same counters."""
+
+    def test_schemes_registered(self, tmp_path):
+        """Test that sqlite:// and resp:// resolve to the shared backends."""
+        assert isinstance(storage_from_string(f"sqlite:///{tmp_path}/rl.db"), SQLiteStorage)
+        assert isinstance(storage_from_string("resp://127.0.0.1:6379/0"), RespStorage)
+
+    def test_sliding_window_admits_exactly_the_limit(self, storage_uri):
+        """Test that hits beyond the limit are refused and costs count."""
+        limiter = SlidingWindowCounterRateLimiter(storage_from_string(storage_uri))
+        item = parse("5/minute")
+
+        assert [limiter.hit(item, "client") for _ in range(6)] == [True] * 5 + [False]
+        assert limiter.hit(item, "other", cost=5)
+        assert not limiter.hit(item, "third", cost=6)
+        assert limiter.get_window_stats(item, "client").remaining == 0
+
+    def test_separate_instances_share_counts(self, storage_uri):
+        """Test that two storage instances (two workers) enforce one limit."""
+        worker_a = SlidingWindowCounterRateLimiter(storage_from_string(storage_uri))
+        worker_b = SlidingWindowCounterRateLimiter(storage_from_string(storage_uri))
+        item = parse("4/minute")
+
+        assert worker_a.hit(item, "client") and worker_a.hit(item, "client")
+        assert worker_b.hit(item, "client") and worker_b.hit(item, "client")
+        assert not worker_a.hit(item, "client")
+        assert not worker_b.hit(item, "client")
+
+    def test_concurrent_workers_never_overshoot(self, storage_uri):
+        """Test that racing instances admit exactly the limit in total."""
+        item = parse("50/minute")
+        admitted = []
+
+        def worker():
+            limiter = SlidingWindowCounterRateLimiter(storage_from_string(storage_uri))
+            admitted.append(sum(limiter.hit(item, "shared") for _ in range(40)))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert sum(admitted) == 50
+
+    def test_fixed_window_counters(self, storage_uri):
+        """Test the plain counter operations used by the fixed-window strategy."""
+        storage = storage_from_string(storage_uri)
+
+        assert storage.incr("key", 60) == 1
+        assert storage.incr("key", 60, amount=2) == 3
+        assert storage.get("key") == 3
+        assert storage.get_expiry("key") > 0
+        storage.clear("key")
+        assert storage.get("key") == 0
+        assert storage.check()
+
+
+class TestSlowapiIntegration:
+    """Test the storages behind slowapi's decorator."""
+
+    def test_limit_shared_between_apps(self, storage_uri):
+        """Test that two app instances on one store share a client's budget."""
+        worker_a = TestClient(_limited_app(storage_uri))
+        worker_b = TestClient(_limited_app(storage_uri))
+
+        codes = [c.get("/limited").status_code for c in (worker_a, worker_b, worker_a, worker_b)]
+
+        assert codes == [200, 200, 200, 429]
+
+    def test_unreachable_store_falls_back_to_memory(self):
+        """Test that a dead shared store degrades to per-process limits."""
+        client = TestClient(_limited_app("resp://127.0.0.1:1/0"))
+
+        codes = [client.get("/limited").status_code for _ in range(4)]
+
+        assert codes == [200, 200, 200, 429]
+
+
+class TestRespConnection:
+    """Test the minimal RESP client against the stand-in."""
+
+    def test_pipeline_and_error_replies(self, resp_server):
+        """Test that an error reply is raised without desyncing the connection."""
+        host, port = resp_server.server_address
+        conn = RespConnection(host, port)
+        try:
+            replies = conn.pipeline(("SET", "k", "1"), ("INCRBY", "k", 2), ("GET", "k"))
+            assert replies == ["OK", 3, "3"]
+            with pytest.raises(RespError):
+                conn.pipeline(("BOGUS",), ("PING",))
+            assert conn.execute("PING") == "PONG"
+        finally:
+            conn.close()
@@ -0,0 +1,182 @@
+# Conversation Memory Tests
+# ==========================
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+import agent
+from session_memory import SessionMemory
+
+
+class _RecordingGraph:
+    """Stands in for the compiled LangGraph agent and records its input."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def ainvoke(self, state):
+        from langchain_core.messages import AIMessage
+
+        self.calls.append(state["messages"])
+        return {"messages": state["messages"] + [AIMessage(content=f"answer {len(self.calls)}")]}
+
+
+class TestSessionWindow:
+    """Test the bounded rolling window and summary."""
+
+    def test_window_bounded_by_turns(self):
+        """Test that old exchanges fold into the summary."""
+        memory = SessionMemory(max_turns=4, max_tokens=10_000)
+        for i in range(5):
+            memory.append("s1", f"question {i}", f"answer {i}")
+
+        context = memory.get("s1")
+
+        assert [t.text for t in context.turns] == [
+            "question 3", "answer 3", "question 4", "answer 4",
+        ]
+        assert context.turns[0].role == "user"
+        assert "user: question 0" in context.summary
+        assert "assistant: answer 2" in context.summary
+
+    def test_prompt_tokens_stay_flat(self):
+        """Test that a long conversation stays within window + summary caps."""
+        memory = SessionMemory(max_turns=100, max_tokens=400, summary_tokens=100)
+        sizes = []
+        for i in range(50):
+            memory.append("s1", f"question {i} " + "x" * 300, f"answer {i} " + "y" * 600)
+            sizes.append(memory.get("s1").tokens)
+
+        assert max(sizes[10:]) <= 400 + 100 + 1
+        assert memory.get("s1").summary.startswith("…")
+
+    def test_no_session_id_is_stateless(self):
+        """Test that requests without a session_id store nothing."""
+        memory = SessionMemory()
+        memory.append(None, "q", "a")
+
+        assert len(memory) == 0
+        assert memory.get(None).turns == []
+
+
+class TestSessionEviction:
+    """Test idle expiry and LRU capacity."""
+
+    def test_idle_sessions_expire(self):
+        """Test that sessions idle past the TTL are dropped."""
+        memory = SessionMemory(idle_ttl=0.05)
+        memory.append("old", "q", "a")
+        time.sleep(0.1)
+        memory.append("new", "q", "a")
+
+        assert memory.get("old").turns == []
+        assert len(memory.get("new").turns) == 2
+
+    def test_lru_eviction_without_store(self):
+        """Test that the least recently used session is evicted at capacity."""
+        memory = SessionMemory(max_sessions=2, store_path="")
+        memory.append("a", "q", "a")
+        memory.append("b", "q", "a")
+        memory.get("a")  # touch: "b" is now least recently used
+        memory.append("c", "q", "a")
+
+        assert len(memory) == 2
+        assert memory.get("b").turns == []
+        assert len(memory.get("a").turns) == 2
+
+
+class TestSharedStore:
+    """Test the SQLite store shared by worker processes."""
+
+    def test_evicted_session_reloads(self, tmp_path):
+        """Test that a session dropped from the cache is read back from SQLite."""
+        memory = SessionMemory(max_sessions=1, max_turns=2, store_path=str(tmp_path / "s.db"))
+        memory.append("a", "first question", "first answer")
+        memory.append("a", "second question", "second answer")
+        memory.append("b", "q", "a")
+
+        assert len(memory) == 1 and memory.stats()["stored"] == 2
+        context = memory.get("a")
+
+        assert [t.text for t in context.turns] == ["second question", "second answer"]
+        assert "first question" in context.summary
+
+    def test_workers_share_sessions(self, tmp_path):
+        """Test that a follow-up on another worker sees the exchanges made on this one."""
+        path = str(tmp_path / "s.db")
+        first, second = SessionMemory(store_path=path), SessionMemory(store_path=path)
+
+        first.append("s1", "What are his skills?", "Python, FastAPI")
+        turns = second.get("s1").turns
+        assert [t.text for t in turns] == ["What are his skills?", "Python, FastAPI"]
+
+        second.append("s1", "Which is strongest?", "Python")
+        assert len(first.get("s1").turns) == 4  # cached copy was stale and is re-read
+        first.append("s1", "Why?", "Years of use")
+        assert [t.text for t in second.get("s1").turns][-2:] == ["Why?", "Years of use"]
+
+    def test_idle_rows_are_ignored(self, tmp_path):
+        """Test that a stored session idle past the TTL starts over."""
+        memory = SessionMemory(idle_ttl=0.05, store_path=str(tmp_path / "s.db"))
+        memory.append("a", "q", "a")
+        time.sleep(0.1)
+
+        assert memory.get("a").turns == []
+        memory.append("a", "new", "start")
+        assert [t.text for t in memory.get("a").turns] == ["new", "start"]
+
+
+class TestAgentUsesMemory:
+    """Test that run_agent sends the session's history along."""
+
+    @pytest.fixture
+    def graph(self):
+        fake = _RecordingGraph()
+        # The router would answer "What are his skills?" without the graph
+        with patch("agent.LANGGRAPH_AVAILABLE", True), patch("agent._compiled_graph", fake), \
+                patch("agent.session_memory", SessionMemory()), \
+                patch("agent.INTENT_ROUTER_ENABLED", False):
+            yield fake
+
+    async def test_follow_up_includes_history(self, graph):
+        """Test that the second question carries the first exchange."""
+        await agent.run_agent("What are his skills?", session_id="s1")
+        result = await agent.run_agent("Which of those is strongest?", session_id="s1")
+
+        assert result["answer"] == "answer 2"
+        first, second = graph.calls
+        assert [m.content for m in first] == ["What are his skills?"]
+        assert [m.content for m in second] == [
+            "What are his skills?", "answer 1", "Which of those is strongest?",
+        ]
+        assert [m.type for m in second] == ["human", "ai", "human"]
+
+    async def test_sessions_are_isolated(self, graph):
+        """Test that other sessions and anonymous requests start cold."""
+        await agent.run_agent("Hello", session_id="s1")
+        await agent.run_agent("Hi", session_id="s2")
+        await agent.run_agent("Hey")
+
+        assert [len(call) for call in graph.calls] == [1, 1, 1]
+
+    async def test_store_is_used_off_the_event_loop(self, graph, tmp_path):
+        """Test that the shared store's SQLite locks are taken on the blocking pool."""
+        memory = SessionMemory(store_path=str(tmp_path / "s.db"))
+        threads = []
+        for name in ("version", "update"):
+            method = getattr(memory._store, name)
+
+            def recorded(*args, _method=method, **kwargs):
+                threads.append(threading.current_thread())
+                return _method(*args, **kwargs)
+
+            setattr(memory._store, name, recorded)
+
+        with patch("agent.session_memory", memory):
+            await agent.run_agent("Hello", session_id="s1")
+            await agent.run_agent("And then?", session_id="s1")
+
+        assert len(graph.calls[1]) == 3
+        assert threads and threading.current_thread() not in threads
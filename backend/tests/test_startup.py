@@ -0,0 +1,79 @@
+# Startup Import-Time Tests
+# ==========================
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+import agent
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Generous wall-clock budget for `import main` in a fresh interpreter; the
+# real guard is that the LLM stack stays out of the import graph.
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "4000"))
+HEAVY_PREFIXES = ("langgraph", "langchain", "langsmith", "anthropic", "numpy")
+
+
+def import_times(module: str) -> dict:
+    """Cumulative import time (ms) per module from `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time: self [us] | cumulative | imported package"
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+@pytest.fixture(scope="module")
+def main_import_times():
+    return import_times("main")
+
+
+class TestImportBudget:
+    """Cold start: the web app must not pay for the AI stack at import."""
+
+    def test_llm_stack_not_imported(self, main_import_times):
+        """Test that LangGraph / LangChain / Anthropic and numpy load lazily."""
+        heavy = sorted(name for name in main_import_times if name.startswith(HEAVY_PREFIXES))
+
+        assert heavy == []
+
+    def test_main_within_budget(self, main_import_times):
+        """Test that importing main stays within the import-time budget."""
+        slowest = sorted(main_import_times.items(), key=lambda item: item[1], reverse=True)[:10]
+
+        assert main_import_times["main"] < IMPORT_BUDGET_MS, f"slowest imports: {slowest}"
+
+
+class TestAgentWarmUp:
+    """Test lazy graph compilation."""
+
+    @pytest.mark.skipif(not agent.LANGGRAPH_AVAILABLE, reason="langgraph not installed")
+    def test_warm_up_compiles_graph(self):
+        """Test that warm_up builds the graph so the first request skips it."""
+        with patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test-key"}), \
+                patch("agent._compiled_graph", None):
+            agent.warm_up()
+
+            assert agent._compiled_graph is not None
+            assert agent.get_graph() is agent._compiled_graph
+
+    def test_no_graph_without_api_key(self):
+        """Test that the graph is not built when no LLM is configured."""
+        with patch.dict(os.environ, {"ANTHROPIC_API_KEY": ""}), \
+                patch("agent._compiled_graph", None):
+            assert agent.get_graph() is None
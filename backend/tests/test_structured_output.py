@@ -0,0 +1,128 @@
+# Structured Output Tests
+# =======================
+import json
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+import agent
+from benchmarks.anthropic_mock import AnthropicMock
+from benchmarks.bench_structured_output import SOLUTION, fuzz, sample_outputs
+from structured_output import (
+    ErrorSolution,
+    LearningPlan,
+    TeachingResult,
+    bind_schema,
+    extract,
+    parse_json_text,
+    scan_json_objects,
+)
+
+
+class TestScanner:
+    """Test the single-pass brace-aware scanner."""
+
+    def test_braces_and_quotes_inside_strings(self):
+        """Test that string contents never change the brace depth."""
+        text = 'note {"a": "}{ \\"}\\" {", "b": {"c": 1}} tail'
+
+        spans = [(text[s:e], depth) for s, e, depth in scan_json_objects(text)]
+
+        assert spans == [('{"c": 1}', 1), ('{"a": "}{ \\"}\\" {", "b": {"c": 1}}', 0)]
+
+    @pytest.mark.parametrize("wrap", [
+        "{}",
+        "Here you go:\n```json\n{}\n```",
+        "{}}}}",
+        "Sure {{ let me think }} ... {}",
+    ])
+    def test_solution_found_in_noisy_text(self, wrap):
+        """Test prose, fences, trailing braces and decoy objects around the JSON."""
+        text = wrap.replace("{}", json.dumps(SOLUTION)) if wrap != "{}" else json.dumps(SOLUTION)
+
+        solution = parse_json_text(text, ErrorSolution)
+
+        assert solution is not None and solution.confidence == 0.9
+
+    def test_truncated_output(self):
+        """Test that a cut-off reply yields nothing rather than a bad object."""
+        text = json.dumps(SOLUTION)[:-20]
+
+        assert parse_json_text(text, ErrorSolution) is None
+
+    def test_unbalanced_input_is_linear(self):
+        """Test that a megabyte of open braces is scanned quickly (the old regex was quadratic)."""
+        start = time.perf_counter()
+        assert parse_json_text("{" * 1_000_000, ErrorSolution) is None
+        assert time.perf_counter() - start < 5.0
+
+    def test_fuzzed_outputs_never_raise(self):
+        """Test random corruptions of model replies."""
+        report = fuzz(300, seed=1)
+
+        assert report["errors"] == 0
+        assert report["extracted"] > 0
+
+    @pytest.mark.parametrize("scenario", ["valid", "trailing", "braces"])
+    def test_large_outputs(self, scenario):
+        """Test extraction from 200 KB replies."""
+        assert parse_json_text(sample_outputs(200_000)[scenario], ErrorSolution) is not None
+
+
+class TestSchemas:
+    """Test validation and coercion of near-miss replies."""
+
+    def test_lists_and_text_coerced(self):
+        """Test that steps given as a list and lists given as text still fit."""
+        plan = LearningPlan.model_validate({
+            "lesson_plan": "# Plan", "resources": "- Docs\n- Book",
+            "quiz_questions": ["Q1"], "next_steps": ["Build", "Share"],
+        })
+
+        assert plan.resources == ["Docs", "Book"]
+        assert plan.next_steps == "Build\nShare"
+
+    def test_invalid_confidence_rejected(self):
+        """Test that a schema violation skips the candidate."""
+        text = json.dumps({**SOLUTION, "confidence": 7})
+
+        assert parse_json_text(text, ErrorSolution) is None
+
+    def test_tool_call_preferred(self):
+        """Test that native tool-call output is used without parsing text."""
+        message = AIMessage(content="", tool_calls=[
+            {"name": "TeachingResult", "id": "t1", "args": {
+                "acknowledgment": "Thanks", "structured_content": "# X",
+                "suggested_exercises": ["a"], "related_topics": ["b"],
+            }},
+        ])
+
+        assert extract(message, TeachingResult).acknowledgment == "Thanks"
+
+    def test_bind_schema_skips_models_without_tools(self):
+        """Test that test doubles without bind_tools are used as-is."""
+        llm = object()
+
+        assert bind_schema(llm, ErrorSolution) is llm
+
+
+class TestNativeMode:
+    """Test the agents against the local Messages API mock."""
+
+    @pytest.fixture
+    def mock_api(self, monkeypatch):
+        with AnthropicMock(responder=lambda body: json.dumps(SOLUTION)) as server:
+            monkeypatch.setenv("ANTHROPIC_BASE_URL", server.url)
+            monkeypatch.delenv("ANTHROPIC_API_URL", raising=False)
+            monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+            yield server
+
+    async def test_error_solver_uses_forced_tool(self, mock_api):
+        """Test that the schema is sent as a forced tool and its input is returned."""
+        result = await agent.run_error_solver_agent("NameError: name 'total' is not defined")
+
+        body = mock_api.requests[0]
+        assert body["tool_choice"] == {"type": "tool", "name": "ErrorSolution"}
+        assert [t["name"] for t in body["tools"]] == ["ErrorSolution"]
+        assert result == SOLUTION